@@ -0,0 +1,148 @@
+"""
+Circuit Breaker theo host cho HTTP crawler + Negative Cache cho URL bài viết lỗi.
+
+- CLOSED: request bình thường. `CIRCUIT_FAILURE_THRESHOLD` lần fetch lỗi liên tiếp (hết mọi profile) -> OPEN.
+- OPEN: mọi request tới host bị bỏ qua ngay (không thử profile, không sleep) trong thời gian cooldown.
+- HALF_OPEN: hết cooldown, cho đúng 1 request thăm dò; thành công -> CLOSED, lỗi -> OPEN lại với cooldown x2
+  (tối đa `CIRCUIT_MAX_COOLDOWN_SECONDS`).
+- Negative cache: URL bài tải/trích xuất lỗi bị bỏ qua trong TTL (x2 mỗi lần lỗi lại), không cào lại mỗi lượt quét.
+Trạng thái chỉ là dict + thời gian (không gắn event loop).
+"""
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlparse
+
+from app.core import config
+
+logger = config.logger
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+PROBE_TIMEOUT_SECONDS = 120  # Request thăm dò bị hủy giữa chừng -> cho thăm dò lại
+
+
+def _host(url: str) -> str:
+    return urlparse(url).hostname or url
+
+
+class Breaker:
+    def __init__(self, host: str):
+        self.host = host
+        self.state = CLOSED
+        self.failures = 0
+        self.trips = 0  # Số lần OPEN liên tiếp (cooldown tăng dần)
+        self.opened_at = 0.0
+        self.cooldown = 0.0
+        self.probing = False
+        self.probe_started = 0.0
+        self.skipped = 0
+
+    def allow(self, now: float) -> bool:
+        if self.state == CLOSED:
+            return True
+        if self.state == OPEN and now - self.opened_at >= self.cooldown:
+            self.state = HALF_OPEN
+            self.probing = False
+        if self.state == HALF_OPEN and (not self.probing or now - self.probe_started > PROBE_TIMEOUT_SECONDS):
+            self.probing = True
+            self.probe_started = now
+            logger.info(f"🔌 Circuit {self.host}: HALF-OPEN, gửi 1 request thăm dò")
+            return True
+        self.skipped += 1
+        return False
+
+    def is_open(self, now: float) -> bool:
+        """Host đang bị chặn request (OPEN chưa hết cooldown, hoặc HALF_OPEN đang thăm dò)."""
+        if self.state == OPEN:
+            return now - self.opened_at < self.cooldown
+        return self.state == HALF_OPEN and self.probing and now - self.probe_started <= PROBE_TIMEOUT_SECONDS
+
+    def success(self) -> None:
+        if self.state != CLOSED:
+            logger.info(f"🔌 Circuit {self.host}: CLOSED (host đã phục hồi, bỏ qua {self.skipped} request)")
+        self.state = CLOSED
+        self.failures = 0
+        self.trips = 0
+        self.probing = False
+        self.skipped = 0
+
+    def failure(self, now: float) -> None:
+        self.failures += 1
+        if self.state == HALF_OPEN or self.failures >= config.CIRCUIT_FAILURE_THRESHOLD:
+            self.trips += 1
+            self.state = OPEN
+            self.opened_at = now
+            self.probing = False
+            self.cooldown = min(config.CIRCUIT_MAX_COOLDOWN_SECONDS,
+                                config.CIRCUIT_COOLDOWN_SECONDS * 2 ** (self.trips - 1))
+            logger.warning(f"🔌 Circuit {self.host}: OPEN trong {self.cooldown:.0f}s ({self.failures} lần lỗi liên tiếp)")
+
+
+_breakers: Dict[str, Breaker] = {}
+
+
+def get_breaker(url: str) -> Breaker:
+    host = _host(url)
+    breaker = _breakers.get(host)
+    if breaker is None:
+        breaker = _breakers[host] = Breaker(host)
+    return breaker
+
+
+def allow(url: str) -> bool:
+    """Có được gửi request tới host của URL không (HALF_OPEN: chỉ request đầu tiên được đi)."""
+    return get_breaker(url).allow(time.monotonic())
+
+
+def is_open(url: str) -> bool:
+    return get_breaker(url).is_open(time.monotonic())
+
+
+def record_success(url: str) -> None:
+    get_breaker(url).success()
+
+
+def record_failure(url: str) -> None:
+    get_breaker(url).failure(time.monotonic())
+
+
+def states() -> Dict[str, str]:
+    return {host: b.state for host, b in _breakers.items()}
+
+
+# --- Negative Cache (URL bài viết lỗi) ---
+# url -> (hết hạn lúc, số lần lỗi)
+_negative: "OrderedDict[str, Tuple[float, int]]" = OrderedDict()
+
+
+def remember_failed_url(url: str, now: Optional[float] = None) -> float:
+    """Ghi nhận URL lỗi. Trả về TTL (giây) trước khi được thử lại."""
+    now = time.monotonic() if now is None else now
+    _, count = _negative.pop(url, (0.0, 0))
+    count += 1
+    ttl = min(24 * 3600, config.NEGATIVE_CACHE_TTL_MINUTES * 60 * 2 ** (count - 1))
+    _negative[url] = (now + ttl, count)
+    while len(_negative) > config.NEGATIVE_CACHE_MAX_ENTRIES:
+        _negative.popitem(last=False)
+    logger.debug(f"🚫 Negative cache: {url} (lần {count}, bỏ qua {ttl / 60:.0f} phút)")
+    return ttl
+
+
+def is_failed_url(url: str, now: Optional[float] = None) -> bool:
+    """URL đã lỗi gần đây và chưa hết TTL. Hết TTL: vẫn giữ số lần lỗi để lần sau TTL dài hơn."""
+    entry = _negative.get(url)
+    if entry is None:
+        return False
+    now = time.monotonic() if now is None else now
+    return now < entry[0]
+
+
+def forget_failed_url(url: str) -> None:
+    _negative.pop(url, None)
+
+
+def clear() -> None:
+    _breakers.clear()
+    _negative.clear()
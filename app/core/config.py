@@ -15,12 +15,32 @@ if not os.path.exists(DATA_DIR):
     os.makedirs(DATA_DIR, exist_ok=True)
 DB_NAME = os.path.join(DATA_DIR, "xauusd_news.db")
 
+# SQLite Connection Pool (1 writer + N readers, mở 1 lần dùng suốt vòng đời process)
+DB_READ_POOL_SIZE = int(os.getenv("DB_READ_POOL_SIZE", "3"))
+DB_BUSY_TIMEOUT_MS = int(os.getenv("DB_BUSY_TIMEOUT_MS", "5000"))
+DB_CACHE_SIZE_KB = int(os.getenv("DB_CACHE_SIZE_KB", "16384"))
+DB_MMAP_SIZE = int(os.getenv("DB_MMAP_SIZE", str(256 * 1024 * 1024)))
+
+# Write-Behind Queue: gom các lệnh ghi tần suất cao và commit theo lô (Group Commit)
+DB_WRITE_FLUSH_MS = int(os.getenv("DB_WRITE_FLUSH_MS", "50"))
+DB_WRITE_MAX_BATCH = int(os.getenv("DB_WRITE_MAX_BATCH", "100"))
+
+# Article Retention: xóa bài đã PROCESSED cũ hơn N ngày (nội dung nén zlib ở bảng article_bodies)
+ARTICLE_RETENTION_DAYS = int(os.getenv("ARTICLE_RETENTION_DAYS", "30"))
+DB_INCREMENTAL_VACUUM_PAGES = int(os.getenv("DB_INCREMENTAL_VACUUM_PAGES", "0"))  # 0 = trả lại toàn bộ trang trống
+
 # Logs Dir
 LOGS_DIR = os.path.join(ROOT_DIR, "logs")
 if not os.path.exists(LOGS_DIR):
     os.makedirs(LOGS_DIR, exist_ok=True)
 LOG_FILE = os.path.join(LOGS_DIR, "app.log")
 
+# DB Instrumentation (opt-in): latency/rows/lock wait theo helper + slow query log (kèm EXPLAIN QUERY PLAN)
+DB_METRICS_ENABLED = os.getenv("DB_METRICS_ENABLED", "false").lower() == "true"
+DB_SLOW_QUERY_MS = float(os.getenv("DB_SLOW_QUERY_MS", "100"))
+DB_METRICS_DUMP_MINUTES = int(os.getenv("DB_METRICS_DUMP_MINUTES", "15"))
+DB_METRICS_FILE = os.path.join(LOGS_DIR, "db_metrics.jsonl")
+
 IMAGES_DIR = "images"
 
 # --- API KEYS ---
@@ -57,6 +77,15 @@ KEYWORDS_CORRELATION = [
     r"Bond Yield", r"Treasury", r"Inflation", r"Jobless Claims"
 ]
 
+# Realtime Alert: lọc tiêu đề (khớp chuỗi con, không phân biệt hoa thường)
+KEYWORDS_BLACKLIST = ["eur", "gbp", "jpy", "aud", "nzd", "cad", "ecb", "boe", "boj", "rba", "oil", "crypto", "btc", "eth"]
+KEYWORDS_URGENT = [
+    "cpi", "fed", "rate", "hike", "cut", "war", "explosion",
+    "surprise", "jump", "plunge", "miss", "beat", "non-farm", "nfp", "pmi", "gdp",
+    "unemployment", "inflation", "biden", "trump", "powell"
+]
+KEYWORDS_BREAKING = ["fed rate", "war", "nuclear", "tăng lãi suất", "chiến tranh"]  # Ép is_breaking = True
+
 # --- NEWS SOURCES CONFIG ---
 # Nguồn tin chuyên sâu cho XAU/USD Trading (độ nhạy cao)
 NEWS_SOURCES = [
@@ -80,6 +109,53 @@ NEWS_SOURCES = [
     }
 ]
 
+# Crawler: quét song song, giới hạn theo host (thay cho sleep ngẫu nhiên 3-6s giữa các bài)
+CRAWLER_MAX_CONCURRENCY = int(os.getenv("CRAWLER_MAX_CONCURRENCY", "8"))  # Tổng request đồng thời
+CRAWLER_HOST_CONCURRENCY = int(os.getenv("CRAWLER_HOST_CONCURRENCY", "2"))  # Request đồng thời / host
+CRAWLER_HOST_RATE = float(os.getenv("CRAWLER_HOST_RATE", "0.5"))  # Request / giây / host (<= 0: tắt)
+CRAWLER_HOST_BURST = int(os.getenv("CRAWLER_HOST_BURST", "3"))
+CRAWLER_EXTRACT_WORKERS = int(os.getenv("CRAWLER_EXTRACT_WORKERS", str(min(4, os.cpu_count() or 1))))  # Process parse HTML (0: dùng thread)
+# Pipeline quét tin: discover -> filter -> fetch -> extract -> persist, nối bằng queue có giới hạn (backpressure)
+CRAWLER_PIPELINE_QUEUE_SIZE = int(os.getenv("CRAWLER_PIPELINE_QUEUE_SIZE", "16"))
+CRAWLER_FETCH_WORKERS = int(os.getenv("CRAWLER_FETCH_WORKERS", str(CRAWLER_MAX_CONCURRENCY)))  # Worker tải bài (host vẫn do rate_limit giới hạn)
+
+# Lịch poll theo nguồn (realtime_alert): chu kỳ mỗi nguồn ~ POLL_PUBLISH_FRACTION x khoảng cách đăng bài quan sát được,
+# kẹp trong [POLL_MIN_SECONDS, POLL_MAX_SECONDS]; poll nhanh nhất quanh tin High Impact, giãn ra lúc thị trường nghỉ / nguồn lỗi liên tục
+POLL_TICK_SECONDS = int(os.getenv("POLL_TICK_SECONDS", "30"))  # Chu kỳ job realtime_alert (kiểm tra nguồn nào đến hạn)
+POLL_MIN_SECONDS = float(os.getenv("POLL_MIN_SECONDS", "30"))
+POLL_MAX_SECONDS = float(os.getenv("POLL_MAX_SECONDS", "900"))
+POLL_DEFAULT_SECONDS = float(os.getenv("POLL_DEFAULT_SECONDS", "60"))  # Khi chưa biết tần suất đăng bài của nguồn
+POLL_PUBLISH_FRACTION = float(os.getenv("POLL_PUBLISH_FRACTION", "0.5"))
+POLL_EVENT_BEFORE_MINUTES = int(os.getenv("POLL_EVENT_BEFORE_MINUTES", "5"))  # Cửa sổ poll nhanh quanh tin High Impact
+POLL_EVENT_AFTER_MINUTES = int(os.getenv("POLL_EVENT_AFTER_MINUTES", "30"))
+POLL_QUIET_MULTIPLIER = float(os.getenv("POLL_QUIET_MULTIPLIER", "4"))
+POLL_QUIET_HOURS_UTC = os.getenv("POLL_QUIET_HOURS_UTC", "")  # VD: "21-23" (giờ UTC, [start, end)); cuối tuần luôn là giờ nghỉ
+
+# Circuit Breaker theo host: N lần fetch lỗi liên tiếp -> bỏ qua host trong cooldown (x2 mỗi lần thăm dò thất bại)
+CIRCUIT_FAILURE_THRESHOLD = int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", "2"))
+CIRCUIT_COOLDOWN_SECONDS = float(os.getenv("CIRCUIT_COOLDOWN_SECONDS", "120"))
+CIRCUIT_MAX_COOLDOWN_SECONDS = float(os.getenv("CIRCUIT_MAX_COOLDOWN_SECONDS", "1800"))
+# Negative Cache: URL bài tải / trích xuất lỗi không bị cào lại trong TTL (x2 mỗi lần lỗi lại, tối đa 24h)
+NEGATIVE_CACHE_TTL_MINUTES = float(os.getenv("NEGATIVE_CACHE_TTL_MINUTES", "60"))
+NEGATIVE_CACHE_MAX_ENTRIES = int(os.getenv("NEGATIVE_CACHE_MAX_ENTRIES", "5000"))
+
+# HTML Cache: HTML bài viết đã tải lưu nén trên đĩa (content-addressed, LRU) -> re-extract không cần tải lại
+HTML_CACHE_ENABLED = os.getenv("HTML_CACHE_ENABLED", "true").lower() == "true"
+HTML_CACHE_DIR = os.getenv("HTML_CACHE_DIR", os.path.join(DATA_DIR, "html_cache"))
+HTML_CACHE_MAX_MB = float(os.getenv("HTML_CACHE_MAX_MB", "500"))
+
+# Seen Links: LRU link bài đã có trong DB (nạp bài trong N giờ gần nhất khi khởi động) -> lọc feed không cần hỏi DB từng entry
+SEEN_LINKS_MAX = int(os.getenv("SEEN_LINKS_MAX", "20000"))
+SEEN_LINKS_WARM_HOURS = float(os.getenv("SEEN_LINKS_WARM_HOURS", "72"))
+
+# Near-Duplicate: bài cùng nội dung (SimHash lệch <= N bit) trong cửa sổ thời gian được gắn với bài gốc, không gọi AI lại
+# Bản đăng lại lệch ~2-4 bit; tin mẫu khác nhau (VD: Jobless Claims 2 tuần liền) có thể chỉ lệch ~9 bit, bài không liên quan ~32 bit
+DEDUP_MAX_DISTANCE = int(os.getenv("DEDUP_MAX_DISTANCE", "5"))
+DEDUP_WINDOW_HOURS = float(os.getenv("DEDUP_WINDOW_HOURS", "24"))
+
+# Feed Cache: feed RSS đã parse được dùng chung trong TTL, sau đó revalidate bằng ETag/Last-Modified (304) + hash nội dung
+FEED_CACHE_TTL_SECONDS = float(os.getenv("FEED_CACHE_TTL_SECONDS", "45"))
+
 HEADERS = {
     "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
     "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8,application/signed-exchange;v=b3;q=0.7",
@@ -153,12 +229,25 @@ for sym in TRADING_SYMBOLS:
 logger.info(f"📋 Trading Symbols: {TRADING_SYMBOLS}")
 logger.info(f"🌍 Interested Currencies: {INTERESTED_CURRENCIES}")
 
+# MT5 Bridge (EA SimpleDataServer): protocol v2 = 1 kết nối bền, frame có độ dài + request ID, PING khi rảnh;
+# EA cũ (lệnh text, đóng socket sau mỗi lệnh) được phát hiện lúc bắt tay -> legacy, thử lại v2 sau N giây
+MT5_HOST = os.getenv("MT5_HOST", "127.0.0.1")
+MT5_PORT = int(os.getenv("MT5_PORT", "1122"))
+MT5_REQUEST_TIMEOUT_SECONDS = float(os.getenv("MT5_REQUEST_TIMEOUT_SECONDS", "5"))
+MT5_HEARTBEAT_SECONDS = float(os.getenv("MT5_HEARTBEAT_SECONDS", "15"))
+MT5_LEGACY_RETRY_SECONDS = float(os.getenv("MT5_LEGACY_RETRY_SECONDS", "300"))
+# Nến lịch sử dạng nhị phân (record 48 byte, decode bằng numpy) thay cho CSV; EA chưa hỗ trợ -> tự quay về CSV
+MT5_BINARY_BARS = os.getenv("MT5_BINARY_BARS", "true").lower() == "true"
+
 # Global default volume (fallback for all strategies)
 TRADE_VOLUME = float(os.getenv("TRADE_VOLUME", "0.01"))
 
 # Time-To-Live for Signals (Minutes) - Avoid executing stale signals
 SIGNAL_TTL_MINUTES = int(os.getenv("SIGNAL_TTL_MINUTES", "30"))
 
+# Lease (Seconds) khi AutoTrader claim signal - hết hạn mà chưa complete thì signal được claim lại
+SIGNAL_CLAIM_LEASE_SECONDS = int(os.getenv("SIGNAL_CLAIM_LEASE_SECONDS", "300"))
+
 # Scheduler Interval (Seconds) - How often the bot checks for signals
 SCHEDULER_INTERVAL_SECONDS = int(os.getenv("SCHEDULER_INTERVAL_SECONDS", "60"))
 
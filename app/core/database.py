@@ -1,36 +1,169 @@
-import aiosqlite
+import asyncio
 
 from contextlib import asynccontextmanager
 
-from typing import List, Dict, Optional, Any
+from typing import List, Dict, Optional, Any, Iterable, Set
+
+from collections import OrderedDict
 
 import json
 
 import logging
 
-from datetime import datetime, timezone
+import time
+
+import zlib
+
+import uuid
+
+from datetime import date, datetime, timedelta, timezone
 
 from app.core import config 
 
+from app.core import db_metrics
+
+from app.core.db_pool import DBPool
+
+from app.core import migrations
+
+from app.core.write_queue import WriteBehindQueue
+
+from app.utils import simhash
+
 logger = config.logger
 
 DB_NAME = config.DB_NAME
 
+_pool: Optional[DBPool] = None
+
+_schema_ready_for: Optional[str] = None
+
+_write_queue: Optional[WriteBehindQueue] = None
+
+_fp_index: Optional[simhash.FingerprintIndex] = None
+
+_fp_index_for: Optional[str] = None
+
+# Link (id) bài đã có trong DB, LRU trong RAM: lượt quét ổn định không phải hỏi DB cho từng entry của feed
+_seen_links: Optional["OrderedDict[str, None]"] = None
+
+_seen_links_for: Optional[str] = None
+
+seen_link_stats = {"hits": 0, "lookups": 0, "queries": 0}
+
+def _now_ts() -> int:
+
+    """Epoch giây (UTC) hiện tại, so với các cột *_ts (xem migration #004)"""
+
+    return int(time.time())
+
+async def get_pool() -> DBPool:
+
+    """Lấy pool kết nối dùng chung (tự mở lại nếu event loop hoặc DB_NAME thay đổi)"""
+
+    global _pool
+
+    loop = asyncio.get_running_loop()
+
+    if _pool is not None and (_pool.db_path != DB_NAME or (_pool.loop is not None and _pool.loop is not loop)):
+
+        # asyncio.run() mới (VD: dashboard) -> Lock/Queue cũ không dùng được nữa
+
+        await _pool.close()
+
+        _pool = None
+
+    if _pool is None:
+
+        _pool = DBPool(DB_NAME)
+
+    if not _pool.is_open:
+
+        await _pool.open()
+
+    return _pool
+
+async def get_write_queue() -> WriteBehindQueue:
+
+    """Lấy write-behind queue dùng chung (gắn với event loop hiện tại)"""
+
+    global _write_queue
+
+    loop = asyncio.get_running_loop()
+
+    if _write_queue is not None and _write_queue.loop is not loop:
+
+        if _write_queue.pending_count:
+
+            logger.warning(f"⚠️ Bỏ {_write_queue.pending_count} lệnh ghi chưa flush của event loop cũ.")
+
+        _write_queue = None
+
+    if _write_queue is None:
+
+        _write_queue = WriteBehindQueue(_current_writer)
+
+    return _write_queue
+
+@asynccontextmanager
+
+async def _current_writer():
+
+    """Kết nối Writer cho write-behind queue: lấy pool hiện tại ở mỗi lần flush (pool có thể đã mở lại sau close_db / đổi DB_NAME)"""
+
+    pool = await get_pool()
+
+    async with pool.writer() as conn:
+
+        yield conn
+
+async def flush_writes() -> bool:
+
+    """Commit ngay các lệnh ghi đang chờ trong write-behind queue"""
+
+    if _write_queue is None or _write_queue.loop is not asyncio.get_running_loop():
+
+        return True
+
+    return await _write_queue.flush()
+
+async def close_db() -> None:
+
+    """Flush write-behind queue rồi đóng pool kết nối (gọi khi shutdown scheduler / kết thúc manual run)"""
+
+    global _pool, _write_queue
+
+    if _write_queue is not None:
+
+        if _write_queue.loop is asyncio.get_running_loop():
+
+            await _write_queue.close()
+
+        _write_queue = None
+
+    if _pool is not None:
+
+        await _pool.close()
+
+        _pool = None
+
 @asynccontextmanager
 
 async def get_db_connection():
 
-    """Async Context manager để quản lý kết nối DB an toàn"""
+    """
 
-    conn = None
+    Async Context manager để mượn kết nối Writer từ pool (đọc + ghi).
 
-    try:
+    Không tự flush write-behind queue: helper nào ghi trực tiếp lên dòng mà queue cũng ghi thì gọi flush_writes() trước
 
-        async with aiosqlite.connect(DB_NAME) as conn:
+    """
 
-            conn.row_factory = aiosqlite.Row
+    try:
+
+        pool = await get_pool()
 
-            await conn.execute("PRAGMA journal_mode=WAL;") 
+        async with pool.writer() as conn:
 
             yield conn
 
@@ -40,319 +173,596 @@ async def get_db_connection():
 
         raise e
 
-    # aiosqlite context manager tự động close connection
+@asynccontextmanager
+
+async def get_read_connection():
+
+    """
+
+    Async Context manager để mượn kết nối Reader từ pool (chỉ đọc, chạy song song).
+
+    Không chờ write-behind queue (không cắt ngắn group commit); caller cần read-your-writes tự gọi flush_writes()
+
+    """
+
+    try:
+
+        pool = await get_pool()
+
+        async with pool.reader() as conn:
+
+            yield conn
+
+    except Exception as e:
+
+        logger.error(f"Lỗi kết nối CSDL (Async): {e}")
+
+        raise e
 
 async def init_db() -> None:
 
-    """Khởi tạo bảng nếu chưa có (Async)"""
+    """Khởi tạo / nâng cấp schema qua hệ thống migration (Async). Chỉ chạy thật 1 lần mỗi process."""
+
+    global _schema_ready_for
+
+    if _schema_ready_for == DB_NAME:
+
+        return
 
     try:
 
         async with get_db_connection() as conn:
 
-            # Tạo bảng articles
+            version = await migrations.run_migrations(conn)
 
-            await conn.execute('''
+            await migrations.ensure_incremental_auto_vacuum(conn)
 
-                CREATE TABLE IF NOT EXISTS articles (
+        _schema_ready_for = DB_NAME
 
-                    id TEXT PRIMARY KEY,       -- Link bài viết là khóa chính
+        logger.debug(f"🗄️ DB schema version: {version}")
 
-                    source TEXT,
+    except Exception as e:
 
-                    title TEXT,
+        logger.error(f"Lỗi khởi tạo DB: {e}")
 
-                    published TEXT,
+async def check_article_exists(link: str) -> bool:
 
-                    content TEXT,              -- Nội dung full
+    """Kiểm tra link đã có trong DB chưa (qua LRU seen links; nhiều link: find_existing_links)"""
 
-                    keywords TEXT,             -- Lưu list keyword dạng string
+    return link in await find_existing_links([link])
 
-                    status TEXT DEFAULT 'NEW', -- NEW: Chưa AI xử lý, PROCESSED: Đã xong
+async def get_seen_links() -> "OrderedDict[str, None]":
 
-                    is_alerted INTEGER DEFAULT 0, -- 0: Chưa alert, 1: Đã alert (Breaking News)
+    """LRU các link đã có trong DB (nạp bài trong SEEN_LINKS_WARM_HOURS giờ gần nhất lần đầu dùng)"""
 
-                    image_url TEXT,            -- URL ảnh thumbnail
+    global _seen_links, _seen_links_for
 
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    if _seen_links is not None and _seen_links_for == DB_NAME:
 
-                )
+        return _seen_links
 
-            ''')
+    seen: "OrderedDict[str, None]" = OrderedDict()
 
-            # Migration: Ensure columns exist (Ignore error if exists)
+    try:
 
-            try:
+        async with get_read_connection() as conn:
 
-                await conn.execute("ALTER TABLE articles ADD COLUMN is_alerted INTEGER DEFAULT 0")
+            async with conn.execute('''
 
-            except Exception: pass 
+                SELECT id FROM articles WHERE created_at_ts >= ?
 
-            try:
+                ORDER BY created_at_ts DESC LIMIT ?
 
-                await conn.execute("ALTER TABLE articles ADD COLUMN image_url TEXT")
+            ''', (_now_ts() - int(config.SEEN_LINKS_WARM_HOURS * 3600), config.SEEN_LINKS_MAX)) as cursor:
 
-            except Exception: pass
+                # Cũ -> mới: bài mới nhất nằm cuối LRU (bị đẩy ra sau cùng)
 
-            # Tạo bảng reports
+                for row in reversed(await cursor.fetchall()):
 
-            await conn.execute('''
+                    seen[row[0]] = None
 
-                CREATE TABLE IF NOT EXISTS reports (
+    except Exception as e:
 
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+        logger.error(f"Lỗi nạp seen links: {e}")
 
-                    report_content TEXT,    -- Nội dung bài viết final
+    _seen_links, _seen_links_for = seen, DB_NAME
 
-                    sentiment_score REAL,   -- Điểm số (-10 đến 10)
+    logger.debug(f"🔗 Seen links: nạp {len(seen)} link từ DB")
 
-                    trend TEXT,             -- Bullish/Bearish/Neutral
+    return seen
 
-                    signal_type TEXT,       -- BUY/SELL/WAIT (AI Signal)
+def _remember_links(seen: "OrderedDict[str, None]", links: Iterable[str]) -> None:
 
-                    entry_price REAL,
+    for link in links:
 
-                    stop_loss REAL,
+        seen[link] = None
 
-                    take_profit REAL,
+        seen.move_to_end(link)
 
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    while len(seen) > config.SEEN_LINKS_MAX:
 
-                )
+        seen.popitem(last=False)
 
-            ''')
+async def find_existing_links(links: List[str]) -> Set[str]:
 
-            # Migration for existing reports table
+    """
 
-            try:
+    Các link đã có trong DB. Link nằm trong LRU trả lời ngay trong RAM, phần còn lại: 1 query IN (...) cho cả lô.
 
-                await conn.execute("ALTER TABLE reports ADD COLUMN signal_type TEXT")
+    Output: Set link đã tồn tại.
 
-                await conn.execute("ALTER TABLE reports ADD COLUMN entry_price REAL")
+    """
 
-                await conn.execute("ALTER TABLE reports ADD COLUMN stop_loss REAL")
+    seen = await get_seen_links()
 
-                await conn.execute("ALTER TABLE reports ADD COLUMN take_profit REAL")
+    unique = list(dict.fromkeys(links))
 
-            except Exception: pass
+    seen_link_stats["lookups"] += len(unique)
 
-            # Tạo bảng economic_events
+    existing = set()
 
-            await conn.execute('''
+    unknown = []
 
-                CREATE TABLE IF NOT EXISTS economic_events (
+    for link in unique:
 
-                    id TEXT PRIMARY KEY,
+        if link in seen:
 
-                    title TEXT,
+            seen.move_to_end(link)
 
-                    currency TEXT,
+            existing.add(link)
 
-                    impact TEXT,
+        else:
 
-                    timestamp DATETIME,
+            unknown.append(link)
 
-                    forecast TEXT,
+    seen_link_stats["hits"] += len(existing)
 
-                    previous TEXT,
+    if not unknown:
 
-                    actual TEXT,
+        return existing
 
-                    status TEXT DEFAULT 'pending'
+    try:
 
-                )
+        async with get_read_connection() as conn:
 
-            ''')
+            # SQLite giới hạn số tham số / câu lệnh -> chia lô
 
-            # Tạo bảng trade_signals
+            for start in range(0, len(unknown), 500):
 
-            await conn.execute('''
+                chunk = unknown[start:start + 500]
 
-                CREATE TABLE IF NOT EXISTS trade_signals (
+                seen_link_stats["queries"] += 1
 
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                placeholders = ','.join(['?'] * len(chunk))
 
-                    symbol TEXT,
+                async with conn.execute(f"SELECT id FROM articles WHERE id IN ({placeholders})", chunk) as cursor:
 
-                    signal_type TEXT, -- BUY/SELL/WAIT
+                    found = [row[0] for row in await cursor.fetchall()]
 
-                    source TEXT,      -- NEWS, AI_REPORT
+                existing.update(found)
 
-                    score REAL,
+                _remember_links(seen, found)
 
-                    is_processed INTEGER DEFAULT 0,
+    except Exception as e:
 
-                    entry_price REAL,
+        logger.error(f"Lỗi kiểm tra link đã tồn tại: {e}")
 
-                    stop_loss REAL,
+    return existing
 
-                    take_profit REAL,
+async def get_fingerprint_index() -> simhash.FingerprintIndex:
 
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    """Index SimHash các bài gần đây (nạp từ DB lần đầu dùng, sau đó cập nhật trong RAM ở save_to_db)"""
 
-                )
+    global _fp_index, _fp_index_for
 
-            ''')
+    if _fp_index is not None and _fp_index_for == DB_NAME:
 
-            # Migration: Add columns if not exists
+        return _fp_index
 
-            try:
+    window = config.DEDUP_WINDOW_HOURS * 3600
 
-                await conn.execute("ALTER TABLE trade_signals ADD COLUMN is_processed INTEGER DEFAULT 0")
+    index = simhash.FingerprintIndex(config.DEDUP_MAX_DISTANCE, window)
 
-            except Exception: pass
+    try:
 
-            try:
+        async with get_read_connection() as conn:
 
-                await conn.execute("ALTER TABLE trade_signals ADD COLUMN entry_price REAL")
+            async with conn.execute('''
 
-            except Exception: pass
+                SELECT id, simhash, duplicate_of, created_at_ts FROM articles
 
-            try:
+                WHERE simhash IS NOT NULL AND created_at_ts >= ?
 
-                await conn.execute("ALTER TABLE trade_signals ADD COLUMN stop_loss REAL")
+                ORDER BY created_at_ts
 
-            except Exception: pass
+            ''', (_now_ts() - int(window),)) as cursor:
 
-            try:
+                for row in await cursor.fetchall():
 
-                await conn.execute("ALTER TABLE trade_signals ADD COLUMN take_profit REAL")
+                    index.add(simhash.to_unsigned(row['simhash']), row['id'], row['duplicate_of'], row['created_at_ts'])
 
-            except Exception: pass
+    except Exception as e:
 
-            # Tạo bảng trade_history
+        logger.error(f"Lỗi nạp index fingerprint: {e}")
 
-            await conn.execute('''
+    _fp_index, _fp_index_for = index, DB_NAME
 
-                CREATE TABLE IF NOT EXISTS trade_history (
+    return index
 
-                    ticket INTEGER PRIMARY KEY,
+async def find_duplicate(article_id: str, fingerprint: Optional[int]) -> Optional[str]:
 
-                    signal_id INTEGER,
+    """
 
-                    symbol TEXT,
+    Tìm bài gốc gần trùng (SimHash) trong cửa sổ DEDUP_WINDOW_HOURS rồi ghi fingerprint vào index.
 
-                    order_type TEXT,
+    Output: id bài gốc, None nếu bài này là bản gốc.
 
-                    volume REAL,
+    """
 
-                    open_price REAL,
+    if fingerprint is None: return None
 
-                    sl REAL,
+    index = await get_fingerprint_index()
 
-                    tp REAL,
+    canonical_id = index.find(fingerprint)
 
-                    close_price REAL,
+    if canonical_id == article_id:
 
-                    profit REAL,
+        canonical_id = None
 
-                    status TEXT DEFAULT 'OPEN',
+    index.add(fingerprint, article_id, canonical_id)
 
-                    strategy TEXT,    -- NEW: Strategy Name (NEWS, SNIPER, REPORT, CALENDAR)
+    return canonical_id
 
-                    close_reason TEXT, -- NEW: Reason for closing (HIT_SL, HIT_TP, MANUAL, etc.)
+async def save_to_db(item: Dict[str, Any]) -> bool:
 
-                    open_time TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    """
 
-                    close_time TIMESTAMP,
+    Lưu 1 bài báo vào DB (write-behind: commit theo lô). Nội dung được nén vào bảng article_bodies.
 
-                    FOREIGN KEY (signal_id) REFERENCES trade_signals(id)
+    Bài gần trùng với bài đã lưu gần đây (SimHash) được gắn duplicate_of = id bài gốc.
 
-                )
+    Output: False nếu lỗi hoặc id đã có (trong DB / đang chờ trong queue): INSERT OR IGNORE sẽ bỏ qua nên không ghi
 
-            ''')
+    và không thêm fingerprint vào index (tránh gắn bài sau vào nội dung không được lưu).
 
-            # Migration: Add columns if not exists
+    """
 
-            try:
+    try:
 
-                await conn.execute("ALTER TABLE trade_history ADD COLUMN strategy TEXT")
+        if item["id"] in await find_existing_links([item["id"]]):
 
-            except Exception: pass
+            logger.debug(f"   -> SKIP: Bài đã có trong DB ({item['id']})")
 
-            try:
+            return False
 
-                await conn.execute("ALTER TABLE trade_history ADD COLUMN close_reason TEXT")
+        queue = await get_write_queue()
 
-            except Exception: pass
+        keywords_str = json.dumps(item["keywords"], ensure_ascii=False)
 
-            await conn.commit()
+        content = item.get("content") or ""
+
+        fingerprint = item.get("fingerprint")
+
+        if fingerprint is None:
+
+            fingerprint = simhash.fingerprint(content)
+
+        duplicate_of = await find_duplicate(item["id"], fingerprint)
+
+        item["duplicate_of"] = duplicate_of
+
+        _remember_links(await get_seen_links(), [item["id"]])
+
+        if duplicate_of:
+
+            logger.info(f"🔁 Tin gần trùng: {item['id']} -> {duplicate_of}")
+
+        queue.enqueue('''
+
+            INSERT OR IGNORE INTO articles (id, source, title, published, content_length, keywords, image_url, status, simhash, duplicate_of)
+
+            VALUES (?, ?, ?, ?, ?, ?, ?, 'NEW', ?, ?)
+
+        ''', (
+
+            item["id"],
+
+            item["source"],
+
+            item["title"],
+
+            item["published_at"],
+
+            len(content),
+
+            keywords_str,
+
+            item.get("image_url"),
+
+            simhash.to_signed(fingerprint) if fingerprint is not None else None,
+
+            duplicate_of
+
+        ), key=("article", item["id"]))
+
+        queue.enqueue(
+
+            "INSERT OR IGNORE INTO article_bodies (article_id, body) VALUES (?, ?)",
+
+            (item["id"], zlib.compress(content.encode("utf-8"))),
+
+            key=("article_body", item["id"])
+
+        )
+
+        return True
 
     except Exception as e:
 
-        logger.error(f"Lỗi khởi tạo DB: {e}")
+        logger.error(f"Lỗi lưu DB bài viết {item.get('id')}: {e}")
 
-async def check_article_exists(link: str) -> bool:
+        return False
 
-    """Kiểm tra link đã có trong DB chưa"""
+async def get_unprocessed_articles() -> List[Dict[str, Any]]:
+
+    """Lấy metadata các bài viết có status = 'NEW' (nội dung: get_article_contents). Gồm cả bài gần trùng (duplicate_of)."""
 
     try:
 
-        async with get_db_connection() as conn:
+        async with get_read_connection() as conn:
 
-            async with conn.execute("SELECT 1 FROM articles WHERE id = ?", (link,)) as cursor:
+            async with conn.execute("SELECT id, source, title, published AS published_at, content_length, duplicate_of FROM articles WHERE status = 'NEW'") as cursor:
 
-                result = await cursor.fetchone()
+                rows = await cursor.fetchall()
 
-                return result is not None
+                return [dict(row) for row in rows]
 
-    except Exception:
+    except Exception as e:
 
-        return False
+        logger.error(f"Lỗi lấy bài viết chưa xử lý: {e}")
 
-async def save_to_db(item: Dict[str, Any]) -> bool:
+        return []
+
+async def get_article_contents(ids: List[str]) -> Dict[str, str]:
+
+    """
+
+    Lazy-load nội dung (giải nén) cho các bài viết được chọn.
 
-    """Lưu 1 bài báo vào DB"""
+    Input: List id. Output: Dict {id: content} (bài không có nội dung bị bỏ qua).
+
+    """
+
+    if not ids: return {}
 
     try:
 
-        async with get_db_connection() as conn:
+        async with get_read_connection() as conn:
 
-            keywords_str = json.dumps(item["keywords"], ensure_ascii=False)
+            placeholders = ','.join(['?'] * len(ids))
 
-            await conn.execute('''
+            async with conn.execute(f"SELECT article_id, body FROM article_bodies WHERE article_id IN ({placeholders})", list(ids)) as cursor:
 
-                INSERT OR IGNORE INTO articles (id, source, title, published, content, keywords, image_url, status)
+                rows = await cursor.fetchall()
 
-                VALUES (?, ?, ?, ?, ?, ?, ?, 'NEW')
+                return {row['article_id']: zlib.decompress(row['body']).decode("utf-8") for row in rows if row['body']}
 
-            ''', (
+    except Exception as e:
 
-                item["id"],
+        logger.error(f"Lỗi lấy nội dung bài viết: {e}")
 
-                item["source"],
+        return {}
 
-                item["title"],
+async def get_article_content(article_id: str) -> str:
 
-                item["published_at"],
+    """Lazy-load nội dung 1 bài viết ('' nếu không có)"""
 
-                item["content"],
+    contents = await get_article_contents([article_id])
 
-                keywords_str,
+    return contents.get(article_id, "")
 
-                item.get("image_url")
+async def get_article_ids() -> List[str]:
 
-            ))
+    """Id (= URL) của mọi bài viết đang có trong DB."""
 
-            await conn.commit()
+    try:
 
-            return True
+        async with get_read_connection() as conn:
+
+            async with conn.execute("SELECT id FROM articles") as cursor:
+
+                return [row[0] for row in await cursor.fetchall()]
 
     except Exception as e:
 
-        logger.error(f"Lỗi lưu DB bài viết {item.get('id')}: {e}")
+        logger.error(f"Lỗi lấy danh sách bài viết: {e}")
 
-        return False
+        return []
 
-async def get_unprocessed_articles() -> List[Dict[str, Any]]:
+async def get_article_media(ids: List[str]) -> Dict[str, Dict[str, Any]]:
+
+    """
+
+    Ảnh + fingerprint đang lưu của các bài được chọn (để re-extract so sánh với kết quả mới).
 
-    """Lấy tất cả bài viết có status = 'NEW'"""
+    Output: Dict {id: {"image_url", "fingerprint"}} (fingerprint dạng unsigned 64-bit hoặc None).
+
+    """
+
+    if not ids: return {}
+
+    try:
+
+        async with get_read_connection() as conn:
+
+            placeholders = ','.join(['?'] * len(ids))
+
+            async with conn.execute(f"SELECT id, image_url, simhash FROM articles WHERE id IN ({placeholders})", list(ids)) as cursor:
+
+                return {
+                    row['id']: {
+                        "image_url": row['image_url'],
+                        "fingerprint": simhash.to_unsigned(row['simhash']) if row['simhash'] is not None else None,
+                    }
+                    for row in await cursor.fetchall()
+                }
+
+    except Exception as e:
+
+        logger.error(f"Lỗi lấy ảnh / fingerprint bài viết: {e}")
+
+        return {}
+
+async def update_article_contents(rows: List[Dict[str, Any]]) -> int:
+
+    """
+
+    Ghi đè nội dung + ảnh + fingerprint của các bài đã có (re-extract từ HTML cache), 1 transaction.
+
+    Input: List dict {id, content, image_url, fingerprint}. Body cũ bị xóa rồi chèn lại để trigger FTS cập nhật index.
+
+    Output: Số bài đã cập nhật.
+
+    """
+
+    if not rows: return 0
+
+    # Write-behind: các INSERT đang chờ phải vào DB trước
+    await flush_writes()
 
     try:
 
         async with get_db_connection() as conn:
 
-            async with conn.execute("SELECT id, source, title, content FROM articles WHERE status = 'NEW'") as cursor:
+            await conn.executemany(
+
+                "UPDATE articles SET content_length = ?, image_url = ?, simhash = ? WHERE id = ?",
+
+                [(len(r["content"]), r.get("image_url"),
+
+                  simhash.to_signed(r["fingerprint"]) if r.get("fingerprint") is not None else None, r["id"]) for r in rows]
+
+            )
+
+            await conn.executemany("DELETE FROM article_bodies WHERE article_id = ?", [(r["id"],) for r in rows])
+
+            await conn.executemany(
+
+                "INSERT INTO article_bodies (article_id, body) VALUES (?, ?)",
+
+                [(r["id"], zlib.compress(r["content"].encode("utf-8"))) for r in rows]
+
+            )
+
+            await conn.commit()
+
+            return len(rows)
+
+    except Exception as e:
+
+        logger.error(f"Lỗi cập nhật nội dung bài viết: {e}")
+
+        return 0
+
+def build_fts_query(keywords: List[str], exclude: Optional[List[str]] = None, column: Optional[str] = None) -> str:
+
+    """
+
+    Tạo biểu thức MATCH cho FTS5 từ tập keyword: ("k1" OR "k2") NOT ("x1" OR "x2").
+
+    Mỗi keyword là 1 phrase (đã escape), column: giới hạn 'title' hoặc 'content'.
+
+    """
+
+    def phrase_group(words: List[str]) -> str:
+
+        phrases = ['"' + w.replace('"', '""') + '"' for w in words if w and w.strip()]
+
+        return "(" + " OR ".join(phrases) + ")" if phrases else ""
+
+    query = phrase_group(keywords)
+
+    if not query: return ""
+
+    if column:
+
+        query = f"{column} : {query}"
+
+    excluded = phrase_group(exclude or [])
+
+    if excluded:
+
+        query = f"{query} NOT {column + ' : ' if column else ''}{excluded}"
+
+    return query
+
+async def search_articles(keywords: List[str], exclude: Optional[List[str]] = None, column: Optional[str] = None,
+
+                          status: Optional[str] = None, lookback_minutes: Optional[int] = None,
+
+                          article_ids: Optional[List[str]] = None, limit: int = 50) -> List[Dict[str, Any]]:
+
+    """
+
+    Tìm bài viết theo tập keyword qua FTS5, xếp hạng BM25 (title nặng hơn content).
+
+    Input: keywords (OR), exclude (NOT), column ('title'/'content'/None), bộ lọc status/thời gian/id.
+
+    Output: List metadata (không có content) + 'relevance' (càng nhỏ càng liên quan).
+
+    """
+
+    match = build_fts_query(keywords, exclude, column)
+
+    if not match: return []
+
+    sql = '''
+
+        SELECT a.id, a.source, a.title, a.published AS published_at, a.content_length, a.image_url,
+
+               bm25(articles_fts, 4.0, 1.0) AS relevance
+
+        FROM articles_fts
+
+        JOIN article_bodies b ON b.doc_id = articles_fts.rowid
+
+        JOIN articles a ON a.id = b.article_id
+
+        WHERE articles_fts MATCH ?
+
+    '''
+
+    params: List[Any] = [match]
+
+    if status:
+
+        sql += " AND a.status = ?"
+
+        params.append(status)
+
+    if lookback_minutes:
+
+        sql += " AND a.created_at_ts >= ?"
+
+        params.append(_now_ts() - lookback_minutes * 60)
+
+    if article_ids is not None:
+
+        if not article_ids: return []
+
+        sql += f" AND a.id IN ({','.join(['?'] * len(article_ids))})"
+
+        params.extend(article_ids)
+
+    sql += " ORDER BY relevance LIMIT ?"
+
+    params.append(limit)
+
+    try:
+
+        async with get_read_connection() as conn:
+
+            async with conn.execute(sql, params) as cursor:
 
                 rows = await cursor.fetchall()
 
@@ -360,10 +770,74 @@ async def get_unprocessed_articles() -> List[Dict[str, Any]]:
 
     except Exception as e:
 
-        logger.error(f"Lỗi lấy bài viết chưa xử lý: {e}")
+        logger.error(f"Lỗi search_articles: {e}")
 
         return []
 
+async def prune_old_articles(retention_days: int) -> int:
+
+    """
+
+    Xóa bài viết đã PROCESSED cũ hơn `retention_days` ngày (cả metadata lẫn nội dung nén).
+
+    Output: Số bài đã xóa.
+
+    """
+
+    cutoff = _now_ts() - retention_days * 86400
+
+    try:
+
+        async with get_db_connection() as conn:
+
+            # Trigger articles_bd xóa kèm body (và index FTS)
+
+            cursor = await conn.execute("DELETE FROM articles WHERE status = 'PROCESSED' AND created_at_ts < ?", (cutoff,))
+
+            deleted = cursor.rowcount
+
+            await cursor.close()
+
+            await conn.commit()
+
+            return deleted
+
+    except Exception as e:
+
+        logger.error(f"Lỗi prune articles: {e}")
+
+        return 0
+
+async def incremental_vacuum(max_pages: int = 0) -> int:
+
+    """
+
+    Trả các trang trống về hệ điều hành (PRAGMA incremental_vacuum). max_pages = 0: toàn bộ.
+
+    Không bao giờ chạy VACUUM đầy đủ (giữ writer lâu); DB cũ được chuyển sang INCREMENTAL 1 lần trong init_db.
+
+    Output: Số trang trống còn lại (freelist_count).
+
+    """
+
+    try:
+
+        async with get_db_connection() as conn:
+
+            async with conn.execute(f"PRAGMA incremental_vacuum({int(max_pages)})") as cursor:
+
+                await cursor.fetchall()
+
+            async with conn.execute("PRAGMA freelist_count") as cursor:
+
+                return (await cursor.fetchone())[0]
+
+    except Exception as e:
+
+        logger.error(f"Lỗi incremental vacuum: {e}")
+
+        return -1
+
 async def mark_articles_processed(ids: List[str]) -> None:
 
     """Chuyển status sang PROCESSED sau khi AI phân tích xong"""
@@ -432,139 +906,262 @@ async def get_latest_report() -> Optional[Dict[str, Any]]:
 
     try:
 
-        async with get_db_connection() as conn:
+        async with get_read_connection() as conn:
+
+            async with conn.execute("SELECT * FROM reports ORDER BY id DESC LIMIT 1") as cursor:
+
+                row = await cursor.fetchone()
+
+                return dict(row) if row else None
+
+    except Exception as e:
+
+        logger.error(f"Lỗi lấy báo cáo mới nhất: {e}")
+
+        return None
+
+async def get_unalerted_news(lookback_minutes: int = 30) -> List[Dict[str, Any]]:
+
+    """Lấy tin chưa alert (bỏ qua bài gần trùng với bài gốc đã lưu)"""
+
+    now = _now_ts()
+
+    try:
+
+        async with get_read_connection() as conn:
+
+            async with conn.execute('''
+
+                SELECT id, title, content_length, published, source, image_url
+
+                FROM articles 
+
+                WHERE is_alerted = 0 
+
+                AND status = 'NEW'
+
+                AND duplicate_of IS NULL
+
+                AND created_at_ts BETWEEN ? AND ?
+
+                ORDER BY created_at_ts DESC
+
+            ''', (now - lookback_minutes * 60, now)) as cursor:
+
+                rows = await cursor.fetchall()
+
+                return [dict(row) for row in rows]
+
+    except Exception as e:
+
+        logger.error(f"Lỗi lấy tin chưa alert: {e}")
+
+        return []
+
+async def mark_article_alerted(id: str) -> None:
+
+    try:
+
+        queue = await get_write_queue()
+
+        queue.enqueue("UPDATE articles SET is_alerted = 1 WHERE id = ?", (id,), key=("article_alerted", id))
+
+    except Exception as e:
+
+        logger.error(f"Lỗi đánh dấu alert: {e}")
+
+# --- Economic Calendar Database Methods (Async) ---
+
+async def upsert_economic_event(event: Dict[str, Any]) -> bool:
+
+    """
+
+    Upsert 1 sự kiện: trùng khóa tự nhiên (title, currency, event_date) hoặc trùng id đều cập nhật dòng có sẵn.
+
+    Id = timestamp_currency_title nên trùng id không đổi event_date (không vi phạm index khóa tự nhiên).
+
+    """
+
+    try:
+
+        async with get_db_connection() as conn:
+
+            await conn.execute('''
+
+                INSERT INTO economic_events (id, title, currency, impact, timestamp, event_date, forecast, previous, actual)
+
+                VALUES (?, ?, ?, ?, ?, date(?), ?, ?, ?)
+
+                ON CONFLICT(title, currency, event_date) DO UPDATE SET
+
+                    actual = excluded.actual,
+
+                    forecast = excluded.forecast,
+
+                    timestamp = excluded.timestamp
+
+                ON CONFLICT(id) DO UPDATE SET
+
+                    actual = excluded.actual,
+
+                    forecast = excluded.forecast
+
+            ''', (
+
+                event["id"],
+
+                event["event"],
+
+                event["currency"],
+
+                event["impact"],
+
+                event["timestamp"],
+
+                event["timestamp"],
+
+                event["forecast"],
+
+                event["previous"],
+
+                event["actual"]
 
-            async with conn.execute("SELECT * FROM reports ORDER BY id DESC LIMIT 1") as cursor:
+            ))
 
-                row = await cursor.fetchone()
+            await conn.commit()
 
-                return dict(row) if row else None
+            return True
 
     except Exception as e:
 
-        logger.error(f"Lỗi lấy báo cáo mới nhất: {e}")
+        logger.error(f"Lỗi upsert economic event {event.get('id')}: {e}")
 
-        return None
+        return False
 
-async def get_unalerted_news(lookback_minutes: int = 30) -> List[Dict[str, Any]]:
+async def bulk_upsert_economic_events(events: List[Dict[str, Any]]) -> int:
 
-    """Lấy tin chưa alert"""
+    """
 
-    try:
+    Upsert lịch kinh tế theo lô (1 transaction, 1 executemany) theo khóa tự nhiên (title, currency, event_date).
 
-        async with get_db_connection() as conn:
+    Giữ nguyên status 'pre_notified'/'post_notified' và actual đã có ngay trong SQL.
 
-            async with conn.execute('''
+    Sự kiện bị dời ±1 ngày (VD: qua nửa đêm UTC): dòng cũ cùng title/currency lệch 1 ngày mà không còn trong lịch mới
 
-                SELECT id, title, content, published, source, image_url
+    bị xóa, status đã alert của nó chuyển sang dòng mới (không alert 2 lần).
 
-                FROM articles 
+    Input: List dict {id, title, currency, impact, timestamp, event_date, forecast, previous}.
 
-                WHERE is_alerted = 0 
+    Output: Số dòng đã upsert.
 
-                AND status = 'NEW'
+    """
 
-                AND created_at >= datetime('now', ?)
+    if not events: return 0
 
-                ORDER BY created_at DESC
+    incoming = {(e['title'], e['currency'], e['event_date']) for e in events}
 
-            ''', (f'-{lookback_minutes} minutes',)) as cursor:
+    dates = [date.fromisoformat(key[2]) for key in incoming]
 
-                rows = await cursor.fetchall()
+    # Status pre/post_notified đang chờ trong write-behind queue phải vào DB trước khi đọc / chuyển sang dòng mới
+    await flush_writes()
 
-                return [dict(row) for row in rows]
+    try:
 
-    except Exception as e:
+        async with get_db_connection() as conn:
 
-        logger.error(f"Lỗi lấy tin chưa alert: {e}")
+            async with conn.execute('''
 
-        return []
+                SELECT rowid, title, currency, event_date, status FROM economic_events
 
-async def mark_article_alerted(id: str) -> None:
+                WHERE event_date BETWEEN ? AND ?
 
-    try:
+            ''', ((min(dates) - timedelta(days=1)).isoformat(), (max(dates) + timedelta(days=1)).isoformat())) as cursor:
 
-        async with get_db_connection() as conn:
+                existing = await cursor.fetchall()
 
-            await conn.execute("UPDATE articles SET is_alerted = 1 WHERE id = ?", (id,))
+            stale = []
 
-            await conn.commit()
+            carried: Dict[tuple, str] = {}
 
-    except Exception as e:
+            for row in existing:
 
-        logger.error(f"Lỗi đánh dấu alert: {e}")
+                if (row['title'], row['currency'], row['event_date']) in incoming: continue
 
-# --- Economic Calendar Database Methods (Async) ---
+                day = date.fromisoformat(row['event_date'])
 
-async def upsert_economic_event(event: Dict[str, Any]) -> bool:
+                for shifted in (day - timedelta(days=1), day + timedelta(days=1)):
 
-    try:
+                    target = (row['title'], row['currency'], shifted.isoformat())
 
-        async with get_db_connection() as conn:
+                    if target not in incoming: continue
 
-            await conn.execute('''
+                    stale.append((row['rowid'],))
 
-                INSERT INTO economic_events (id, title, currency, impact, timestamp, forecast, previous, actual)
+                    if row['status'] == 'post_notified' or (row['status'] == 'pre_notified' and target not in carried):
 
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                        carried[target] = row['status']
 
-                ON CONFLICT(id) DO UPDATE SET
+                    break
 
-                    actual = excluded.actual,
+            if stale:
 
-                    forecast = excluded.forecast,
+                logger.info(f"📅 {len(stale)} sự kiện bị dời ngày: thay dòng cũ (giữ status đã alert)")
 
-                    timestamp = excluded.timestamp
+                await conn.executemany("DELETE FROM economic_events WHERE rowid = ?", stale)
 
-            ''', (
+            rows = [{**e, 'status': carried.get((e['title'], e['currency'], e['event_date']), 'pending')} for e in events]
 
-                event["id"],
+            await conn.executemany('''
 
-                event["event"],
+                INSERT INTO economic_events (id, title, currency, impact, timestamp, event_date, forecast, previous, actual, status)
 
-                event["currency"],
+                VALUES (:id, :title, :currency, :impact, :timestamp, :event_date, :forecast, :previous, '', :status)
 
-                event["impact"],
+                ON CONFLICT(title, currency, event_date) DO UPDATE SET
 
-                event["timestamp"],
+                    impact = excluded.impact,
 
-                event["forecast"],
+                    timestamp = excluded.timestamp,
 
-                event["previous"],
+                    forecast = excluded.forecast,
 
-                event["actual"]
+                    previous = excluded.previous,
 
-            ))
+                    status = CASE WHEN economic_events.status = 'post_notified' OR excluded.status = 'pending'
+
+                                  THEN economic_events.status ELSE excluded.status END
+
+            ''', rows)
 
             await conn.commit()
 
-            return True
+            return len(events)
 
     except Exception as e:
 
-        logger.error(f"Lỗi upsert economic event {event.get('id')}: {e}")
+        logger.error(f"Lỗi bulk upsert economic events: {e}")
 
-        return False
+        return 0
 
 async def get_pending_pre_alerts(minutes_window: int = 60) -> List[Dict[str, Any]]:
 
+    now = _now_ts()
+
     try:
 
-        async with get_db_connection() as conn:
+        async with get_read_connection() as conn:
 
             async with conn.execute('''
 
                 SELECT * FROM economic_events
 
-                WHERE timestamp > datetime('now') 
-
-                AND timestamp <= datetime('now', ?)
+                WHERE timestamp_ts BETWEEN ? AND ?
 
                 AND status = 'pending'
 
                 AND impact = 'High'
 
-            ''', (f'+{minutes_window} minutes',)) as cursor:
+            ''', (now + 1, now + minutes_window * 60)) as cursor:
 
                 rows = await cursor.fetchall()
 
@@ -580,7 +1177,7 @@ async def get_pending_post_alerts() -> List[Dict[str, Any]]:
 
     try:
 
-        async with get_db_connection() as conn:
+        async with get_read_connection() as conn:
 
             async with conn.execute('''
 
@@ -610,11 +1207,9 @@ async def update_event_status(event_id: str, new_status: str) -> None:
 
     try:
 
-        async with get_db_connection() as conn:
-
-            await conn.execute("UPDATE economic_events SET status = ? WHERE id = ?", (new_status, event_id))
+        queue = await get_write_queue()
 
-            await conn.commit()
+        queue.enqueue("UPDATE economic_events SET status = ? WHERE id = ?", (new_status, event_id), key=("event_status", event_id))
 
     except Exception as e:
 
@@ -622,19 +1217,23 @@ async def update_event_status(event_id: str, new_status: str) -> None:
 
 async def get_incomplete_events_today() -> List[Dict[str, Any]]:
 
+    # Ngày hôm nay theo giờ máy (localtime) -> khoảng epoch [00:00, 24:00)
+
+    day_start = int(datetime.now().replace(hour=0, minute=0, second=0, microsecond=0).timestamp())
+
     try:
 
-        async with get_db_connection() as conn:
+        async with get_read_connection() as conn:
 
             async with conn.execute('''
 
                 SELECT * FROM economic_events
 
-                WHERE date(timestamp) = date('now', 'localtime') 
+                WHERE timestamp_ts BETWEEN ? AND ?
 
                 AND (actual IS NULL OR actual = '')
 
-            ''') as cursor:
+            ''', (day_start, day_start + 86400 - 1)) as cursor:
 
                 rows = await cursor.fetchall()
 
@@ -648,9 +1247,11 @@ async def get_incomplete_events_today() -> List[Dict[str, Any]]:
 
 async def check_upcoming_high_impact_news(minutes: int = 30) -> Optional[str]:
 
+    now = _now_ts()
+
     try:
 
-        async with get_db_connection() as conn:
+        async with get_read_connection() as conn:
 
             async with conn.execute('''
 
@@ -658,11 +1259,9 @@ async def check_upcoming_high_impact_news(minutes: int = 30) -> Optional[str]:
 
                 WHERE impact = 'High'
 
-                AND timestamp > datetime('now')
+                AND timestamp_ts BETWEEN ? AND ?
 
-                AND timestamp <= datetime('now', ?)
-
-            ''', (f'+{minutes} minutes',)) as cursor:
+            ''', (now + 1, now + minutes * 60)) as cursor:
 
                 row = await cursor.fetchone()
 
@@ -676,9 +1275,11 @@ async def check_upcoming_high_impact_news(minutes: int = 30) -> Optional[str]:
 
 async def check_recent_high_impact_news(minutes: int = 15) -> Optional[str]:
 
+    now = _now_ts()
+
     try:
 
-        async with get_db_connection() as conn:
+        async with get_read_connection() as conn:
 
             async with conn.execute('''
 
@@ -686,11 +1287,9 @@ async def check_recent_high_impact_news(minutes: int = 15) -> Optional[str]:
 
                 WHERE impact = 'High'
 
-                AND timestamp <= datetime('now')
-
-                AND timestamp >= datetime('now', ?)
+                AND timestamp_ts BETWEEN ? AND ?
 
-            ''', (f'-{minutes} minutes',)) as cursor:
+            ''', (now - minutes * 60, now)) as cursor:
 
                 row = await cursor.fetchone()
 
@@ -702,6 +1301,36 @@ async def check_recent_high_impact_news(minutes: int = 15) -> Optional[str]:
 
         return None
 
+async def get_high_impact_event_times(past_minutes: int = 60, ahead_minutes: int = 24 * 60) -> List[int]:
+
+    """Epoch (UTC, giây) các tin High Impact trong [now - past, now + ahead]. Dùng cho lịch poll nguồn tin."""
+
+    now = _now_ts()
+
+    try:
+
+        async with get_read_connection() as conn:
+
+            async with conn.execute('''
+
+                SELECT timestamp_ts FROM economic_events
+
+                WHERE impact = 'High'
+
+                AND timestamp_ts BETWEEN ? AND ?
+
+                ORDER BY timestamp_ts
+
+            ''', (now - past_minutes * 60, now + ahead_minutes * 60)) as cursor:
+
+                return [row[0] for row in await cursor.fetchall()]
+
+    except Exception as e:
+
+        logger.error(f"Lỗi get_high_impact_event_times: {e}")
+
+        return []
+
 async def save_trade_signal(symbol: str, signal_type: str, source: str, score: float, entry: float = None, sl: float = None, tp: float = None) -> bool:
 
     try:
@@ -728,9 +1357,11 @@ async def save_trade_signal(symbol: str, signal_type: str, source: str, score: f
 
 async def get_latest_valid_signal(symbol: str, ttl_minutes: int = 60) -> Optional[Dict[str, Any]]:
 
+    now = _now_ts()
+
     try:
 
-        async with get_db_connection() as conn:
+        async with get_read_connection() as conn:
 
             # 1. News
 
@@ -744,13 +1375,13 @@ async def get_latest_valid_signal(symbol: str, ttl_minutes: int = 60) -> Optiona
 
                 AND is_processed = 0
 
-                AND created_at >= datetime('now', ?)
+                AND created_at_ts BETWEEN ? AND ?
 
-                ORDER BY created_at DESC
+                ORDER BY created_at_ts DESC
 
                 LIMIT 1
 
-            ''', (symbol, f'-{ttl_minutes} minutes')) as cursor:
+            ''', (symbol, now - ttl_minutes * 60, now)) as cursor:
 
                 news_signal = await cursor.fetchone()
 
@@ -768,13 +1399,13 @@ async def get_latest_valid_signal(symbol: str, ttl_minutes: int = 60) -> Optiona
 
                 AND is_processed = 0
 
-                AND created_at >= datetime('now', ?)
+                AND created_at_ts BETWEEN ? AND ?
 
-                ORDER BY created_at DESC
+                ORDER BY created_at_ts DESC
 
                 LIMIT 1
 
-            ''', (symbol, f'-{ttl_minutes} minutes')) as cursor:
+            ''', (symbol, now - ttl_minutes * 60, now)) as cursor:
 
                 ai_signal = await cursor.fetchone()
 
@@ -826,9 +1457,11 @@ async def get_all_valid_signals(symbol: str, ttl_minutes: int = 60) -> List[Dict
 
     """
 
+    now = _now_ts()
+
     try:
 
-        async with get_db_connection() as conn:
+        async with get_read_connection() as conn:
 
             async with conn.execute('''
 
@@ -840,11 +1473,11 @@ async def get_all_valid_signals(symbol: str, ttl_minutes: int = 60) -> List[Dict
 
                 AND source IN ('NEWS', 'AI_REPORT')
 
-                AND created_at >= datetime('now', ?)
+                AND created_at_ts BETWEEN ? AND ?
 
-                ORDER BY ABS(score) DESC, created_at DESC
+                ORDER BY ABS(score) DESC, created_at_ts DESC
 
-            ''', (symbol, f'-{ttl_minutes} minutes')) as cursor:
+            ''', (symbol, now - ttl_minutes * 60, now)) as cursor:
 
                 rows = await cursor.fetchall()
 
@@ -856,39 +1489,181 @@ async def get_all_valid_signals(symbol: str, ttl_minutes: int = 60) -> List[Dict
 
         return []
 
-async def get_events_for_trap(min_minutes: float = 1.6, max_minutes: float = 2.4) -> List[Dict[str, Any]]:
+async def claim_signals(symbol: str, ttl_minutes: int = 60, limit: Optional[int] = None, lease_seconds: Optional[int] = None) -> List[Dict[str, Any]]:
 
     """
 
-    Lấy các tin High Impact sắp ra trong khoảng [min, max] phút tới.
+    Claim nguyên tử các signal chưa xử lý (NEWS, AI_REPORT) trong TTL: 1 câu UPDATE ... RETURNING.
 
-    Mục đích: Trap Trading (Straddle).
+    Signal đang được claim (lease chưa hết hạn) bởi trader khác bị bỏ qua.
+
+    Sau khi xử lý: complete_signal() (đã xong) hoặc release_signals() (trả lại để lần sau xử lý).
+
+    Input: symbol, ttl_minutes, limit (None = tất cả), lease_seconds (mặc định SIGNAL_CLAIM_LEASE_SECONDS).
+
+    Output: List[Dict] (kèm 'claim_token'), sắp xếp: ABS(score) giảm dần, mới nhất trước.
+
+    """
+
+    now = _now_ts()
+
+    token = uuid.uuid4().hex
+
+    lease = lease_seconds if lease_seconds is not None else config.SIGNAL_CLAIM_LEASE_SECONDS
+
+    try:
+
+        async with get_db_connection() as conn:
+
+            async with conn.execute('''
+
+                UPDATE trade_signals
+
+                SET claim_token = ?, claim_expires_ts = ?
+
+                WHERE id IN (
+
+                    SELECT id FROM trade_signals
+
+                    WHERE symbol = ?
+
+                    AND is_processed = 0
+
+                    AND source IN ('NEWS', 'AI_REPORT')
+
+                    AND created_at_ts BETWEEN ? AND ?
+
+                    AND (claim_expires_ts IS NULL OR claim_expires_ts < ?)
+
+                    ORDER BY ABS(score) DESC, created_at_ts DESC
+
+                    LIMIT ?
+
+                )
+
+                RETURNING *
+
+            ''', (token, now + lease, symbol, now - ttl_minutes * 60, now, now, limit if limit else -1)) as cursor:
+
+                rows = [dict(row) for row in await cursor.fetchall()]
+
+            await conn.commit()
+
+            # RETURNING không đảm bảo thứ tự
+
+            rows.sort(key=lambda r: (abs(r.get('score') or 0), r.get('created_at_ts') or 0), reverse=True)
+
+            return rows
+
+    except Exception as e:
+
+        logger.error(f"Lỗi claim_signals: {e}")
+
+        return []
+
+async def complete_signal(signal_id: int, claim_token: str) -> bool:
+
+    """
+
+    Đánh dấu signal đã claim là đã xử lý (chỉ khi token còn khớp).
+
+    Output: False nếu claim đã mất (lease hết hạn và trader khác đã claim lại).
+
+    """
+
+    try:
+
+        async with get_db_connection() as conn:
+
+            cursor = await conn.execute('''
+
+                UPDATE trade_signals
+
+                SET is_processed = 1, claim_token = NULL, claim_expires_ts = NULL
+
+                WHERE id = ? AND claim_token = ?
+
+            ''', (signal_id, claim_token))
+
+            updated = cursor.rowcount
+
+            await cursor.close()
+
+            await conn.commit()
+
+            if not updated:
+
+                logger.warning(f"⚠️ Signal #{signal_id}: claim không còn hiệu lực (token mismatch).")
+
+            return updated > 0
+
+    except Exception as e:
+
+        logger.error(f"Lỗi complete_signal: {e}")
+
+        return False
+
+async def release_signals(claim_token: str, signal_ids: Optional[List[int]] = None) -> int:
+
+    """
+
+    Trả lại các signal đã claim nhưng chưa xử lý xong (lần chạy sau claim lại được ngay).
+
+    Input: claim_token, signal_ids (None = mọi signal còn giữ bởi token).
+
+    Output: Số signal được trả lại.
 
     """
 
+    sql = "UPDATE trade_signals SET claim_token = NULL, claim_expires_ts = NULL WHERE claim_token = ? AND is_processed = 0"
+
+    params: List[Any] = [claim_token]
+
+    if signal_ids is not None:
+
+        if not signal_ids: return 0
+
+        sql += f" AND id IN ({','.join(['?'] * len(signal_ids))})"
+
+        params.extend(signal_ids)
+
     try:
 
         async with get_db_connection() as conn:
 
-            # SQLite datetime('now') is UTC.
+            cursor = await conn.execute(sql, params)
+
+            released = cursor.rowcount
+
+            await cursor.close()
+
+            await conn.commit()
+
+            return released
+
+    except Exception as e:
+
+        logger.error(f"Lỗi release_signals: {e}")
+
+        return 0
 
-            # Convert minutes to fraction of day for arithmetic if needed, or use modifier
+async def get_events_for_trap(min_minutes: float = 1.6, max_minutes: float = 2.4) -> List[Dict[str, Any]]:
 
-            # Modifier format: '+2 minutes'
+    """
 
-            # Since we need a range, we check:
+    Lấy các tin High Impact sắp ra trong khoảng [min, max] phút tới.
 
-            # timestamp >= now + min_minutes
+    Mục đích: Trap Trading (Straddle).
 
-            # timestamp <= now + max_minutes
+    """
 
-            min_offset = f'+{min_minutes} minutes'
+    try:
 
-            max_offset = f'+{max_minutes} minutes'
+        async with get_read_connection() as conn:
 
-            # Debug SQL logic: 
+            # Khoảng epoch [now + min, now + max] (UTC, giây)
 
-            # timestamp between (now + 1.5 min) and (now + 2.5 min)
+            now = time.time()
 
             async with conn.execute('''
 
@@ -898,11 +1673,9 @@ async def get_events_for_trap(min_minutes: float = 1.6, max_minutes: float = 2.4
 
                 AND status = 'pre_notified'
 
-                AND timestamp >= datetime('now', ?)
+                AND timestamp_ts BETWEEN ? AND ?
 
-                AND timestamp <= datetime('now', ?)
-
-            ''', (min_offset, max_offset)) as cursor:
+            ''', (int(now + min_minutes * 60), int(now + max_minutes * 60))) as cursor:
 
                 rows = await cursor.fetchall()
 
@@ -928,27 +1701,33 @@ async def save_trade_entry(ticket: int, signal_id: Optional[int], symbol: str, o
 
     Strategy: NEWS, SNIPER, REPORT, CALENDAR or MANUAL.
 
+    Đi qua write-behind queue nhưng CHỜ commit xong (lệnh thật trên MT5 không được mất).
+
     """
 
     try:
 
-        async with get_db_connection() as conn:
+        queue = await get_write_queue()
 
-            await conn.execute('''
+        saved = await queue.execute('''
 
-                INSERT INTO trade_history (ticket, signal_id, symbol, order_type, volume, 
+            INSERT INTO trade_history (ticket, signal_id, symbol, order_type, volume, 
 
-                                          open_price, sl, tp, strategy, status)
+                                      open_price, sl, tp, strategy, status)
 
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, 'OPEN')
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, 'OPEN')
 
-            ''', (ticket, signal_id, symbol, order_type, volume, open_price, sl, tp, strategy))
+        ''', (ticket, signal_id, symbol, order_type, volume, open_price, sl, tp, strategy))
 
-            await conn.commit()
+        if not saved:
 
-            logger.info(f"💾 Saved trade to DB: Ticket #{ticket} ({order_type} {symbol})")
+            logger.error(f"❌ Lỗi save_trade_entry: Ticket #{ticket} không commit được")
 
-            return True
+            return False
+
+        logger.info(f"💾 Saved trade to DB: Ticket #{ticket} ({order_type} {symbol})")
+
+        return True
 
     except Exception as e:
 
@@ -966,7 +1745,7 @@ async def get_open_trades() -> List[Dict[str, Any]]:
 
     try:
 
-        async with get_db_connection() as conn:
+        async with get_read_connection() as conn:
 
             async with conn.execute('''
 
@@ -996,6 +1775,10 @@ async def update_trade_exit(ticket: int, close_price: float, profit: float, stat
 
     """
 
+    # Ghi trực tiếp: profit / SL / TP đang chờ trong write-behind queue phải commit trước (không ghi đè giá trị cuối)
+
+    await flush_writes()
+
     try:
 
         async with get_db_connection() as conn:
@@ -1088,21 +1871,21 @@ async def update_trade_profit(ticket: int, profit: float) -> bool:
 
     Cập nhật floating profit cho trade đang mở.
 
+    Write-behind: chỉ giữ giá trị profit cuối cùng của mỗi ticket trong 1 lô commit.
+
     """
 
     try:
 
-        async with get_db_connection() as conn:
-
-            await conn.execute('''
+        queue = await get_write_queue()
 
-                UPDATE trade_history SET profit = ? WHERE ticket = ?
+        queue.enqueue('''
 
-            ''', (profit, ticket))
+            UPDATE trade_history SET profit = ? WHERE ticket = ?
 
-            await conn.commit()
+        ''', (profit, ticket), key=("trade_profit", ticket))
 
-            return True
+        return True
 
     except Exception as e:
 
@@ -1132,31 +1915,31 @@ async def update_trade_details(ticket: int, open_price: float, sl: float, tp: fl
 
     try:
 
-        async with get_db_connection() as conn:
+        queue = await get_write_queue()
 
-            # Chỉ update nếu giá trị > 0 để tránh ghi đè sai nếu không cần thiết, 
+        # Chỉ update nếu giá trị > 0 để tránh ghi đè sai nếu không cần thiết, 
 
-            # nhưng yêu cầu là đồng bộ chính xác từ MT5 nên ta update thẳng.
+        # nhưng yêu cầu là đồng bộ chính xác từ MT5 nên ta update thẳng.
 
-            # Tuy nhiên, SQL dynamic sẽ tốt hơn nếu data thiếu. 
+        # Tuy nhiên, SQL dynamic sẽ tốt hơn nếu data thiếu. 
 
-            # Ở đây giả sử trading_monitor luôn truyền full data.
+        # Ở đây giả sử trading_monitor luôn truyền full data.
 
-            await conn.execute('''
+        # Write-behind: gộp theo ticket, chỉ giữ lần đồng bộ cuối cùng.
 
-                UPDATE trade_history 
+        queue.enqueue('''
 
-                SET open_price = ?, sl = ?, tp = ?
+            UPDATE trade_history 
 
-                WHERE ticket = ?
+            SET open_price = ?, sl = ?, tp = ?
 
-            ''', (open_price, sl, tp, ticket))
+            WHERE ticket = ?
 
-            await conn.commit()
+        ''', (open_price, sl, tp, ticket), key=("trade_details", ticket))
 
-            logger.info(f"💾 Updated trade details #{ticket}: Price={open_price}, SL={sl}, TP={tp}")
+        logger.info(f"💾 Updated trade details #{ticket}: Price={open_price}, SL={sl}, TP={tp}")
 
-            return True
+        return True
 
     except Exception as e:
 
@@ -1171,7 +1954,7 @@ async def get_trade_metadata(ticket: int) -> Optional[Dict[str, Any]]:
     Trả về None nếu signal_id là NULL (Sniper/Straddle/Manual).
     """
     try:
-        async with get_db_connection() as conn:
+        async with get_read_connection() as conn:
             async with conn.execute('''
                 SELECT ts.source, ts.score
                 FROM trade_history th
@@ -1201,6 +1984,8 @@ async def sync_trade_data(ticket: int, open_price: float, close_price: float, pr
     Đồng bộ toàn diện dữ liệu trade từ MT5 về DB (Full Sync).
     Tự động convert timestamp sang UTC.
     """
+    # Ghi trực tiếp: profit / SL / TP đang chờ trong write-behind queue phải commit trước (không ghi đè giá trị cuối)
+    await flush_writes()
     try:
         async with get_db_connection() as conn:
             sql = '''
@@ -1225,3 +2010,80 @@ async def sync_trade_data(ticket: int, open_price: float, close_price: float, pr
     except Exception as e:
         logger.error(f"❌ Lỗi sync_trade_data #{ticket}: {e}")
         return False
+
+# --- Trade Statistics (Summary Tables, duy trì bởi trigger - xem migration #008) ---
+
+async def get_strategy_stats() -> List[Dict[str, Any]]:
+    """
+    Thống kê theo strategy (lệnh CLOSED): trades, wins, losses, win_rate (%), net/gross profit.
+    """
+    try:
+        async with get_read_connection() as conn:
+            async with conn.execute('''
+                SELECT *, ROUND(100.0 * wins / trades, 1) AS win_rate
+                FROM trade_strategy_stats
+                ORDER BY net_profit DESC
+            ''') as cursor:
+                return [dict(row) for row in await cursor.fetchall()]
+    except Exception as e:
+        logger.error(f"❌ Lỗi get_strategy_stats: {e}")
+        return []
+
+async def get_equity_curve(days: Optional[int] = None) -> List[Dict[str, Any]]:
+    """
+    PnL theo ngày (UTC) kèm equity lũy kế và drawdown. days: chỉ lấy N ngày gần nhất (equity vẫn tính từ đầu).
+    """
+    try:
+        async with get_read_connection() as conn:
+            sql = "SELECT * FROM trade_equity_curve ORDER BY day"
+            if days:
+                sql = f"SELECT * FROM ({sql} DESC LIMIT {int(days)}) ORDER BY day"
+            async with conn.execute(sql) as cursor:
+                return [dict(row) for row in await cursor.fetchall()]
+    except Exception as e:
+        logger.error(f"❌ Lỗi get_equity_curve: {e}")
+        return []
+
+async def get_trade_summary() -> Dict[str, Any]:
+    """
+    Tổng quan: tổng lệnh đóng, win rate (%), net profit, max drawdown.
+    """
+    summary = {'trades': 0, 'wins': 0, 'win_rate': 0.0, 'net_profit': 0.0, 'max_drawdown': 0.0}
+    try:
+        async with get_read_connection() as conn:
+            async with conn.execute('''
+                SELECT COALESCE(SUM(trades), 0) AS trades, COALESCE(SUM(wins), 0) AS wins,
+                       COALESCE(SUM(net_profit), 0) AS net_profit
+                FROM trade_strategy_stats
+            ''') as cursor:
+                row = await cursor.fetchone()
+                summary.update(dict(row))
+            async with conn.execute("SELECT COALESCE(MAX(drawdown), 0) FROM trade_equity_curve") as cursor:
+                summary['max_drawdown'] = (await cursor.fetchone())[0]
+        if summary['trades']:
+            summary['win_rate'] = round(100.0 * summary['wins'] / summary['trades'], 1)
+        return summary
+    except Exception as e:
+        logger.error(f"❌ Lỗi get_trade_summary: {e}")
+        return summary
+
+async def rebuild_trade_stats() -> bool:
+    """
+    Tính lại toàn bộ bảng thống kê từ trade_history (backfill / sửa lệch). CLI: python main.py --rebuild-stats
+    """
+    # Thống kê tính từ trade_history: các cập nhật đang chờ trong write-behind queue phải vào DB trước
+    await flush_writes()
+    try:
+        async with get_db_connection() as conn:
+            for sql in migrations.REBUILD_TRADE_STATS_SQL:
+                await conn.execute(sql)
+            await conn.commit()
+            logger.info("📊 Rebuilt trade statistics tables.")
+            return True
+    except Exception as e:
+        logger.error(f"❌ Lỗi rebuild_trade_stats: {e}")
+        return False
+
+# --- Instrumentation (opt-in, xem app/core/db_metrics.py) ---
+# Giữ ở CUỐI module: bọc mọi helper async public được định nghĩa phía trên
+db_metrics.instrument_module(globals())
@@ -0,0 +1,329 @@
+"""
+Instrumentation cho tầng Database (opt-in: DB_METRICS_ENABLED=true).
+
+- Mỗi helper public trong `database.py` được bọc (`instrument_module`): đếm số lần gọi, lỗi,
+  histogram độ trễ, số dòng đọc/ghi, số câu lệnh và thời gian chờ kết nối (lock wait) của pool.
+- Kết nối mượn từ pool được bọc bởi `TracedConnection`: đo từng câu lệnh (execute/executemany/commit),
+  câu chậm hơn `DB_SLOW_QUERY_MS` được log kèm `EXPLAIN QUERY PLAN`.
+- `snapshot()` trả về số liệu hiện tại; scheduler gọi `log_snapshot()` định kỳ (ghi JSON lines).
+Khi tắt, mỗi helper chỉ tốn thêm 1 phép kiểm tra cờ; kết nối không bị bọc.
+"""
+import functools
+import inspect
+import json
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional
+
+import aiosqlite
+from aiosqlite.context import Result
+
+from app.core import config
+
+logger = config.logger
+
+ENABLED: bool = config.DB_METRICS_ENABLED
+
+# Cận trên các bucket histogram (ms); bucket cuối = vô cực
+BUCKETS_MS = (0.5, 1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+UNSCOPED = "(direct)"  # Kết nối mượn trực tiếp, không qua helper của database.py
+
+_current: ContextVar[Optional["HelperStats"]] = ContextVar("db_metrics_helper", default=None)
+
+
+class HelperStats:
+    __slots__ = ("name", "calls", "errors", "total_ms", "max_ms", "buckets", "rows", "statements", "db_ms",
+                 "lock_waits", "lock_wait_ms")
+
+    def __init__(self, name: str):
+        self.name = name
+        self.calls = 0
+        self.errors = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.buckets = [0] * (len(BUCKETS_MS) + 1)
+        self.rows = 0
+        self.statements = 0
+        self.db_ms = 0.0
+        self.lock_waits = 0
+        self.lock_wait_ms = 0.0
+
+    def observe(self, elapsed_ms: float, error: bool = False) -> None:
+        self.calls += 1
+        self.errors += error
+        self.total_ms += elapsed_ms
+        self.max_ms = max(self.max_ms, elapsed_ms)
+        for i, bound in enumerate(BUCKETS_MS):
+            if elapsed_ms <= bound:
+                self.buckets[i] += 1
+                return
+        self.buckets[-1] += 1
+
+    def percentile(self, q: float) -> float:
+        """Ước lượng percentile = cận trên của bucket chứa nó (bucket cuối -> max_ms)."""
+        if not self.calls:
+            return 0.0
+        target = q * self.calls
+        seen = 0
+        for i, count in enumerate(self.buckets):
+            seen += count
+            if seen >= target:
+                return min(BUCKETS_MS[i], self.max_ms) if i < len(BUCKETS_MS) else self.max_ms
+        return self.max_ms
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "avg_ms": round(self.total_ms / self.calls, 3) if self.calls else 0.0,
+            "p50_ms": round(self.percentile(0.50), 3),
+            "p95_ms": round(self.percentile(0.95), 3),
+            "p99_ms": round(self.percentile(0.99), 3),
+            "max_ms": round(self.max_ms, 3),
+            "total_ms": round(self.total_ms, 3),
+            "rows": self.rows,
+            "statements": self.statements,
+            "db_ms": round(self.db_ms, 3),
+            "lock_waits": self.lock_waits,
+            "lock_wait_ms": round(self.lock_wait_ms, 3),
+            "histogram": {f"le_{b}": c for b, c in zip(list(BUCKETS_MS) + ["inf"], self.buckets) if c},
+        }
+
+
+_helpers: Dict[str, HelperStats] = {}
+_lock_waits: Dict[str, HelperStats] = {}  # Theo loại kết nối: writer / reader
+_slow_queries = 0
+_since = time.time()
+
+
+def enable(flag: bool = True) -> None:
+    global ENABLED
+    ENABLED = flag
+
+
+def reset() -> None:
+    global _slow_queries, _since
+    _helpers.clear()
+    _lock_waits.clear()
+    _slow_queries = 0
+    _since = time.time()
+
+
+def _stats(name: str) -> HelperStats:
+    stats = _helpers.get(name)
+    if stats is None:
+        stats = _helpers[name] = HelperStats(name)
+    return stats
+
+
+def _scope_stats() -> HelperStats:
+    return _current.get() or _stats(UNSCOPED)
+
+
+@contextmanager
+def track(name: str):
+    """Đo 1 lần gọi helper `name`; câu lệnh / lock wait bên trong được tính cho helper này."""
+    stats = _stats(name)
+    token = _current.set(stats)
+    start = time.perf_counter()
+    error = False
+    try:
+        yield stats
+    except BaseException:
+        error = True
+        raise
+    finally:
+        _current.reset(token)
+        stats.observe((time.perf_counter() - start) * 1000, error)
+
+
+def instrument(func):
+    """Decorator cho helper async: chỉ đo khi ENABLED (kiểm tra lúc gọi, bật/tắt được lúc chạy)."""
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        if not ENABLED:
+            return await func(*args, **kwargs)
+        with track(func.__name__):
+            return await func(*args, **kwargs)
+    return wrapper
+
+
+def instrument_module(namespace: Dict[str, Any]) -> None:
+    """Bọc mọi hàm async public được định nghĩa trong module (gọi ở CUỐI module với globals())."""
+    module_name = namespace["__name__"]
+    for name, func in list(namespace.items()):
+        if name.startswith("_") or not inspect.iscoroutinefunction(func) or func.__module__ != module_name:
+            continue
+        namespace[name] = instrument(func)
+
+
+def record_lock_wait(role: str, seconds: float) -> None:
+    """Thời gian chờ mượn kết nối từ pool (writer lock / reader rảnh)."""
+    if not ENABLED:
+        return
+    elapsed_ms = seconds * 1000
+    stats = _scope_stats()
+    stats.lock_waits += 1
+    stats.lock_wait_ms += elapsed_ms
+    role_stats = _lock_waits.get(role)
+    if role_stats is None:
+        role_stats = _lock_waits[role] = HelperStats(role)
+    role_stats.observe(elapsed_ms)
+
+
+# --- Statement tracing ---
+
+class _Statement:
+    __slots__ = ("conn", "sql", "params", "stats", "elapsed_ms", "done")
+
+    def __init__(self, conn: aiosqlite.Connection, sql: str, params: Any, stats: HelperStats):
+        self.conn = conn
+        self.sql = sql
+        self.params = params
+        self.stats = stats
+        self.elapsed_ms = 0.0
+        self.done = False
+
+    async def finish(self) -> None:
+        """Ghi nhận câu lệnh (1 lần); log kèm query plan nếu chậm."""
+        if self.done:
+            return
+        self.done = True
+        self.stats.statements += 1
+        self.stats.db_ms += self.elapsed_ms
+        if self.elapsed_ms >= config.DB_SLOW_QUERY_MS:
+            await _log_slow_query(self)
+
+
+async def _log_slow_query(stmt: _Statement) -> None:
+    global _slow_queries
+    _slow_queries += 1
+    sql = " ".join(stmt.sql.split())
+
+    plan = ""
+    if stmt.params is not None:
+        try:
+            async with stmt.conn.execute(f"EXPLAIN QUERY PLAN {stmt.sql}", stmt.params) as cursor:
+                plan = " | ".join(row[3] for row in await cursor.fetchall())
+        except Exception as e:
+            plan = f"(không lấy được plan: {e})"
+    logger.warning(f"🐢 Slow query {stmt.elapsed_ms:.1f} ms [{stmt.stats.name}]: {sql[:300]} | PLAN: {plan or '-'}")
+
+
+class TracedCursor(aiosqlite.Cursor):
+    """Cursor đếm số dòng fetch; thời gian fetch cộng vào câu lệnh, chốt khi fetchall/close."""
+
+    def __init__(self, cursor: aiosqlite.Cursor, stmt: _Statement):
+        super().__init__(cursor._conn, cursor._cursor)
+        self._stmt = stmt
+
+    def _observe(self, start: float, rows: int) -> None:
+        self._stmt.elapsed_ms += (time.perf_counter() - start) * 1000
+        self._stmt.stats.rows += rows
+
+    async def fetchone(self):
+        start = time.perf_counter()
+        row = await super().fetchone()
+        self._observe(start, row is not None)
+        return row
+
+    async def fetchmany(self, size: Optional[int] = None):
+        start = time.perf_counter()
+        rows = await super().fetchmany(size)
+        self._observe(start, len(rows))
+        return rows
+
+    async def fetchall(self):
+        start = time.perf_counter()
+        rows = await super().fetchall()
+        self._observe(start, len(rows))
+        await self._stmt.finish()
+        return rows
+
+    async def close(self) -> None:
+        await super().close()
+        await self._stmt.finish()
+
+
+class TracedConnection:
+    """Proxy aiosqlite.Connection: đo từng câu lệnh, các thuộc tính khác chuyển thẳng cho kết nối gốc."""
+
+    def __init__(self, conn: aiosqlite.Connection):
+        self._conn = conn
+
+    def __getattr__(self, name: str):
+        return getattr(self._conn, name)
+
+    async def _run(self, method, sql: str, params: Any, explain_params: Any):
+        stmt = _Statement(self._conn, sql, explain_params, _scope_stats())
+        start = time.perf_counter()
+        cursor = await method(sql, params)
+        stmt.elapsed_ms = (time.perf_counter() - start) * 1000
+        if cursor.description is None:
+            # Lệnh ghi / DDL: không có dòng để fetch -> chốt ngay
+            stmt.stats.rows += max(cursor.rowcount, 0)
+            await stmt.finish()
+            return cursor
+        return TracedCursor(cursor, stmt)
+
+    def execute(self, sql: str, parameters: Optional[Iterable[Any]] = None):
+        params = parameters if parameters is not None else []
+        return Result(self._run(self._conn.execute, sql, params, params))
+
+    def executemany(self, sql: str, parameters: Iterable[Iterable[Any]]):
+        rows = parameters if isinstance(parameters, list) else list(parameters)
+        return Result(self._run(self._conn.executemany, sql, rows, rows[0] if rows else None))
+
+    async def execute_fetchall(self, sql: str, parameters: Optional[Iterable[Any]] = None):
+        async with self.execute(sql, parameters) as cursor:
+            return await cursor.fetchall()
+
+    async def commit(self) -> None:
+        stmt = _Statement(self._conn, "COMMIT", None, _scope_stats())
+        start = time.perf_counter()
+        await self._conn.commit()
+        stmt.elapsed_ms = (time.perf_counter() - start) * 1000
+        await stmt.finish()
+
+
+def wrap_connection(conn: aiosqlite.Connection):
+    """Pool gọi khi cho mượn kết nối: chỉ bọc khi instrumentation đang bật."""
+    return TracedConnection(conn) if ENABLED else conn
+
+
+# --- Snapshot API ---
+
+def snapshot(reset_after: bool = False) -> Dict[str, Any]:
+    """Số liệu từ lần reset gần nhất. helpers sắp xếp theo tổng thời gian (giảm dần)."""
+    now = time.time()
+    helpers: List = sorted(_helpers.items(), key=lambda kv: kv[1].total_ms, reverse=True)
+    data = {
+        "timestamp": datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S'),
+        "window_s": round(now - _since, 1),
+        "enabled": ENABLED,
+        "slow_query_ms": config.DB_SLOW_QUERY_MS,
+        "slow_queries": _slow_queries,
+        "lock_wait": {role: s.to_dict() for role, s in _lock_waits.items()},
+        "helpers": {name: s.to_dict() for name, s in helpers},
+    }
+    if reset_after:
+        reset()
+    return data
+
+
+def log_snapshot(reset_after: bool = True, path: str = None) -> Dict[str, Any]:
+    """Job định kỳ của scheduler: ghi snapshot (1 dòng JSON) vào file + log tóm tắt top helper."""
+    data = snapshot(reset_after)
+    try:
+        with open(path or config.DB_METRICS_FILE, "a", encoding="utf-8") as f:
+            f.write(json.dumps(data, ensure_ascii=False) + "\n")
+    except Exception as e:
+        logger.error(f"❌ Lỗi ghi DB metrics: {e}")
+
+    top = list(data["helpers"].items())[:5]
+    summary = ", ".join(f"{name}={s['calls']}x p95={s['p95_ms']}ms wait={s['lock_wait_ms']:.0f}ms" for name, s in top)
+    waits = ", ".join(f"{role}: p95={s['p95_ms']}ms max={s['max_ms']}ms" for role, s in data["lock_wait"].items())
+    logger.info(f"📈 [DB METRICS] {data['window_s']}s | slow={data['slow_queries']} | lock wait [{waits or '-'}] | top: {summary or '-'}")
+    return data
@@ -0,0 +1,157 @@
+"""
+Connection Pool cho SQLite (Async).
+
+- 1 kết nối Writer duy nhất (SQLite chỉ cho 1 writer tại 1 thời điểm) được bảo vệ bởi Lock.
+- N kết nối Reader (query_only) chạy song song nhờ WAL.
+- PRAGMA (WAL, synchronous, busy_timeout, cache_size, mmap_size) chỉ set 1 lần khi mở pool.
+- Mỗi kết nối đăng ký SQL function `inflate_text` (trigger FTS5 khi INSERT body cần đọc nội dung nén; trigger xóa chỉ dùng rowid).
+- Thời gian chờ mượn kết nối được ghi vào `db_metrics` (khi bật DB_METRICS_ENABLED).
+"""
+import asyncio
+import time
+import zlib
+from contextlib import asynccontextmanager
+from typing import Callable, List, Optional
+
+import aiosqlite
+
+from app.core import config
+from app.core import db_metrics
+
+logger = config.logger
+
+
+def inflate_text(blob: Optional[bytes]) -> Optional[str]:
+    """SQL function `inflate_text(blob)`: giải nén zlib -> text (dùng bởi trigger INSERT FTS của article_bodies)."""
+    if blob is None:
+        return None
+    return zlib.decompress(blob).decode("utf-8")
+
+
+class DBPool:
+    def __init__(self, db_path: str, read_size: int = None):
+        self.db_path = db_path
+        self.read_size = max(1, read_size if read_size else config.DB_READ_POOL_SIZE)
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+
+        self._writer: Optional[aiosqlite.Connection] = None
+        self._write_lock: Optional[asyncio.Lock] = None
+        self._readers: List[aiosqlite.Connection] = []
+        self._idle_readers: Optional[asyncio.Queue] = None
+        self._open_lock: Optional[asyncio.Lock] = None
+
+    @property
+    def is_open(self) -> bool:
+        return self._writer is not None
+
+    async def _connect(self, read_only: bool) -> aiosqlite.Connection:
+        conn = aiosqlite.connect(self.db_path)
+        # Kết nối sống lâu: thread worker của aiosqlite không được giữ process lại khi thoát
+        getattr(conn, "_thread", conn).daemon = True
+        await conn
+        conn.row_factory = aiosqlite.Row
+        await conn.create_function("inflate_text", 1, inflate_text, deterministic=True)
+
+        pragmas = [
+            f"PRAGMA busy_timeout={config.DB_BUSY_TIMEOUT_MS};",
+            "PRAGMA synchronous=NORMAL;",
+            f"PRAGMA cache_size=-{config.DB_CACHE_SIZE_KB};",
+            f"PRAGMA mmap_size={config.DB_MMAP_SIZE};",
+            "PRAGMA temp_store=MEMORY;",
+        ]
+        if read_only:
+            pragmas.append("PRAGMA query_only=1;")
+
+        for pragma in pragmas:
+            # Đóng cursor ngay: cursor PRAGMA còn mở sẽ giữ SHARED lock và chặn writer
+            async with conn.execute(pragma):
+                pass
+        return conn
+
+    async def open(self) -> None:
+        """Mở toàn bộ kết nối (idempotent)."""
+        if self._open_lock is None:
+            self._open_lock = asyncio.Lock()
+
+        async with self._open_lock:
+            if self.is_open:
+                return
+
+            self.loop = asyncio.get_running_loop()
+            writer = await self._connect(read_only=False)
+            # auto_vacuum chỉ có hiệu lực với DB mới (trước khi tạo bảng); DB cũ được chuyển 1 lần trong init_db
+            async with writer.execute("PRAGMA auto_vacuum=INCREMENTAL;"):
+                pass
+            # journal_mode=WAL được lưu vĩnh viễn trong file DB, chỉ cần set từ writer
+            async with writer.execute("PRAGMA journal_mode=WAL;"):
+                pass
+
+            readers = []
+            idle = asyncio.Queue()
+            for _ in range(self.read_size):
+                reader = await self._connect(read_only=True)
+                readers.append(reader)
+                idle.put_nowait(reader)
+
+            self._writer = writer
+            self._write_lock = asyncio.Lock()
+            self._readers = readers
+            self._idle_readers = idle
+            logger.debug(f"💾 DB Pool opened: 1 writer + {self.read_size} readers ({self.db_path})")
+
+    async def close(self) -> None:
+        """Đóng toàn bộ kết nối. Gọi khi scheduler shutdown."""
+        conns = ([self._writer] if self._writer else []) + self._readers
+        self._writer = None
+        self._readers = []
+        self._idle_readers = None
+        self._write_lock = None
+
+        for conn in conns:
+            try:
+                await conn.close()
+            except Exception as e:
+                logger.warning(f"⚠️ Lỗi đóng kết nối DB: {e}")
+        if conns:
+            logger.debug("💾 DB Pool closed.")
+
+    async def set_trace_callback(self, handler: Optional[Callable[[str], None]]) -> None:
+        """Gắn trace callback (SQL đã bind tham số) cho mọi kết nối trong pool. None = tắt."""
+        if not self.is_open:
+            await self.open()
+        for conn in [self._writer] + self._readers:
+            await conn.set_trace_callback(handler)
+
+    @asynccontextmanager
+    async def writer(self):
+        """
+        Mượn kết nối Writer (độc quyền).
+        Transaction chưa commit khi thoát sẽ bị rollback (giữ nguyên ngữ nghĩa của kết nối đóng/mở cũ).
+        """
+        if not self.is_open:
+            await self.open()
+
+        waited = time.perf_counter()
+        async with self._write_lock:
+            db_metrics.record_lock_wait("writer", time.perf_counter() - waited)
+            conn = self._writer
+            try:
+                yield db_metrics.wrap_connection(conn)
+            finally:
+                if conn.in_transaction:
+                    await conn.rollback()
+
+    @asynccontextmanager
+    async def reader(self):
+        """Mượn 1 kết nối Reader (chỉ đọc)."""
+        if not self.is_open:
+            await self.open()
+
+        idle = self._idle_readers
+        waited = time.perf_counter()
+        conn = await idle.get()
+        db_metrics.record_lock_wait("reader", time.perf_counter() - waited)
+        try:
+            yield db_metrics.wrap_connection(conn)
+        finally:
+            idle.put_nowait(conn)
@@ -0,0 +1,113 @@
+"""
+Cache RSS feed dùng chung cho cả process.
+
+- Lưu ETag / Last-Modified / hash nội dung theo từng URL feed -> lần poll sau gửi `If-None-Match` / `If-Modified-Since`.
+  304 hoặc body có hash trùng lần trước => dùng lại feed đã parse, feedparser không phải chạy lại.
+- Trong `FEED_CACHE_TTL_SECONDS`, các consumer (realtime_alert mỗi phút, job_scan_news) dùng chung feed đã parse
+  mà không gửi request; các lần gọi đồng thời cho cùng URL chỉ tạo 1 request (Lock theo URL).
+- Dữ liệu cache là thuần Python (sống qua nhiều asyncio.run()); chỉ Lock gắn với event loop (tự tạo lại, giống rate_limit).
+"""
+import asyncio
+import hashlib
+import time
+from typing import Any, Dict, Optional
+
+from app.core import config
+
+logger = config.logger
+
+
+class CachedFeed:
+    def __init__(self, feed: Any, body_hash: str, etag: Optional[str], last_modified: Optional[str]):
+        self.feed = feed
+        self.body_hash = body_hash
+        self.etag = etag
+        self.last_modified = last_modified
+        self.checked_at = time.monotonic()  # Lần cuối xác nhận feed còn mới (200 / 304)
+
+
+_feeds: Dict[str, CachedFeed] = {}
+_locks: Dict[str, asyncio.Lock] = {}
+_loop: Optional[asyncio.AbstractEventLoop] = None
+
+stats = {"fresh": 0, "not_modified": 0, "unchanged": 0, "parsed": 0}
+
+
+def lock(url: str) -> asyncio.Lock:
+    """Lock theo URL feed: consumer thứ 2 chờ kết quả của consumer đầu thay vì tải lại."""
+    global _loop
+    loop = asyncio.get_running_loop()
+    if _loop is not loop:
+        # Lock cũ gắn với event loop đã đóng
+        _locks.clear()
+        _loop = loop
+
+    url_lock = _locks.get(url)
+    if url_lock is None:
+        url_lock = _locks[url] = asyncio.Lock()
+    return url_lock
+
+
+def get_fresh(url: str) -> Optional[Any]:
+    """Feed đã parse nếu vừa được xác nhận trong TTL (không cần gửi request), ngược lại None."""
+    cached = _feeds.get(url)
+    if cached and time.monotonic() - cached.checked_at < config.FEED_CACHE_TTL_SECONDS:
+        stats["fresh"] += 1
+        logger.debug(f"📦 Feed cache (TTL): {url}")
+        return cached.feed
+    return None
+
+
+def conditional_headers(url: str) -> Dict[str, str]:
+    """Header conditional GET từ validator của lần tải trước."""
+    cached = _feeds.get(url)
+    headers = {}
+    if cached:
+        if cached.etag:
+            headers["If-None-Match"] = cached.etag
+        if cached.last_modified:
+            headers["If-Modified-Since"] = cached.last_modified
+    return headers
+
+
+def not_modified(url: str) -> Optional[Any]:
+    """Server trả 304: gia hạn TTL và trả feed cũ."""
+    cached = _feeds.get(url)
+    if not cached:
+        return None
+    cached.checked_at = time.monotonic()
+    stats["not_modified"] += 1
+    logger.debug(f"📦 Feed 304 Not Modified: {url}")
+    return cached.feed
+
+
+def body_hash(content: bytes) -> str:
+    return hashlib.sha1(content).hexdigest()
+
+
+def unchanged(url: str, digest: str, etag: Optional[str] = None, last_modified: Optional[str] = None) -> Optional[Any]:
+    """Body 200 có hash trùng lần trước (server không hỗ trợ 304): cập nhật validator, trả feed cũ."""
+    cached = _feeds.get(url)
+    if not cached or cached.body_hash != digest:
+        return None
+    cached.etag = etag or cached.etag
+    cached.last_modified = last_modified or cached.last_modified
+    cached.checked_at = time.monotonic()
+    stats["unchanged"] += 1
+    logger.debug(f"📦 Feed không đổi (hash): {url}")
+    return cached.feed
+
+
+def store(url: str, feed: Any, digest: str, etag: Optional[str] = None, last_modified: Optional[str] = None) -> None:
+    """Lưu feed vừa parse. Feed rỗng/lỗi không được cache để lần sau tải lại đầy đủ."""
+    stats["parsed"] += 1
+    if not getattr(feed, "entries", None):
+        _feeds.pop(url, None)
+        return
+    _feeds[url] = CachedFeed(feed, digest, etag, last_modified)
+
+
+def clear() -> None:
+    _feeds.clear()
+    for key in stats:
+        stats[key] = 0
@@ -0,0 +1,193 @@
+"""
+Cache HTML bài viết trên đĩa (content-addressed, nén zlib, giới hạn dung lượng + LRU).
+
+- objects/<h[:2]>/<h>.z : HTML nén, h = sha256(HTML) -> cùng nội dung chỉ lưu 1 lần (nhiều URL / tải lại).
+- refs/<u[:2]>/<u>      : JSON {url, hash, fetched_at}, u = sha256(URL) -> bản HTML mới nhất của URL.
+- LRU: mtime của object = lần dùng gần nhất (ghi / đọc đều "chạm" file). Tổng dung lượng > HTML_CACHE_MAX_MB
+  -> xóa object cũ nhất tới khi còn ~90%. Ref trỏ tới object đã bị xóa được coi là miss (và được dọn).
+- Ghi nguyên tử (file tạm + os.replace) -> process re-extract đọc song song an toàn.
+Hàm đồng bộ (I/O đĩa + nén); code async dùng `save()` (chạy trong thread).
+"""
+import asyncio
+import hashlib
+import json
+import os
+import tempfile
+import time
+import zlib
+from typing import Dict, Iterator, Optional, Tuple
+
+from app.core import config
+
+logger = config.logger
+
+COMPRESS_LEVEL = 6
+EVICT_TARGET = 0.9
+
+stats = {"stored": 0, "deduplicated": 0, "hits": 0, "misses": 0, "evicted": 0}
+_size_bytes: Optional[int] = None  # Tổng dung lượng objects (tính lần đầu bằng cách quét thư mục)
+
+
+def _root() -> str:
+    return config.HTML_CACHE_DIR
+
+
+def _object_path(digest: str) -> str:
+    return os.path.join(_root(), "objects", digest[:2], digest + ".z")
+
+
+def _ref_path(url: str) -> str:
+    key = hashlib.sha256(url.encode("utf-8")).hexdigest()
+    return os.path.join(_root(), "refs", key[:2], key)
+
+
+def _write_atomic(path: str, data: bytes) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+def _iter_objects() -> Iterator[Tuple[str, os.stat_result]]:
+    base = os.path.join(_root(), "objects")
+    if not os.path.isdir(base):
+        return
+    for shard in os.scandir(base):
+        if not shard.is_dir():
+            continue
+        for entry in os.scandir(shard.path):
+            if entry.name.endswith(".z"):
+                try:
+                    yield entry.path, entry.stat()
+                except FileNotFoundError:
+                    continue  # Vừa bị process khác xóa
+
+
+def size_bytes() -> int:
+    global _size_bytes
+    if _size_bytes is None:
+        _size_bytes = sum(st.st_size for _, st in _iter_objects())
+    return _size_bytes
+
+
+def store(url: str, html: str) -> Optional[str]:
+    """Lưu HTML của URL. Trả về content hash (None nếu cache tắt / HTML rỗng)."""
+    global _size_bytes
+    if not config.HTML_CACHE_ENABLED or not html:
+        return None
+
+    raw = html.encode("utf-8")
+    digest = hashlib.sha256(raw).hexdigest()
+    path = _object_path(digest)
+    if os.path.exists(path):
+        os.utime(path)  # LRU touch
+        stats["deduplicated"] += 1
+    else:
+        data = zlib.compress(raw, COMPRESS_LEVEL)
+        _write_atomic(path, data)
+        _size_bytes = size_bytes() + len(data)
+        stats["stored"] += 1
+
+    ref = json.dumps({"url": url, "hash": digest, "fetched_at": int(time.time())}).encode("utf-8")
+    _write_atomic(_ref_path(url), ref)
+
+    if size_bytes() > config.HTML_CACHE_MAX_MB * 1024 * 1024:
+        evict()
+    return digest
+
+
+async def save(url: str, html: str) -> Optional[str]:
+    """store() chạy trong thread (không chặn event loop). Lỗi ghi đĩa chỉ log, không ảnh hưởng crawler."""
+    if not config.HTML_CACHE_ENABLED:
+        return None
+    try:
+        return await asyncio.to_thread(store, url, html)
+    except Exception as e:
+        logger.warning(f"⚠️ HTML cache: không lưu được {url}: {e}")
+        return None
+
+
+def lookup(url: str) -> Optional[Dict[str, object]]:
+    """Ref của URL ({url, hash, fetched_at}) hoặc None."""
+    try:
+        with open(_ref_path(url), "rb") as f:
+            return json.loads(f.read())
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def load(url: str) -> Optional[str]:
+    """HTML mới nhất của URL trong cache (None nếu không có / đã bị evict)."""
+    ref = lookup(url)
+    if ref is None:
+        stats["misses"] += 1
+        return None
+    path = _object_path(ref["hash"])
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+        os.utime(path)
+    except FileNotFoundError:
+        # Object đã bị evict: dọn ref mồ côi
+        try:
+            os.remove(_ref_path(url))
+        except FileNotFoundError:
+            pass
+        stats["misses"] += 1
+        return None
+    stats["hits"] += 1
+    return zlib.decompress(data).decode("utf-8")
+
+
+def evict(max_bytes: Optional[int] = None) -> int:
+    """Xóa object ít dùng nhất tới khi tổng dung lượng <= ~90% giới hạn. Trả về số object đã xóa."""
+    global _size_bytes
+    limit = config.HTML_CACHE_MAX_MB * 1024 * 1024 if max_bytes is None else max_bytes
+    objects = sorted(_iter_objects(), key=lambda item: item[1].st_mtime)
+    total = sum(st.st_size for _, st in objects)
+    target = limit * EVICT_TARGET
+    removed = 0
+    for path, st in objects:
+        if total <= target:
+            break
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        total -= st.st_size
+        removed += 1
+    _size_bytes = total
+    if removed:
+        stats["evicted"] += removed
+        logger.info(f"🗑️ HTML cache: evict {removed} bản HTML cũ (còn {total / 1024 / 1024:.1f} MB)")
+    return removed
+
+
+def urls() -> Iterator[str]:
+    """Mọi URL đang có ref trong cache."""
+    base = os.path.join(_root(), "refs")
+    if not os.path.isdir(base):
+        return
+    for shard in os.scandir(base):
+        if not shard.is_dir():
+            continue
+        for entry in os.scandir(shard.path):
+            if entry.name.startswith(".tmp-"):
+                continue
+            try:
+                with open(entry.path, "rb") as f:
+                    yield json.loads(f.read())["url"]
+            except (FileNotFoundError, ValueError, KeyError):
+                continue
+
+
+def reset_size() -> None:
+    """Quên tổng dung lượng đã đếm (VD: đổi HTML_CACHE_DIR)."""
+    global _size_bytes
+    _size_bytes = None
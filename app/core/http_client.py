@@ -0,0 +1,78 @@
+"""
+Session HTTP dùng chung cho cả process (curl_cffi, Async).
+
+- 1 `AsyncSession` sống lâu cho mỗi profile impersonate (chrome120, safari15_5, ...): giữ keep-alive,
+  không phải bắt tay TLS lại cho mỗi lần poll RSS / tải bài / scrape lịch kinh tế.
+- Nhớ profile thành công gần nhất theo từng host -> lần sau thử profile đó trước.
+- Gắn với event loop hiện tại (tự tạo lại khi asyncio.run() mới, giống DB pool); `close_sessions()` khi shutdown.
+"""
+import asyncio
+from typing import Dict, List, Optional
+from urllib.parse import urlparse
+
+from app.core import config
+
+logger = config.logger
+
+try:
+    from curl_cffi.requests import AsyncSession
+except ImportError:
+    AsyncSession = None
+
+_sessions: Dict[str, "AsyncSession"] = {}
+_preferred: Dict[str, str] = {}  # host -> profile thành công gần nhất
+_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def _host(url: str) -> str:
+    return urlparse(url).hostname or url
+
+
+def get_session(profile: str) -> "AsyncSession":
+    """Session dùng chung của 1 profile impersonate (tạo lần đầu dùng)."""
+    global _loop
+    if AsyncSession is None:
+        raise RuntimeError("Thiếu thư viện curl_cffi (pip install curl_cffi)")
+
+    loop = asyncio.get_running_loop()
+    if _loop is not loop:
+        # Session cũ gắn với event loop đã đóng: bỏ đi (curl handle được giải phóng khi GC)
+        _sessions.clear()
+        _loop = loop
+
+    session = _sessions.get(profile)
+    if session is None:
+        session = _sessions[profile] = AsyncSession(
+            impersonate=profile,
+            max_clients=max(10, config.CRAWLER_MAX_CONCURRENCY * 2),
+        )
+        logger.debug(f"🌐 HTTP session mới: {profile}")
+    return session
+
+
+def profiles_for(url: str, profiles: List[str]) -> List[str]:
+    """Thứ tự thử profile cho URL: profile thành công gần nhất của host lên đầu."""
+    preferred = _preferred.get(_host(url))
+    if preferred in profiles:
+        return [preferred] + [p for p in profiles if p != preferred]
+    return list(profiles)
+
+
+def remember_profile(url: str, profile: str) -> None:
+    """Ghi nhớ profile vừa tải thành công URL (theo host)."""
+    _preferred[_host(url)] = profile
+
+
+async def close_sessions() -> None:
+    """Đóng toàn bộ session (gọi khi scheduler shutdown / kết thúc manual run)."""
+    sessions = list(_sessions.values())
+    _sessions.clear()
+    if _loop is not asyncio.get_running_loop():
+        return
+    for session in sessions:
+        try:
+            await session.close()
+        except Exception as e:
+            logger.warning(f"⚠️ Lỗi đóng HTTP session: {e}")
+    if sessions:
+        logger.debug(f"🌐 Đã đóng {len(sessions)} HTTP session.")
@@ -0,0 +1,557 @@
+"""
+Schema Migrations (Async).
+
+Mỗi migration có số version tăng dần, được áp dụng đúng 1 lần và ghi lại vào bảng `schema_migrations`.
+Thêm thay đổi schema mới = thêm 1 hàm `_mXXX_...` và 1 dòng vào MIGRATIONS (KHÔNG sửa migration cũ).
+"""
+import sqlite3
+import zlib
+from typing import Awaitable, Callable, List, Tuple
+
+import aiosqlite
+
+from app.core import config
+
+logger = config.logger
+
+async def _table_columns(conn: aiosqlite.Connection, table: str) -> set:
+    # table_xinfo: gồm cả generated column (table_info ẩn chúng)
+    async with conn.execute(f"PRAGMA table_xinfo({table})") as cursor:
+        return {row[1] for row in await cursor.fetchall()}
+
+async def _add_column(conn: aiosqlite.Connection, table: str, column: str, decl: str) -> None:
+    """ALTER TABLE ADD COLUMN nếu cột chưa tồn tại (thay cho try/except: pass)"""
+    if column not in await _table_columns(conn, table):
+        await conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {decl}")
+
+# --- MIGRATIONS ---
+
+async def _m001_baseline_schema(conn: aiosqlite.Connection) -> None:
+    """Schema gốc (trước khi có hệ thống migration). Idempotent cho DB cũ."""
+    await conn.execute('''
+        CREATE TABLE IF NOT EXISTS articles (
+            id TEXT PRIMARY KEY,       -- Link bài viết là khóa chính
+            source TEXT,
+            title TEXT,
+            published TEXT,
+            content TEXT,              -- Nội dung full
+            keywords TEXT,             -- Lưu list keyword dạng string
+            status TEXT DEFAULT 'NEW', -- NEW: Chưa AI xử lý, PROCESSED: Đã xong
+            is_alerted INTEGER DEFAULT 0, -- 0: Chưa alert, 1: Đã alert (Breaking News)
+            image_url TEXT,            -- URL ảnh thumbnail
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    await _add_column(conn, "articles", "is_alerted", "INTEGER DEFAULT 0")
+    await _add_column(conn, "articles", "image_url", "TEXT")
+
+    await conn.execute('''
+        CREATE TABLE IF NOT EXISTS reports (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            report_content TEXT,    -- Nội dung bài viết final
+            sentiment_score REAL,   -- Điểm số (-10 đến 10)
+            trend TEXT,             -- Bullish/Bearish/Neutral
+            signal_type TEXT,       -- BUY/SELL/WAIT (AI Signal)
+            entry_price REAL,
+            stop_loss REAL,
+            take_profit REAL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    for column, decl in [("signal_type", "TEXT"), ("entry_price", "REAL"), ("stop_loss", "REAL"), ("take_profit", "REAL")]:
+        await _add_column(conn, "reports", column, decl)
+
+    await conn.execute('''
+        CREATE TABLE IF NOT EXISTS economic_events (
+            id TEXT PRIMARY KEY,
+            title TEXT,
+            currency TEXT,
+            impact TEXT,
+            timestamp DATETIME,
+            forecast TEXT,
+            previous TEXT,
+            actual TEXT,
+            status TEXT DEFAULT 'pending'
+        )
+    ''')
+
+    await conn.execute('''
+        CREATE TABLE IF NOT EXISTS trade_signals (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            symbol TEXT,
+            signal_type TEXT, -- BUY/SELL/WAIT
+            source TEXT,      -- NEWS, AI_REPORT
+            score REAL,
+            is_processed INTEGER DEFAULT 0,
+            entry_price REAL,
+            stop_loss REAL,
+            take_profit REAL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    for column, decl in [("is_processed", "INTEGER DEFAULT 0"), ("entry_price", "REAL"), ("stop_loss", "REAL"), ("take_profit", "REAL")]:
+        await _add_column(conn, "trade_signals", column, decl)
+
+    await conn.execute('''
+        CREATE TABLE IF NOT EXISTS trade_history (
+            ticket INTEGER PRIMARY KEY,
+            signal_id INTEGER,
+            symbol TEXT,
+            order_type TEXT,
+            volume REAL,
+            open_price REAL,
+            sl REAL,
+            tp REAL,
+            close_price REAL,
+            profit REAL,
+            status TEXT DEFAULT 'OPEN',
+            strategy TEXT,    -- Strategy Name (NEWS, SNIPER, REPORT, CALENDAR)
+            close_reason TEXT, -- Reason for closing (HIT_SL, HIT_TP, MANUAL, etc.)
+            open_time TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            close_time TIMESTAMP,
+            FOREIGN KEY (signal_id) REFERENCES trade_signals(id)
+        )
+    ''')
+    await _add_column(conn, "trade_history", "strategy", "TEXT")
+    await _add_column(conn, "trade_history", "close_reason", "TEXT")
+
+async def _m002_hot_query_indexes(conn: aiosqlite.Connection) -> None:
+    """Index cho các query chạy mỗi phút (tránh full-scan các bảng chỉ tăng)"""
+    # get_unalerted_news (status + is_alerted + created_at) & get_unprocessed_articles (status)
+    await conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_articles_status_alerted_created
+        ON articles (status, is_alerted, created_at)
+    ''')
+    # get_all_valid_signals / get_latest_valid_signal
+    await conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_signals_symbol_processed_source_created
+        ON trade_signals (symbol, is_processed, source, created_at)
+    ''')
+    # get_pending_pre_alerts / get_events_for_trap
+    await conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_events_impact_status_timestamp
+        ON economic_events (impact, status, timestamp)
+    ''')
+    # get_open_trades
+    await conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_trades_status
+        ON trade_history (status)
+    ''')
+
+async def _m003_economic_events_natural_key(conn: aiosqlite.Connection) -> None:
+    """Khóa tự nhiên (title, currency, event_date) cho upsert lịch kinh tế theo lô"""
+    await _add_column(conn, "economic_events", "event_date", "TEXT")  # YYYY-MM-DD (UTC)
+    await conn.execute("UPDATE economic_events SET event_date = date(timestamp) WHERE event_date IS NULL")
+
+    # Dọn trùng lặp cũ: giữ 1 dòng mỗi khóa, ưu tiên dòng đã gửi alert rồi tới giờ mới nhất
+    await conn.execute('''
+        DELETE FROM economic_events WHERE rowid IN (
+            SELECT rowid FROM (
+                SELECT rowid, ROW_NUMBER() OVER (
+                    PARTITION BY title, currency, event_date
+                    ORDER BY CASE status WHEN 'post_notified' THEN 0 WHEN 'pre_notified' THEN 1 ELSE 2 END,
+                             timestamp DESC
+                ) AS rn
+                FROM economic_events
+            ) WHERE rn > 1
+        )
+    ''')
+    await conn.execute('''
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_events_natural_key
+        ON economic_events (title, currency, event_date)
+    ''')
+
+# (table, cột TEXT thời gian UTC) -> cột epoch `<cột>_ts`
+EPOCH_COLUMNS = [
+    ("articles", "created_at"),
+    ("trade_signals", "created_at"),
+    ("economic_events", "timestamp"),
+    ("trade_history", "open_time"),
+    ("trade_history", "close_time"),
+]
+
+async def _m004_epoch_time_columns(conn: aiosqlite.Connection) -> None:
+    """
+    Cột INTEGER epoch (giây, UTC) cho các cột thời gian TEXT, để lọc theo khoảng thời gian bằng index.
+    Dùng generated column (VIRTUAL): SQLite tự tính khi ghi nên không thể lệch với cột gốc,
+    dù giá trị đến từ CURRENT_TIMESTAMP, chuỗi '%Y-%m-%d %H:%M:%S' hay ISO có offset. Chuỗi lỗi -> NULL.
+    Dữ liệu cũ được backfill khi tạo index bên dưới.
+    """
+    for table, column in EPOCH_COLUMNS:
+        await _add_column(
+            conn, table, f"{column}_ts",
+            f"INTEGER GENERATED ALWAYS AS (CAST(strftime('%s', {column}) AS INTEGER)) VIRTUAL"
+        )
+
+    # Thay các index theo cột TEXT của migration #002
+    await conn.execute("DROP INDEX IF EXISTS idx_articles_status_alerted_created")
+    await conn.execute("DROP INDEX IF EXISTS idx_signals_symbol_processed_source_created")
+    await conn.execute("DROP INDEX IF EXISTS idx_events_impact_status_timestamp")
+
+    # get_unalerted_news
+    await conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_articles_status_alerted_created_ts
+        ON articles (status, is_alerted, created_at_ts)
+    ''')
+    # get_all_valid_signals / get_latest_valid_signal
+    await conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_signals_symbol_processed_source_created_ts
+        ON trade_signals (symbol, is_processed, source, created_at_ts)
+    ''')
+    # get_pending_pre_alerts / get_events_for_trap
+    await conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_events_impact_status_timestamp_ts
+        ON economic_events (impact, status, timestamp_ts)
+    ''')
+    # check_upcoming_high_impact_news / check_recent_high_impact_news
+    await conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_events_impact_timestamp_ts
+        ON economic_events (impact, timestamp_ts)
+    ''')
+    # get_incomplete_events_today
+    await conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_events_timestamp_ts
+        ON economic_events (timestamp_ts)
+    ''')
+    # Thống kê / dashboard theo thời gian đóng lệnh
+    await conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_trades_close_time_ts
+        ON trade_history (close_time_ts)
+    ''')
+
+async def _m005_article_cold_storage(conn: aiosqlite.Connection) -> None:
+    """
+    Tách nội dung bài viết (lớn, chỉ AI cần) khỏi bảng articles sang bảng article_bodies (nén zlib).
+    articles chỉ giữ metadata dùng để lọc + content_length.
+    """
+    await conn.execute('''
+        CREATE TABLE IF NOT EXISTS article_bodies (
+            article_id TEXT PRIMARY KEY,   -- = articles.id
+            body BLOB                      -- zlib(content utf-8)
+        )
+    ''')
+    await _add_column(conn, "articles", "content_length", "INTEGER DEFAULT 0")
+
+    if "content" not in await _table_columns(conn, "articles"):
+        return
+
+    # Chuyển dữ liệu cũ theo lô để không giữ toàn bộ nội dung trong RAM
+    last_rowid = 0
+    while True:
+        async with conn.execute(
+            "SELECT rowid, id, content FROM articles WHERE rowid > ? ORDER BY rowid LIMIT 500", (last_rowid,)
+        ) as cursor:
+            rows = await cursor.fetchall()
+        if not rows:
+            break
+        last_rowid = rows[-1][0]
+        await conn.executemany(
+            "INSERT OR IGNORE INTO article_bodies (article_id, body) VALUES (?, ?)",
+            [(row[1], zlib.compress(row[2].encode("utf-8"))) for row in rows if row[2]]
+        )
+        await conn.executemany(
+            "UPDATE articles SET content_length = ? WHERE rowid = ?",
+            [(len(row[2] or ""), row[0]) for row in rows]
+        )
+
+    await conn.execute("ALTER TABLE articles DROP COLUMN content")
+
+async def _m006_articles_fts(conn: aiosqlite.Connection) -> None:
+    """
+    FTS5 (title + content) cho lọc keyword & xếp hạng BM25.
+    - Contentless (content=''): chỉ lưu index, nội dung gốc vẫn nằm nén ở article_bodies.
+    - rowid FTS = article_bodies.doc_id (INTEGER PRIMARY KEY, không đổi khi VACUUM).
+    - Đồng bộ bằng trigger; trigger dùng SQL function inflate_text (đăng ký trong DBPool).
+    """
+    # Dựng lại article_bodies với khóa số ổn định cho FTS
+    await conn.execute('''
+        CREATE TABLE article_bodies_new (
+            doc_id INTEGER PRIMARY KEY,           -- = rowid của articles_fts
+            article_id TEXT NOT NULL UNIQUE,      -- = articles.id
+            body BLOB                             -- zlib(content utf-8)
+        )
+    ''')
+    await conn.execute("INSERT INTO article_bodies_new (article_id, body) SELECT article_id, body FROM article_bodies")
+    await conn.execute("DROP TABLE article_bodies")
+    await conn.execute("ALTER TABLE article_bodies_new RENAME TO article_bodies")
+
+    await conn.execute('''
+        CREATE VIRTUAL TABLE IF NOT EXISTS articles_fts USING fts5(
+            title, content,
+            content = '',
+            tokenize = 'porter unicode61 remove_diacritics 2'
+        )
+    ''')
+
+    # Body mới -> index (title lấy từ articles, được ghi trước body trong save_to_db)
+    await conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS article_bodies_ai AFTER INSERT ON article_bodies BEGIN
+            INSERT INTO articles_fts (rowid, title, content)
+            SELECT NEW.doc_id, a.title, inflate_text(NEW.body) FROM articles a WHERE a.id = NEW.article_id;
+        END
+    ''')
+    # Contentless FTS5: xóa phải cung cấp lại đúng token gốc
+    await conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS article_bodies_ad AFTER DELETE ON article_bodies BEGIN
+            INSERT INTO articles_fts (articles_fts, rowid, title, content)
+            SELECT 'delete', OLD.doc_id, a.title, inflate_text(OLD.body) FROM articles a WHERE a.id = OLD.article_id;
+        END
+    ''')
+    # Xóa bài viết -> xóa body trước (khi dòng articles còn tồn tại để trigger trên lấy được title)
+    await conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS articles_bd BEFORE DELETE ON articles BEGIN
+            DELETE FROM article_bodies WHERE article_id = OLD.id;
+        END
+    ''')
+
+    await conn.execute('''
+        INSERT INTO articles_fts (rowid, title, content)
+        SELECT b.doc_id, a.title, inflate_text(b.body)
+        FROM article_bodies b JOIN articles a ON a.id = b.article_id
+    ''')
+
+async def _m007_signal_claims(conn: aiosqlite.Connection) -> None:
+    """Claim token + lease cho trade_signals (claim_signals: nhiều trader chạy song song không xử lý trùng)"""
+    await _add_column(conn, "trade_signals", "claim_token", "TEXT")
+    await _add_column(conn, "trade_signals", "claim_expires_ts", "INTEGER")  # epoch giây (UTC)
+
+# --- Trade statistics (summary tables, cập nhật bởi trigger) ---
+
+# Biểu thức cho 1 lệnh đã đóng (ref = NEW/OLD trong trigger)
+def _trade_stats_values(ref: str, sign: int) -> Tuple[str, str]:
+    profit = f"COALESCE({ref}.profit, 0)"
+    strategy_row = (
+        f"COALESCE({ref}.strategy, 'MANUAL'), {sign}, {sign} * ({profit} > 0), {sign} * ({profit} < 0), "
+        f"{sign} * {profit}, {sign} * MAX({profit}, 0), {sign} * MIN({profit}, 0)"
+    )
+    daily_row = (
+        f"COALESCE(date({ref}.close_time), date({ref}.open_time), 'N/A'), {sign}, {sign} * ({profit} > 0), "
+        f"{sign} * ({profit} < 0), {sign} * {profit}"
+    )
+    return strategy_row, daily_row
+
+def _trade_stats_statements(ref: str, sign: int) -> str:
+    """Các câu UPSERT cộng (sign=1) / trừ (sign=-1) đóng góp của 1 lệnh CLOSED vào bảng thống kê"""
+    strategy_row, daily_row = _trade_stats_values(ref, sign)
+    sql = f'''
+            INSERT INTO trade_strategy_stats (strategy, trades, wins, losses, net_profit, gross_profit, gross_loss)
+            VALUES ({strategy_row})
+            ON CONFLICT(strategy) DO UPDATE SET
+                trades = trades + excluded.trades, wins = wins + excluded.wins, losses = losses + excluded.losses,
+                net_profit = net_profit + excluded.net_profit,
+                gross_profit = gross_profit + excluded.gross_profit, gross_loss = gross_loss + excluded.gross_loss;
+            INSERT INTO trade_daily_pnl (day, trades, wins, losses, net_profit)
+            VALUES ({daily_row})
+            ON CONFLICT(day) DO UPDATE SET
+                trades = trades + excluded.trades, wins = wins + excluded.wins, losses = losses + excluded.losses,
+                net_profit = net_profit + excluded.net_profit;
+    '''
+    if sign < 0:
+        sql += '''
+            DELETE FROM trade_strategy_stats WHERE trades <= 0;
+            DELETE FROM trade_daily_pnl WHERE trades <= 0;
+    '''
+    return sql
+
+# Lấp đầy lại bảng thống kê từ trade_history (dùng cho migration & database.rebuild_trade_stats)
+REBUILD_TRADE_STATS_SQL = [
+    "DELETE FROM trade_strategy_stats",
+    "DELETE FROM trade_daily_pnl",
+    '''
+        INSERT INTO trade_strategy_stats (strategy, trades, wins, losses, net_profit, gross_profit, gross_loss)
+        SELECT COALESCE(strategy, 'MANUAL'), COUNT(*),
+               SUM(COALESCE(profit, 0) > 0), SUM(COALESCE(profit, 0) < 0), SUM(COALESCE(profit, 0)),
+               SUM(MAX(COALESCE(profit, 0), 0)), SUM(MIN(COALESCE(profit, 0), 0))
+        FROM trade_history WHERE status = 'CLOSED'
+        GROUP BY COALESCE(strategy, 'MANUAL')
+    ''',
+    '''
+        INSERT INTO trade_daily_pnl (day, trades, wins, losses, net_profit)
+        SELECT COALESCE(date(close_time), date(open_time), 'N/A'), COUNT(*),
+               SUM(COALESCE(profit, 0) > 0), SUM(COALESCE(profit, 0) < 0), SUM(COALESCE(profit, 0))
+        FROM trade_history WHERE status = 'CLOSED'
+        GROUP BY COALESCE(date(close_time), date(open_time), 'N/A')
+    ''',
+]
+
+async def _m008_trade_stats(conn: aiosqlite.Connection) -> None:
+    """
+    Bảng thống kê giao dịch duy trì tăng dần (thay cho việc dashboard đọc toàn bộ trade_history):
+    - trade_strategy_stats: tổng hợp theo strategy.
+    - trade_daily_pnl: PnL theo ngày (UTC).
+    - view trade_equity_curve: equity lũy kế + drawdown theo ngày (tính trên vài trăm dòng daily).
+    Trigger trên trade_history trừ đóng góp cũ / cộng đóng góp mới mỗi khi lệnh CLOSED được ghi/sửa/xóa.
+    """
+    await conn.execute('''
+        CREATE TABLE IF NOT EXISTS trade_strategy_stats (
+            strategy TEXT PRIMARY KEY,
+            trades INTEGER NOT NULL DEFAULT 0,
+            wins INTEGER NOT NULL DEFAULT 0,
+            losses INTEGER NOT NULL DEFAULT 0,
+            net_profit REAL NOT NULL DEFAULT 0,
+            gross_profit REAL NOT NULL DEFAULT 0,
+            gross_loss REAL NOT NULL DEFAULT 0
+        )
+    ''')
+    await conn.execute('''
+        CREATE TABLE IF NOT EXISTS trade_daily_pnl (
+            day TEXT PRIMARY KEY,  -- YYYY-MM-DD (UTC, theo close_time)
+            trades INTEGER NOT NULL DEFAULT 0,
+            wins INTEGER NOT NULL DEFAULT 0,
+            losses INTEGER NOT NULL DEFAULT 0,
+            net_profit REAL NOT NULL DEFAULT 0
+        )
+    ''')
+    await conn.execute('''
+        CREATE VIEW IF NOT EXISTS trade_equity_curve AS
+        SELECT day, trades, wins, losses, net_profit, equity,
+               MAX(equity) OVER (ORDER BY day ROWS UNBOUNDED PRECEDING) - equity AS drawdown
+        FROM (
+            SELECT *, SUM(net_profit) OVER (ORDER BY day ROWS UNBOUNDED PRECEDING) AS equity
+            FROM trade_daily_pnl
+        )
+    ''')
+
+    watched = "status, profit, strategy, open_time, close_time"
+    await conn.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trade_stats_ai AFTER INSERT ON trade_history
+        WHEN NEW.status = 'CLOSED' BEGIN {_trade_stats_statements("NEW", 1)} END
+    ''')
+    await conn.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trade_stats_ad AFTER DELETE ON trade_history
+        WHEN OLD.status = 'CLOSED' BEGIN {_trade_stats_statements("OLD", -1)} END
+    ''')
+    # UPDATE: trừ đóng góp cũ (nếu đã CLOSED) + cộng đóng góp mới (nếu CLOSED); thứ tự chạy không ảnh hưởng kết quả
+    await conn.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trade_stats_au_add AFTER UPDATE OF {watched} ON trade_history
+        WHEN NEW.status = 'CLOSED' BEGIN {_trade_stats_statements("NEW", 1)} END
+    ''')
+    await conn.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trade_stats_au_sub AFTER UPDATE OF {watched} ON trade_history
+        WHEN OLD.status = 'CLOSED' BEGIN {_trade_stats_statements("OLD", -1)} END
+    ''')
+
+    for sql in REBUILD_TRADE_STATS_SQL:
+        await conn.execute(sql)
+
+async def _m009_article_fingerprints(conn: aiosqlite.Connection) -> None:
+    """
+    SimHash nội dung bài viết (phát hiện tin gần trùng giữa các nguồn):
+    - simhash: fingerprint 64-bit (signed), tính lúc save_to_db. Bài cũ để NULL (không backfill).
+    - duplicate_of: id bài gốc nếu bài này gần trùng (NULL = bài gốc); realtime_alert / analyze_market bỏ qua.
+    """
+    await _add_column(conn, "articles", "simhash", "INTEGER")
+    await _add_column(conn, "articles", "duplicate_of", "TEXT")
+    # Nạp index fingerprint gần đây khi khởi động (lọc theo created_at_ts)
+    await conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_articles_created_ts
+        ON articles (created_at_ts)
+    ''')
+
+# FTS5 contentless_delete (SQLite >= 3.43): xóa theo rowid mà không cần nội dung gốc
+FTS_CONTENTLESS_DELETE = sqlite3.sqlite_version_info >= (3, 43, 0)
+
+async def _m010_articles_fts_rowid_delete(conn: aiosqlite.Connection) -> None:
+    """
+    Trigger xóa của articles_fts không gọi inflate_text nữa: kết nối sqlite3 thường (script, dashboard, prune tay)
+    không có function này nên DELETE bài / body từng lỗi "no such function".
+    - SQLite >= 3.43: contentless_delete=1 (vẫn chỉ lưu index), xóa theo rowid.
+    - Bản cũ hơn: FTS5 lưu kèm title + content (tốn thêm dung lượng) để xóa được theo rowid.
+    Dựng lại index từ article_bodies (migration chạy trên kết nối của DBPool, có inflate_text).
+    """
+    options = "content = '', contentless_delete = 1," if FTS_CONTENTLESS_DELETE else ""
+    await conn.execute("DROP TRIGGER IF EXISTS article_bodies_ad")
+    await conn.execute("DROP TABLE IF EXISTS articles_fts")
+    await conn.execute(f'''
+        CREATE VIRTUAL TABLE articles_fts USING fts5(
+            title, content, {options}
+            tokenize = 'porter unicode61 remove_diacritics 2'
+        )
+    ''')
+    await conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS article_bodies_ad AFTER DELETE ON article_bodies BEGIN
+            DELETE FROM articles_fts WHERE rowid = OLD.doc_id;
+        END
+    ''')
+    await conn.execute('''
+        INSERT INTO articles_fts (rowid, title, content)
+        SELECT b.doc_id, a.title, inflate_text(b.body)
+        FROM article_bodies b JOIN articles a ON a.id = b.article_id
+    ''')
+
+Migration = Tuple[int, str, Callable[[aiosqlite.Connection], Awaitable[None]]]
+
+MIGRATIONS: List[Migration] = [
+    (1, "baseline_schema", _m001_baseline_schema),
+    (2, "hot_query_indexes", _m002_hot_query_indexes),
+    (3, "economic_events_natural_key", _m003_economic_events_natural_key),
+    (4, "epoch_time_columns", _m004_epoch_time_columns),
+    (5, "article_cold_storage", _m005_article_cold_storage),
+    (6, "articles_fts", _m006_articles_fts),
+    (7, "signal_claims", _m007_signal_claims),
+    (8, "trade_stats", _m008_trade_stats),
+    (9, "article_fingerprints", _m009_article_fingerprints),
+    (10, "articles_fts_rowid_delete", _m010_articles_fts_rowid_delete),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+# --- RUNNER ---
+
+async def get_schema_version(conn: aiosqlite.Connection) -> int:
+    await conn.execute('''
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version INTEGER PRIMARY KEY,
+            name TEXT,
+            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    async with conn.execute("SELECT COALESCE(MAX(version), 0) FROM schema_migrations") as cursor:
+        row = await cursor.fetchone()
+        return row[0]
+
+async def run_migrations(conn: aiosqlite.Connection) -> int:
+    """
+    Áp dụng các migration chưa chạy (mỗi migration 1 transaction riêng).
+    Output: schema version hiện tại.
+    """
+    current = await get_schema_version(conn)
+    await conn.commit()
+
+    for version, name, migrate in MIGRATIONS:
+        if version <= current:
+            continue
+
+        try:
+            await conn.execute("BEGIN")
+            await migrate(conn)
+            await conn.execute(
+                "INSERT INTO schema_migrations (version, name) VALUES (?, ?)", (version, name)
+            )
+            await conn.commit()
+            current = version
+            logger.info(f"🗄️ Applied DB migration #{version:03d} ({name})")
+        except Exception as e:
+            await conn.rollback()
+            logger.error(f"❌ Migration #{version:03d} ({name}) thất bại: {e}")
+            raise
+
+    return current
+
+async def ensure_incremental_auto_vacuum(conn: aiosqlite.Connection) -> bool:
+    """
+    Chuyển DB cũ (tạo trước khi bật auto_vacuum=INCREMENTAL) sang INCREMENTAL bằng VACUUM 1 lần lúc khởi động.
+    VACUUM không chạy được trong transaction nên không nằm trong MIGRATIONS; chạy ngay sau run_migrations.
+    Output: True nếu vừa chuyển đổi.
+    """
+    async with conn.execute("PRAGMA auto_vacuum") as cursor:
+        mode = (await cursor.fetchone())[0]
+    if mode == 2:
+        return False
+
+    logger.info("🧹 Chuyển DB sang auto_vacuum=INCREMENTAL (VACUUM 1 lần)...")
+    async with conn.execute("PRAGMA auto_vacuum=INCREMENTAL"):
+        pass
+    async with conn.execute("VACUUM"):
+        pass
+    return True
@@ -0,0 +1,107 @@
+"""
+Pipeline bất đồng bộ nhiều stage (Async).
+
+- Mỗi stage có N worker (concurrency riêng), đọc từ 1 asyncio.Queue có giới hạn và đẩy kết quả sang queue kế tiếp
+  -> stage sau chậm thì stage trước tự dừng chờ (backpressure), RAM không phình theo số bài.
+- `run()` là async generator: kết quả của stage cuối được trả ra ngay khi có, không chờ cả pipeline xong.
+- Consumer dừng sớm (break / lỗi) -> toàn bộ worker bị hủy.
+- Thống kê theo stage (số item vào/ra, thời gian bận) trong `stats`.
+"""
+import asyncio
+import time
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Iterable, List
+
+from app.core import config
+
+logger = config.logger
+
+_DONE = object()
+
+# fn(item, emit): xử lý 1 item, gọi `await emit(x)` cho mỗi kết quả (0..n) gửi sang stage sau
+StageFn = Callable[[Any, Callable[[Any], Awaitable[None]]], Awaitable[None]]
+
+
+class Stage:
+    def __init__(self, name: str, fn: StageFn, concurrency: int = 1):
+        self.name = name
+        self.fn = fn
+        self.concurrency = max(1, concurrency)
+        self.items_in = 0
+        self.items_out = 0
+        self.busy_seconds = 0.0     # Thời gian xử lý (không tính lúc chờ stage sau nhận item)
+        self.blocked_seconds = 0.0  # Thời gian chờ do backpressure
+
+
+class Pipeline:
+    def __init__(self, name: str, queue_size: int = None):
+        self.name = name
+        self.queue_size = max(1, queue_size if queue_size else config.CRAWLER_PIPELINE_QUEUE_SIZE)
+        self.stages: List[Stage] = []
+
+    def add_stage(self, name: str, fn: StageFn, concurrency: int = 1) -> "Pipeline":
+        self.stages.append(Stage(name, fn, concurrency))
+        return self
+
+    @property
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        return {
+            s.name: {"in": s.items_in, "out": s.items_out, "busy_s": round(s.busy_seconds, 3),
+                     "blocked_s": round(s.blocked_seconds, 3), "workers": s.concurrency}
+            for s in self.stages
+        }
+
+    async def _worker(self, stage: Stage, inbox: asyncio.Queue, outbox: asyncio.Queue) -> None:
+        blocked = 0.0
+
+        async def emit(result: Any) -> None:
+            nonlocal blocked
+            stage.items_out += 1
+            started = time.perf_counter()
+            await outbox.put(result)
+            blocked += time.perf_counter() - started
+
+        while True:
+            item = await inbox.get()
+            if item is _DONE:
+                await inbox.put(_DONE)  # Báo cho worker khác cùng stage
+                return
+            stage.items_in += 1
+            blocked = 0.0
+            started = time.perf_counter()
+            try:
+                await stage.fn(item, emit)
+            except Exception as e:
+                logger.error(f"❌ Pipeline {self.name}/{stage.name} lỗi: {e}")
+            finally:
+                stage.busy_seconds += time.perf_counter() - started - blocked
+                stage.blocked_seconds += blocked
+
+    async def _run_stage(self, stage: Stage, inbox: asyncio.Queue, outbox: asyncio.Queue) -> None:
+        await asyncio.gather(*[self._worker(stage, inbox, outbox) for _ in range(stage.concurrency)])
+        await outbox.put(_DONE)
+
+    async def run(self, items: Iterable[Any]) -> AsyncIterator[Any]:
+        """Đưa `items` vào stage đầu, trả ra (async generator) kết quả của stage cuối theo thứ tự hoàn thành."""
+        queues = [asyncio.Queue(self.queue_size) for _ in range(len(self.stages) + 1)]
+
+        async def feed() -> None:
+            for item in items:
+                await queues[0].put(item)
+            await queues[0].put(_DONE)
+
+        tasks = [asyncio.create_task(feed())]
+        tasks += [
+            asyncio.create_task(self._run_stage(stage, queues[i], queues[i + 1]))
+            for i, stage in enumerate(self.stages)
+        ]
+        try:
+            while True:
+                result = await queues[-1].get()
+                if result is _DONE:
+                    break
+                yield result
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            logger.debug(f"🧵 Pipeline {self.name}: {self.stats}")
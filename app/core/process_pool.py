@@ -0,0 +1,59 @@
+"""
+Process pool cho tác vụ CPU-bound (parse HTML) - không tranh GIL với event loop như default thread pool.
+
+- Số worker có giới hạn (VD: `CRAWLER_EXTRACT_WORKERS`); 0 = chạy trong default thread pool như cũ.
+- `warm_up()` khi khởi động: tạo sẵn toàn bộ worker + chạy initializer (nạp thư viện) để burst bài đầu tiên không phải chờ.
+- Worker chết (BrokenProcessPool): tạo lại pool, lần gọi đó chạy tạm trong thread pool.
+"""
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Optional
+
+from app.core import config
+
+logger = config.logger
+
+
+def _noop() -> None:
+    return None
+
+
+class WorkerPool:
+    def __init__(self, name: str, max_workers: int, initializer: Optional[Callable[[], None]] = None):
+        """initializer: hàm top-level (picklable) chạy 1 lần trong mỗi worker."""
+        self.name = name
+        self.max_workers = max(0, max_workers)
+        self.initializer = initializer
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers, initializer=self.initializer)
+            logger.debug(f"⚙️ Process pool '{self.name}': {self.max_workers} worker")
+        return self._executor
+
+    async def run(self, fn: Callable[..., Any], *args) -> Any:
+        """Chạy fn(*args) (fn + args phải picklable) trong process pool."""
+        loop = asyncio.get_running_loop()
+        if not self.max_workers:
+            return await loop.run_in_executor(None, fn, *args)
+        try:
+            return await loop.run_in_executor(self._get_executor(), fn, *args)
+        except BrokenProcessPool:
+            logger.warning(f"⚠️ Process pool '{self.name}' bị hỏng, tạo lại (lần này chạy trong thread).")
+            self.shutdown()
+            return await loop.run_in_executor(None, fn, *args)
+
+    async def warm_up(self) -> None:
+        """Khởi tạo toàn bộ worker ngay (mỗi worker 1 task rỗng, initializer chạy khi worker khởi động)."""
+        if not self.max_workers:
+            return
+        await asyncio.gather(*[self.run(_noop) for _ in range(self.max_workers)])
+        logger.info(f"⚙️ Process pool '{self.name}' sẵn sàng ({self.max_workers} worker).")
+
+    def shutdown(self) -> None:
+        """Dừng worker (không chờ task đang chạy). Lần run() sau sẽ tạo pool mới."""
+        executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
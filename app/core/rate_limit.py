@@ -0,0 +1,89 @@
+"""
+Giới hạn tốc độ / đồng thời cho HTTP crawler (Async).
+
+- Mỗi host có 1 Semaphore (`CRAWLER_HOST_CONCURRENCY` request song song) và 1 Token Bucket
+  (`CRAWLER_HOST_RATE` request/giây, cho phép burst `CRAWLER_HOST_BURST`) thay cho sleep ngẫu nhiên cố định.
+- 1 Semaphore toàn cục (`CRAWLER_MAX_CONCURRENCY`) giới hạn tổng số request đang chạy.
+- Trạng thái gắn với event loop hiện tại (tự tạo lại khi asyncio.run() mới, giống DB pool).
+"""
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from typing import Dict, Optional
+from urllib.parse import urlparse
+
+from app.core import config
+
+logger = config.logger
+
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: int):
+        """rate: token/giây (<= 0 = không giới hạn). burst: số token tối đa tích lũy."""
+        self.rate = rate
+        self.capacity = max(1, burst)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> float:
+        """Lấy 1 token (chờ nếu hết). Trả về số giây đã chờ."""
+        if self.rate <= 0:
+            return 0.0
+
+        waited = 0.0
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return waited
+                delay = (1 - self.tokens) / self.rate
+                waited += delay
+                await asyncio.sleep(delay)
+
+
+class HostLimiter:
+    def __init__(self, host: str):
+        self.host = host
+        self.semaphore = asyncio.Semaphore(max(1, config.CRAWLER_HOST_CONCURRENCY))
+        self.bucket = TokenBucket(config.CRAWLER_HOST_RATE, config.CRAWLER_HOST_BURST)
+
+
+_limiters: Dict[str, HostLimiter] = {}
+_global: Optional[asyncio.Semaphore] = None
+_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def get_limiter(url: str) -> HostLimiter:
+    """Limiter của host trong URL (dùng chung cho mọi request tới host đó)."""
+    global _global, _loop
+    loop = asyncio.get_running_loop()
+    if _loop is not loop:
+        # Semaphore/Lock cũ gắn với event loop đã đóng
+        _limiters.clear()
+        _global = asyncio.Semaphore(max(1, config.CRAWLER_MAX_CONCURRENCY))
+        _loop = loop
+
+    host = urlparse(url).hostname or url
+    limiter = _limiters.get(host)
+    if limiter is None:
+        limiter = _limiters[host] = HostLimiter(host)
+    return limiter
+
+
+@asynccontextmanager
+async def host_slot(url: str):
+    """
+    Mượn 1 slot để gửi request tới URL: semaphore của host -> token bucket -> semaphore toàn cục.
+    Slot toàn cục chỉ bị giữ khi request thật sự chạy (host đang chờ token không chiếm slot của host khác).
+    """
+    limiter = get_limiter(url)
+    async with limiter.semaphore:
+        waited = await limiter.bucket.acquire()
+        if waited:
+            logger.debug(f"   ...Rate limit {limiter.host}: chờ {waited:.1f}s")
+        async with _global:
+            yield
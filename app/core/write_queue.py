@@ -0,0 +1,165 @@
+"""
+Write-Behind Queue với Group Commit (Async).
+
+- Các lệnh ghi tần suất cao được xếp hàng, 1 task writer duy nhất gom lại và commit trong 1 transaction
+  mỗi `DB_WRITE_FLUSH_MS` ms hoặc khi đủ `DB_WRITE_MAX_BATCH` lệnh.
+- Lệnh có `key` giống nhau được gộp (coalesce): chỉ giữ lệnh cuối cùng (VD: floating profit theo ticket).
+- Caller cần độ bền (VD: lưu lệnh vừa khớp) dùng `execute()` / `flush()` để chờ commit xong.
+"""
+import asyncio
+import itertools
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, List, Optional, Sequence
+
+from app.core import config
+from app.core import db_metrics
+
+logger = config.logger
+
+
+class _PendingWrite:
+    __slots__ = ("sql", "params", "futures")
+
+    def __init__(self, sql: str, params: Sequence[Any], futures: List[asyncio.Future]):
+        self.sql = sql
+        self.params = params
+        self.futures = futures
+
+
+class WriteBehindQueue:
+    def __init__(self, connection_factory: Callable, flush_interval_ms: int = None, max_batch: int = None):
+        """
+        connection_factory: async context manager trả về kết nối Writer, gọi lại ở mỗi lần commit
+        (database truyền hàm lấy Writer của pool hiện tại, không gắn cứng 1 pool).
+        """
+        self.connection_factory = connection_factory
+        self.flush_interval = (flush_interval_ms if flush_interval_ms is not None else config.DB_WRITE_FLUSH_MS) / 1000
+        self.max_batch = max_batch if max_batch else config.DB_WRITE_MAX_BATCH
+        self.loop = asyncio.get_running_loop()
+
+        self._pending: "OrderedDict[Hashable, _PendingWrite]" = OrderedDict()
+        self._inflight: List[_PendingWrite] = []
+        self._seq = itertools.count()
+        self._has_work = asyncio.Event()
+        self._flush_now = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def pending_count(self) -> int:
+        return len(self._pending) + len(self._inflight)
+
+    def enqueue(self, sql: str, params: Sequence[Any] = (), key: Hashable = None) -> asyncio.Future:
+        """
+        Xếp hàng 1 lệnh ghi. Trả về Future -> True/False khi batch chứa lệnh được commit.
+        key: lệnh mới có cùng key thay thế lệnh cũ còn chờ (lệnh mới được đưa xuống cuối hàng).
+        """
+        if self._task is None or self._task.done():
+            self._task = self.loop.create_task(self._run())
+
+        future = self.loop.create_future()
+        futures = [future]
+
+        if key is None:
+            key = ("_seq", next(self._seq))
+        else:
+            replaced = self._pending.pop(key, None)
+            if replaced:
+                futures = replaced.futures + futures
+
+        self._pending[key] = _PendingWrite(sql, tuple(params), futures)
+        self._has_work.set()
+        if len(self._pending) >= self.max_batch:
+            self._flush_now.set()
+        return future
+
+    async def execute(self, sql: str, params: Sequence[Any] = (), key: Hashable = None) -> bool:
+        """Xếp hàng rồi chờ lệnh được commit (dùng cho dữ liệu cần bền vững ngay)."""
+        future = self.enqueue(sql, params, key)
+        self._flush_now.set()
+        return await future
+
+    async def flush(self) -> bool:
+        """Commit ngay mọi lệnh đang chờ. Trả về False nếu có lệnh lỗi."""
+        ops = list(self._pending.values()) + self._inflight
+        if not ops:
+            return True
+        futures = [f for op in ops for f in op.futures]
+        self._flush_now.set()
+        results = await asyncio.gather(*futures)
+        return all(results)
+
+    async def close(self) -> None:
+        """Flush phần còn lại rồi dừng writer task."""
+        await self.flush()
+        if self._task and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            await self._has_work.wait()
+
+            # Cửa sổ group commit: chờ thêm lệnh tới khi hết thời gian hoặc có yêu cầu flush
+            if not self._flush_now.is_set():
+                try:
+                    await asyncio.wait_for(self._flush_now.wait(), timeout=self.flush_interval)
+                except asyncio.TimeoutError:
+                    pass
+
+            batch = list(self._pending.values())
+            self._pending.clear()
+            self._has_work.clear()
+            self._flush_now.clear()
+
+            if batch:
+                self._inflight = batch
+                try:
+                    await self._commit(batch)
+                finally:
+                    self._inflight = []
+
+    async def _commit(self, batch: List[_PendingWrite]) -> None:
+        if db_metrics.ENABLED:
+            # Task writer được tạo trong context của helper gọi enqueue() -> tách riêng số liệu của group commit
+            with db_metrics.track("write_queue.commit"):
+                await self._commit_batch(batch)
+        else:
+            await self._commit_batch(batch)
+
+    async def _commit_batch(self, batch: List[_PendingWrite]) -> None:
+        try:
+            async with self.connection_factory() as conn:
+                try:
+                    for op in batch:
+                        await conn.execute(op.sql, op.params)
+                    await conn.commit()
+                    self._resolve(batch, True)
+                    return
+                except Exception as e:
+                    await conn.rollback()
+                    logger.warning(f"⚠️ Group commit lỗi ({len(batch)} lệnh): {e}. Ghi lại từng lệnh...")
+
+                # Fallback: mỗi lệnh 1 transaction để 1 lệnh lỗi không kéo cả batch
+                for op in batch:
+                    try:
+                        await conn.execute(op.sql, op.params)
+                        await conn.commit()
+                        self._resolve([op], True)
+                    except Exception as e:
+                        await conn.rollback()
+                        logger.error(f"❌ Write-behind lỗi: {e} | SQL: {op.sql.strip()[:120]}")
+                        self._resolve([op], False)
+        except Exception as e:
+            logger.error(f"❌ Write-behind không lấy được kết nối: {e}")
+            self._resolve(batch, False)
+
+    @staticmethod
+    def _resolve(batch: List[_PendingWrite], ok: bool) -> None:
+        for op in batch:
+            for future in op.futures:
+                if not future.done():
+                    future.set_result(ok)
@@ -0,0 +1,29 @@
+"""
+Worker bảo trì Database (Async): dọn bài viết cũ + trả dung lượng trống (incremental vacuum).
+"""
+import asyncio
+from app.core import database
+from app.core import config
+
+logger = config.logger
+
+async def main():
+    try:
+        logger.info(f"🧹 [DB MAINTENANCE] Dọn bài viết đã xử lý cũ hơn {config.ARTICLE_RETENTION_DAYS} ngày...")
+
+        deleted = await database.prune_old_articles(config.ARTICLE_RETENTION_DAYS)
+        free_pages = await database.incremental_vacuum(config.DB_INCREMENTAL_VACUUM_PAGES)
+
+        logger.info(f"🧹 [DB MAINTENANCE] Đã xóa {deleted} bài viết. Trang trống còn lại: {free_pages}")
+
+    except Exception as e:
+        logger.error(f"❌ DB Maintenance Error: {e}", exc_info=True)
+
+if __name__ == "__main__":
+    async def _run():
+        await database.init_db()
+        try:
+            await main()
+        finally:
+            await database.close_db()
+    asyncio.run(_run())
@@ -3,153 +3,196 @@ Worker riêng biệt cho Real-time Alert (Async).
 """
 import datetime
 import asyncio
+import time
+from contextlib import aclosing
+from typing import Any, Dict
 from app.core import database
 from app.services import ai_engine
 from app.services import telegram_bot
 from app.services import news_crawler
+from app.services import poll_scheduler
 from app.services.trader import AutoTrader
 from app.core import config
+from app.utils import keyword_matcher
 
 logger = config.logger
 
+# Quét lại tin chưa Alert trong SWEEP_LOOKBACK_MINUTES phút qua mỗi tick.
+# Bài đã screen (không phải tin nóng) được nhớ qua các tick (id -> hết hạn, monotonic) để không gửi AI lại mỗi POLL_TICK_SECONDS;
+# TTL dài hơn cửa sổ quét nên bài luôn ra khỏi cửa sổ trước khi bị quên
+SWEEP_LOOKBACK_MINUTES = 5
+SCREENED_TTL_SECONDS = 2 * SWEEP_LOOKBACK_MINUTES * 60
+_screened: Dict[str, float] = {}
+
+def _mark_screened(article_id: str) -> None:
+    _screened[article_id] = time.monotonic() + SCREENED_TTL_SECONDS
+
+def _prune_screened() -> None:
+    now = time.monotonic()
+    for article_id in [k for k, expires in _screened.items() if expires <= now]:
+        del _screened[article_id]
+
+async def screen_article(article: Dict[str, Any]) -> None:
+    """Lọc 1 bài (keyword tiêu đề -> AI) và gửi Breaking News nếu đạt."""
+    matcher = keyword_matcher.get_matcher()
+
+    # Defense Layer (metadata only, nội dung chỉ load khi cần gọi AI)
+    if (article.get('content_length') or 0) < 200:
+        return
+
+    # Pre-filter: quét tiêu đề 1 lượt (blacklist / urgent / breaking)
+    title_hits = matcher.match(article['title'], {keyword_matcher.BLACKLIST, keyword_matcher.URGENT, keyword_matcher.BREAKING})
+
+    # --- BLACKLIST FILTER: Loại bỏ tin không liên quan ---
+    if keyword_matcher.BLACKLIST in title_hits:
+        logger.debug(f"   -> SKIP: Tin chứa từ khóa ngoại lai ({article['title']})")
+        return
+    # ---------------------------------------------------
+
+    if keyword_matcher.URGENT not in title_hits:
+        return
+
+    # Lazy-load nội dung (cold storage) nếu crawler chưa đưa sẵn
+    content = article.get('content')
+    if content is None:
+        content = await database.get_article_content(article['id'])
+    if len(content) < 200 or "Lỗi cào dữ liệu" in content:
+        return
+
+    # Check Breaking AI (Async)
+    analysis = await ai_engine.check_breaking_news(content)
+    if not analysis: return
+        
+    is_breaking = analysis.get('is_breaking', False)
+    score = analysis.get('score', 0)
+    headline_vi = analysis.get('headline_vi', article['title'])
+    summary_vi = analysis.get('summary_vi', '')
+    impact_vi = analysis.get('impact_vi', '')
+    
+    # Keyword Override
+    if keyword_matcher.BREAKING in title_hits:
+        is_breaking = True
+        if score < 5: score = 8 
+
+    if is_breaking:
+        logger.warning(f"🔥 BREAKING NEWS: {headline_vi}")
+        
+        # --- SEND TELEGRAM ---
+        score_val = abs(score)
+        if score_val >= 8:
+            warn_text = "🔥 TÁC ĐỘNG: CỰC MẠNH (Lưu ý rủi ro)"
+        elif score_val >= 5:
+            warn_text = "⚡ TÁC ĐỘNG: MẠNH"
+        else:
+            warn_text = "⚠️ TÁC ĐỘNG: TRUNG BÌNH"
+
+        message = (
+                f"🚨 <b>{headline_vi}</b>\n\n"
+                f"📝 {summary_vi}\n"
+                f"💥 <b>Phân tích:</b> {impact_vi}\n"
+                f"{warn_text} \n"
+                f"#Breaking"
+            )
+        image_url = article.get("image_url")
+        if image_url:
+             await telegram_bot.send_report_to_telegram(message, [image_url])
+             logger.info("✅ Đã gửi Breaking News đến Telegram (có ảnh)")
+        else:
+             await telegram_bot.send_message_async(message)
+             logger.info("✅ Đã gửi Breaking News đến Telegram")
+        
+        # --- WORDPRESS (Sync wrapped in Thread) ---
+        try:
+            from app.services.wordpress_service import wordpress_service
+            if wordpress_service.enabled:
+                wp_title = f"🚨 {headline_vi}"
+                wp_content = (
+                    f"📝 {summary_vi}\n"
+                    f"💥 <strong>Phân tích:</strong> {impact_vi}\n"
+                    f"<strong>{warn_text}</strong>"
+                )
+                # Assuming create_liveblog_entry is sync
+                await asyncio.to_thread(
+                    wordpress_service.create_liveblog_entry, 
+                    title=wp_title, content=wp_content, image_url=image_url
+                )
+        except Exception as e: 
+            logger.error(f"❌ WordPress Error: {e}")
+        
+        # --- TRIGGER AUTO TRADER (ACTIONABLE) ---
+        try:
+            if score_val >= 5: 
+                logger.info("🤖 Activating Auto Trader...")
+                trader = AutoTrader()
+                ai_trend = analysis.get('trend_forecast', 'NEUTRAL').upper()
+                if ai_trend == "BULLISH":
+                    trend_est = "BULLISH"
+                    logger.info("   📈 AI Prediction: Vàng sẽ TĂNG giá.")
+                elif ai_trend == "BEARISH":
+                    trend_est = "BEARISH"
+                    logger.info("   📉 AI Prediction: Vàng sẽ GIẢM giá.")
+                else:
+                    trend_est = "NEUTRAL"
+                    logger.info("   ⚖️ AI Prediction: Không rõ xu hướng hoặc Sideway.")
+                    
+                news_data = {
+                    'title': headline_vi,
+                    'score': score_val,
+                    'trend': trend_est, 
+                    'source': 'NEWS', 
+                    'symbol': 'XAUUSD'
+                }
+                await trader.process_news_signal(news_data)
+        except Exception as e:
+            logger.error(f"❌ Trader Trigger Failed: {e}")
+
+        # Mark Alerted
+        await database.mark_article_alerted(article['id'])
+
 async def main():
     try:
         logger.debug("⚡ [ALERT WORKER] BẮT ĐẦU QUÉT TIN NÓNG...")
         
-        # 1. Trigger Crawler (Async)
-        # Note: get_gold_news should be awaited
-        await news_crawler.get_gold_news(lookback_minutes=5, fast_mode=True)
+        # 1. Chỉ poll các nguồn đã đến hạn (lịch thích ứng theo tần suất đăng bài / lịch kinh tế / lỗi)
+        scheduler = poll_scheduler.get_scheduler()
+        due_sources = await scheduler.due_sources(config.NEWS_SOURCES)
+        _prune_screened()
+        if due_sources:
+            logger.debug(f"   -> Nguồn đến hạn: {[s.get('name') for s in due_sources]}")
+            lookback = scheduler.lookback_minutes(due_sources)
+
+            # Crawler dạng stream: screen từng bài ngay khi vừa lưu DB,
+            # không chờ các bài khác trong batch tải / parse xong
+            # aclosing: screen lỗi giữa chừng vẫn đóng crawler ngay (commit bài đã lưu, ghi thống kê)
+            async with aclosing(news_crawler.stream_gold_news(lookback_minutes=lookback, fast_mode=True,
+                                                              sources=due_sources)) as stream:
+                async for item in stream:
+                    if item.get('duplicate_of'):
+                        _mark_screened(item['id'])
+                        continue
+                    await screen_article({**item, 'content_length': len(item.get('content') or '')})
+                    _mark_screened(item['id'])
         
-        # 2. Lấy tin trong 5 phút qua
-        recent_articles = await database.get_unalerted_news(lookback_minutes=5)
+        # 2. Tin trong SWEEP_LOOKBACK_MINUTES phút qua chưa Alert và chưa screen (VD: lưu bởi job khác / tick trước bị lỗi)
+        recent_articles = [a for a in await database.get_unalerted_news(lookback_minutes=SWEEP_LOOKBACK_MINUTES)
+                           if a['id'] not in _screened]
 
         if not recent_articles:
-            logger.debug("   -> Không có tin mới chưa xử lý trong 5 phút qua.")
+            logger.debug(f"   -> Không có tin mới chưa xử lý trong {SWEEP_LOOKBACK_MINUTES} phút qua.")
             return
 
         logger.debug(f"   -> Tìm thấy {len(recent_articles)} tin chưa Alert. Đang checking...")
 
         for article in recent_articles:
-            # Defense Layer
-            content_sample = article.get('content', '')
-            if len(content_sample) < 200 or "Lỗi cào dữ liệu" in content_sample:
-                continue
-
-            # Pre-filter
-            title_lower = article['title'].lower()
-
-            # --- BLACKLIST FILTER: Loại bỏ tin không liên quan ---
-            ignore_keywords = ["eur", "gbp", "jpy", "aud", "nzd", "cad", "ecb", "boe", "boj", "rba", "oil", "crypto", "btc", "eth"]
-            if any(k in title_lower for k in ignore_keywords):
-                logger.debug(f"   -> SKIP: Tin chứa từ khóa ngoại lai ({article['title']})")
-                continue
-            # ---------------------------------------------------
-
-            urgent_keywords = ["cpi", "fed", "rate", "hike", "cut", "war", "explosion", 
-                               "surprise", "jump", "plunge", "miss", "beat", "non-farm", "nfp", "pmi", "gdp",
-                               "unemployment", "inflation", "biden", "trump", "powell"]
-             
-            if not any(k in title_lower for k in urgent_keywords):
-                continue
-
-            # Check Breaking AI (Async)
-            analysis = await ai_engine.check_breaking_news(article['content'])
-            if not analysis: continue
-                
-            is_breaking = analysis.get('is_breaking', False)
-            score = analysis.get('score', 0)
-            headline_vi = analysis.get('headline_vi', article['title'])
-            summary_vi = analysis.get('summary_vi', '')
-            impact_vi = analysis.get('impact_vi', '')
-            
-            # Keyword Override
-            urgent_keywords_vi = ["fed rate", "war", "nuclear", "tăng lãi suất", "chiến tranh"]
-            if any(k in article['title'].lower() for k in urgent_keywords_vi):
-                is_breaking = True
-                if score < 5: score = 8 
-
-            if is_breaking:
-                logger.warning(f"🔥 BREAKING NEWS: {headline_vi}")
-                
-                # --- SEND TELEGRAM ---
-                score_val = abs(score)
-                if score_val >= 8:
-                    warn_text = "🔥 TÁC ĐỘNG: CỰC MẠNH (Lưu ý rủi ro)"
-                elif score_val >= 5:
-                    warn_text = "⚡ TÁC ĐỘNG: MẠNH"
-                else:
-                    warn_text = "⚠️ TÁC ĐỘNG: TRUNG BÌNH"
-
-                message = (
-                        f"🚨 <b>{headline_vi}</b>\n\n"
-                        f"📝 {summary_vi}\n"
-                        f"💥 <b>Phân tích:</b> {impact_vi}\n"
-                        f"{warn_text} \n"
-                        f"#Breaking"
-                    )
-                image_url = article.get("image_url")
-                if image_url:
-                     await telegram_bot.send_report_to_telegram(message, [image_url])
-                     logger.info("✅ Đã gửi Breaking News đến Telegram (có ảnh)")
-                else:
-                     await telegram_bot.send_message_async(message)
-                     logger.info("✅ Đã gửi Breaking News đến Telegram")
-                
-                # --- WORDPRESS (Sync wrapped in Thread) ---
-                try:
-                    from app.services.wordpress_service import wordpress_service
-                    if wordpress_service.enabled:
-                        wp_title = f"🚨 {headline_vi}"
-                        wp_content = (
-                            f"📝 {summary_vi}\n"
-                            f"💥 <strong>Phân tích:</strong> {impact_vi}\n"
-                            f"<strong>{warn_text}</strong>"
-                        )
-                        # Assuming create_liveblog_entry is sync
-                        await asyncio.to_thread(
-                            wordpress_service.create_liveblog_entry, 
-                            title=wp_title, content=wp_content, image_url=image_url
-                        )
-                except Exception as e: 
-                    logger.error(f"❌ WordPress Error: {e}")
-                
-                # --- TRIGGER AUTO TRADER (ACTIONABLE) ---
-                try:
-                    if score_val >= 5: 
-                        logger.info("🤖 Activating Auto Trader...")
-                        trader = AutoTrader()
-                        ai_trend = analysis.get('trend_forecast', 'NEUTRAL').upper()
-                        if ai_trend == "BULLISH":
-                            trend_est = "BULLISH"
-                            logger.info("   📈 AI Prediction: Vàng sẽ TĂNG giá.")
-                        elif ai_trend == "BEARISH":
-                            trend_est = "BEARISH"
-                            logger.info("   📉 AI Prediction: Vàng sẽ GIẢM giá.")
-                        else:
-                            trend_est = "NEUTRAL"
-                            logger.info("   ⚖️ AI Prediction: Không rõ xu hướng hoặc Sideway.")
-                            
-                        news_data = {
-                            'title': headline_vi,
-                            'score': score_val,
-                            'trend': trend_est, 
-                            'source': 'NEWS', 
-                            'symbol': 'XAUUSD'
-                        }
-                        await trader.process_news_signal(news_data)
-                except Exception as e:
-                    logger.error(f"❌ Trader Trigger Failed: {e}")
-
-                # Mark Alerted
-                await database.mark_article_alerted(article['id'])
-                
-            else:
-                pass
+            await screen_article(article)
+            _mark_screened(article['id'])
 
     except Exception as e:
         logger.error(f"❌ Lỗi Alert Worker: {e}", exc_info=True)
 
     finally:
+        # Commit đánh dấu is_alerted đang chờ trong write-behind queue trước lượt quét kế tiếp
+        await database.flush_writes()
         logger.debug("⚡ [ALERT WORKER] HOÀN TẤT.")
 
 if __name__ == "__main__":
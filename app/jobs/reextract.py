@@ -0,0 +1,73 @@
+"""
+Re-extract nội dung bài viết từ HTML cache (Async, không truy cập mạng).
+
+Dùng khi đổi logic trích xuất (html_extractor): đọc HTML gốc từ app/core/html_cache, parse lại trong process pool
+(mỗi worker tự đọc + giải nén HTML, chỉ kết quả được gửi về), rồi ghi đè articles.content / image_url theo lô.
+Chạy: python main.py --reextract
+"""
+import asyncio
+import os
+from typing import Dict, Optional
+
+from app.core import config
+from app.core import database
+from app.core import process_pool
+from app.services import html_extractor
+
+logger = config.logger
+
+BATCH_SIZE = 200
+
+
+async def main(workers: Optional[int] = None) -> Dict[str, int]:
+    counts = {"total": 0, "updated": 0, "unchanged": 0, "not_cached": 0, "failed": 0}
+    pool = process_pool.WorkerPool("reextract", workers if workers is not None else (os.cpu_count() or 1), html_extractor.warm_up)
+    try:
+        ids = await database.get_article_ids()
+        counts["total"] = len(ids)
+        logger.info(f"♻️ [RE-EXTRACT] {len(ids)} bài viết, {pool.max_workers} worker, nguồn: {config.HTML_CACHE_DIR}")
+        await pool.warm_up()
+
+        for start in range(0, len(ids), BATCH_SIZE):
+            batch = ids[start:start + BATCH_SIZE]
+            results = await asyncio.gather(*[pool.run(html_extractor.parse_cached_article, url) for url in batch])
+            current = await database.get_article_contents(batch)
+            media = await database.get_article_media(batch)
+
+            rows = []
+            for url, result in zip(batch, results):
+                if result is None:
+                    counts["not_cached"] += 1
+                    continue
+                text = result.get("text", "")
+                # Cùng ngưỡng với crawler: nội dung quá ngắn = trích xuất lỗi, giữ bản cũ
+                if len(text) < 200:
+                    counts["failed"] += 1
+                    continue
+                # Chỉ bỏ qua khi cả nội dung, ảnh và fingerprint đều như cũ (logic mới có thể chỉ đổi ảnh)
+                stored = media.get(url, {})
+                if current.get(url) == text and stored.get("image_url") == result.get("image") \
+                        and stored.get("fingerprint") == result.get("fingerprint"):
+                    counts["unchanged"] += 1
+                    continue
+                rows.append({"id": url, "content": text, "image_url": result.get("image"),
+                             "fingerprint": result.get("fingerprint")})
+
+            counts["updated"] += await database.update_article_contents(rows)
+            logger.info(f"   -> {min(start + BATCH_SIZE, len(ids))}/{len(ids)}: {counts}")
+
+        logger.info(f"♻️ [RE-EXTRACT] HOÀN TẤT: {counts}")
+    except Exception as e:
+        logger.error(f"❌ Re-extract Error: {e}", exc_info=True)
+    finally:
+        pool.shutdown()
+    return counts
+
+if __name__ == "__main__":
+    async def _run():
+        await database.init_db()
+        try:
+            await main()
+        finally:
+            await database.close_db()
+    asyncio.run(_run())
@@ -121,6 +121,9 @@ async def main():
                     logger.warning(f"      ⚠️ History not found for #{ticket}. Keeping as OPEN to retry later.")
                     # Không update closed = 0.0 vội vàng.
         
+        # Commit các cập nhật profit/details đang chờ trong write-behind queue
+        await database.flush_writes()
+        
         logger.info(f"✅ [TRADE MONITOR] Sync complete: {closed_count} closed, {updated_count} updated")
         
     except Exception as e:
@@ -4,6 +4,7 @@ import json
 import logging
 import asyncio
 from app.core import config
+from app.core import database
 from app.utils import prompts
 from app.services.ai_base import AIService
 from app.services.gemini_service import GeminiService
@@ -41,20 +42,44 @@ async def analyze_market(
     if not articles: return None
 
     logger.info(f"🤖 AI nhận {len(articles)} bài báo...")
+
+    # 0. Bỏ bài gần trùng (cùng 1 tin đăng lại ở nguồn khác, duplicate_of = bài gốc)
+    unique_articles = [art for art in articles if not art.get('duplicate_of')]
+    if unique_articles and len(unique_articles) < len(articles):
+        logger.info(f"🔁 Bỏ {len(articles) - len(unique_articles)} bài gần trùng.")
+        articles = unique_articles
     
-    # 1. Giới hạn số lượng articles
+    # 1. Giới hạn số lượng articles: ưu tiên bài liên quan nhất (FTS5 + BM25), thiếu thì bù bài mới nhất
     MAX_ARTICLES = 10
     if len(articles) > MAX_ARTICLES:
-        articles_sorted = sorted(
-            articles, 
-            key=lambda x: x.get('published_at', ''), 
-            reverse=True
+        by_id = {art['id']: art for art in articles if art.get('id')}
+        ranked = await database.search_articles(
+            config.KEYWORDS_DIRECT + config.KEYWORDS_CORRELATION,
+            article_ids=list(by_id),
+            limit=MAX_ARTICLES
         )
-        articles = articles_sorted[:MAX_ARTICLES]
-        logger.info(f"📊 Giới hạn xuống {MAX_ARTICLES} bài mới nhất.")
+        selected = [by_id[r['id']] for r in ranked if r['id'] in by_id]
+
+        if len(selected) < MAX_ARTICLES:
+            chosen = {id(art) for art in selected}
+            articles_sorted = sorted(
+                (art for art in articles if id(art) not in chosen),
+                key=lambda x: x.get('published_at', '') or '',
+                reverse=True
+            )
+            selected += articles_sorted[:MAX_ARTICLES - len(selected)]
+
+        articles = selected
+        logger.info(f"📊 Giới hạn xuống {MAX_ARTICLES} bài ({len(ranked)} bài chọn theo độ liên quan).")
     
     logger.info(f"✅ Phân tích {len(articles)} bài báo...")
 
+    # Lazy-load nội dung (cold storage) chỉ cho các bài được chọn
+    missing_ids = [art['id'] for art in articles if 'content' not in art and art.get('id')]
+    if missing_ids:
+        contents = await database.get_article_contents(missing_ids)
+        articles = [{**art, 'content': contents.get(art.get('id'), '')} if 'content' not in art else art for art in articles]
+
     # 2. Chuẩn bị dữ liệu
     news_text = ""
     for i, art in enumerate(articles, 1):
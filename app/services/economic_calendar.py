@@ -1,17 +1,18 @@
 import time
 import html
 import json
+import hashlib
 import os
 import asyncio
 from typing import List, Dict, Optional
 import logging
 from datetime import datetime, timedelta
-from curl_cffi.requests import AsyncSession
 from bs4 import BeautifulSoup
 from dateutil import parser as date_parser
 from dateutil import tz
 from app.core import config
 from app.core import database
+from app.core import http_client
 from app.services import telegram_bot
 from app.services import ai_engine
 from app.services.trader import AutoTrader
@@ -22,6 +23,9 @@ SCHEDULE_JSON_URL = "https://nfs.faireconomy.media/ff_calendar_thisweek.json"
 CACHE_FILE = "data/ff_schedule.json"
 CACHE_TTL = 3600  # 60 minutes
 
+# sha256 của JSON lịch đã sync gần nhất (service được tạo mới mỗi phút nên giữ ở module-level)
+_last_schedule_digest: Optional[str] = None
+
 class EconomicCalendarService:
     def __init__(self):
         # 1. URL Mặc định (Scan cả tuần)
@@ -36,135 +40,141 @@ class EconomicCalendarService:
     async def _fetch_url(self, url: str):
         """
         Helper: Browser Rotation & Retry Mechanism (Async)
+        Session dùng chung (keep-alive) theo profile; profile thành công gần nhất của host được thử trước.
         """
-        browsers = ["chrome120", "safari15_5", "chrome110", "edge101", "safari_ios_16_5"]
+        browsers = http_client.profiles_for(url, ["chrome120", "safari15_5", "chrome110", "edge101", "safari_ios_16_5"])
         
-        async with AsyncSession(timeout=30) as session:
-            for browser in browsers:
-                try:
-                    response = await session.get(url, headers=self.headers, impersonate=browser)
-                    
-                    if response.status_code == 200:
-                        return response
-                    elif response.status_code == 403:
-                        logger.warning(f"⚠️ Blocked 403 ({browser}). Retrying in 3s...")
-                        await asyncio.sleep(3)
-                    else:
-                        logger.warning(f"⚠️ Failed {response.status_code} ({browser}). Retrying...")
-                        await asyncio.sleep(3)
-
-                except Exception as e:
-                    logger.warning(f"❌ Connection Error ({browser}): {e}")
+        for browser in browsers:
+            try:
+                response = await http_client.get_session(browser).get(url, headers=self.headers, timeout=30)
+                
+                if response.status_code == 200:
+                    http_client.remember_profile(url, browser)
+                    return response
+                elif response.status_code == 403:
+                    logger.warning(f"⚠️ Blocked 403 ({browser}). Retrying in 3s...")
                     await asyncio.sleep(3)
-        
+                else:
+                    logger.warning(f"⚠️ Failed {response.status_code} ({browser}). Retrying...")
+                    await asyncio.sleep(3)
+
+            except Exception as e:
+                logger.warning(f"❌ Connection Error ({browser}): {e}")
+                await asyncio.sleep(3)
+    
         logger.error(f"❌ All browsers failed to fetch URL: {url}")
         return None
 
+    async def _load_schedule_bytes(self) -> Optional[bytes]:
+        """
+        Lấy JSON thô (bytes) của lịch tuần: cache file nếu còn hạn, ngược lại tải mới (Async).
+        """
+        loop = asyncio.get_running_loop()
+        if os.path.exists(CACHE_FILE):
+            mod_time = os.path.getmtime(CACHE_FILE)
+            if time.time() - mod_time < CACHE_TTL:
+                return await loop.run_in_executor(None, self._read_cache)
+
+        logger.debug(f"🌐 Fetching Schedule JSON: {SCHEDULE_JSON_URL}")
+        # USE ROTATION
+        response = await self._fetch_url(SCHEDULE_JSON_URL)
+
+        if response and response.status_code == 200:
+            raw = response.content
+            # Write Cache Async
+            await loop.run_in_executor(None, self._write_cache, raw)
+            return raw
+        return None
+
     async def fetch_schedule_json(self) -> List[Dict]:
         """
         Lấy lịch sự kiện từ JSON API (Async). 
         """
         try:
-            # Check Cache (IO Sync is acceptable for reading small JSON file)
-            loop = asyncio.get_running_loop()
-            if os.path.exists(CACHE_FILE):
-                mod_time = os.path.getmtime(CACHE_FILE)
-                if time.time() - mod_time < CACHE_TTL:
-                    with open(CACHE_FILE, 'r') as f:
-                        return await loop.run_in_executor(None, json.load, f)
-            
-            logger.debug(f"🌐 Fetching Schedule JSON: {SCHEDULE_JSON_URL}")
-            # USE ROTATION
-            response = await self._fetch_url(SCHEDULE_JSON_URL)
-            
-            if response and response.status_code == 200:
-                data = response.json()
-                # Write Cache Async
-                await loop.run_in_executor(None, self._write_cache, data)
-                return data
-            return []
+            raw = await self._load_schedule_bytes()
+            return json.loads(raw) if raw else []
         except Exception as e:
             logger.error(f"❌ Error fetching schedule JSON: {e}")
             return []
 
-    def _write_cache(self, data):
-        with open(CACHE_FILE, 'w') as f:
-            json.dump(data, f)
+    def _read_cache(self) -> bytes:
+        with open(CACHE_FILE, 'rb') as f:
+            return f.read()
+
+    def _write_cache(self, raw: bytes):
+        with open(CACHE_FILE, 'wb') as f:
+            f.write(raw)
+
+    def _build_event_row(self, item: Dict) -> Optional[Dict]:
+        """
+        Chuẩn hóa 1 item JSON -> row cho bulk upsert. None nếu bị lọc (không phải High / tiền tệ không quan tâm).
+        """
+        title = item.get('title', 'Unknown')
+        currency = item.get('country', 'USD')
+        impact = item.get('impact', 'Low')
+
+        # Filter High Impact Only (SIẾT CHẶT)
+        if impact != 'High':
+            return None
+
+        # --- DYNAMIC CURRENCY FILTER ---
+        if currency not in config.INTERESTED_CURRENCIES:
+            return None
+        # ----------------------------
+
+        # JSON date -> UTC
+        dt = date_parser.parse(item.get('date'))
+        dt_utc = dt.astimezone(tz.UTC)
+        timestamp_iso = dt_utc.strftime('%Y-%m-%d %H:%M:%S')
+
+        # Generate ID
+        safe_title = title.replace(" ", "_").replace("/", "").replace(":", "")
+
+        return {
+            'id': f"{timestamp_iso}_{currency}_{safe_title}",
+            'title': title,
+            'currency': currency,
+            'impact': impact,
+            'timestamp': timestamp_iso,
+            'event_date': dt_utc.strftime('%Y-%m-%d'),
+            'forecast': item.get('forecast', ''),
+            'previous': item.get('previous', ''),
+        }
 
     async def sync_schedule_to_db(self):
         """
         Đồng bộ từ JSON vào DB (Async).
+        Bỏ qua hoàn toàn nếu JSON tải về giống hệt lần sync trước (so sánh sha256 của bytes).
         """
-        events = await self.fetch_schedule_json()
-        if not events: return
-
-        count = 0
-        async with database.get_db_connection() as conn:
-            for item in events:
-                try:
-                    title = item.get('title', 'Unknown')
-                    currency = item.get('country', 'USD')
-                    impact = item.get('impact', 'Low')
-                    
-                    # Filter High Impact Only (SIẾT CHẶT)
-                    if impact != 'High': 
-                        continue
-
-                    # --- DYNAMIC CURRENCY FILTER ---
-                    if currency not in config.INTERESTED_CURRENCIES:
-                        continue
-                    # ----------------------------
-
-                    # JSON date -> UTC
-                    date_str = item.get('date')
-                    dt = date_parser.parse(date_str)
-                    dt_utc = dt.astimezone(tz.UTC)
-                    timestamp_iso = dt_utc.strftime('%Y-%m-%d %H:%M:%S')
-                    date_only = dt_utc.strftime('%Y-%m-%d')
-                    
-                    # Generate ID
-                    safe_title = title.replace(" ", "_").replace("/", "").replace(":", "")
-                    id_str = f"{timestamp_iso}_{currency}_{safe_title}"
-                    
-                    # 1. Preserve Status
-                    existing_status = 'pending'
-                    async with conn.execute('''
-                        SELECT status FROM economic_events
-                        WHERE title = ? 
-                        AND currency = ? 
-                        AND date(timestamp) BETWEEN date(?, '-1 day') AND date(?, '+1 day')
-                    ''', (title, currency, date_only, date_only)) as cursor:
-                         rows = await cursor.fetchall()
-                         for r in rows:
-                            if r['status'] in ['pre_notified', 'post_notified']:
-                                existing_status = r['status']
-                                break
-
-                    # 2. Cleanup Duplicates
-                    await conn.execute('''
-                        DELETE FROM economic_events 
-                        WHERE title = ? 
-                        AND currency = ? 
-                        AND date(timestamp) BETWEEN date(?, '-1 day') AND date(?, '+1 day')
-                    ''', (title, currency, date_only, date_only))
-
-                    # 3. Insert New
-                    await conn.execute('''
-                        INSERT INTO economic_events (id, title, currency, impact, timestamp, forecast, previous, actual, status)
-                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-                    ''', (
-                        id_str, title, currency, impact, timestamp_iso, 
-                        item.get('forecast', ''), 
-                        item.get('previous', ''), 
-                        "", # Actual empty
-                        existing_status
-                    ))
-                    count += 1
-                except Exception as e:
-                    logger.error(f"❌ Lỗi khi import '{item.get('title', 'Unknown')}': {str(e)}")
-                    continue
-            
-            await conn.commit()
+        global _last_schedule_digest
+
+        try:
+            raw = await self._load_schedule_bytes()
+            if not raw: return
+
+            digest = hashlib.sha256(raw).hexdigest()
+            if digest == _last_schedule_digest:
+                logger.debug("⏭️ Schedule JSON unchanged. Skip sync.")
+                return
+
+            events = json.loads(raw)
+        except Exception as e:
+            logger.error(f"❌ Error fetching schedule JSON: {e}")
+            return
+
+        rows = []
+        for item in events:
+            try:
+                row = self._build_event_row(item)
+                if row: rows.append(row)
+            except Exception as e:
+                logger.error(f"❌ Lỗi khi import '{item.get('title', 'Unknown')}': {str(e)}")
+                continue
+
+        # Upsert theo khóa tự nhiên (title, currency, event_date), giữ status đã alert ngay trong SQL
+        count = await database.bulk_upsert_economic_events(rows)
+        if count == len(rows):
+            _last_schedule_digest = digest
         logger.info(f"✅ Synced {count} High events to DB.")
 
     async def fetch_realtime_results_html(self):
@@ -236,7 +246,7 @@ class EconomicCalendarService:
                             SET actual = ? 
                             WHERE title = ? 
                             AND currency = ? 
-                            AND date(timestamp) = ? 
+                            AND event_date = ? 
                             AND (actual IS NULL OR actual = '')
                         ''', (actual, title, currency, date_only_utc))
                         conn.total_changes
@@ -322,6 +332,9 @@ class EconomicCalendarService:
                 await self.send_post_alert(event, time_str)
                 await database.update_event_status(event['id'], 'post_notified')
 
+            # Commit trạng thái đã alert (write-behind queue) trước lượt kế tiếp
+            await database.flush_writes()
+
             # --- TRAP TRADING (STRADDLE) ---
             if config.ENABLE_STRATEGY_CALENDAR:
                 # Check for High Impact news in 2 minutes
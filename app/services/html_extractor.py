@@ -0,0 +1,135 @@
+"""
+Parse HTML bài viết / trang fallback (CPU-bound, chạy trong process pool của app/core/process_pool.py).
+
+- Mỗi trang chỉ parse 1 lần bằng lxml (C): og:image đọc bằng XPath trên cây đó, rồi chính cây đó đưa vào trafilatura
+  (thay cho BeautifulSoup html.parser thuần Python + trafilatura parse lại từ đầu).
+- Module nhẹ, hàm ở top-level (picklable) để worker process import nhanh.
+"""
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+from urllib.parse import urljoin
+import json
+
+from app.core import config
+from app.core import html_cache
+from app.utils import simhash
+
+try:
+    import trafilatura
+except ImportError:
+    trafilatura = None
+    config.logger.warning("Thư viện 'trafilatura' chưa được cài đặt. (pip install trafilatura)")
+
+logger = config.logger
+
+EXCLUDE_LINK_PATTERNS = ["/tag/", "/category/", "login", "signup", "author", "javascript:", "mailto:"]
+
+
+def warm_up() -> None:
+    """Chạy 1 lần trong mỗi worker khi khởi động pool: nạp sẵn trafilatura/lxml để bài đầu tiên không phải chờ import."""
+    if trafilatura:
+        trafilatura.extract("<html><body><article><p>warm up</p></article></body></html>")
+
+
+def _load_tree(html_content: str):
+    return trafilatura.load_html(html_content) if trafilatura and html_content else None
+
+
+def _og_image(tree) -> Optional[str]:
+    for content in tree.xpath('//meta[@property="og:image"]/@content'):
+        if content.strip():
+            return content.strip()
+    return None
+
+
+def parse_article(url: str, html_content: str) -> Dict[str, str]:
+    """
+    Parse article: og:image (lxml) ưu tiên hơn ảnh của trafilatura.
+    Trả về {"text", "image", "fingerprint"} ({} nếu lỗi); fingerprint = SimHash nội dung (tính luôn trong worker).
+    """
+    try:
+        tree = _load_tree(html_content)
+        if tree is None:
+            return {}
+
+        # 1. og:image (Best quality) - đọc trên cây lxml dùng chung
+        og_image = _og_image(tree)
+
+        # 2. Extract text/metadata with Trafilatura (tái dùng cây đã parse)
+        extracted_json_str = trafilatura.extract(tree, include_images=True, output_format="json", url=url)
+
+        text_content = ""
+        trafilatura_image = None
+
+        if extracted_json_str:
+            data = json.loads(extracted_json_str)
+            text_content = (data.get("text") or "").strip()
+            # Trafilatura returns 'image' or 'graphic'
+            trafilatura_image = data.get("image") or data.get("graphic")
+
+        # 3. Determine final image (og:image > Trafilatura)
+        final_image = og_image if og_image else trafilatura_image
+
+        # Validate image URL basic
+        if final_image and not final_image.startswith("http"):
+            final_image = None
+
+        return {
+            "text": text_content,
+            "image": final_image,
+            "fingerprint": simhash.fingerprint(text_content)
+        }
+
+    except Exception as e:
+        logger.error(f"Parse error: {e}")
+        return {}
+
+
+def parse_cached_article(url: str) -> Optional[Dict[str, str]]:
+    """parse_article trên HTML lấy từ html_cache (đọc + giải nén ngay trong worker). None nếu không có trong cache."""
+    html_content = html_cache.load(url)
+    if html_content is None:
+        return None
+    return parse_article(url, html_content)
+
+
+def scrape_links(url: str, html_content: str) -> List[Dict]:
+    """Logic parse fallback: lấy các link bài viết tiềm năng (thẻ a có href, text >= 10 ký tự)."""
+    entries = []
+    seen_links = set()
+    try:
+        tree = _load_tree(html_content)
+        if tree is None:
+            return []
+
+        published = datetime.now(timezone.utc).isoformat()
+        for link in tree.iterfind(".//a[@href]"):
+            # Make absolute URL
+            full_url = urljoin(url, link.get("href"))
+
+            # Basic validation
+            if not full_url.startswith("http"): continue
+
+            # Filter non-article links
+            if any(pattern in full_url for pattern in EXCLUDE_LINK_PATTERNS): continue
+
+            # Get text as temporary title
+            title_text = link.text_content().strip()
+
+            # Filter garbage
+            if len(title_text) < 10: continue
+            if full_url in seen_links: continue
+
+            seen_links.add(full_url)
+
+            entries.append({
+                "title": title_text,
+                "link": full_url,
+                "summary": "",
+                "published": published
+            })
+
+        return entries
+    except Exception as e:
+        logger.error(f"Fallback parse error: {e}")
+        return []
@@ -98,8 +98,8 @@ async def get_market_data(symbol: str = "XAUUSD") -> Tuple[Optional[pd.DataFrame
         try:
             client = MT5DataClient()
             if await client.connect():
+                # Kết nối được giữ lại (protocol v2) cho lệnh kế tiếp
                 df = await client.get_historical_data(symbol, timeframe="H1", count=120)
-                await client.disconnect()
                 
                 if df is not None and not df.empty:
                     logger.info(f"✅ Đã lấy dữ liệu từ MT5 (Attempt {attempt}/{MT5_MAX_RETRIES})")
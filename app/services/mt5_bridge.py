@@ -1,9 +1,38 @@
 import asyncio
+import numpy as np
 import pandas as pd
 import io
+import struct
 import time
 from datetime import datetime, timezone
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
+
+from app.core import config
+
+# --- Protocol v2 (EA SimpleDataServer >= 4.00) ---
+# Bắt tay: client gửi "HELLO|2" (text thô), EA v2 trả "HELLO|2|OK" rồi chuyển kết nối sang chế độ frame.
+# EA cũ coi HELLO là lệnh lạ, trả "ERROR|UNKNOWN_COMMAND" và đóng socket -> client dùng chế độ legacy.
+# Frame: [len: uint32 LE][request_id: uint32 LE][kind: uint8] + payload (len byte)
+HELLO = b"HELLO|2"
+HELLO_OK = b"HELLO|2|OK"
+FRAME_HEADER = struct.Struct("<IIB")
+KIND_TEXT = 0
+KIND_BARS = 1
+MAX_FRAME_SIZE = 64 * 1024 * 1024
+
+PROTOCOL_LEGACY = 1
+PROTOCOL_V2 = 2
+
+# Lệnh giao dịch: timeout / mất kết nối sau khi đã gửi không có nghĩa EA chưa thực hiện -> không gửi lại
+NON_IDEMPOTENT_COMMANDS = {"ORDER", "ORDER_REL", "CLOSE", "DELETE"}
+
+class UnconfirmedRequestError(ConnectionError):
+    """Lệnh đã ghi lên socket nhưng kết nối mất trước khi có phản hồi: EA có thể đã thực hiện"""
+
+# Lệnh BARS|SYMBOL|TF|COUNT (EA >= 4.10): mỗi nến 1 record 48 byte little-endian, sắp xếp cũ -> mới
+BAR_DTYPE = np.dtype([
+    ("time", "<i8"), ("open", "<f8"), ("high", "<f8"), ("low", "<f8"), ("close", "<f8"), ("volume", "<i8")
+])
 
 class MT5DataClient:
     _instance = None
@@ -13,15 +42,31 @@ class MT5DataClient:
             cls._instance = super(MT5DataClient, cls).__new__(cls)
         return cls._instance
 
-    def __init__(self, host='127.0.0.1', port=1122):
+    def __init__(self, host=None, port=None):
         if hasattr(self, '_initialized') and self._initialized:
             return
 
-        self.host = host
-        self.port = port
+        self.host = host or config.MT5_HOST
+        self.port = port or config.MT5_PORT
         self.reader = None
         self.writer = None
         
+        # Protocol đang dùng: None = chưa bắt tay, 2 = kết nối bền (frame), 1 = EA cũ (mỗi lệnh 1 kết nối)
+        self.protocol = None
+        self._legacy_until = 0.0
+        self._loop = None
+        self._connect_lock = None
+        self._reader_task = None
+        self._heartbeat_task = None
+        # Request đang chờ phản hồi trên kết nối hiện tại: request_id -> Future (kind, payload)
+        self._pending: Dict[int, asyncio.Future] = {}
+        self._next_id = 0
+        self._last_io = 0.0
+        # EA hỗ trợ BARS nhị phân? None = chưa biết (kiểm tra lại sau mỗi lần bắt tay)
+        self._binary_bars = None
+        self.stats = {"connects": 0, "requests": 0, "legacy_requests": 0, "heartbeats": 0,
+                      "timeouts": 0, "late_responses": 0}
+        
         # Mapping timeframe
         self.TIMEFRAMES = {
             'M1': 1, 'M5': 5, 'M15': 15, 'M30': 30,
@@ -29,134 +74,352 @@ class MT5DataClient:
         }
         self._initialized = True
 
+    def _bind_loop(self):
+        """
+        Kết nối bền gắn với event loop tạo ra nó (giống http_client / DB pool):
+        asyncio.run() mới -> bỏ kết nối cũ, tạo lại lock
+        """
+        loop = asyncio.get_running_loop()
+        if self._loop is loop:
+            return
+        if self.writer:
+            try:
+                self.writer.transport.abort()
+            except Exception:
+                pass  # Loop cũ đã đóng: socket được giải phóng khi GC
+        self.reader = None
+        self.writer = None
+        self._reader_task = None
+        self._heartbeat_task = None
+        self._pending = {}
+        self._connect_lock = asyncio.Lock()
+        self._loop = loop
+
+    def _connected(self) -> bool:
+        return self.writer is not None and not self.writer.is_closing()
+
+    def _drop(self, error: Optional[BaseException] = None):
+        """
+        Đóng kết nối v2 hiện tại ngay (không chờ), lệnh kế tiếp sẽ tự kết nối lại.
+        Mọi request đang chờ trên kết nối này nhận lỗi ngay thay vì chờ hết timeout
+        """
+        current = asyncio.current_task()
+        for task in (self._heartbeat_task, self._reader_task):
+            if task and task is not current:
+                task.cancel()
+        self._heartbeat_task = None
+        self._reader_task = None
+        if self.writer:
+            try:
+                self.writer.close()
+            except Exception:
+                pass
+        self.reader = None
+        self.writer = None
+
+        pending, self._pending = self._pending, {}
+        for future in pending.values():
+            if not future.done():
+                future.set_exception(error or ConnectionResetError("MT5 connection closed"))
+
     async def connect(self) -> bool:
         """
-        Mở kết nối Socket đến MT5 (Async)
+        Mở kết nối Socket đến MT5 (Async).
+        Bắt tay protocol v2 -> giữ kết nối bền + heartbeat; EA cũ -> chế độ legacy (thử lại v2 sau MT5_LEGACY_RETRY_SECONDS)
         """
-        try:
-            self.reader, self.writer = await asyncio.wait_for(
-                asyncio.open_connection(self.host, self.port),
-                timeout=5
-            )
+        self._bind_loop()
+        if self._connected():
+            return True
+        if self.protocol == PROTOCOL_LEGACY and time.monotonic() < self._legacy_until:
+            return True  # Legacy: kết nối được mở theo từng lệnh
+
+        async with self._connect_lock:
+            # Nhiều coroutine cùng gọi connect() -> chỉ 1 lần bắt tay, các coroutine còn lại dùng chung kết nối
+            if self._connected():
+                return True
+            if self.protocol == PROTOCOL_LEGACY and time.monotonic() < self._legacy_until:
+                return True
+
+            try:
+                reader, writer = await asyncio.wait_for(
+                    asyncio.open_connection(self.host, self.port),
+                    timeout=5
+                )
+            except Exception as e:
+                print(f"❌ Exception connecting to MT5 {self.host}:{self.port} -> {e}") 
+                return False
+
+            try:
+                writer.write(HELLO)
+                await writer.drain()
+                reply = await asyncio.wait_for(reader.readexactly(len(HELLO_OK)), timeout=config.MT5_REQUEST_TIMEOUT_SECONDS)
+            except asyncio.IncompleteReadError as e:
+                reply = e.partial  # EA cũ trả lỗi ngắn / đóng socket
+            except (OSError, asyncio.TimeoutError) as e:
+                writer.close()
+                print(f"❌ MT5 handshake failed {self.host}:{self.port} -> {e!r}")
+                return False
+
+            self.stats["connects"] += 1
+            if reply != HELLO_OK:
+                writer.close()
+                if self.protocol != PROTOCOL_LEGACY:
+                    print(f"⚠️ EA MT5 chưa hỗ trợ protocol v2 (reply={reply[:32]!r}) -> dùng chế độ legacy")
+                self.protocol = PROTOCOL_LEGACY
+                self._legacy_until = time.monotonic() + config.MT5_LEGACY_RETRY_SECONDS
+                return True
+
+            self.reader, self.writer = reader, writer
+            self.protocol = PROTOCOL_V2
+            self._binary_bars = None
+            self._pending = {}
+            self._last_io = time.monotonic()
+            self._reader_task = asyncio.create_task(self._read_loop(reader))
+            self._heartbeat_task = asyncio.create_task(self._heartbeat())
             return True
-        except Exception as e:
-            print(f"❌ Exception connecting to MT5 {self.host}:{self.port} -> {e}") 
-            return False
 
     async def disconnect(self):
         """
         Đóng kết nối (Async)
         """
-        if self.writer:
+        if self._loop is not asyncio.get_running_loop():
+            self._bind_loop()  # Kết nối thuộc loop cũ: chỉ bỏ đi
+            return
+        writer = self.writer
+        self._drop()
+        if writer:
             try:
-                self.writer.close()
-                await self.writer.wait_closed()
+                await writer.wait_closed()
             except Exception:
                 pass
-            self.writer = None
-            self.reader = None
+
+    async def _heartbeat(self):
+        """
+        Giữ kết nối v2: PING khi rảnh quá MT5_HEARTBEAT_SECONDS.
+        Không nhận được PONG -> đóng kết nối, lệnh kế tiếp tự kết nối lại
+        """
+        interval = config.MT5_HEARTBEAT_SECONDS
+        writer = self.writer
+        while self.writer is writer:
+            await asyncio.sleep(max(0.01, self._last_io + interval - time.monotonic()))
+            if self.writer is not writer or time.monotonic() - self._last_io < interval:
+                continue
+            try:
+                _, body = await self._request("PING")
+                if body != b"PONG":
+                    raise ConnectionError(f"Unexpected heartbeat reply {body[:32]!r}")
+                self.stats["heartbeats"] += 1
+            except Exception as e:
+                print(f"⚠️ MT5 heartbeat failed ({e!r}) -> reconnect ở lệnh kế tiếp")
+                if self.writer is writer:
+                    self._drop()
+                return
+
+    @staticmethod
+    async def _read_frame(reader: asyncio.StreamReader) -> Tuple[int, int, bytes]:
+        header = await reader.readexactly(FRAME_HEADER.size)
+        length, request_id, kind = FRAME_HEADER.unpack(header)
+        if length > MAX_FRAME_SIZE:
+            raise ConnectionError(f"Frame too large ({length} bytes)")
+        payload = await reader.readexactly(length) if length else b""
+        return request_id, kind, payload
+
+    async def _read_loop(self, reader: asyncio.StreamReader):
+        """
+        Đọc frame liên tục trên kết nối v2 và trả từng phản hồi về đúng request theo ID
+        (EA có thể trả khác thứ tự gửi; phản hồi của request đã timeout / bị hủy được bỏ qua)
+        """
+        error = None
+        try:
+            while True:
+                request_id, kind, body = await self._read_frame(reader)
+                self._last_io = time.monotonic()
+                future = self._pending.get(request_id)
+                if future is None or future.done():
+                    self.stats["late_responses"] += 1
+                    continue
+                future.set_result((kind, body))
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            error = ConnectionResetError(f"MT5 connection lost: {e!r}")
+        finally:
+            if self.reader is reader:
+                self._drop(error)
+
+    async def _request(self, command: str, timeout: Optional[float] = None) -> Tuple[int, bytes]:
+        """
+        Gửi 1 lệnh, trả (kind, payload).
+        v2: nhiều coroutine gửi song song trên cùng kết nối bền, phản hồi được ghép theo request ID; timeout / hủy chỉ
+        bỏ request đó (kết nối giữ nguyên). Legacy: 1 kết nối / lệnh, đọc tới khi EA đóng socket
+        (thay cho việc đoán hết tin bằng chunk < 4096 byte)
+        """
+        payload = command.encode()
+        timeout = timeout or config.MT5_REQUEST_TIMEOUT_SECONDS
+        if self.protocol == PROTOCOL_LEGACY and not self.writer:
+            return await self._request_legacy(payload, timeout)
+
+        if not self._connected():
+            raise ConnectionResetError("MT5 connection closed")
+        self._next_id = self._next_id % 0xFFFFFFFF + 1
+        request_id = self._next_id
+        pending = self._pending
+        future = self._loop.create_future()
+        pending[request_id] = future
+        sent = False
+        try:
+            # 1 lần write / frame -> frame của các coroutine không bị xen vào nhau
+            self.writer.write(FRAME_HEADER.pack(len(payload), request_id, KIND_TEXT) + payload)
+            sent = True
+            await self.writer.drain()
+            kind, body = await asyncio.wait_for(future, timeout=timeout)
+        except asyncio.TimeoutError:
+            self.stats["timeouts"] += 1
+            raise
+        except (ConnectionError, OSError, EOFError) as e:
+            if sent:
+                raise UnconfirmedRequestError(f"MT5 connection lost after sending: {e!r}") from e
+            raise
+        finally:
+            pending.pop(request_id, None)
+        self.stats["requests"] += 1
+        return kind, body
+
+    async def _request_legacy(self, payload: bytes, timeout: float) -> Tuple[int, bytes]:
+        try:
+            reader, writer = await asyncio.wait_for(asyncio.open_connection(self.host, self.port), timeout=5)
+        except asyncio.TimeoutError:
+            # Chưa gửi gì -> lỗi kết nối (được retry), khác với timeout chờ phản hồi
+            raise ConnectionError(f"Timed out connecting to MT5 {self.host}:{self.port}")
+        try:
+            writer.write(payload)
+            await writer.drain()
+            # EA cũ đóng socket ngay sau khi gửi -> EOF = hết phản hồi
+            data = await asyncio.wait_for(reader.read(), timeout=timeout)
+        except (ConnectionError, OSError, EOFError) as e:
+            raise UnconfirmedRequestError(f"MT5 connection lost after sending: {e!r}") from e
+        finally:
+            writer.close()
+        if not data:
+            raise UnconfirmedRequestError("Empty response, connection closed by peer")
+        self.stats["legacy_requests"] += 1
+        return KIND_TEXT, data
 
     async def get_historical_data(self, symbol="XAUUSD", timeframe="H1", count=120):
         """
         Gửi lệnh lấy dữ liệu nến (Async)
         """
-        if not self.writer:
-            if not await self.connect():
-                return None
+        if not await self.connect():
+            return None
 
         try:
+            tried_binary = False
+            if self.protocol == PROTOCOL_V2 and config.MT5_BINARY_BARS and self._binary_bars is not False:
+                tried_binary = True
+                kind, data = await self._request(f"BARS|{symbol}|{timeframe}|{count}")
+                if kind == KIND_BARS:
+                    self._binary_bars = True
+                    return self._parse_binary_bars(data)
+                # EA chưa có BARS (hiểu thành lệnh CSV với symbol "BARS" -> ERROR) hoặc không có dữ liệu: thử CSV
+
             # Gửi lệnh theo protocol: SYMBOL|TIMEFRAME|COUNT
             command = f"{symbol}|{timeframe}|{count}"
-            self.writer.write(command.encode())
-            await self.writer.drain()
-            
-            # Nhận dữ liệu (Buffer)
-            data = b""
-            while True:
-                try:
-                    # Timeout cho mỗi lần đọc chunk
-                    chunk = await asyncio.wait_for(self.reader.read(4096), timeout=5)
-                    if not chunk: break
-                    data += chunk
-                    # Nếu buffer nhỏ hơn 4096 nghĩa là đã hết tin (với EA simple)
-                    if len(chunk) < 4096: break 
-                except asyncio.TimeoutError:
-                    break
+            _, data = await self._request(command)
             
             response_str = data.decode('utf-8', errors='ignore').strip()
             
             if not response_str or response_str.startswith("ERROR"):
                 return None
 
-            # Parse CSV off-thread (CPU bound) nếu quá nặng? 
-            # Hiện tại vẫn parse sync vì pandas read_csv nhanh với data nhỏ.
-            # Parse CSV: Time,Open,High,Low,Close,Volume
-            csv_str = response_str.replace(";", "\n")
-            
-            df = pd.read_csv(io.StringIO(csv_str), header=None, 
-                             names=["Time", "Open", "High", "Low", "Close", "Volume"])
-            
-            # Xử lý datetime
-            df['Time'] = pd.to_datetime(df['Time'], unit='s')
-            df.set_index('Time', inplace=True)
-            
-            # Convert múi giờ
-            if df.index.tz is None:
-                df.index = df.index.tz_localize('UTC')
-            df.index = df.index.tz_convert('Asia/Ho_Chi_Minh')
-            
-            # Ensure data is sorted by Time (Ascending)
-            df.sort_index(inplace=True)
-            
-            return df
+            if tried_binary and self._binary_bars is None:
+                print("⚠️ EA MT5 chưa hỗ trợ BARS nhị phân -> dùng CSV")
+                self._binary_bars = False
+            return self._parse_csv_bars(response_str)
 
         except Exception as e:
-            print(f"❌ Lỗi lấy data: {e}")
+            print(f"❌ Lỗi lấy data: {e!r}")
             return None
 
-    async def _send_simple_command(self, command: str) -> str:
+    @staticmethod
+    def _parse_binary_bars(payload: bytes) -> pd.DataFrame:
+        """
+        Decode nến nhị phân (BAR_DTYPE): các cột là view trên buffer nhận được (np.frombuffer), không parse từng giá trị.
+        bytes được bọc 1 lần vào bytearray để DataFrame vẫn ghi được; chỉ index thời gian được tạo mới
+        """
+        if len(payload) % BAR_DTYPE.itemsize:
+            raise ValueError(f"Binary bars payload {len(payload)} B is not a multiple of {BAR_DTYPE.itemsize}")
+        bars = np.frombuffer(payload if isinstance(payload, bytearray) else bytearray(payload), dtype=BAR_DTYPE)
+
+        index = pd.to_datetime(bars["time"], unit='s').tz_localize('UTC').tz_convert('Asia/Ho_Chi_Minh').rename('Time')
+        df = pd.DataFrame({
+            "Open": bars["open"], "High": bars["high"], "Low": bars["low"], "Close": bars["close"], "Volume": bars["volume"]
+        }, index=index, copy=False)
+
+        # EA gửi cũ -> mới; chỉ sort (copy) nếu thứ tự sai
+        if not df.index.is_monotonic_increasing:
+            df.sort_index(inplace=True)
+        return df
+
+    @staticmethod
+    def _parse_csv_bars(response_str: str) -> pd.DataFrame:
+        # Parse CSV: Time,Open,High,Low,Close,Volume
+        csv_str = response_str.replace(";", "\n")
+        
+        df = pd.read_csv(io.StringIO(csv_str), header=None, 
+                         names=["Time", "Open", "High", "Low", "Close", "Volume"])
+        
+        # Xử lý datetime
+        df['Time'] = pd.to_datetime(df['Time'], unit='s')
+        df.set_index('Time', inplace=True)
+        
+        # Convert múi giờ
+        if df.index.tz is None:
+            df.index = df.index.tz_localize('UTC')
+        df.index = df.index.tz_convert('Asia/Ho_Chi_Minh')
+        
+        # Ensure data is sorted by Time (Ascending)
+        df.sort_index(inplace=True)
+        
+        return df
+
+    async def _send_simple_command(self, command: str, timeout: Optional[float] = None) -> str:
         """
-        Gửi lệnh và nhận phản hồi ngắn (Async)
-        Có cơ chế Retry nếu mất kết nối
+        Gửi lệnh và nhận phản hồi ngắn (Async), an toàn khi nhiều coroutine gọi cùng lúc
+        Có cơ chế Retry nếu mất kết nối; timeout (giây) áp dụng cho từng lần gửi (mặc định MT5_REQUEST_TIMEOUT_SECONDS).
+        ORDER / ORDER_REL / CLOSE / DELETE đã gửi mà timeout hoặc mất kết nối trước khi có phản hồi -> trả FAIL|TIMEOUT,
+        không gửi lại (tránh mở / đóng lệnh 2 lần)
         """
         max_retries = 3
         last_error = None
         
         for attempt in range(max_retries):
             # Ensure connection
-            if not self.writer:
-                if not await self.connect():
-                    await asyncio.sleep(1)
-                    continue
+            if not await self.connect():
+                await asyncio.sleep(1)
+                continue
             
             try:
-                self.writer.write(command.encode())
-                await self.writer.drain()
+                _, data = await self._request(command, timeout)
+                return data.decode('utf-8').strip()
                 
-                # Wait for response with timeout
-                chunk = await asyncio.wait_for(self.reader.read(4096), timeout=5)
-                
-                if not chunk:
-                    # Connection closed by peer
-                    raise ConnectionResetError("Empty response, connection closed by peer")
-                    
-                response = chunk.decode('utf-8').strip()
-                
-                # --- FIX: Chủ động đóng kết nối sau mỗi lệnh thành công ---
-                # Điều này đồng bộ với hành vi của EA (Server đóng ngay sau khi gửi)
-                await self.disconnect()
-                # ---------------------------------------------------------
-                
-                return response
-                
-            except (ConnectionError, OSError, asyncio.TimeoutError) as e:
+            except (asyncio.TimeoutError, UnconfirmedRequestError) as e:
+                if command.split("|", 1)[0] in NON_IDEMPOTENT_COMMANDS:
+                    if isinstance(e, asyncio.TimeoutError):
+                        print(f"⚠️ MT5 timeout for {command!r} -> không gửi lại (EA có thể vẫn đang thực hiện lệnh)")
+                        return "FAIL|TIMEOUT"
+                    print(f"⚠️ MT5 connection lost after sending {command!r} ({e}) -> không gửi lại (EA có thể đã thực hiện lệnh)")
+                    return "FAIL|TIMEOUT|CONNECTION_LOST"
+                last_error = e
+                print(f"⚠️ Socket {'timeout' if isinstance(e, asyncio.TimeoutError) else f'error ({e!r})'}. "
+                      f"Retrying ({attempt+1}/{max_retries})...")
+                await asyncio.sleep(0.5)
+            except (ConnectionError, OSError, EOFError) as e:
                 last_error = e
-                print(f"⚠️ Socket error ({e}). Reconnecting ({attempt+1}/{max_retries})...")
-                await self.disconnect()
+                print(f"⚠️ Socket error ({e!r}). Reconnecting ({attempt+1}/{max_retries})...")
                 await asyncio.sleep(0.5)
             except Exception as e:
+                # Kết nối dùng chung với các lệnh khác: không đóng vì lỗi riêng của lệnh này
                 print(f"❌ Unexpected error sending command: {e}")
-                await self.disconnect()
                 return f"FAIL|EXCEPTION|{e}"
                 
         return f"FAIL|CONNECTION_ERROR|{last_error}"
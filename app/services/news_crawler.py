@@ -1,17 +1,25 @@
 import feedparser
 import asyncio
+import calendar
 import re
 import time
-import random
-import json
 from datetime import datetime, timedelta, timezone
 from dateutil import parser
-from urllib.parse import urljoin
-from typing import List, Dict, Optional, Any
+from typing import List, Dict, Optional, Any, AsyncIterator, Tuple
 from concurrent.futures import ThreadPoolExecutor
 
 from app.core import config
 from app.core import database
+from app.core import rate_limit
+from app.core import http_client
+from app.core import feed_cache
+from app.core import html_cache
+from app.core import circuit_breaker
+from app.core import pipeline
+from app.core import process_pool
+from app.services import html_extractor
+from app.services import poll_scheduler
+from app.utils import keyword_matcher
 import traceback
 
 # --- Import & Check Dependencies ---
@@ -21,60 +29,58 @@ except ImportError:
     AsyncSession = None
     config.logger.warning("Thư viện 'curl_cffi' chưa được cài đặt. (pip install curl_cffi)")
 
-try:
-    import trafilatura
-    from bs4 import BeautifulSoup
-except ImportError:
-    config.logger.warning("Thư viện 'trafilatura' hoặc 'beautifulsoup4' chưa được cài đặt.")
-
 logger = config.logger
-KEYWORDS = {
-    "DIRECT": config.KEYWORDS_DIRECT,
-    "CORRELATION": config.KEYWORDS_CORRELATION
-}
+
+# Thống kê theo stage của lượt quét gần nhất (Pipeline.stats + tổng thời gian), dùng cho benchmark / replay
+last_crawl_stats: Dict[str, Any] = {}
+
+# Parse HTML (CPU-bound) chạy trong process pool có giới hạn, không tranh GIL với event loop
+extract_pool = process_pool.WorkerPool("html_extract", config.CRAWLER_EXTRACT_WORKERS, html_extractor.warm_up)
 
 def clean_html(raw_html: str) -> str:
     cleanr = re.compile('<.*?>')
     return re.sub(cleanr, '', raw_html).strip()
 
 def check_keywords(text: str) -> List[str]:
-    found_keywords = []
-    text_lower = text.lower()
-    all_keywords = KEYWORDS["DIRECT"] + KEYWORDS["CORRELATION"]
-    for kw in all_keywords:
-        pattern = r"\b" + re.escape(kw.lower()) + r"\b"
-        if re.search(pattern, text_lower):
-            found_keywords.append(kw)
-    return list(set(found_keywords))
+    """Keyword DIRECT / CORRELATION (khớp nguyên từ) có trong text, quét 1 lượt bằng matcher dùng chung."""
+    return keyword_matcher.get_matcher().keywords(text, {keyword_matcher.DIRECT, keyword_matcher.CORRELATION})
 
 # --- Async Helper Functions ---
 
-async def fetch_url(url: str, timeout: int = 30) -> Optional[Any]:
+async def fetch_url(url: str, timeout: int = 30, headers: Optional[Dict[str, str]] = None) -> Optional[Any]:
     """
     Async helper fetch data with rotation of impersonations.
+    Dùng session sống lâu của http_client (keep-alive); profile thành công gần nhất của host được thử trước.
+    Mỗi lần thử đi qua rate_limit.host_slot (giới hạn đồng thời + token bucket theo host).
+    headers: header bổ sung (VD: If-None-Match cho conditional GET -> có thể trả về response 304).
     Returns: Response object or None
     """
     if not AsyncSession:
         return None
 
-    browsers = ["chrome120", "chrome110", "safari15_5"]
+    # Host đang bị chặn (circuit OPEN): bỏ qua ngay, không tốn thời gian thử profile + sleep
+    if not circuit_breaker.allow(url):
+        logger.debug(f"🔌 Skip {url}: circuit đang mở")
+        return None
+
+    browsers = http_client.profiles_for(url, ["chrome120", "chrome110", "safari15_5"])
+    request_headers = {"Referer": "https://www.google.com/", **(headers or {})}
     
     for browser in browsers:
         try:
             logger.info(f"🌐 Fetching {url} (Impersonate: {browser})...")
             
-            # Sử dụng AsyncSession context manager
-            async with AsyncSession(
-                impersonate=browser, 
-                timeout=timeout,
-                headers={"Referer": "https://www.google.com/"}
-            ) as session:
-                response = await session.get(url)
+            session = http_client.get_session(browser)
+            async with rate_limit.host_slot(url):
+                response = await session.get(url, timeout=timeout, headers=request_headers)
             
-            if response.status_code == 200:
+            if response.status_code in (200, 304):
+                http_client.remember_profile(url, browser)
+                circuit_breaker.record_success(url)
                 return response
             elif response.status_code == 404:
                 logger.warning(f"❌ 404 Not Found: {url}")
+                circuit_breaker.record_success(url)  # Host vẫn phản hồi bình thường
                 return None
             else:
                 logger.warning(f"⚠️ Status {response.status_code} with {browser}. Retrying next in 5s...")
@@ -85,78 +91,32 @@ async def fetch_url(url: str, timeout: int = 30) -> Optional[Any]:
             await asyncio.sleep(5)
             
     logger.error(f"❌ Failed to fetch {url} after all attempts.")
+    circuit_breaker.record_failure(url)
     return None
 
-def _parse_article_sync(url: str, html_content: str) -> Dict[str, str]:
-    """Hàm đồng bộ để parse article: Ưu tiên BS4 og:image -> Trafilatura"""
-    try:
-        # 1. Try finding og:image with BeautifulSoup (Best quality)
-        og_image = None
-        try:
-            soup = BeautifulSoup(html_content, 'html.parser')
-            meta_img = soup.find("meta", property="og:image")
-            if meta_img and meta_img.get("content"):
-                og_image = meta_img["content"]
-        except Exception:
-            pass
-
-        # 2. Extract text/metadata with Trafilatura
-        extracted_json_str = trafilatura.extract(html_content, include_images=True, output_format="json", url=url)
-        
-        text_content = ""
-        trafilatura_image = None
-        
-        if extracted_json_str:
-            data = json.loads(extracted_json_str)
-            text_content = data.get("text", "").strip()
-            # Trafilatura returns 'image' or 'graphic'
-            trafilatura_image = data.get("image") or data.get("graphic")
-            
-        # 3. Determine final image (BS4 > Trafilatura)
-        final_image = og_image if og_image else trafilatura_image
-        
-        # Validate image URL basic
-        if final_image and not final_image.startswith("http"):
-             final_image = None
-
-        return {
-            "text": text_content,
-            "image": final_image
-        }
-        
-    except Exception as e:
-        logger.error(f"Parse error: {e}")
-        return {}
-
-async def get_full_content(url: str, selector: str = None) -> Dict[str, str]:
-    """
-    Lấy nội dung bài viết full (Async).
-    """
-    error_res = {"content": "", "image_url": ""}
-    
+async def download_article(url: str) -> Tuple[Optional[str], str]:
+    """Tải HTML bài viết. Trả về (html, "") hoặc (None, thông báo lỗi)."""
     if not AsyncSession:
-        error_res["content"] = "Lỗi: Thiếu thư viện curl_cffi."
-        return error_res
+        return None, "Lỗi: Thiếu thư viện curl_cffi."
 
     response = await fetch_url(url)
     if not response:
-        error_res["content"] = "Lỗi kết nối (Network/Blocked)."
-        return error_res
-        
-    try:
+        return None, "Lỗi kết nối (Network/Blocked)."
+    # Giữ lại HTML gốc để re-extract sau này (main.py --reextract) mà không phải tải lại
+    await html_cache.save(url, response.text)
+    return response.text, ""
 
-        # Chạy parsing (CPU-bound) trong executor
-        loop = asyncio.get_running_loop()
-        parse_result = await loop.run_in_executor(
-            None, 
-            lambda: _parse_article_sync(url, response.text)
-        )
+async def extract_article(url: str, html: str) -> Dict[str, str]:
+    """Trích nội dung + ảnh từ HTML (CPU-bound, chạy trong process pool)."""
+    error_res = {"content": "", "image_url": ""}
+    try:
+        parse_result = await extract_pool.run(html_extractor.parse_article, url, html)
         
         full_text = parse_result.get("text", "")
         top_image = parse_result.get("image", None)
         
         if len(full_text) > 100:
-            return {"content": full_text, "image_url": top_image}
+            return {"content": full_text, "image_url": top_image, "fingerprint": parse_result.get("fingerprint")}
         else:
             error_res["content"] = "Nội dung quá ngắn/bị ẩn (Extraction failed)."
             return error_res
@@ -167,74 +127,58 @@ async def get_full_content(url: str, selector: str = None) -> Dict[str, str]:
         error_res["content"] = f"Lỗi cào dữ liệu: {e}"
         return error_res
 
+async def get_full_content(url: str, selector: str = None) -> Dict[str, str]:
+    """
+    Lấy nội dung bài viết full (Async) = download_article + extract_article.
+    """
+    html, error = await download_article(url)
+    if html is None:
+        return {"content": error, "image_url": ""}
+    return await extract_article(url, html)
+
 def _parse_rss_sync(content: bytes):
     return feedparser.parse(content)
 
 async def get_rss_feed_data(url: str, timeout: int = 30):
-    """Lấy dữ liệu RSS (Async)"""
+    """
+    Lấy dữ liệu RSS (Async) qua feed_cache.
+    Trong TTL dùng lại feed đã parse; sau TTL gửi conditional GET, chỉ chạy feedparser khi feed thật sự thay đổi.
+    """
     try:
-        response = await fetch_url(url, timeout=timeout)
-        if not response:
-             return None
-             
-        # Parse content trong executor
-        loop = asyncio.get_running_loop()
-        feed = await loop.run_in_executor(None, lambda: _parse_rss_sync(response.content))
-        return feed
+        feed = feed_cache.get_fresh(url)
+        if feed is not None:
+            return feed
+
+        async with feed_cache.lock(url):
+            # Consumer khác vừa tải xong trong lúc chờ lock
+            feed = feed_cache.get_fresh(url)
+            if feed is not None:
+                return feed
+
+            response = await fetch_url(url, timeout=timeout, headers=feed_cache.conditional_headers(url))
+            if not response:
+                 return None
+            if response.status_code == 304:
+                return feed_cache.not_modified(url)
+
+            content = response.content
+            digest = feed_cache.body_hash(content)
+            etag = response.headers.get("ETag")
+            last_modified = response.headers.get("Last-Modified")
+            feed = feed_cache.unchanged(url, digest, etag, last_modified)
+            if feed is not None:
+                return feed
+
+            # Parse content trong executor
+            loop = asyncio.get_running_loop()
+            feed = await loop.run_in_executor(None, lambda: _parse_rss_sync(content))
+            feed_cache.store(url, feed, digest, etag, last_modified)
+            return feed
 
     except Exception as e:
         logger.error(f"⚠️ RSS {url} lỗi: {e}")
         return None
 
-def _scrape_fallback_sync(url: str, html_content: str) -> List[Dict]:
-    """Logic parse fallback dùng BeautifulSoup (Sync) thay vì Newspaper Source"""
-    entries = []
-    seen_titles = set()
-    try:
-        soup = BeautifulSoup(html_content, 'html.parser')
-        
-        # Tìm tất cả thẻ a có href
-        links = soup.find_all('a', href=True)
-        
-        exclude_patterns = ["/tag/", "/category/", "login", "signup", "author", "javascript:", "mailto:"]
-        
-        for link in links:
-            href = link['href']
-            # Make absolute URL
-            full_url = urljoin(url, href)
-            
-            # Basic validation
-            if not full_url.startswith("http"): continue
-            
-            # Filter non-article links
-            is_valid = True
-            for pattern in exclude_patterns:
-                if pattern in full_url:
-                    is_valid = False
-                    break
-            if not is_valid: continue
-
-            # Get text as temporary title
-            title_text = link.get_text().strip()
-            
-            # Filter garbage
-            if len(title_text) < 10: continue
-            if full_url in seen_titles: continue
-            
-            seen_titles.add(full_url)
-            
-            entries.append({
-                "title": title_text,
-                "link": full_url,
-                "summary": "",
-                "published": datetime.now(timezone.utc).isoformat()
-            })
-            
-        return entries
-    except Exception as e:
-        logger.error(f"Fallback parse error: {e}")
-        return []
-
 async def scrape_website_fallback(source_config: Dict) -> List[Dict]:
     """Cào trực tiếp website nếu RSS lỗi (Async)"""
     url = source_config.get("web")
@@ -250,12 +194,8 @@ async def scrape_website_fallback(source_config: Dict) -> List[Dict]:
         if not response:
             return []
 
-        # Run parsing in executor
-        loop = asyncio.get_running_loop()
-        entries = await loop.run_in_executor(
-            None, 
-            lambda: _scrape_fallback_sync(url, response.text)
-        )
+        # Run parsing in process pool
+        entries = await extract_pool.run(html_extractor.scrape_links, url, response.text)
         
         # Lọc keywords ở đây (CPU bound nhẹ, có thể để ở main thread async cũng được)
         filtered_entries = []
@@ -264,82 +204,118 @@ async def scrape_website_fallback(source_config: Dict) -> List[Dict]:
              if len(check_keywords(entry['link'])) > 0:
                  filtered_entries.append(entry)
         
-        logger.info(f"✅ Web Scraping (BeautifulSoup) tìm thấy {len(filtered_entries)} bài viết tiềm năng.")
+        logger.info(f"✅ Web Scraping (lxml) tìm thấy {len(filtered_entries)} bài viết tiềm năng.")
         return filtered_entries
         
     except Exception as e:
         logger.error(f"❌ Lỗi Web Scraping {source_name}: {e}")
         return []
 
-async def get_gold_news(lookback_minutes: Optional[int] = None, fast_mode: bool = False) -> List[Dict[str, Any]]:
+async def _fetch_source_entries(source: Dict, fast_mode: bool) -> Tuple[List[Any], bool, bool]:
     """
-    Quét tin tức từ RSS và Web Fallback (Async).
+    RSS của 1 nguồn (fallback Web Scraping nếu lỗi). Trả về (entries, is_fallback, fetched).
+    fetched = tải được nguồn (feed rỗng vẫn là thành công), dùng cho poll_scheduler tách lỗi với nguồn ít bài.
     """
-    logger.debug(">>> KHỞI TẠO DATABASE...")
-    # Init DB Async
-    await database.init_db()
-    
-    logger.info(f"🔎 BẮT ĐẦU QUÉT TIN TỨC (Lookback: {lookback_minutes if lookback_minutes else '24h'})")
-    now_utc = datetime.now(timezone.utc)
-    
-    if lookback_minutes:
-        time_limit = now_utc - timedelta(minutes=lookback_minutes)
-    else:
-        time_limit = now_utc - timedelta(hours=24) 
-    
-    new_articles_added = []
-    new_articles_count = 0
+    source_name = source.get("name", "Unknown")
+    timeout_cfg = 10 if fast_mode else 30
 
-    for source in config.NEWS_SOURCES:
-        entries = []
-        is_fallback = False
-        source_name = source.get("name", "Unknown")
-        rss_url = source.get("rss")
-        selector = source.get("selector")
-        
-        timeout_cfg = 10 if fast_mode else 30
+    # 1. Thử RSS
+    logger.info(f"📰 Đang xử lý nguồn: {source_name}")
+    fetched = False
+    try:
+        feed = await get_rss_feed_data(source.get("rss"), timeout=timeout_cfg)
+        fetched = feed is not None and not getattr(feed, "bozo", False)
+        if feed and feed.entries:
+            logger.debug(f"-> RSS {source_name}: Quét {len(feed.entries)} bài...")
+            return feed.entries, False, True
+        raise Exception("RSS Empty/Fail")
+    except:
+        # 2. Web Scraping Fallback
+        if not fast_mode:
+            logger.warning(f"⚠️ RSS {source_name} thất bại. Chuyển sang Web Scraping...")
+            entries = await scrape_website_fallback(source)
+            return entries, True, fetched or bool(entries)
+        logger.warning(f"⚠️ RSS {source_name} {'rỗng' if fetched else 'thất bại'}. Skip Web Scraping (Fast Mode).")
+        return [], False, fetched
+
+def _normalize_entry(entry: Any) -> Tuple[str, str, str, str]:
+    """Chuẩn hóa (feedparser obj hoặc dict) -> (link, title, summary, published)"""
+    if isinstance(entry, dict):
+        return entry.get("link", ""), entry.get("title", ""), entry.get("summary", ""), entry.get("published", "")
+    return (
+        getattr(entry, "link", ""),
+        getattr(entry, "title", ""),
+        clean_html(getattr(entry, "summary", "")),
+        getattr(entry, "published", getattr(entry, "updated", "")),
+    )
+
+def _entry_timestamps(entries: List[Any]) -> List[float]:
+    """Epoch các bài trong feed (feedparser *_parsed), dùng để ước lượng tần suất đăng bài của nguồn."""
+    times = []
+    for entry in entries:
+        parsed = getattr(entry, "published_parsed", None) or getattr(entry, "updated_parsed", None)
+        if parsed:
+            times.append(float(calendar.timegm(parsed)))
+    return times
+
+def _build_news_item(candidate: Dict[str, Any], extract_res: Dict[str, str]) -> Optional[Dict[str, Any]]:
+    """Ghép bài đã qua bộ lọc + nội dung trích xuất. None nếu nội dung lỗi/quá ngắn."""
+    link = candidate["link"]
+    full_content = extract_res.get("content", "")
+    image_url = extract_res.get("image_url")
+
+    is_error_content = isinstance(full_content, str) and (full_content.strip().startswith("Lỗi") or full_content.strip().startswith("Error"))
+    is_too_short = len(full_content) < 200
+
+    if is_error_content or is_too_short:
+        logger.warning(f"⚠️ Content invalid or too short. Skipping DB save. ({link})")
+        return None
 
-        # 1. Thử RSS
-        logger.info(f"📰 Đang xử lý nguồn: {source_name}")
-        try:
-            feed = await get_rss_feed_data(rss_url, timeout=timeout_cfg)
-            if feed and feed.entries:
-                entries = feed.entries
-                logger.debug(f"-> RSS {source_name}: Quét {len(entries)} bài...")
-            else:
-                raise Exception("RSS Empty/Fail")
-        except:
-            # 2. Web Scraping Fallback
-            if not fast_mode:
-                logger.warning(f"⚠️ RSS {source_name} thất bại. Chuyển sang Web Scraping...")
-                entries = await scrape_website_fallback(source)
-                is_fallback = True
-            else:
-                 logger.warning(f"⚠️ RSS {source_name} thất bại. Skip Web Scraping (Fast Mode).")
-        
-        if not entries:
-            continue
+    return {
+        "id": link,
+        "source": candidate["source"],
+        "published_at": candidate["pub_date"].isoformat(),
+        "title": candidate["title"],
+        "keywords": candidate["keywords"],
+        "url": link,
+        "content": full_content,
+        "image_url": image_url,
+        "fingerprint": extract_res.get("fingerprint")
+    }
+
+def _build_pipeline(lookback_minutes: Optional[int], fast_mode: bool, sources: List[Dict]) -> pipeline.Pipeline:
+    """
+    Pipeline quét tin: discover (feed mỗi nguồn) -> filter (DB / thời gian / keyword) -> fetch (HTML)
+    -> extract (process pool) -> persist (DB). Item đi giữa các stage mang `seq` = (thứ tự nguồn, thứ tự trong feed).
+    """
+    now_utc = datetime.now(timezone.utc)
+    time_limit = now_utc - (timedelta(minutes=lookback_minutes) if lookback_minutes else timedelta(hours=24))
+    seen_links = set()
+
+    async def discover(item, emit):
+        source_idx, source = item
+        entries, is_fallback, fetched = await _fetch_source_entries(source, fast_mode)
+        # Lỗi tải (backoff) tách riêng với tín hiệu bài mới (ngày đăng -> tần suất đăng bài): feed rỗng không phải lỗi
+        poll_scheduler.get_scheduler().record(source.get("name", "Unknown"), fetched, _entry_timestamps(entries))
+        await emit((source_idx, source, entries, is_fallback))
+
+    async def filter_entries(item, emit):
+        source_idx, source, entries, is_fallback = item
+        source_name = source.get("name", "Unknown")
 
-        # 3. Xử lý bài viết
-        for entry in entries:
-            # Chuẩn hóa (feedparser obj hoặc dict)
-            if isinstance(entry, dict):
-                link = entry.get("link", "")
-                title = entry.get("title", "")
-                summary = entry.get("summary", "")
-                pub_str = entry.get("published", "")
-            else:
-                link = getattr(entry, "link", "")
-                title = getattr(entry, "title", "")
-                summary = clean_html(getattr(entry, "summary", ""))
-                pub_str = getattr(entry, "published", getattr(entry, "updated", ""))
+        # 1. Lọc rẻ trong RAM (trùng link / negative cache / thời gian / keyword)
+        candidates = []
+        for entry_idx, entry in enumerate(entries):
+            link, title, summary, pub_str = _normalize_entry(entry)
 
             if not link or not title: continue
             logger.debug(f"🔍 Checking: {title[:50]}...")
-            # DB Check: Async call
-            exists = await database.check_article_exists(link)
-            if exists:
-                logger.debug(f"   -> SKIP: Đã có trong DB")
+            # Cùng 1 link xuất hiện ở nhiều nguồn: chỉ giữ lần đầu
+            if link in seen_links:
+                logger.debug(f"   -> SKIP: Trùng link với nguồn trước")
+                continue
+            if circuit_breaker.is_failed_url(link):
+                logger.debug(f"   -> SKIP: Bài lỗi gần đây (negative cache)")
                 continue
 
             # Check time
@@ -362,46 +338,108 @@ async def get_gold_news(lookback_minutes: Optional[int] = None, fast_mode: bool
             if not matched_kws:
                 logger.debug(f"   -> SKIP: Không chứa từ khóa quan trọng")
                 continue
-            
-            if matched_kws:
-                logger.info(f"✅ PHÁT HIỆN TIN MỚI ({'WEB' if is_fallback else 'RSS'}): {title[:80]}")
-                
-                # Fetch Full Content Async
-                extract_res = await get_full_content(link, selector=selector)
-                full_content = extract_res.get("content", "")
-                image_url = extract_res.get("image_url")
-                
-                is_error_content = isinstance(full_content, str) and (full_content.strip().startswith("Lỗi") or full_content.strip().startswith("Error"))
-                is_too_short = len(full_content) < 200
 
-                if is_error_content or is_too_short:
-                    logger.warning(f"⚠️ Content invalid or too short. Skipping DB save.")
-                    continue
+            candidates.append((entry_idx, link, title, pub_date, matched_kws))
 
-                news_item = {
-                    "id": link,
-                    "source": source_name,
-                    "published_at": pub_date.isoformat(),
-                    "title": title,
-                    "keywords": matched_kws,
-                    "url": link,
-                    "content": full_content,
-                    "image_url": image_url
-                }
-                
-                # DB Save: Async call
-                saved = await database.save_to_db(news_item)
-                if saved:
-                    new_articles_count += 1
-                    new_articles_added.append(news_item)
-                
-                # Async Sleep
-                if not fast_mode:
-                    sleep_time = random.uniform(3, 6)
-                    logger.debug(f"   ...Sleeping {sleep_time:.1f}s...")
-                    await asyncio.sleep(sleep_time)
-
-    logger.info("="*60)
-    logger.info(f"✅ HOÀN TẤT! Đã thêm {new_articles_count} bài viết mới vào Database.")
-    logger.info("="*60)
-    return new_articles_added
+        # 2. DB Check: 1 lần cho cả feed (LRU seen links, link lạ: 1 query IN)
+        existing = await database.find_existing_links([c[1] for c in candidates]) if candidates else set()
+
+        for entry_idx, link, title, pub_date, matched_kws in candidates:
+            if link in existing or link in seen_links:
+                logger.debug(f"   -> SKIP: Đã có trong DB ({link})")
+                continue
+
+            logger.info(f"✅ PHÁT HIỆN TIN MỚI ({'WEB' if is_fallback else 'RSS'}): {title[:80]}")
+            seen_links.add(link)
+            await emit({
+                "seq": (source_idx, entry_idx),
+                "link": link,
+                "title": title,
+                "source": source_name,
+                "selector": source.get("selector"),
+                "pub_date": pub_date,
+                "keywords": matched_kws,
+            })
+
+    async def fetch(candidate, emit):
+        html, error = await download_article(candidate["link"])
+        await emit((candidate, html, error))
+
+    async def extract(item, emit):
+        candidate, html, error = item
+        extract_res = await extract_article(candidate["link"], html) if html is not None else {"content": error, "image_url": ""}
+        news_item = _build_news_item(candidate, extract_res)
+        if news_item:
+            await emit((candidate["seq"], news_item))
+        elif not circuit_breaker.is_open(candidate["link"]):
+            # Lỗi do chính bài viết (không phải host đang bị chặn) -> không cào lại trong TTL
+            circuit_breaker.remember_failed_url(candidate["link"])
+
+    async def persist(item, emit):
+        seq, news_item = item
+        # DB Save: Async call (write-behind)
+        if await database.save_to_db(news_item):
+            await emit((seq, news_item))
+
+    return (
+        pipeline.Pipeline("news")
+        .add_stage("discover", discover, concurrency=max(1, len(sources)))
+        .add_stage("filter", filter_entries)
+        .add_stage("fetch", fetch, concurrency=config.CRAWLER_FETCH_WORKERS)
+        .add_stage("extract", extract, concurrency=max(1, config.CRAWLER_EXTRACT_WORKERS))
+        .add_stage("persist", persist)
+    )
+
+async def _crawl(lookback_minutes: Optional[int], fast_mode: bool, sources: Optional[List[Dict]] = None) -> AsyncIterator[Tuple[Tuple[int, int], Dict[str, Any]]]:
+    """Chạy pipeline quét tin, trả ra (seq, news_item) ngay khi mỗi bài được lưu."""
+    logger.debug(">>> KHỞI TẠO DATABASE...")
+    # Init DB Async
+    await database.init_db()
+
+    logger.info(f"🔎 BẮT ĐẦU QUÉT TIN TỨC (Lookback: {lookback_minutes if lookback_minutes else '24h'})")
+    sources = config.NEWS_SOURCES if sources is None else sources
+    news_pipeline = _build_pipeline(lookback_minutes, fast_mode, sources)
+    new_articles_count = 0
+    started = time.perf_counter()
+    results = news_pipeline.run(enumerate(sources))
+    try:
+        async for seq, news_item in results:
+            new_articles_count += 1
+            yield seq, news_item
+    finally:
+        # Consumer có thể dừng sớm (break / lỗi khi screen): vẫn dừng worker pipeline, commit và ghi thống kê
+        await results.aclose()
+
+        # Bài mới nằm trong write-behind queue: commit trước khi kết thúc để job đọc sau (report / alert) thấy ngay
+        await database.flush_writes()
+
+        last_crawl_stats.clear()
+        last_crawl_stats.update({"elapsed_s": time.perf_counter() - started, "articles": new_articles_count,
+                                 "stages": news_pipeline.stats})
+
+        logger.info("="*60)
+        logger.info(f"✅ HOÀN TẤT! Đã thêm {new_articles_count} bài viết mới vào Database.")
+        logger.info("="*60)
+
+async def stream_gold_news(lookback_minutes: Optional[int] = None, fast_mode: bool = False,
+                           sources: Optional[List[Dict]] = None) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Quét tin tức dạng async generator: mỗi bài mới được trả ra ngay khi đã lưu DB (theo thứ tự hoàn thành),
+    trong lúc các bài khác vẫn đang tải / parse. Dùng cho realtime_alert (screen bài nóng đầu tiên sớm nhất có thể).
+    sources: chỉ quét các nguồn này (mặc định: toàn bộ config.NEWS_SOURCES).
+    Consumer dừng sớm nên gọi aclose() (hoặc contextlib.aclosing) để commit bài đã lưu ngay.
+    """
+    crawl = _crawl(lookback_minutes, fast_mode, sources)
+    try:
+        async for _, news_item in crawl:
+            yield news_item
+    finally:
+        await crawl.aclose()
+
+async def get_gold_news(lookback_minutes: Optional[int] = None, fast_mode: bool = False) -> List[Dict[str, Any]]:
+    """
+    Quét tin tức từ RSS và Web Fallback (Async), chạy hết pipeline rồi trả về toàn bộ bài mới.
+    Danh sách trả về theo thứ tự nguồn trong config rồi thứ tự trong feed.
+    """
+    results = [item async for item in _crawl(lookback_minutes, fast_mode)]
+    return [news_item for _, news_item in sorted(results, key=lambda r: r[0])]
@@ -0,0 +1,189 @@
+"""
+Lịch poll thích ứng theo từng nguồn tin (dùng bởi realtime_alert).
+
+- Tần suất đăng bài của mỗi nguồn: trung vị khoảng cách giữa các bài trong feed, làm mượt bằng EWMA qua các lần poll.
+- Chu kỳ poll = POLL_PUBLISH_FRACTION x tần suất đăng bài, kẹp trong [POLL_MIN_SECONDS, POLL_MAX_SECONDS].
+- Quanh tin High Impact (economic_events): poll ở chu kỳ nhỏ nhất.
+- Giờ nghỉ (cuối tuần / POLL_QUIET_HOURS_UTC): giãn chu kỳ x POLL_QUIET_MULTIPLIER.
+- Nguồn lỗi liên tục: giãn chu kỳ x2 mỗi lần lỗi (tối đa POLL_MAX_SECONDS), reset khi poll thành công.
+"""
+import math
+import statistics
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from app.core import config
+from app.core import database
+
+logger = config.logger
+
+EWMA_ALPHA = 0.3
+EVENT_REFRESH_SECONDS = 60  # Đọc lại lịch kinh tế từ DB tối đa 1 lần / phút
+MAX_LOOKBACK_MINUTES = 60
+
+
+def _parse_quiet_hours(spec: str) -> Optional[tuple]:
+    """ "21-23" -> (21, 23). Rỗng / sai định dạng -> None."""
+    try:
+        start, end = (int(x) for x in spec.split("-"))
+        return start % 24, end % 24
+    except (ValueError, AttributeError):
+        return None
+
+
+class SourceState:
+    def __init__(self, name: str):
+        self.name = name
+        self.publish_interval: Optional[float] = None  # Giây giữa 2 bài (EWMA)
+        self.interval: float = config.POLL_DEFAULT_SECONDS
+        self.next_poll: float = 0.0
+        self.last_success: Optional[float] = None
+        self.failures = 0
+        self.polls = 0
+
+
+class PollScheduler:
+    def __init__(self, min_seconds: float = None, max_seconds: float = None, default_seconds: float = None,
+                 quiet_hours: str = None):
+        self.min_seconds = config.POLL_MIN_SECONDS if min_seconds is None else min_seconds
+        self.max_seconds = max(self.min_seconds, config.POLL_MAX_SECONDS if max_seconds is None else max_seconds)
+        self.default_seconds = config.POLL_DEFAULT_SECONDS if default_seconds is None else default_seconds
+        self.quiet_hours = _parse_quiet_hours(config.POLL_QUIET_HOURS_UTC if quiet_hours is None else quiet_hours)
+        self.sources: Dict[str, SourceState] = {}
+        self.event_times: List[float] = []
+        self._events_loaded_at = 0.0
+
+    def _state(self, name: str) -> SourceState:
+        state = self.sources.get(name)
+        if state is None:
+            state = self.sources[name] = SourceState(name)
+            state.interval = self.default_seconds
+        return state
+
+    # --- Ngữ cảnh thị trường ---
+    def set_event_times(self, times: List[float]) -> None:
+        self.event_times = sorted(times)
+
+    async def refresh_events(self, now: float = None) -> None:
+        now = time.time() if now is None else now
+        if now - self._events_loaded_at < EVENT_REFRESH_SECONDS:
+            return
+        self._events_loaded_at = now
+        self.set_event_times(await database.get_high_impact_event_times(
+            past_minutes=config.POLL_EVENT_AFTER_MINUTES, ahead_minutes=24 * 60))
+
+    def in_event_window(self, now: float) -> bool:
+        before = config.POLL_EVENT_BEFORE_MINUTES * 60
+        after = config.POLL_EVENT_AFTER_MINUTES * 60
+        return any(ts - before <= now <= ts + after for ts in self.event_times)
+
+    def next_event_window(self, now: float) -> Optional[float]:
+        """Thời điểm bắt đầu cửa sổ poll nhanh kế tiếp (sau now), None nếu không có."""
+        before = config.POLL_EVENT_BEFORE_MINUTES * 60
+        for ts in self.event_times:
+            if ts - before > now:
+                return ts - before
+        return None
+
+    def is_quiet(self, now: float) -> bool:
+        dt = datetime.fromtimestamp(now, timezone.utc)
+        # Thị trường vàng đóng cửa: tối thứ 6 (21h UTC) -> tối chủ nhật (22h UTC)
+        weekday = dt.weekday()
+        if (weekday == 4 and dt.hour >= 21) or weekday == 5 or (weekday == 6 and dt.hour < 22):
+            return True
+        if self.quiet_hours:
+            start, end = self.quiet_hours
+            if start <= end:
+                return start <= dt.hour < end
+            return dt.hour >= start or dt.hour < end
+        return False
+
+    # --- Chu kỳ poll ---
+    def interval_for(self, state: SourceState, now: float) -> float:
+        if state.publish_interval is None:
+            interval = self.default_seconds
+        else:
+            interval = state.publish_interval * config.POLL_PUBLISH_FRACTION
+
+        if self.in_event_window(now):
+            interval = self.min_seconds
+        elif self.is_quiet(now):
+            interval *= config.POLL_QUIET_MULTIPLIER
+
+        if state.failures:
+            interval *= 2 ** min(state.failures, 10)
+        return min(self.max_seconds, max(self.min_seconds, interval))
+
+    def record(self, name: str, ok: bool, publish_times: List[float] = None, now: float = None) -> float:
+        """
+        Ghi nhận kết quả 1 lần poll nguồn `name` và lên lịch lần kế tiếp.
+        ok: tải nguồn thành công (feed rỗng / không có bài mới vẫn là ok; chỉ lỗi tải mới bị backoff).
+        publish_times: epoch các bài trong feed (nếu có) để ước lượng tần suất đăng bài. Trả về chu kỳ mới (giây).
+        """
+        now = time.time() if now is None else now
+        state = self._state(name)
+        state.polls += 1
+
+        if ok:
+            state.failures = 0
+            state.last_success = now
+            times = sorted(t for t in (publish_times or []) if t <= now + 300)
+            gaps = [b - a for a, b in zip(times, times[1:]) if b > a]
+            if gaps:
+                observed = statistics.median(gaps)
+                if state.publish_interval is None:
+                    state.publish_interval = observed
+                else:
+                    state.publish_interval += EWMA_ALPHA * (observed - state.publish_interval)
+        else:
+            state.failures += 1
+
+        state.interval = self.interval_for(state, now)
+        state.next_poll = now + state.interval
+        # Không ngủ quên qua đầu cửa sổ tin High Impact
+        window_start = self.next_event_window(now)
+        if window_start is not None and state.failures == 0 and window_start < state.next_poll:
+            state.next_poll = window_start
+        logger.debug(f"⏱️ Poll {name}: {'OK' if ok else 'FAIL'} -> {state.interval:.0f}s "
+                     f"(publish ~{state.publish_interval or 0:.0f}s, lỗi {state.failures})")
+        return state.interval
+
+    def due(self, sources: List[Dict[str, Any]], now: float = None) -> List[Dict[str, Any]]:
+        """Các nguồn đã đến hạn poll (giữ thứ tự config). Trong cửa sổ tin High Impact: đến hạn sau POLL_MIN_SECONDS."""
+        now = time.time() if now is None else now
+        fast = self.in_event_window(now)
+        due_sources = []
+        for source in sources:
+            state = self._state(source.get("name", "Unknown"))
+            next_poll = state.next_poll
+            if fast and state.failures == 0 and state.last_success is not None:
+                next_poll = min(next_poll, state.last_success + self.min_seconds)
+            if now >= next_poll:
+                due_sources.append(source)
+        return due_sources
+
+    async def due_sources(self, sources: List[Dict[str, Any]], now: float = None) -> List[Dict[str, Any]]:
+        now = time.time() if now is None else now
+        await self.refresh_events(now)
+        return self.due(sources, now)
+
+    def lookback_minutes(self, sources: List[Dict[str, Any]], now: float = None, minimum: int = 5) -> int:
+        """Lookback đủ phủ khoảng từ lần poll thành công trước của các nguồn (không bỏ sót bài khi poll thưa)."""
+        now = time.time() if now is None else now
+        lookback = minimum
+        for source in sources:
+            state = self.sources.get(source.get("name", "Unknown"))
+            if state and state.last_success is not None:
+                lookback = max(lookback, math.ceil((now - state.last_success) / 60) + 1)
+        return min(lookback, MAX_LOOKBACK_MINUTES)
+
+
+_scheduler: Optional[PollScheduler] = None
+
+
+def get_scheduler() -> PollScheduler:
+    global _scheduler
+    if _scheduler is None:
+        _scheduler = PollScheduler()
+    return _scheduler
@@ -36,6 +36,11 @@ class AutoTrader:
                 # Call async function
                 result = await func(*args)
                 
+                # Timeout của lệnh giao dịch: EA có thể đã thực hiện -> không gửi lại (tránh vào / đóng lệnh 2 lần)
+                if isinstance(result, str) and result.startswith("FAIL|TIMEOUT"):
+                    logger.error(f"❌ Action timed out: {result}. Not retrying (order may still be executed by MT5)")
+                    return result
+
                 # Check MT5 FAIL response
                 if isinstance(result, str) and "FAIL" in result:
                     logger.warning(f"⚠️ Action failed: {result}. Retrying ({attempt+1}/{max_retries})...")
@@ -125,15 +130,25 @@ class AutoTrader:
         """
         logger.info(f"🤖 Starting Analysis for {self.symbol} (Vol: {self.volume})...")
 
-        # 1. Get ALL Valid Signals from DB (Sorted by Quality)
-        signals_list = await database.get_all_valid_signals(self.symbol, ttl_minutes=config.SIGNAL_TTL_MINUTES)
+        # 1. Claim ALL Valid Signals from DB (Sorted by Quality) - atomic, trader khác không lấy trùng
+        signals_list = await database.claim_signals(self.symbol, ttl_minutes=config.SIGNAL_TTL_MINUTES)
         
         if not signals_list:
             logger.info("⏸️ No valid signals in DB (News/AI). Waiting...")
             return "WAIT_NO_SIGNAL"
 
-        logger.info(f"📥 Found {len(signals_list)} valid signals. Processing batch...")
-        
+        claim_token = signals_list[0]['claim_token']
+        logger.info(f"📥 Claimed {len(signals_list)} valid signals. Processing batch...")
+
+        try:
+            return await self._process_claimed_signals(signals_list, claim_token)
+        finally:
+            # Signal chưa complete (lỗi lấy giá / đặt lệnh thất bại) được trả lại cho lần chạy sau
+            released = await database.release_signals(claim_token)
+            if released:
+                logger.info(f"↩️ Released {released} unfinished signal(s) for retry.")
+
+    async def _process_claimed_signals(self, signals_list: List[dict], claim_token: str) -> list:
         results = []
 
         # 2. Iterate through signals
@@ -159,14 +174,14 @@ class AutoTrader:
                     close_success = await self.close_all_positions(self.symbol, reason="CONFLICT_REVERSE")
                     if not close_success:
                         logger.error("   ❌ Failed to close old positions. Skipping this signal safety.")
-                        await database.mark_signal_processed(signal_id)
+                        await database.complete_signal(signal_id, claim_token)
                         results.append(f"SKIP_CLOSE_FAIL_{signal_id}")
                         continue
                         
                     logger.info("   ✅ Old positions cleared. Proceeding to entry...")
                 else:
                     logger.info(f"   🛡️ WEAK SIGNAL (<8). Ignored to protect existing trend.")
-                    await database.mark_signal_processed(signal_id)
+                    await database.complete_signal(signal_id, claim_token)
                     results.append(f"IGNORED_WEAK_{signal_id}")
                     continue  # Skip to next signal
             else:
@@ -178,7 +193,7 @@ class AutoTrader:
             if source == 'NEWS':
                 if not config.ENABLE_STRATEGY_NEWS:
                      logger.info("   ⛔ Strategy NEWS is DISABLED. Skipping.")
-                     await database.mark_signal_processed(signal_id)
+                     await database.complete_signal(signal_id, claim_token)
                      continue
 
                 df, _ = await get_market_data(self.symbol)
@@ -211,7 +226,9 @@ class AutoTrader:
                     except Exception as e:
                         logger.error(f"❌ Failed to save trade to DB: {e}")
                     
-                    await database.mark_signal_processed(signal_id)
+                    await database.complete_signal(signal_id, claim_token)
+                    results.append(result)
+                elif await self._close_timed_out_signal(signal_id, claim_token, result):
                     results.append(result)
                 else:
                     logger.error(f"   ❌ Execution Failed: {result}")
@@ -220,14 +237,14 @@ class AutoTrader:
             elif source == 'AI_REPORT':
                 if not config.ENABLE_STRATEGY_REPORT:
                      logger.info("   ⛔ Strategy REPORT is DISABLED. Skipping.")
-                     await database.mark_signal_processed(signal_id)
+                     await database.complete_signal(signal_id, claim_token)
                      continue
 
                 # Check News Constraints only for AI signals? (Optional, kept from original logic)
                 upcoming_news = await database.check_upcoming_high_impact_news(minutes=30)
                 if upcoming_news:
                     logger.warning(f"   ⛔ DỪNG GIAO DỊCH (AI): Sắp có tin mạnh \"{upcoming_news}\".")
-                    await database.mark_signal_processed(signal_id) 
+                    await database.complete_signal(signal_id, claim_token) 
                     results.append("SKIP_NEWS_EVENT")
                     continue
 
@@ -264,7 +281,7 @@ class AutoTrader:
                         exec_price = db_entry
                     else:
                         logger.error(f"❌ Lệnh {signal_type} thiếu Entry Price. Bỏ qua.")
-                        await database.mark_signal_processed(signal_id)
+                        await database.complete_signal(signal_id, claim_token)
                         continue
                 
                 logger.info(f"   🚀 Executing AI {signal_type} | Price: {exec_price} | Vol: {config.TRADE_REPORT_VOLUME}")
@@ -289,11 +306,28 @@ class AutoTrader:
                     except Exception as e:
                         logger.error(f"❌ Failed to save trade to DB: {e}")
                     
-                    await database.mark_signal_processed(signal_id)
+                    await database.complete_signal(signal_id, claim_token)
+                    results.append(result)
+                elif await self._close_timed_out_signal(signal_id, claim_token, result):
                     results.append(result)
+                else:
+                    logger.error(f"   ❌ Execution Failed: {result}")
         
         return results
 
+    async def _close_timed_out_signal(self, signal_id: int, claim_token: str, result: str) -> bool:
+        """
+        ORDER bị timeout: EA có thể đã vào lệnh -> complete signal (không release để lần sau gửi lại ORDER).
+        Lệnh (nếu có) cần đối soát thủ công trên MT5. Trả về True nếu result là FAIL|TIMEOUT.
+        """
+        if not (isinstance(result, str) and result.startswith("FAIL|TIMEOUT")):
+            return False
+        logger.error(f"   ❌ Signal #{signal_id}: ORDER timeout, MT5 có thể đã vào lệnh. "
+                     f"Đánh dấu đã xử lý (không gửi lại) - cần kiểm tra / đối soát thủ công trên MT5.")
+        if signal_id:
+            await database.complete_signal(signal_id, claim_token)
+        return True
+
     async def process_news_signal(self, news_data: dict):
         """
         Xử lý phản ứng với tin tức (Async)
@@ -0,0 +1,125 @@
+"""
+Bộ so khớp keyword dùng chung (crawler lọc tin + realtime_alert lọc blacklist / urgent).
+
+- Build 1 lần từ config: mọi keyword (đã lowercase) gộp vào 1 regex dạng trie biên dịch sẵn,
+  quét text 1 lượt duy nhất thay vì chạy 1 regex / 1 phép `in` cho từng keyword.
+- Mỗi keyword gắn với 1 hoặc nhiều category. DIRECT / CORRELATION khớp nguyên từ (như `\\b...\\b` cũ),
+  URGENT / BLACKLIST / BREAKING khớp chuỗi con (như `k in title_lower` cũ).
+- Regex dùng lookahead nên bắt được cả các keyword chồng nhau (VD: "interest rate" và "rate").
+"""
+import re
+from typing import Dict, Iterable, List, Optional, Set
+
+from app.core import config
+
+DIRECT = "DIRECT"
+CORRELATION = "CORRELATION"
+URGENT = "URGENT"
+BLACKLIST = "BLACKLIST"
+BREAKING = "BREAKING"
+
+WHOLE_WORD_CATEGORIES = {DIRECT, CORRELATION}
+
+
+def _is_word_char(ch: str) -> bool:
+    return ch.isalnum() or ch == "_"
+
+
+def _trie_regex(terms: Iterable[str]) -> str:
+    """
+    Regex dạng trie cho tập term (VD: fed, fed rate, fomc -> `f(?:ed(?:\\ rate)?|omc)`).
+    Engine chỉ rẽ nhánh theo ký tự kế tiếp thay vì thử lần lượt từng term; ở mỗi vị trí khớp term dài nhất.
+    """
+    trie: Dict[str, dict] = {}
+    for term in terms:
+        node = trie
+        for ch in term:
+            node = node.setdefault(ch, {})
+        node[""] = {}
+
+    def build(node: Dict[str, dict]) -> str:
+        is_end = "" in node
+        branches = [re.escape(ch) + build(child) for ch, child in sorted(node.items()) if ch]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        if is_end:
+            return ("(?:" + body + ")?") if len(branches) == 1 else body + "?"
+        return body
+
+    return build(trie)
+
+
+class KeywordMatcher:
+    def __init__(self, categories: Dict[str, Iterable[str]]):
+        """categories: {category: [keyword, ...]} (keyword là chuỗi thường, không phải regex)."""
+        # term (lowercase) -> [(category, keyword gốc)]
+        self._terms: Dict[str, List[tuple]] = {}
+        for category, keywords in categories.items():
+            for kw in keywords:
+                term = kw.lower()
+                if term:
+                    self._terms.setdefault(term, []).append((category, kw))
+
+        # Tại 1 vị trí, regex chỉ trả về term dài nhất -> các term ngắn hơn cùng vị trí lấy qua bảng prefix
+        ordered = sorted(self._terms, key=len, reverse=True)
+        self._prefixes: Dict[str, List[str]] = {
+            term: [other for other in ordered if other != term and term.startswith(other)]
+            for term in ordered
+        }
+        self._pattern = re.compile("(?=(" + _trie_regex(ordered) + "))") if ordered else None
+
+    def _is_whole_word(self, text: str, start: int, end: int) -> bool:
+        """Tương đương `\\b` ở 2 đầu đoạn text[start:end]."""
+        before = _is_word_char(text[start - 1]) if start > 0 else False
+        after = _is_word_char(text[end]) if end < len(text) else False
+        return before != _is_word_char(text[start]) and after != _is_word_char(text[end - 1])
+
+    def match(self, text: str, categories: Optional[Set[str]] = None) -> Dict[str, List[str]]:
+        """
+        Quét text 1 lượt. Trả về {category: [keyword gốc, ...]} (không trùng, theo thứ tự xuất hiện).
+        categories: chỉ lấy các category này (None = tất cả).
+        """
+        found: Dict[str, List[str]] = {}
+        if not text or self._pattern is None:
+            return found
+
+        text_lower = text.lower()
+        for m in self._pattern.finditer(text_lower):
+            start = m.start()
+            longest = m.group(1)
+            for term in [longest] + self._prefixes[longest]:
+                end = start + len(term)
+                for category, kw in self._terms[term]:
+                    if categories is not None and category not in categories:
+                        continue
+                    if category in WHOLE_WORD_CATEGORIES and not self._is_whole_word(text_lower, start, end):
+                        continue
+                    hits = found.setdefault(category, [])
+                    if kw not in hits:
+                        hits.append(kw)
+        return found
+
+    def keywords(self, text: str, categories: Set[str]) -> List[str]:
+        """Danh sách keyword (không trùng) khớp trong các category cho trước."""
+        result: List[str] = []
+        for hits in self.match(text, categories).values():
+            result.extend(kw for kw in hits if kw not in result)
+        return result
+
+
+_matcher: Optional[KeywordMatcher] = None
+
+
+def get_matcher() -> KeywordMatcher:
+    """Matcher dùng chung, build 1 lần từ config."""
+    global _matcher
+    if _matcher is None:
+        _matcher = KeywordMatcher({
+            DIRECT: config.KEYWORDS_DIRECT,
+            CORRELATION: config.KEYWORDS_CORRELATION,
+            URGENT: config.KEYWORDS_URGENT,
+            BLACKLIST: config.KEYWORDS_BLACKLIST,
+            BREAKING: config.KEYWORDS_BREAKING,
+        })
+    return _matcher
@@ -0,0 +1,129 @@
+"""
+SimHash 64-bit cho phát hiện bài viết gần trùng (cùng 1 tin Fed/CPI đăng lại ở nhiều nguồn).
+
+- fingerprint(): SimHash trên shingle 3 từ liên tiếp (lowercase, chỉ giữ ký tự chữ/số).
+- FingerprintIndex: index các fingerprint gần đây, chia 64 bit thành (max_distance + 1) dải;
+  2 fingerprint lệch <= max_distance bit chắc chắn trùng nhau ít nhất 1 dải (nguyên lý Dirichlet)
+  -> chỉ so Hamming với các ứng viên cùng dải thay vì toàn bộ index.
+"""
+import hashlib
+import re
+import time
+from typing import Dict, List, Optional, Tuple
+
+BITS = 64
+SHINGLE_SIZE = 3
+
+_TOKEN_RE = re.compile(r"\w+")
+
+
+def _hash64(token: str) -> int:
+    return int.from_bytes(hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+def fingerprint(text: str) -> Optional[int]:
+    """SimHash 64-bit (unsigned) của text. None nếu text không có từ nào."""
+    tokens = _TOKEN_RE.findall((text or "").lower())
+    if not tokens:
+        return None
+    if len(tokens) < SHINGLE_SIZE:
+        shingles = tokens
+    else:
+        shingles = [" ".join(tokens[i:i + SHINGLE_SIZE]) for i in range(len(tokens) - SHINGLE_SIZE + 1)]
+
+    weights = [0] * BITS
+    for shingle in shingles:
+        h = _hash64(shingle)
+        for bit in range(BITS):
+            if h >> bit & 1:
+                weights[bit] += 1
+            else:
+                weights[bit] -= 1
+
+    value = 0
+    for bit in range(BITS):
+        if weights[bit] > 0:
+            value |= 1 << bit
+    return value
+
+
+def distance(a: int, b: int) -> int:
+    """Khoảng cách Hamming giữa 2 fingerprint."""
+    return bin(a ^ b).count("1")
+
+
+def to_signed(value: int) -> int:
+    """unsigned 64-bit -> signed (cột INTEGER của SQLite)."""
+    return value - (1 << BITS) if value >= 1 << (BITS - 1) else value
+
+
+def to_unsigned(value: int) -> int:
+    return value + (1 << BITS) if value < 0 else value
+
+
+class FingerprintIndex:
+    def __init__(self, max_distance: int = 10, window_seconds: float = 86400):
+        self.max_distance = max(0, max_distance)
+        self.window_seconds = window_seconds
+        n_bands = self.max_distance + 1
+        width = BITS // n_bands
+        # (shift, mask) của từng dải; dải cuối lấy phần bit còn dư
+        self._bands: List[Tuple[int, int]] = [
+            (i * width, (1 << (width if i < n_bands - 1 else BITS - i * width)) - 1) for i in range(n_bands)
+        ]
+        self._buckets: List[Dict[int, List[int]]] = [{} for _ in self._bands]
+        # entry id -> (fingerprint, canonical_id, added_at)
+        self._entries: Dict[int, Tuple[int, str, float]] = {}
+        self._next_id = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _keys(self, fp: int) -> List[int]:
+        return [(fp >> shift) & mask for shift, mask in self._bands]
+
+    def find(self, fp: int, now: Optional[float] = None) -> Optional[str]:
+        """canonical_id của bài gần trùng gần nhất (trong cửa sổ thời gian), None nếu không có."""
+        now = time.time() if now is None else now
+        best: Optional[Tuple[int, str]] = None
+        seen = set()
+        for bucket, key in zip(self._buckets, self._keys(fp)):
+            for entry_id in bucket.get(key, ()):
+                if entry_id in seen:
+                    continue
+                seen.add(entry_id)
+                other, canonical_id, added_at = self._entries[entry_id]
+                if now - added_at > self.window_seconds:
+                    continue
+                dist = distance(fp, other)
+                if dist <= self.max_distance and (best is None or dist < best[0]):
+                    best = (dist, canonical_id)
+        return best[1] if best else None
+
+    def add(self, fp: int, article_id: str, canonical_id: Optional[str] = None, added_at: Optional[float] = None) -> None:
+        """Thêm fingerprint của 1 bài (canonical_id = None: bài này là bản gốc)."""
+        added_at = time.time() if added_at is None else added_at
+        entry_id = self._next_id
+        self._next_id += 1
+        self._entries[entry_id] = (fp, canonical_id or article_id, added_at)
+        for bucket, key in zip(self._buckets, self._keys(fp)):
+            bucket.setdefault(key, []).append(entry_id)
+        if self._next_id % 256 == 0:
+            self.prune(added_at)
+
+    def prune(self, now: Optional[float] = None) -> int:
+        """Bỏ các fingerprint ngoài cửa sổ thời gian. Trả về số entry đã bỏ."""
+        now = time.time() if now is None else now
+        expired = {eid for eid, entry in self._entries.items() if now - entry[2] > self.window_seconds}
+        if not expired:
+            return 0
+        for eid in expired:
+            del self._entries[eid]
+        for bucket in self._buckets:
+            for key in list(bucket):
+                kept = [eid for eid in bucket[key] if eid not in expired]
+                if kept:
+                    bucket[key] = kept
+                else:
+                    del bucket[key]
+        return len(expired)
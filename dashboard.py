@@ -16,21 +16,22 @@ from app.services.mt5_bridge import MT5DataClient
 DB_PATH = os.path.join("data", "xauusd_news.db")
 PAGE_TITLE = "🤖 Signals Bot Dashboard"
 LAYOUT = "wide"
+RECENT_TRADES_LIMIT = 500  # Bảng chi tiết / PnL bar chỉ đọc N lệnh gần nhất
 
 st.set_page_config(page_title=PAGE_TITLE, layout=LAYOUT)
 
 # --- Database Function ---
 def load_data():
     """
-    Connect to SQLite and load trade_history table.
+    Connect to SQLite and load the most recent trades from trade_history.
     """
     if not os.path.exists(DB_PATH):
         return pd.DataFrame()
     
     try:
         conn = sqlite3.connect(DB_PATH)
-        query = "SELECT * FROM trade_history ORDER BY close_time DESC"
-        df = pd.read_sql_query(query, conn)
+        query = "SELECT * FROM trade_history ORDER BY close_time_ts DESC LIMIT ?"
+        df = pd.read_sql_query(query, conn, params=(RECENT_TRADES_LIMIT,))
         conn.close()
         
         # Data Processing
@@ -69,6 +70,25 @@ def load_data():
         st.error(f"Error loading data: {e}")
         return pd.DataFrame()
 
+def load_stats():
+    """
+    Load summary tables (maintained by triggers, see migration #008): strategy stats + daily equity/drawdown.
+    """
+    if not os.path.exists(DB_PATH):
+        return pd.DataFrame(), pd.DataFrame()
+    
+    try:
+        conn = sqlite3.connect(DB_PATH)
+        strategy_stats = pd.read_sql_query("SELECT * FROM trade_strategy_stats ORDER BY net_profit DESC", conn)
+        equity = pd.read_sql_query("SELECT * FROM trade_equity_curve ORDER BY day", conn)
+        conn.close()
+        
+        equity['day'] = pd.to_datetime(equity['day'], errors='coerce')
+        return strategy_stats, equity
+    except Exception as e:
+        st.error(f"Error loading stats: {e}")
+        return pd.DataFrame(), pd.DataFrame()
+
 # --- Helper: Sync Logic (Reused from script) ---
 async def run_sync_process():
     status_text = st.empty()
@@ -143,26 +163,28 @@ with col_btn2:
 
 # Load Data
 df = load_data()
+strategy_stats, equity_df = load_stats()
 
 if df.empty:
     st.warning("⚠️ No trade data found. The database might be empty or the table 'trade_history' does not exist.")
 else:
     # --- Metrics Section (Top Row) ---
-    # Filter closed trades for clearer stats
-    closed_trades = df[df['status'] == 'CLOSED']
-    total_closed = len(closed_trades)
+    # Totals come from the summary tables (all history); df only holds recent trades
+    closed_trades = df[df['status'] == 'CLOSED'].copy()
+    total_closed = int(strategy_stats['trades'].sum()) if not strategy_stats.empty else 0
     
     # Win Rate calculation
     if total_closed > 0:
-        wins = len(closed_trades[closed_trades['profit'] > 0])
+        wins = int(strategy_stats['wins'].sum())
         win_rate = (wins / total_closed) * 100
     else:
         win_rate = 0.0
         
-    # Net Profit
-    net_profit = closed_trades['profit'].sum()
+    # Net Profit / Max Drawdown
+    net_profit = strategy_stats['net_profit'].sum() if not strategy_stats.empty else 0.0
+    max_drawdown = equity_df['drawdown'].max() if not equity_df.empty else 0.0
 
-    col1, col2, col3 = st.columns(3)
+    col1, col2, col3, col4 = st.columns(4)
     
     with col1:
         st.metric("Total Trades (Closed)", f"{total_closed}")
@@ -172,6 +194,9 @@ else:
         
     with col3:
         st.metric("Net Profit", f"${net_profit:,.2f}", delta_color="normal" if net_profit >= 0 else "inverse")
+        
+    with col4:
+        st.metric("Max Drawdown", f"${max_drawdown:,.2f}")
 
     st.markdown("---")
 
@@ -180,21 +205,18 @@ else:
     
     with chart_col1:
         st.subheader("📈 Cumulative PnL")
-        # Sort by close_time ascending for cumulative calculation
-        if not closed_trades.empty:
-            chart_df = closed_trades.sort_values(by="close_time").copy()
-            chart_df['cumulative_pnl'] = chart_df['profit'].cumsum()
-            
-            fig_line = px.line(chart_df, x="close_time", y="cumulative_pnl", 
+        # Daily equity curve + drawdown (view trade_equity_curve)
+        if not equity_df.empty:
+            fig_line = px.line(equity_df, x="day", y=["equity", "drawdown"], 
                                title="Cumulative Profit Over Time",
-                               labels={"cumulative_pnl": "Profit (USD)", "close_time": "Time"},
+                               labels={"value": "Profit (USD)", "day": "Day", "variable": ""},
                                markers=True)
             st.plotly_chart(fig_line, use_container_width=True)
         else:
             st.info("No closed trades to plot Cumulative PnL.")
 
     with chart_col2:
-        st.subheader("📊 PnL Distribution")
+        st.subheader(f"📊 PnL Distribution (last {RECENT_TRADES_LIMIT})")
         if not closed_trades.empty:
             # Bar chart of profit per ticket
             closed_trades['color'] = closed_trades['profit'] > 0
@@ -213,13 +235,11 @@ else:
     # --- Strategy Performance Section ---
     st.subheader("🎯 Strategy Performance")
     
-    if 'strategy' in df.columns and not closed_trades.empty:
-        # Group by Strategy
-        strategy_stats = closed_trades.groupby('strategy').agg(
-            Total_Trades=('ticket', 'count'),
-            Total_Profit=('profit', 'sum'),
-            Wins=('profit', lambda x: (x > 0).sum())
-        ).reset_index()
+    if not strategy_stats.empty:
+        # Summary rows per strategy (trade_strategy_stats)
+        strategy_stats = strategy_stats.rename(columns={
+            'trades': 'Total_Trades', 'net_profit': 'Total_Profit', 'wins': 'Wins'
+        })
         
         # Calculate Win Rate
         strategy_stats['Win_Rate'] = (strategy_stats['Wins'] / strategy_stats['Total_Trades'] * 100).round(1)
@@ -259,7 +279,7 @@ else:
     st.markdown("---")
     
     # --- Data Table Section ---
-    st.subheader("📋 Trade History Details")
+    st.subheader(f"📋 Trade History Details (last {RECENT_TRADES_LIMIT})")
     
     # 1. Chuẩn bị dữ liệu hiển thị (Copy để không ảnh hưởng data gốc)
     display_df = df.copy()
@@ -19,12 +19,17 @@ from apscheduler.triggers.cron import CronTrigger
 from apscheduler.triggers.interval import IntervalTrigger
 
 from app.core import config
+from app.core import db_metrics
+from app.core import http_client
 from app.services import news_crawler
 from app.jobs import daily_report
 from app.jobs import realtime_alert
 from app.jobs import economic_worker
 from app.jobs import trade_monitor
+from app.jobs import db_maintenance
+from app.jobs import reextract as reextract_job
 from app.services.trader import AutoTrader
+from app.services.mt5_bridge import MT5DataClient
 
 logger = config.logger
 
@@ -128,9 +133,9 @@ async def start_scheduler():
     scheduler.add_job(job_analyze_and_send, CronTrigger(hour=13, minute=45))
     scheduler.add_job(job_analyze_and_send, CronTrigger(hour=19, minute=15))
     
-    # --- REALTIME ALERT (1 phút) ---
-    logger.info("⚡ Thiết lập Real-time Alert: Chạy mỗi 1 phút (HFT Mode)")
-    scheduler.add_job(realtime_alert.main, IntervalTrigger(minutes=1), max_instances=1, coalesce=True)
+    # --- REALTIME ALERT (lịch poll thích ứng theo nguồn) ---
+    logger.info(f"⚡ Thiết lập Real-time Alert: Kiểm tra mỗi {config.POLL_TICK_SECONDS}s, poll nguồn đến hạn ({config.POLL_MIN_SECONDS:.0f}-{config.POLL_MAX_SECONDS:.0f}s)")
+    scheduler.add_job(realtime_alert.main, IntervalTrigger(seconds=config.POLL_TICK_SECONDS), max_instances=1, coalesce=True)
 
     # --- ECONOMIC CALENDAR (1 phút) ---
     logger.info("📅 Thiết lập Economic Calendar Worker: Chạy mỗi 1 phút")
@@ -143,12 +148,26 @@ async def start_scheduler():
     # --- TRADE MONITOR (5 minutes) ---
     logger.info("💾 Thiết lập Trade Monitor: Sync trade status mỗi 5 phút")
     scheduler.add_job(trade_monitor.main, IntervalTrigger(minutes=5), max_instances=1, coalesce=True)
+
+    # --- DB MAINTENANCE (Hằng ngày, ngoài giờ giao dịch chính) ---
+    logger.info(f"🧹 Thiết lập DB Maintenance: 03:30 mỗi ngày (giữ {config.ARTICLE_RETENTION_DAYS} ngày)")
+    scheduler.add_job(db_maintenance.main, CronTrigger(hour=3, minute=30), max_instances=1, coalesce=True)
+
+    # --- DB METRICS (opt-in: DB_METRICS_ENABLED=true) ---
+    if config.DB_METRICS_ENABLED:
+        logger.info(f"📈 Thiết lập DB Metrics: ghi snapshot mỗi {config.DB_METRICS_DUMP_MINUTES} phút -> {config.DB_METRICS_FILE}")
+        scheduler.add_job(db_metrics.log_snapshot, IntervalTrigger(minutes=config.DB_METRICS_DUMP_MINUTES), max_instances=1, coalesce=True)
     
     logger.info(f"✅ Đã thiết lập jobs.")
     logger.info("♾️  Bắt đầu vòng lặp sự kiện (Event Loop)...")
     
+    # Tạo sẵn worker parse HTML trước khi có burst tin đầu tiên
+    await news_crawler.extract_pool.warm_up()
+
     from app.core import database
     await database.init_db()
+    # Nạp sẵn LRU link đã có trong DB -> lượt quét đầu tiên đã lọc feed trong RAM
+    await database.get_seen_links()
     
     scheduler.start()
     
@@ -156,19 +175,44 @@ async def start_scheduler():
         # Keep alive forever
         while True:
             await asyncio.sleep(1)
-    except KeyboardInterrupt:
+    except (KeyboardInterrupt, asyncio.CancelledError):
         logger.info("\n⏹️  Dừng scheduler bởi người dùng")
         scheduler.shutdown()
     except Exception as e:
         logger.critical(f"🔥 LỖI NGHIÊM TRỌNG: {e}", exc_info=True)
         scheduler.shutdown()
+    finally:
+        if db_metrics.ENABLED:
+            db_metrics.log_snapshot()
+        # Đóng HTTP session dùng chung + kết nối MT5 + process pool parse HTML + pool kết nối DB
+        await http_client.close_sessions()
+        await MT5DataClient().disconnect()
+        news_crawler.extract_pool.shutdown()
+        await database.close_db()
 
-async def run_manual_async(report_only=False, alert_only=False, trade_only=False, crawler_only=False, calendar_only=False, monitor_only=False):
+async def run_manual_async(report_only=False, alert_only=False, trade_only=False, crawler_only=False, calendar_only=False, monitor_only=False, rebuild_stats=False, reextract=False):
     """Chạy full flow thủ công (Async Wrapper)"""
     
     from app.core import database
     await database.init_db()
     
+    try:
+        if rebuild_stats:
+            logger.info("📊 Rebuilding Trade Statistics...")
+            await database.rebuild_trade_stats()
+            return
+        if reextract:
+            logger.info("♻️ Re-extracting articles from HTML cache...")
+            await reextract_job.main()
+            return
+        await _run_manual_jobs(report_only, alert_only, trade_only, crawler_only, calendar_only, monitor_only)
+    finally:
+        await http_client.close_sessions()
+        await MT5DataClient().disconnect()
+        news_crawler.extract_pool.shutdown()
+        await database.close_db()
+
+async def _run_manual_jobs(report_only=False, alert_only=False, trade_only=False, crawler_only=False, calendar_only=False, monitor_only=False):
     if report_only:
         logger.info("🛠️ Running Manual Report...")
         await job_scan_news(force=True)
@@ -222,6 +266,8 @@ def main():
     parser.add_argument("--trade", action="store_true", help="Chạy thủ công Auto Trader")
     parser.add_argument("--calendar", action="store_true", help="Chạy thủ công Economic Calendar")
     parser.add_argument("--monitor", action="store_true", help="Chạy thủ công Trade Monitor (Sync SL/TP)")
+    parser.add_argument("--rebuild-stats", action="store_true", help="Tính lại bảng thống kê giao dịch từ trade_history")
+    parser.add_argument("--reextract", action="store_true", help="Trích xuất lại nội dung bài viết từ HTML cache (không tải lại)")
     
     args = parser.parse_args()
 
@@ -240,6 +286,10 @@ def main():
              asyncio.run(run_manual_async(calendar_only=True))
         elif args.monitor:
              asyncio.run(run_manual_async(monitor_only=True))
+        elif args.rebuild_stats:
+             asyncio.run(run_manual_async(rebuild_stats=True))
+        elif args.reextract:
+             asyncio.run(run_manual_async(reextract=True))
         else:
             # Chạy Scheduler (Async Mode)
             asyncio.run(start_scheduler())
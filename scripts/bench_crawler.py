@@ -0,0 +1,132 @@
+"""
+Benchmark: Quét tin (news_crawler.get_gold_news) với fixture HTTP server cục bộ
+- 3 nguồn trên 3 host khác nhau (127.0.0.1/2/3), mỗi response trễ LATENCY_MS (giả lập mạng)
+- SERIAL:      1 request tại 1 thời điểm, không rate limit (= luồng tuần tự cũ ở fast_mode;
+               chế độ thường cũ còn sleep thêm 3-6s sau mỗi bài)
+- CONCURRENT:  feed + nội dung bài tải song song, không rate limit
+- POLITE:      song song + token bucket mặc định theo host (CRAWLER_HOST_RATE / CRAWLER_HOST_BURST)
+Kết quả (id, thứ tự) của các kịch bản phải giống hệt nhau.
+
+Usage: python scripts/bench_crawler.py [articles_per_source] [latency_ms]
+"""
+
+import asyncio
+import logging
+import os
+import sys
+import tempfile
+import threading
+import time
+from email.utils import format_datetime
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core import config
+from app.core import database
+from app.services import news_crawler
+
+HOSTS = ["127.0.0.1", "127.0.0.2", "127.0.0.3"]
+PARAGRAPH = ("<p>Gold prices climbed on Tuesday as traders weighed fresh comments from Federal Reserve officials "
+             "and a softer US Dollar, with XAUUSD holding above key support levels during the London session.</p>")
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    articles = 4
+    latency = 0.2
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, body: str, content_type: str):
+        time.sleep(self.latency)
+        data = body.encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        host = self.headers.get("Host", "")
+        if self.path == "/feed.xml":
+            now = format_datetime(datetime.now(timezone.utc))
+            items = []
+            for i in range(self.articles):
+                items.append(f"<item><title>Gold rallies as Fed signals pause #{i} ({host})</title>"
+                             f"<link>http://{host}/article/{i}.html</link><pubDate>{now}</pubDate>"
+                             f"<description>XAUUSD update</description></item>")
+            # Bài không chứa keyword: bị lọc, không tải nội dung
+            items.append(f"<item><title>Sports roundup ({host})</title><link>http://{host}/article/x.html</link>"
+                         f"<pubDate>{now}</pubDate></item>")
+            self._send(f"<?xml version='1.0'?><rss version='2.0'><channel><title>{host}</title>{''.join(items)}</channel></rss>",
+                       "application/rss+xml")
+        elif self.path.startswith("/article/"):
+            title = f"Gold article {self.path} on {host}"
+            self._send(f"<html><head><title>{title}</title></head><body><article><h1>{title}</h1>{PARAGRAPH * 8}</article></body></html>",
+                       "text/html")
+        else:
+            self.send_error(404)
+
+def start_server() -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer(("0.0.0.0", 0), FixtureHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+async def run_scan(db_path: str):
+    database.DB_NAME = db_path
+    try:
+        start = time.perf_counter()
+        articles = await news_crawler.get_gold_news(lookback_minutes=60)
+        return time.perf_counter() - start, [a["id"] for a in articles]
+    finally:
+        await database.close_db()
+
+def main():
+    FixtureHandler.articles = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+    FixtureHandler.latency = (int(sys.argv[2]) if len(sys.argv) > 2 else 200) / 1000
+    config.logger.setLevel(logging.WARNING)
+
+    server = start_server()
+    port = server.server_address[1]
+    config.NEWS_SOURCES = [
+        {"name": f"Fixture{i}", "rss": f"http://{host}:{port}/feed.xml", "web": None, "selector": None}
+        for i, host in enumerate(HOSTS)
+    ]
+
+    scenarios = [
+        ("SERIAL", {"CRAWLER_MAX_CONCURRENCY": 1, "CRAWLER_HOST_CONCURRENCY": 1, "CRAWLER_HOST_RATE": 0}),
+        ("CONCURRENT", {"CRAWLER_MAX_CONCURRENCY": 8, "CRAWLER_HOST_CONCURRENCY": 4, "CRAWLER_HOST_RATE": 0}),
+        ("POLITE", {"CRAWLER_MAX_CONCURRENCY": config.CRAWLER_MAX_CONCURRENCY,
+                    "CRAWLER_HOST_CONCURRENCY": config.CRAWLER_HOST_CONCURRENCY,
+                    "CRAWLER_HOST_RATE": config.CRAWLER_HOST_RATE}),
+    ]
+
+    hits = FixtureHandler.articles * len(HOSTS)
+    print("=" * 60)
+    print(f"CRAWLER BENCHMARK ({len(HOSTS)} sources x {FixtureHandler.articles} hits, latency {FixtureHandler.latency * 1000:.0f} ms)")
+    print("=" * 60)
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        config.HTML_CACHE_DIR = os.path.join(tmp, "html_cache")
+        for name, overrides in scenarios:
+            for key, value in overrides.items():
+                setattr(config, key, value)
+            elapsed, ids = asyncio.run(run_scan(os.path.join(tmp, f"{name}.db")))
+            results[name] = (elapsed, ids)
+            rate = f"rate={overrides['CRAWLER_HOST_RATE']}/s burst={config.CRAWLER_HOST_BURST}" if overrides["CRAWLER_HOST_RATE"] else "no rate limit"
+            print(f"   {name:<11} {elapsed:6.2f} s   {len(ids)} articles   ({rate})")
+
+    server.shutdown()
+    serial = results["SERIAL"][0]
+    print(f"\n   Legacy (non fast_mode) also slept 3-6s per article: ~{serial + hits * 4.5:.0f} s in total")
+    print(f"   => Speedup CONCURRENT vs SERIAL: x{serial / results['CONCURRENT'][0]:.1f}")
+    identical = len({tuple(ids) for _, ids in results.values()}) == 1
+    print(f"   Results identical across scenarios: {'✅' if identical else '❌'}")
+    print("=" * 60)
+
+if __name__ == "__main__":
+    main()
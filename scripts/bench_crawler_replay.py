@@ -0,0 +1,348 @@
+"""
+Benchmark / Replay: chạy news_crawler.get_gold_news end-to-end trên fixture đã ghi, không cần mạng.
+
+- record: tải RSS + trang web của các nguồn trong config.NEWS_SOURCES và HTML các bài khớp keyword
+          (mạng thật) -> thư mục fixture (manifest.json + body nén gzip).
+- replay: phát lại fixture qua HTTP server asyncio cục bộ. Mỗi host gốc được map sang 1 IP loopback riêng
+          (127.0.0.N) để rate limit / circuit breaker theo host hoạt động như thật; link trong feed / HTML được
+          viết lại về server. Có thể thêm độ trễ (+ jitter), tỉ lệ lỗi 500 và 403 (giả lập bị chặn).
+          Không có --fixtures: dùng bộ fixture tổng hợp (3 nguồn).
+Báo cáo: articles/s, thời gian theo stage của pipeline (busy / blocked), số response theo status,
+bộ nhớ cấp phát (tracemalloc, process chính - worker parse HTML không được tính) ở 1 lượt chạy riêng.
+
+Usage:
+  python scripts/bench_crawler_replay.py record [--out DIR] [--max-articles N]
+  python scripts/bench_crawler_replay.py replay [--fixtures DIR] [--runs N] [--latency-ms 100] [--jitter-ms 20]
+                                                [--error-rate 0.0] [--forbidden-rate 0.0] [--no-rate-limit]
+                                                [--seed 1] [--json OUT]
+"""
+
+import argparse
+import asyncio
+import gzip
+import hashlib
+import json
+import logging
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections import Counter
+from datetime import datetime, timezone
+from email.utils import format_datetime
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import feedparser
+
+from app.core import circuit_breaker
+from app.core import config
+from app.core import database
+from app.core import feed_cache
+from app.core import rate_limit
+from app.services import news_crawler
+
+DEFAULT_FIXTURES = os.path.join(config.DATA_DIR, "crawler_fixtures")
+PARAGRAPH = ("<p>Gold prices climbed on Tuesday as traders weighed fresh comments from Federal Reserve officials "
+             "and a softer US Dollar, with XAUUSD holding above key support levels during the London session.</p>")
+
+# --- Fixture ---
+
+class Fixtures:
+    def __init__(self, sources: List[Dict], recorded_at: float):
+        self.sources = sources
+        self.recorded_at = recorded_at
+        self.responses: Dict[str, Tuple[int, str, bytes]] = {}  # url -> (status, content_type, body)
+
+    def add(self, url: str, status: int, content_type: str, body: bytes) -> None:
+        self.responses[url] = (status, content_type, body)
+
+    def save(self, out_dir: str) -> None:
+        os.makedirs(os.path.join(out_dir, "bodies"), exist_ok=True)
+        entries = []
+        for url, (status, content_type, body) in self.responses.items():
+            name = f"bodies/{hashlib.sha1(url.encode('utf-8')).hexdigest()}.gz"
+            with open(os.path.join(out_dir, name), "wb") as f:
+                f.write(gzip.compress(body))
+            entries.append({"url": url, "status": status, "content_type": content_type, "file": name})
+        with open(os.path.join(out_dir, "manifest.json"), "w", encoding="utf-8") as f:
+            json.dump({"recorded_at": self.recorded_at, "sources": self.sources, "responses": entries}, f, indent=2)
+
+    @classmethod
+    def load(cls, in_dir: str) -> "Fixtures":
+        with open(os.path.join(in_dir, "manifest.json"), encoding="utf-8") as f:
+            manifest = json.load(f)
+        fixtures = cls(manifest["sources"], manifest["recorded_at"])
+        for entry in manifest["responses"]:
+            with open(os.path.join(in_dir, entry["file"]), "rb") as f:
+                fixtures.add(entry["url"], entry["status"], entry["content_type"], gzip.decompress(f.read()))
+        return fixtures
+
+    @classmethod
+    def synthetic(cls, sources: int = 3, articles: int = 6) -> "Fixtures":
+        """Bộ fixture tổng hợp: mỗi nguồn 1 feed (articles bài khớp keyword + 1 bài bị lọc) + HTML từng bài."""
+        now = format_datetime(datetime.now(timezone.utc))
+        fixtures = cls([], time.time())
+        for s in range(sources):
+            host = f"news{s}.example.com"
+            rss = f"https://{host}/feed.xml"
+            fixtures.sources.append({"name": f"Synthetic{s}", "rss": rss, "web": f"https://{host}/", "selector": None})
+            items = []
+            for i in range(articles):
+                url = f"https://{host}/markets/gold-{i}.html"
+                title = f"Gold rallies as Fed signals pause #{i} ({host})"
+                items.append(f"<item><title>{title}</title><link>{url}</link><pubDate>{now}</pubDate>"
+                             f"<description>XAUUSD update</description></item>")
+                html = (f'<html><head><title>{title}</title><meta property="og:image" content="https://{host}/img/{i}.jpg">'
+                        f'</head><body><nav>{"<a href=/x>menu</a>" * 50}</nav><article><h1>{title}</h1>'
+                        f'<p>Story {i} from {host}.</p>{PARAGRAPH * 12}</article></body></html>')
+                fixtures.add(url, 200, "text/html", html.encode("utf-8"))
+            items.append(f"<item><title>Sports roundup ({host})</title><link>https://{host}/sports/1.html</link>"
+                         f"<pubDate>{now}</pubDate></item>")
+            feed = f"<?xml version='1.0'?><rss version='2.0'><channel><title>{host}</title>{''.join(items)}</channel></rss>"
+            fixtures.add(rss, 200, "application/rss+xml", feed.encode("utf-8"))
+        return fixtures
+
+# --- Record ---
+
+async def record(out_dir: str, max_articles: int) -> None:
+    fixtures = Fixtures([dict(s) for s in config.NEWS_SOURCES], time.time())
+
+    async def grab(url: Optional[str]) -> Optional[bytes]:
+        if not url:
+            return None
+        response = await news_crawler.fetch_url(url, timeout=30)
+        if response is None or response.status_code != 200:
+            print(f"   ❌ {url}")
+            return None
+        fixtures.add(url, 200, response.headers.get("content-type", "text/html"), response.content)
+        print(f"   ✅ {url} ({len(response.content) // 1024} KB)")
+        return response.content
+
+    try:
+        for source in config.NEWS_SOURCES:
+            print(f"📰 {source['name']}")
+            body = await grab(source.get("rss"))
+            await grab(source.get("web"))
+            if not body:
+                continue
+            entries = feedparser.parse(body).entries
+            hits = [e for e in entries if news_crawler.check_keywords(f"{e.get('title', '')} {e.get('summary', '')}")]
+            await asyncio.gather(*[grab(e.get("link")) for e in hits[:max_articles]])
+    finally:
+        await news_crawler.http_client.close_sessions()
+
+    fixtures.save(out_dir)
+    print(f"💾 {len(fixtures.responses)} responses -> {out_dir}")
+
+# --- Replay server ---
+
+class ReplayServer:
+    """HTTP/1.1 (keep-alive) tối giản trên asyncio.start_server, trả response đã ghi theo (host gốc, path)."""
+
+    def __init__(self, fixtures: Fixtures, latency: float, jitter: float, error_rate: float, forbidden_rate: float, seed: int):
+        self.fixtures = fixtures
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.forbidden_rate = forbidden_rate
+        self.random = random.Random(seed)
+        self.served: Counter = Counter()
+        hosts = sorted({urlsplit(url).hostname for url in fixtures.responses} |
+                       {urlsplit(s[k]).hostname for s in fixtures.sources for k in ("rss", "web") if s.get(k)})
+        self.ip_of = {host: f"127.0.0.{i + 1}" for i, host in enumerate(hosts)}
+        self.port = 0
+        self._routes: Dict[Tuple[str, str], Tuple[int, str, bytes]] = {}
+        self._server = None
+        self._writers = set()
+
+    def local_url(self, url: Optional[str]) -> Optional[str]:
+        if not url:
+            return url
+        parts = urlsplit(url)
+        path = parts.path or "/"
+        return f"http://{self.ip_of[parts.hostname]}:{self.port}{path}" + (f"?{parts.query}" if parts.query else "")
+
+    def _rewrite(self, body: bytes) -> bytes:
+        for host, ip in self.ip_of.items():
+            local = f"http://{ip}:{self.port}".encode()
+            body = body.replace(f"https://{host}".encode(), local).replace(f"http://{host}".encode(), local)
+        return body
+
+    async def start(self) -> None:
+        self._server = await asyncio.start_server(self._handle, "0.0.0.0", 0)
+        self.port = self._server.sockets[0].getsockname()[1]
+        for url, (status, content_type, body) in self.fixtures.responses.items():
+            parts = urlsplit(url)
+            target = (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+            self._routes[(self.ip_of[parts.hostname], target)] = (status, content_type, self._rewrite(body))
+
+    async def close(self) -> None:
+        self._server.close()
+        for writer in list(self._writers):
+            writer.close()
+        await self._server.wait_closed()
+
+    def _pick(self, ip: str, target: str) -> Tuple[int, str, bytes]:
+        roll = self.random.random()
+        if roll < self.forbidden_rate:
+            return 403, "text/html", b"<html><body>Access denied</body></html>"
+        if roll < self.forbidden_rate + self.error_rate:
+            return 500, "text/html", b"<html><body>Internal error</body></html>"
+        return self._routes.get((ip, target), (404, "text/html", b"not found"))
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self._writers.add(writer)
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                _, target, _ = request_line.decode("latin-1").split(" ", 2)
+                host = ""
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    if name.strip().lower() == "host":
+                        host = value.strip().split(":")[0]
+
+                delay = self.latency + self.random.uniform(-self.jitter, self.jitter)
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                status, content_type, body = self._pick(host, target)
+                self.served[status] += 1
+                writer.write(
+                    f"HTTP/1.1 {status} X\r\nContent-Type: {content_type}\r\nContent-Length: {len(body)}\r\n"
+                    f"Connection: keep-alive\r\n\r\n".encode("latin-1") + body
+                )
+                await writer.drain()
+        except (ConnectionError, ValueError, asyncio.CancelledError):
+            pass  # Client ngắt / server đóng lúc kết thúc benchmark
+        finally:
+            self._writers.discard(writer)
+            writer.close()
+
+# --- Replay ---
+
+async def crawl_once(server: ReplayServer, tmp: str, run: int, lookback_minutes: int) -> Dict:
+    """1 lượt quét trên DB / cache / trạng thái crawler sạch."""
+    database.DB_NAME = os.path.join(tmp, f"replay{run}.db")
+    config.HTML_CACHE_DIR = os.path.join(tmp, f"html_cache{run}")
+    feed_cache.clear()
+    circuit_breaker.clear()
+    rate_limit._loop = None  # Token bucket đầy lại như lúc khởi động
+    try:
+        start = time.perf_counter()
+        articles = await news_crawler.get_gold_news(lookback_minutes=lookback_minutes)
+        elapsed = time.perf_counter() - start
+    finally:
+        await database.close_db()
+    return {"elapsed_s": elapsed, "articles": len(articles), "stages": news_crawler.last_crawl_stats.get("stages", {})}
+
+async def replay(args) -> Dict:
+    fixtures = Fixtures.load(args.fixtures) if args.fixtures else Fixtures.synthetic()
+    server = ReplayServer(fixtures, args.latency_ms / 1000, args.jitter_ms / 1000, args.error_rate, args.forbidden_rate, args.seed)
+    await server.start()
+
+    config.NEWS_SOURCES = [{**s, "rss": server.local_url(s.get("rss")), "web": server.local_url(s.get("web"))}
+                           for s in fixtures.sources]
+    if args.no_rate_limit:
+        config.CRAWLER_HOST_RATE = 0
+    # Feed đã ghi có thể cũ: lookback phủ tới lúc ghi + 24h
+    lookback = int((time.time() - fixtures.recorded_at) / 60) + 24 * 60
+
+    print("=" * 60)
+    print(f"CRAWLER REPLAY ({'fixtures: ' + args.fixtures if args.fixtures else 'synthetic fixtures'}, "
+          f"{len(fixtures.sources)} sources, {len(fixtures.responses)} responses)")
+    print(f"   latency {args.latency_ms:.0f}±{args.jitter_ms:.0f} ms, 500: {args.error_rate:.0%}, 403: {args.forbidden_rate:.0%}, "
+          f"host rate: {config.CRAWLER_HOST_RATE or 'off'}")
+    print("=" * 60)
+
+    runs = []
+    with tempfile.TemporaryDirectory() as tmp:
+        await news_crawler.extract_pool.warm_up()
+        for i in range(args.runs):
+            result = await crawl_once(server, tmp, i, lookback)
+            runs.append(result)
+            print(f"   run {i + 1}: {result['elapsed_s']:6.2f} s   {result['articles']:3d} articles   "
+                  f"{result['articles'] / result['elapsed_s']:6.1f} articles/s")
+
+        # Lượt riêng đo cấp phát bộ nhớ (tracemalloc làm chậm, không tính vào thời gian)
+        tracemalloc.start(10)
+        before = tracemalloc.take_snapshot()
+        await crawl_once(server, tmp, args.runs, lookback)
+        after = tracemalloc.take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    # Đóng session client trước -> kết nối keep-alive kết thúc, handler của server tự thoát
+    await news_crawler.http_client.close_sessions()
+    await server.close()
+    news_crawler.extract_pool.shutdown()
+
+    elapsed = statistics.median(r["elapsed_s"] for r in runs)
+    articles = runs[-1]["articles"]
+    print(f"\n   Median: {elapsed:.2f} s, {articles / elapsed:.1f} articles/s")
+
+    print("\n   Stage        in    out   workers   busy s   blocked s   (last run)")
+    for name, s in runs[-1]["stages"].items():
+        print(f"   {name:<10} {s['in']:4d} {s['out']:6d} {s['workers']:9d} {s['busy_s']:8.2f} {s['blocked_s']:11.2f}")
+
+    print(f"\n   Responses: {dict(sorted(server.served.items()))}")
+
+    top = after.compare_to(before, "lineno")[:5]
+    print(f"\n   Allocations (main process): peak {peak / 1024 / 1024:.1f} MB, retained {current / 1024 / 1024:.1f} MB")
+    for stat in top:
+        frame = stat.traceback[0]
+        print(f"     {stat.size_diff / 1024:8.0f} KB  {os.path.relpath(frame.filename)}:{frame.lineno}")
+    print("=" * 60)
+
+    report = {
+        "median_elapsed_s": elapsed,
+        "articles": articles,
+        "articles_per_s": articles / elapsed,
+        "runs": runs,
+        "responses": dict(server.served),
+        "alloc_peak_bytes": peak,
+    }
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    return report
+
+def main():
+    parser = argparse.ArgumentParser(description="Crawler benchmark / replay harness")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    rec = sub.add_parser("record", help="Ghi RSS / HTML thật của config.NEWS_SOURCES thành fixture")
+    rec.add_argument("--out", default=DEFAULT_FIXTURES)
+    rec.add_argument("--max-articles", type=int, default=10, help="Số bài khớp keyword tối đa / nguồn")
+
+    rep = sub.add_parser("replay", help="Chạy get_gold_news trên fixture qua server cục bộ")
+    rep.add_argument("--fixtures", default=None, help="Thư mục fixture (mặc định: fixture tổng hợp)")
+    rep.add_argument("--runs", type=int, default=3)
+    rep.add_argument("--latency-ms", type=float, default=100)
+    rep.add_argument("--jitter-ms", type=float, default=20)
+    rep.add_argument("--error-rate", type=float, default=0.0, help="Tỉ lệ response 500")
+    rep.add_argument("--forbidden-rate", type=float, default=0.0, help="Tỉ lệ response 403")
+    rep.add_argument("--no-rate-limit", action="store_true", help="Tắt token bucket theo host")
+    rep.add_argument("--seed", type=int, default=1)
+    rep.add_argument("--json", default=None, help="Ghi kết quả ra file JSON (so sánh hồi quy)")
+
+    args = parser.parse_args()
+    config.logger.setLevel(logging.WARNING)
+    if args.command == "record":
+        asyncio.run(record(args.out, args.max_articles))
+    else:
+        asyncio.run(replay(args))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Benchmark: Độ trễ mỗi lần gọi DB helper
+- BEFORE: mở kết nối mới (thread mới + PRAGMA WAL) cho mỗi lệnh (hành vi cũ của get_db_connection)
+- AFTER:  pool kết nối sống lâu (app/core/db_pool.py)
+
+Usage: python scripts/bench_db_pool.py [iterations]
+"""
+
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+from contextlib import asynccontextmanager
+
+import aiosqlite
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core import database
+
+@asynccontextmanager
+async def legacy_connection():
+    """Bản sao get_db_connection() cũ: 1 kết nối / 1 lần gọi"""
+    async with aiosqlite.connect(database.DB_NAME) as conn:
+        conn.row_factory = aiosqlite.Row
+        await conn.execute("PRAGMA journal_mode=WAL;")
+        yield conn
+
+async def legacy_check_article_exists(link: str) -> bool:
+    async with legacy_connection() as conn:
+        async with conn.execute("SELECT 1 FROM articles WHERE id = ?", (link,)) as cursor:
+            return await cursor.fetchone() is not None
+
+async def legacy_get_open_trades():
+    async with legacy_connection() as conn:
+        async with conn.execute("SELECT * FROM trade_history WHERE status = 'OPEN'") as cursor:
+            return [dict(r) for r in await cursor.fetchall()]
+
+async def legacy_update_trade_profit(ticket: int, profit: float):
+    async with legacy_connection() as conn:
+        await conn.execute("UPDATE trade_history SET profit = ? WHERE ticket = ?", (profit, ticket))
+        await conn.commit()
+
+async def measure(name: str, func, iterations: int) -> float:
+    samples = []
+    for i in range(iterations):
+        start = time.perf_counter()
+        await func(i)
+        samples.append((time.perf_counter() - start) * 1000)
+    p50 = statistics.median(samples)
+    p95 = sorted(samples)[int(len(samples) * 0.95) - 1]
+    print(f"   {name:<28} p50={p50:7.3f} ms   p95={p95:7.3f} ms")
+    return p50
+
+async def seed():
+    await database.init_db()
+    async with database.get_db_connection() as conn:
+        await conn.executemany(
+            "INSERT OR IGNORE INTO articles (id, source, title) VALUES (?, 'BENCH', ?)",
+            [(f"https://bench.local/{i}", f"Title {i}") for i in range(2000)]
+        )
+        await conn.executemany(
+            "INSERT OR IGNORE INTO trade_history (ticket, symbol, order_type, status) VALUES (?, 'XAUUSD', 'BUY', ?)",
+            [(i, 'OPEN' if i % 20 == 0 else 'CLOSED') for i in range(1000)]
+        )
+        await conn.commit()
+
+async def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database.DB_NAME = os.path.join(tmp, "bench.db")
+        await seed()
+
+        print("=" * 60)
+        print(f"DB POOL BENCHMARK ({iterations} calls / helper)")
+        print("=" * 60)
+
+        cases = [
+            ("check_article_exists",
+             lambda i: legacy_check_article_exists(f"https://bench.local/{i}"),
+             lambda i: database.check_article_exists(f"https://bench.local/{i}")),
+            ("get_open_trades",
+             lambda i: legacy_get_open_trades(),
+             lambda i: database.get_open_trades()),
+            ("update_trade_profit",
+             lambda i: legacy_update_trade_profit(i % 1000, float(i)),
+             lambda i: database.update_trade_profit(i % 1000, float(i))),
+        ]
+
+        for name, before, after in cases:
+            print(f"\n🔹 {name}")
+            p50_before = await measure("BEFORE (connect per call)", before, iterations)
+            p50_after = await measure("AFTER  (pooled)", after, iterations)
+            print(f"   => Speedup p50: x{p50_before / p50_after:.1f}")
+
+        await database.close_db()
+    print("=" * 60)
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,119 @@
+"""
+Benchmark: Lọc theo khoảng thời gian trên bảng 1M dòng
+- BEFORE: so sánh TEXT với datetime('now', ?) / date(timestamp) (query cũ, index theo cột TEXT)
+- AFTER:  BETWEEN trên cột epoch INTEGER *_ts (migration #004)
+
+Usage: python scripts/bench_epoch_columns.py [rows]
+"""
+
+import asyncio
+import os
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core import database
+
+ITERATIONS = 200
+
+def seed(db_path: str, rows: int):
+    """Sinh dữ liệu: signals & events rải đều trong 1 năm gần nhất"""
+    now = datetime.now(timezone.utc)
+    fmt = '%Y-%m-%d %H:%M:%S'
+
+    def ts(i):
+        return (now - timedelta(seconds=random.randint(0, 365 * 86400))).strftime(fmt)
+
+    conn = sqlite3.connect(db_path)
+    conn.executemany(
+        "INSERT INTO trade_signals (symbol, signal_type, source, score, is_processed, created_at) VALUES (?, 'BUY', ?, ?, ?, ?)",
+        ((random.choice(["XAUUSD", "EURUSD"]), random.choice(["NEWS", "AI_REPORT"]), random.uniform(-10, 10), i % 10 != 0, ts(i))
+         for i in range(rows))
+    )
+    conn.executemany(
+        "INSERT INTO economic_events (id, title, currency, impact, timestamp, event_date, actual, status) VALUES (?, ?, 'USD', ?, ?, date(?), '', 'pending')",
+        ((f"ev{i}", f"Event {i}", random.choice(["High", "Medium", "Low"]), t, t)
+         for i, t in ((i, ts(i)) for i in range(rows)))
+    )
+    # Index theo cột TEXT của migration #002 (để so sánh công bằng với query cũ)
+    conn.execute("CREATE INDEX idx_legacy_signals ON trade_signals (symbol, is_processed, source, created_at)")
+    conn.execute("CREATE INDEX idx_legacy_events ON economic_events (impact, status, timestamp)")
+    conn.commit()
+    conn.execute("ANALYZE")
+    conn.close()
+
+def measure(conn: sqlite3.Connection, name: str, sql: str, params) -> float:
+    samples = []
+    for _ in range(ITERATIONS):
+        start = time.perf_counter()
+        conn.execute(sql, params() if callable(params) else params).fetchall()
+        samples.append((time.perf_counter() - start) * 1000)
+    p50 = statistics.median(samples)
+    plan = conn.execute(f"EXPLAIN QUERY PLAN {sql}", params() if callable(params) else params).fetchall()
+    print(f"   {name:<8} p50={p50:8.3f} ms   plan: {' | '.join(r[3] for r in plan)}")
+    return p50
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    now = lambda: int(time.time())
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database.DB_NAME = os.path.join(tmp, "bench_epoch.db")
+
+        async def init():
+            await database.init_db()
+            await database.close_db()
+        asyncio.run(init())
+
+        print(f"⏳ Seeding {rows:,} rows / table...")
+        seed(database.DB_NAME, rows)
+
+        day_start = int(datetime.now().replace(hour=0, minute=0, second=0, microsecond=0).timestamp())
+        cases = [
+            ("TTL signals (get_all_valid_signals)",
+             '''SELECT * FROM trade_signals INDEXED BY idx_legacy_signals
+                WHERE symbol = ? AND is_processed = 0 AND source IN ('NEWS', 'AI_REPORT')
+                AND created_at >= datetime('now', ?) ORDER BY ABS(score) DESC, created_at DESC''',
+             ("XAUUSD", "-60 minutes"),
+             '''SELECT * FROM trade_signals
+                WHERE symbol = ? AND is_processed = 0 AND source IN ('NEWS', 'AI_REPORT')
+                AND created_at_ts BETWEEN ? AND ? ORDER BY ABS(score) DESC, created_at_ts DESC''',
+             lambda: ("XAUUSD", now() - 3600, now())),
+            ("Pre-alerts window (get_pending_pre_alerts)",
+             '''SELECT * FROM economic_events INDEXED BY idx_legacy_events
+                WHERE timestamp > datetime('now') AND timestamp <= datetime('now', ?)
+                AND status = 'pending' AND impact = 'High\'''',
+             ("+60 minutes",),
+             '''SELECT * FROM economic_events
+                WHERE timestamp_ts BETWEEN ? AND ? AND status = 'pending' AND impact = 'High\'''',
+             lambda: (now() + 1, now() + 3600)),
+            ("Events today (get_incomplete_events_today)",
+             '''SELECT * FROM economic_events
+                WHERE date(timestamp) = date('now', 'localtime') AND (actual IS NULL OR actual = '')''',
+             (),
+             '''SELECT * FROM economic_events
+                WHERE timestamp_ts BETWEEN ? AND ? AND (actual IS NULL OR actual = '')''',
+             (day_start, day_start + 86400 - 1)),
+        ]
+
+        conn = sqlite3.connect(database.DB_NAME)
+        print("=" * 60)
+        print(f"EPOCH COLUMNS BENCHMARK ({rows:,} rows, {ITERATIONS} runs / query)")
+        print("=" * 60)
+        for name, before_sql, before_params, after_sql, after_params in cases:
+            print(f"\n🔹 {name}")
+            p50_before = measure(conn, "BEFORE", before_sql, before_params)
+            p50_after = measure(conn, "AFTER", after_sql, after_params)
+            print(f"   => Speedup p50: x{p50_before / p50_after:.1f}")
+        conn.close()
+    print("=" * 60)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+Benchmark: Parse 1 burst bài viết (news_crawler.get_full_content -> html_extractor.parse_article)
+- OLD:      BeautifulSoup html.parser (tìm og:image) + trafilatura parse lại từ đầu, trong default thread pool
+- THREAD:   parse 1 lần bằng lxml (og:image + trafilatura dùng chung cây), trong default thread pool
+- PROCESS:  như THREAD nhưng chạy trong process pool (1..N worker, đã warm up)
+Đo tổng thời gian của burst và độ trễ lớn nhất của event loop (tick 10 ms) trong lúc parse.
+Nội dung + ảnh trích xuất của mọi kịch bản phải giống hệt nhau.
+
+Usage: python scripts/bench_extraction.py [articles] [max_workers]
+"""
+
+import asyncio
+import json
+import logging
+import os
+import sys
+import time
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import trafilatura
+from bs4 import BeautifulSoup
+
+from app.core import config
+from app.core import process_pool
+from app.services import html_extractor
+
+PARAGRAPH = ("<p>Gold prices climbed on Tuesday as traders weighed fresh comments from Federal Reserve officials "
+             "and a softer US Dollar, with XAUUSD holding above key support levels during the London session.</p>")
+NAV = "".join(f'<li><a href="/news/section-{i}">Section {i} market coverage</a></li>' for i in range(150))
+
+def make_article(i: int) -> str:
+    return (
+        f'<html><head><title>Gold article {i}</title>'
+        f'<meta property="og:image" content="https://cdn.example.com/img/{i}.jpg">'
+        f'<meta name="description" content="XAUUSD update {i}"></head><body>'
+        f'<header><nav><ul>{NAV}</ul></nav></header>'
+        f'<article><h1>Gold article {i}</h1>{PARAGRAPH * 20}</article>'
+        f'<aside>{NAV}</aside><footer>{NAV}</footer></body></html>'
+    )
+
+def old_parse_article(url: str, html_content: str) -> dict:
+    """Bản cũ của news_crawler._parse_article_sync (BS4 html.parser + trafilatura)."""
+    og_image = None
+    soup = BeautifulSoup(html_content, 'html.parser')
+    meta_img = soup.find("meta", property="og:image")
+    if meta_img and meta_img.get("content"):
+        og_image = meta_img["content"]
+    extracted = trafilatura.extract(html_content, include_images=True, output_format="json", url=url)
+    data = json.loads(extracted) if extracted else {}
+    text_content = data.get("text", "").strip()
+    final_image = og_image or data.get("image") or data.get("graphic")
+    if final_image and not final_image.startswith("http"):
+        final_image = None
+    return {"text": text_content, "image": final_image}
+
+async def run_burst(pages, run) -> tuple:
+    """Parse toàn bộ burst song song, đồng thời đo độ trễ lớn nhất của event loop."""
+    max_lag = 0.0
+    done = False
+
+    async def ticker():
+        nonlocal max_lag
+        while not done:
+            start = time.perf_counter()
+            await asyncio.sleep(0.01)
+            max_lag = max(max_lag, time.perf_counter() - start - 0.01)
+
+    tick = asyncio.create_task(ticker())
+    start = time.perf_counter()
+    results = await asyncio.gather(*[run(url, html) for url, html in pages])
+    elapsed = time.perf_counter() - start
+    done = True
+    await tick
+    return elapsed, max_lag, results
+
+async def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 40
+    max_workers = int(sys.argv[2]) if len(sys.argv) > 2 else (os.cpu_count() or 1)
+    config.logger.setLevel(logging.WARNING)
+
+    pages = [(f"https://example.com/article/{i}.html", make_article(i)) for i in range(count)]
+    loop = asyncio.get_running_loop()
+
+    async def old_run(url, html):
+        return await loop.run_in_executor(None, old_parse_article, url, html)
+
+    async def thread_run(url, html):
+        return await loop.run_in_executor(None, html_extractor.parse_article, url, html)
+
+    scenarios = [("OLD (bs4 + trafilatura, thread)", old_run), ("THREAD (lxml once)", thread_run)]
+    pools = []
+    workers = 1
+    while workers <= max_workers:
+        pool = process_pool.WorkerPool(f"bench{workers}", workers, html_extractor.warm_up)
+        await pool.warm_up()
+        pools.append(pool)
+        scenarios.append((f"PROCESS x{workers}", lambda url, html, pool=pool: pool.run(html_extractor.parse_article, url, html)))
+        workers *= 2
+
+    print("=" * 60)
+    print(f"EXTRACTION BENCHMARK ({count} articles, ~{len(pages[0][1]) // 1024} KB each, {os.cpu_count()} CPU)")
+    print("=" * 60)
+
+    baseline = None
+    reference = None
+    identical = True
+    for name, run in scenarios:
+        elapsed, lag, results = await run_burst(pages, run)
+        results = [(r.get("text"), r.get("image")) for r in results]
+        baseline = baseline or elapsed
+        reference = reference or results
+        identical = identical and results == reference
+        print(f"   {name:<32} {elapsed:6.2f} s  x{baseline / elapsed:4.1f}   max loop lag {lag * 1000:6.0f} ms")
+
+    for pool in pools:
+        pool.shutdown()
+    print(f"   Results identical across scenarios: {'✅' if identical else '❌'}")
+    print("=" * 60)
+    return identical
+
+if __name__ == "__main__":
+    sys.exit(0 if asyncio.run(main()) else 1)
@@ -0,0 +1,144 @@
+"""
+Benchmark: Lọc keyword trên tiêu đề tin (news_crawler.check_keywords + bộ lọc của realtime_alert)
+- OLD: 1 regex `\\b...\\b` dựng lại cho mỗi keyword DIRECT/CORRELATION + các phép `k in title_lower` cho blacklist/urgent/breaking
+- NEW: keyword_matcher (1 alternation biên dịch sẵn, quét 1 lượt, gắn category cho từng match)
+Tiêu đề lấy từ bảng articles (nếu DB có dữ liệu), bù bằng bộ tiêu đề mẫu của FXStreet/ForexLive/Investing.
+Kết quả của 2 cách phải giống hệt nhau.
+
+Usage: python scripts/bench_keyword_matcher.py [headlines] [rounds]
+"""
+
+import logging
+import os
+import re
+import sqlite3
+import sys
+import time
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core import config
+from app.services import news_crawler
+from app.utils import keyword_matcher
+
+SAMPLE_HEADLINES = [
+    "Gold Price Forecast: XAU/USD bulls take a breather below $2,400 ahead of US CPI",
+    "Gold climbs to fresh record high as Fed rate cut bets mount",
+    "XAUUSD: Sellers defend key resistance as US Treasury yields rebound",
+    "US Dollar Index (DXY) extends gains after hotter-than-expected PPI data",
+    "Powell says Fed in no hurry to cut interest rates further",
+    "FOMC Minutes: Officials saw inflation risks tilted to the upside",
+    "Nonfarm Payrolls preview: Markets brace for a softer labour market",
+    "US NFP beats estimates at 256K, unemployment rate dips to 4.1%",
+    "EUR/USD slides toward 1.0800 as ECB signals more easing",
+    "GBP/USD steady as BoE holds Bank Rate at 5.25%",
+    "USD/JPY jumps above 150.00 after BoJ keeps policy unchanged",
+    "AUD/USD plunges as RBA turns dovish, China data disappoints",
+    "Oil prices surge on Middle East supply fears",
+    "Bitcoin (BTC) hits $70K as crypto inflows accelerate; ETH follows",
+    "Silver and other precious metals rally on weaker Greenback",
+    "Commodity currencies under pressure as metals retreat",
+    "Treasury yields jump after strong retail sales, Dollar firms",
+    "US GDP grows 2.8% in Q3, beating expectations",
+    "Initial Jobless Claims rise to 242K vs. 230K expected",
+    "Gold slips as traders book profits ahead of Jackson Hole",
+    "Breaking: Explosion reported near major Gulf oil terminal",
+    "Trump threatens new tariffs, safe-haven demand lifts gold",
+    "Biden administration weighs sanctions as war escalates",
+    "Nuclear tensions rise; investors flock to safe havens",
+    "Fed Rate Decision: FOMC holds rates steady, signals two cuts in 2025",
+    "Giá vàng hôm nay tăng mạnh sau quyết định tăng lãi suất của Fed",
+    "Chiến tranh leo thang, vàng lập đỉnh mới",
+    "ISM Manufacturing PMI misses expectations, USD weakens",
+    "Canadian Dollar (CAD) surprises to the upside on jobs data",
+    "NZD/USD hike bets fade as RBNZ strikes cautious tone",
+    "US Bond Yield curve steepens as inflation expectations climb",
+    "Corporate earnings lift equities; gold little changed",
+    "Fedex shares tumble after guidance cut",
+    "XAU/USD technical analysis: Double top warns of deeper correction",
+    "Dollar-denominated gold becomes cheaper for overseas buyers",
+    "Gold's rally stalls near $2,450 as US CPI looms",
+    "Precious Metal ETFs see record outflows in October",
+    "US-China trade war fears weigh on risk sentiment",
+    "Non-farm payrolls surprise: economy adds 300K jobs",
+    "Fed's Waller: Rate cuts should proceed at a measured pace",
+]
+
+def load_headlines(count: int) -> list:
+    """Tiêu đề thật từ DB (nếu có) + bộ mẫu, lặp lại cho đủ số lượng."""
+    titles = []
+    if os.path.exists(config.DB_NAME):
+        try:
+            with sqlite3.connect(config.DB_NAME) as conn:
+                titles = [row[0] for row in conn.execute("SELECT title FROM articles WHERE title IS NOT NULL LIMIT ?", (count,))]
+        except sqlite3.Error:
+            titles = []
+    pool = titles + SAMPLE_HEADLINES
+    return [pool[i % len(pool)] for i in range(count)]
+
+def old_check_keywords(text: str) -> list:
+    found_keywords = []
+    text_lower = text.lower()
+    for kw in config.KEYWORDS_DIRECT + config.KEYWORDS_CORRELATION:
+        pattern = r"\b" + re.escape(kw.lower()) + r"\b"
+        if re.search(pattern, text_lower):
+            found_keywords.append(kw)
+    return list(set(found_keywords))
+
+def old_alert_filter(title: str) -> tuple:
+    title_lower = title.lower()
+    return (
+        any(k in title_lower for k in config.KEYWORDS_BLACKLIST),
+        any(k in title_lower for k in config.KEYWORDS_URGENT),
+        any(k in title_lower for k in config.KEYWORDS_BREAKING),
+    )
+
+def new_alert_filter(matcher, title: str) -> tuple:
+    hits = matcher.match(title, {keyword_matcher.BLACKLIST, keyword_matcher.URGENT, keyword_matcher.BREAKING})
+    return (keyword_matcher.BLACKLIST in hits, keyword_matcher.URGENT in hits, keyword_matcher.BREAKING in hits)
+
+def run_old(headlines):
+    return [(sorted(old_check_keywords(t)), old_alert_filter(t)) for t in headlines]
+
+def run_new(headlines):
+    matcher = keyword_matcher.get_matcher()
+    return [(sorted(news_crawler.check_keywords(t)), new_alert_filter(matcher, t)) for t in headlines]
+
+def timed(fn, headlines, rounds: int) -> float:
+    best = float("inf")
+    for _ in range(rounds):
+        start = time.perf_counter()
+        fn(headlines)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 3000
+    rounds = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    config.logger.setLevel(logging.WARNING)
+
+    headlines = load_headlines(count)
+    old_results = run_old(headlines)
+    new_results = run_new(headlines)
+    mismatches = [(t, o, n) for t, o, n in zip(headlines, old_results, new_results) if o != n]
+
+    print(f"\n⏱️  KEYWORD MATCHER BENCHMARK ({len(headlines)} headlines, best of {rounds})")
+    print("=" * 60)
+    old_s = timed(run_old, headlines, rounds)
+    new_s = timed(run_new, headlines, rounds)
+    print(f"OLD (regex / keyword + linear scans): {old_s * 1000:8.1f} ms  ({old_s / len(headlines) * 1e6:6.1f} µs/headline)")
+    print(f"NEW (single-pass matcher):            {new_s * 1000:8.1f} ms  ({new_s / len(headlines) * 1e6:6.1f} µs/headline)")
+    print(f"Speedup: x{old_s / new_s:.1f}")
+    print("=" * 60)
+
+    if mismatches:
+        for title, old, new in mismatches[:10]:
+            print(f"❌ {title!r}: old={old} new={new}")
+        print(f"❌ {len(mismatches)} headline(s) khác kết quả")
+        return False
+    print("✅ Kết quả giống hệt nhau")
+    return True
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,130 @@
+"""
+Benchmark: Nến lịch sử MT5 dạng CSV (StringFormat + pd.read_csv) so với nhị phân (record 48 byte + np.frombuffer)
+- DECODE:     chỉ phần parse phía Python trên payload đã nhận (median của nhiều lần chạy)
+- END-TO-END: MT5DataClient.get_historical_data qua EA giả lập (protocol v2, localhost): truyền + decode
+DataFrame của 2 định dạng phải giống hệt nhau.
+
+Usage: python scripts/bench_mt5_bars.py [counts...]   (mặc định: 120 10000 100000)
+"""
+
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core import config
+from app.services import mt5_bridge
+from app.services.mt5_bridge import MT5DataClient
+
+def make_bars(count: int) -> np.ndarray:
+    """Nến H1 giả lập (random walk, giá 2 chữ số thập phân như XAUUSD), cũ -> mới"""
+    rng = np.random.default_rng(42)
+    bars = np.zeros(count, dtype=mt5_bridge.BAR_DTYPE)
+    close = np.round(2000 + np.cumsum(rng.normal(0, 2, count)), 2)
+    bars["time"] = 1_700_000_000 - np.arange(count)[::-1] * 3600
+    bars["open"] = np.round(close + rng.normal(0, 1, count), 2)
+    bars["high"] = np.maximum(bars["open"], close) + 0.75
+    bars["low"] = np.minimum(bars["open"], close) - 0.75
+    bars["close"] = close
+    bars["volume"] = rng.integers(100, 5000, count)
+    return bars
+
+def csv_payload(bars: np.ndarray) -> bytes:
+    """Giống GetData() của EA: StringFormat("%I64d,%G,%G,%G,%G,%I64d") + ";", mới -> cũ"""
+    return "".join("%d,%G,%G,%G,%G,%d;" % tuple(bar.tolist()) for bar in bars[::-1]).encode()
+
+def timed(fn, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    return statistics.median(samples) * 1000
+
+def decode_csv(payload: bytes) -> pd.DataFrame:
+    return MT5DataClient._parse_csv_bars(payload.decode('utf-8', errors='ignore').strip())
+
+class BarsServer:
+    """EA v2 giả lập: trả payload dựng sẵn cho BARS|... (nhị phân) và SYMBOL|TF|COUNT (CSV)"""
+
+    def __init__(self, payloads):
+        self.payloads = payloads
+
+    async def _handle(self, reader, writer):
+        try:
+            await reader.readexactly(len(mt5_bridge.HELLO))
+            writer.write(mt5_bridge.HELLO_OK)
+            while True:
+                length, request_id, _ = mt5_bridge.FRAME_HEADER.unpack(await reader.readexactly(mt5_bridge.FRAME_HEADER.size))
+                parts = (await reader.readexactly(length)).decode().split("|")
+                if parts[0] == "BARS":
+                    kind, body = mt5_bridge.KIND_BARS, self.payloads[int(parts[3])][1]
+                else:
+                    kind, body = mt5_bridge.KIND_TEXT, self.payloads[int(parts[2])][0]
+                writer.write(mt5_bridge.FRAME_HEADER.pack(len(body), request_id, kind) + body)
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            writer.close()
+
+async def end_to_end(payloads, counts):
+    server = await asyncio.start_server(BarsServer(payloads)._handle, "127.0.0.1", 0)
+    MT5DataClient._instance = None
+    client = MT5DataClient(port=server.sockets[0].getsockname()[1])
+    results = {}
+    try:
+        for count in counts:
+            repeat = 20 if count <= 10_000 else 5
+            for binary in (False, True):
+                config.MT5_BINARY_BARS = binary
+                await client.get_historical_data("XAUUSD", "H1", count)  # Warm-up
+                samples = []
+                for _ in range(repeat):
+                    started = time.perf_counter()
+                    df = await client.get_historical_data("XAUUSD", "H1", count)
+                    samples.append(time.perf_counter() - started)
+                assert df is not None and len(df) == count
+                results[(count, binary)] = statistics.median(samples) * 1000
+    finally:
+        await client.disconnect()
+        server.close()
+        await server.wait_closed()
+    return results
+
+def main():
+    counts = [int(c) for c in sys.argv[1:]] or [120, 10_000, 100_000]
+    payloads = {}
+    for count in counts:
+        bars = make_bars(count)
+        payloads[count] = (csv_payload(bars), bars.tobytes())
+
+    print(f"{'bars':>8} | {'CSV size':>10} {'bin size':>10} | {'CSV decode':>11} {'bin decode':>11} {'speedup':>8}")
+    print("-" * 70)
+    for count in counts:
+        csv_bytes, bin_bytes = payloads[count]
+        csv_df, bin_df = decode_csv(csv_bytes), MT5DataClient._parse_binary_bars(bin_bytes)
+        pd.testing.assert_frame_equal(csv_df, bin_df)
+        repeat = 50 if count <= 10_000 else 10
+        csv_ms = timed(lambda: decode_csv(csv_bytes), repeat)
+        bin_ms = timed(lambda: MT5DataClient._parse_binary_bars(bin_bytes), repeat)
+        print(f"{count:>8} | {len(csv_bytes) / 1024:>8.1f}KB {len(bin_bytes) / 1024:>8.1f}KB | "
+              f"{csv_ms:>9.3f}ms {bin_ms:>9.3f}ms {csv_ms / bin_ms:>7.1f}x")
+
+    results = asyncio.run(end_to_end(payloads, counts))
+    print(f"\n{'bars':>8} | {'CSV e2e':>11} {'bin e2e':>11} {'speedup':>8}")
+    print("-" * 46)
+    for count in counts:
+        csv_ms, bin_ms = results[(count, False)], results[(count, True)]
+        print(f"{count:>8} | {csv_ms:>9.3f}ms {bin_ms:>9.3f}ms {csv_ms / bin_ms:>7.1f}x")
+    print("\nResults identical ✅")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+"""
+Test Script for Near-Duplicate Article Detection
+Verifies SimHash linking across sources at save time, alert/report filtering, templated but distinct stories
+kept apart, re-saved ids not indexed and index reload from the DB
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core import database
+from app.utils import simhash
+
+STORY = (
+    "The Federal Reserve held its benchmark interest rate steady on Wednesday, but signalled that two cuts "
+    "remain likely this year as inflation continues to cool. Chair Jerome Powell told reporters that the "
+    "committee needs greater confidence before easing policy, while noting the labour market remains solid. "
+    "Gold prices jumped after the decision as the US Dollar weakened and Treasury yields slipped, with "
+    "XAUUSD climbing toward the session high as traders priced in a September move. "
+)
+# Cùng tin, nguồn khác đăng lại: thêm dateline, sửa 1 từ
+REWRITE = "WASHINGTON (Fed Watch) - " + STORY.replace("Wednesday", "Wed")
+OTHER = (
+    "Crude oil futures extended losses for a third session as OPEC+ members signalled higher output next "
+    "quarter, while US inventories rose more than expected. Brent slipped below key support and energy shares "
+    "underperformed the broader market, with refiners leading declines amid weaker margins across Asia. "
+) * 2
+
+# Tin mẫu (cùng khung câu + đoạn giới thiệu chỉ số), 2 tuần khác nhau: 2 tin riêng biệt
+CLAIMS = (
+    "Initial Jobless Claims in the US rose to {0} in the week ending {1}, the US Department of Labor reported on "
+    "Thursday. This reading came in {2} the market expectation of {3}. Jobless claims data is released weekly by the "
+    "US Department of Labor and measures the number of people filing for unemployment insurance for the first time. "
+    "A higher than expected reading is considered negative for the US Dollar, while a lower reading is seen as positive."
+)
+CLAIMS_WEEK1 = CLAIMS.format("231,000", "September 14", "above", "225,000")
+CLAIMS_WEEK2 = CLAIMS.format("219,000", "September 21", "below", "228,000")
+ECB = (
+    "The European Central Bank lowered its deposit rate by a quarter point and kept the door open to further easing "
+    "as euro zone growth stalls. President Christine Lagarde said decisions would remain data dependent, and the euro "
+    "slipped against the dollar while German bund yields fell to their lowest level in a month after the announcement. "
+)
+
+def article(link: str, source: str, content: str) -> dict:
+    return {"id": link, "source": source, "title": f"{source} story", "published_at": "",
+            "keywords": ["Fed"], "content": content, "image_url": None}
+
+async def duplicate_of(link: str):
+    async with database.get_read_connection() as conn:
+        async with conn.execute("SELECT duplicate_of FROM articles WHERE id = ?", (link,)) as cursor:
+            return (await cursor.fetchone())[0]
+
+async def test_fingerprint():
+    """Test that a rewrite is within the Hamming threshold, templated wires and an unrelated story are not"""
+    print("=" * 60)
+    print("TEST 1: SimHash Distance")
+    print("=" * 60)
+
+    base, rewrite, other = simhash.fingerprint(STORY), simhash.fingerprint(REWRITE), simhash.fingerprint(OTHER)
+    near, far = simhash.distance(base, rewrite), simhash.distance(base, other)
+    templated = simhash.distance(simhash.fingerprint(CLAIMS_WEEK1), simhash.fingerprint(CLAIMS_WEEK2))
+    print(f"   rewrite: {near} bit(s), templated wires: {templated} bit(s), unrelated: {far} bit(s)")
+
+    if near <= database.config.DEDUP_MAX_DISTANCE < templated < far:
+        print("✅ Rewrite is a near-duplicate, templated wires and unrelated story are not")
+        return True
+    print("❌ Unexpected distances")
+    return False
+
+async def test_link_on_save():
+    """Test that copies from other sources are linked to the first article and skipped by alerts"""
+    print("\n" + "=" * 60)
+    print("TEST 2: Link On Save + Alert Filter")
+    print("=" * 60)
+
+    await database.save_to_db(article("https://fxstreet/fed", "FXStreet", STORY))
+    await database.save_to_db(article("https://forexlive/fed", "ForexLive", REWRITE))
+    await database.save_to_db(article("https://investing/oil", "Investing", OTHER))
+    await database.flush_writes()
+
+    links = [await duplicate_of(link) for link in ("https://fxstreet/fed", "https://forexlive/fed", "https://investing/oil")]
+    alerts = sorted(n['id'] for n in await database.get_unalerted_news(lookback_minutes=5))
+    unprocessed = {a['id']: a['duplicate_of'] for a in await database.get_unprocessed_articles()}
+
+    if links == [None, "https://fxstreet/fed", None] and alerts == ["https://fxstreet/fed", "https://investing/oil"] \
+            and unprocessed.get("https://forexlive/fed") == "https://fxstreet/fed":
+        print("✅ Copy linked to canonical, excluded from alerts, flagged for report selection")
+        return True
+    print(f"❌ links={links}, alerts={alerts}, unprocessed={unprocessed}")
+    return False
+
+async def test_templated_wires_kept_apart():
+    """Test that two weekly releases written from the same template are not linked"""
+    print("\n" + "=" * 60)
+    print("TEST 3: Templated Wires Kept Apart")
+    print("=" * 60)
+
+    await database.save_to_db(article("https://fxstreet/claims-0914", "FXStreet", CLAIMS_WEEK1))
+    await database.save_to_db(article("https://fxstreet/claims-0921", "FXStreet", CLAIMS_WEEK2))
+    await database.flush_writes()
+
+    linked = await duplicate_of("https://fxstreet/claims-0921")
+    if linked is None:
+        print("✅ Second week's claims report is its own story")
+        return True
+    print(f"❌ linked to {linked}")
+    return False
+
+async def test_resave_not_indexed():
+    """Test that re-saving an existing id (INSERT OR IGNORE) does not add its new fingerprint to the index"""
+    print("\n" + "=" * 60)
+    print("TEST 4: Re-Saved Id Not Indexed")
+    print("=" * 60)
+
+    index = await database.get_fingerprint_index()
+    size = len(index)
+    saved = await database.save_to_db(article("https://investing/oil", "Investing", ECB))  # Đã có -> bị bỏ qua
+    await database.save_to_db(article("https://reuters/ecb", "Reuters", ECB))
+    await database.flush_writes()
+
+    linked = await duplicate_of("https://reuters/ecb")
+    if not saved and linked is None and len(index) == size + 1:
+        print("✅ Ignored insert left the index alone; the new ECB story is canonical")
+        return True
+    print(f"❌ saved={saved}, linked={linked}, index size={len(index)} (before {size})")
+    return False
+
+async def test_reload_index():
+    """Test that a fresh process rebuilds the index from recent fingerprints in the DB"""
+    print("\n" + "=" * 60)
+    print("TEST 5: Index Reload From DB")
+    print("=" * 60)
+
+    database._fp_index = None  # Giả lập process mới
+    await database.save_to_db(article("https://other/fed", "Other", REWRITE + " (Reuters)"))
+    await database.flush_writes()
+
+    index = await database.get_fingerprint_index()
+    linked = await duplicate_of("https://other/fed")
+    if linked == "https://fxstreet/fed" and len(index) == 7:
+        print("✅ Reloaded index links the new copy to the original canonical")
+        return True
+    print(f"❌ linked={linked}, index size={len(index)}")
+    return False
+
+async def main():
+    """Run all tests"""
+    print("\n🧪 NEAR-DUPLICATE DETECTION - TEST SUITE")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database.DB_NAME = os.path.join(tmp, "dedup.db")
+        await database.init_db()
+
+        results = [
+            await test_fingerprint(),
+            await test_link_on_save(),
+            await test_templated_wires_kept_apart(),
+            await test_resave_not_indexed(),
+            await test_reload_index(),
+        ]
+        await database.close_db()
+
+    print("\n" + "=" * 60)
+    print("TEST SUMMARY")
+    print("=" * 60)
+    passed = sum(results)
+    total = len(results)
+    print(f"Passed: {passed}/{total}")
+
+    if passed == total:
+        print("✅ ALL TESTS PASSED")
+    else:
+        print(f"❌ {total - passed} TEST(S) FAILED")
+    print("=" * 60)
+    return passed == total
+
+if __name__ == "__main__":
+    sys.exit(0 if asyncio.run(main()) else 1)
@@ -0,0 +1,149 @@
+"""
+Test Script for Articles Full-Text Index (FTS5)
+Verifies trigger sync, keyword-set search with BM25 ranking, index cleanup on prune/vacuum
+and deletes from a plain sqlite3 connection (no app-registered SQL functions)
+"""
+
+import asyncio
+import os
+import sqlite3
+import sys
+import tempfile
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core import database
+
+FILLER = " Markets were quiet during the Asian session." * 10
+
+ARTICLES = [
+    ("https://t/gold-title", "Gold jumps as Fed signals rate cut", "Spot prices moved higher." + FILLER),
+    ("https://t/gold-body", "Asian markets wrap", "Gold edged up while the dollar eased." + FILLER),
+    ("https://t/oil", "Oil slides on supply fears", "Crude extended losses, gold unchanged." + FILLER),
+    ("https://t/none", "Equities close mixed", "Tech stocks led the session." + FILLER),
+]
+
+async def seed():
+    for link, title, content in ARTICLES:
+        await database.save_to_db({
+            "id": link, "source": "RSS", "title": title, "published_at": "",
+            "keywords": [], "content": content, "image_url": None
+        })
+    await database.flush_writes()
+
+async def fts_integrity_ok() -> bool:
+    async with database.get_db_connection() as conn:
+        try:
+            await conn.execute("INSERT INTO articles_fts (articles_fts, rank) VALUES ('integrity-check', 1)")
+            return True
+        except Exception as e:
+            print(f"   integrity-check: {e}")
+            return False
+
+async def test_ranking():
+    """Test that title matches outrank body-only matches"""
+    print("=" * 60)
+    print("TEST 1: Keyword Search + BM25 Ranking")
+    print("=" * 60)
+
+    results = await database.search_articles(["Gold", "XAU"], status="NEW")
+    ids = [r['id'] for r in results]
+    print(f"   Ranked: {ids}")
+
+    if ids[:1] == ["https://t/gold-title"] and set(ids) == {"https://t/gold-title", "https://t/gold-body", "https://t/oil"}:
+        print("✅ Title match ranked first, non-matching article excluded")
+        return True
+    print("❌ Unexpected ranking")
+    return False
+
+async def test_exclude_and_column():
+    """Test NOT keywords and title-only search"""
+    print("\n" + "=" * 60)
+    print("TEST 2: Exclude + Column Filter")
+    print("=" * 60)
+
+    excluded = [r['id'] for r in await database.search_articles(["gold"], exclude=["oil", "crude"])]
+    title_only = [r['id'] for r in await database.search_articles(["gold"], column="title")]
+    stemmed = [r['id'] for r in await database.search_articles(["signal"], column="title")]
+
+    if "https://t/oil" not in excluded and len(excluded) == 2 and title_only == ["https://t/gold-title"] and stemmed == ["https://t/gold-title"]:
+        print("✅ NOT / column filter / porter stemming work")
+        return True
+    print(f"❌ excluded={excluded}, title_only={title_only}, stemmed={stemmed}")
+    return False
+
+async def test_prune_sync():
+    """Test that pruning + VACUUM keeps the index in sync"""
+    print("\n" + "=" * 60)
+    print("TEST 3: Prune + Vacuum Keep Index In Sync")
+    print("=" * 60)
+
+    await database.mark_articles_processed(["https://t/gold-title"])
+    async with database.get_db_connection() as conn:
+        await conn.execute("UPDATE articles SET created_at = datetime('now', '-90 days') WHERE id = 'https://t/gold-title'")
+        await conn.commit()
+
+    deleted = await database.prune_old_articles(30)
+    await database.incremental_vacuum()
+    ids = [r['id'] for r in await database.search_articles(["gold"])]
+
+    if deleted == 1 and "https://t/gold-title" not in ids and len(ids) == 2 and await fts_integrity_ok():
+        print("✅ Pruned article removed from index, integrity-check OK after VACUUM")
+        return True
+    print(f"❌ deleted={deleted}, ids={ids}")
+    return False
+
+async def test_plain_connection_delete():
+    """Test that a plain sqlite3 connection (script / dashboard / manual prune) can delete articles"""
+    print("\n" + "=" * 60)
+    print("TEST 4: Delete From Plain sqlite3 Connection")
+    print("=" * 60)
+
+    try:
+        with sqlite3.connect(database.DB_NAME) as conn:
+            conn.execute("DELETE FROM articles WHERE id = 'https://t/oil'")
+        error = None
+    except sqlite3.Error as e:
+        error = e
+    ids = [r['id'] for r in await database.search_articles(["gold"])]
+
+    if error is None and ids == ["https://t/gold-body"] and await fts_integrity_ok():
+        print("✅ Deleted without inflate_text, index still in sync")
+        return True
+    print(f"❌ error={error}, ids={ids}")
+    return False
+
+async def main():
+    """Run all tests"""
+    print("\n🧪 ARTICLES FTS5 - TEST SUITE")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database.DB_NAME = os.path.join(tmp, "fts.db")
+        await database.init_db()
+        await seed()
+
+        results = [
+            await test_ranking(),
+            await test_exclude_and_column(),
+            await test_prune_sync(),
+            await test_plain_connection_delete(),
+        ]
+        await database.close_db()
+
+    print("\n" + "=" * 60)
+    print("TEST SUMMARY")
+    print("=" * 60)
+    passed = sum(results)
+    total = len(results)
+    print(f"Passed: {passed}/{total}")
+
+    if passed == total:
+        print("✅ ALL TESTS PASSED")
+    else:
+        print(f"❌ {total - passed} TEST(S) FAILED")
+    print("=" * 60)
+    return passed == total
+
+if __name__ == "__main__":
+    sys.exit(0 if asyncio.run(main()) else 1)
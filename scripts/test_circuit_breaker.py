@@ -0,0 +1,146 @@
+"""
+Test Script for the Per-Host Circuit Breaker and Negative URL Cache
+Verifies state transitions with half-open probing, zero-cost skips in fetch_url and failed-URL TTLs
+"""
+
+import asyncio
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core import circuit_breaker
+from app.core import config
+from app.services import news_crawler
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    requests = 0
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        type(self).requests += 1
+        body = b"ok"
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+def start_server() -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FixtureHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+async def test_transitions():
+    """Test CLOSED -> OPEN -> HALF_OPEN (single probe) -> OPEN (longer) -> CLOSED"""
+    print("=" * 60)
+    print("TEST 1: State Transitions")
+    print("=" * 60)
+
+    b = circuit_breaker.Breaker("blocked.example")
+    cooldown = config.CIRCUIT_COOLDOWN_SECONDS
+    b.failure(0)
+    still_closed = b.state == circuit_breaker.CLOSED
+    for _ in range(config.CIRCUIT_FAILURE_THRESHOLD - 1):
+        b.failure(0)
+    opened = b.state == circuit_breaker.OPEN and not b.allow(cooldown - 1)
+
+    probes = [b.allow(cooldown), b.allow(cooldown + 1)]  # Chỉ request đầu tiên được thăm dò
+    b.failure(cooldown + 2)
+    reopened = b.state == circuit_breaker.OPEN and b.cooldown == min(config.CIRCUIT_MAX_COOLDOWN_SECONDS, cooldown * 2)
+
+    probe_again = b.allow(cooldown + 2 + b.cooldown)
+    b.success()
+
+    if still_closed and opened and probes == [True, False] and reopened and probe_again and b.state == circuit_breaker.CLOSED:
+        print(f"✅ Opened after {config.CIRCUIT_FAILURE_THRESHOLD} failures, 1 probe at a time, cooldown doubled, closed on success")
+        return True
+    print(f"❌ still_closed={still_closed}, opened={opened}, probes={probes}, reopened={reopened}, state={b.state}")
+    return False
+
+async def test_fetch_skip(base: str):
+    """Test that fetch_url skips an open host without any request or sleep, and recovers via a probe"""
+    print("\n" + "=" * 60)
+    print("TEST 2: fetch_url Skips Open Host")
+    print("=" * 60)
+
+    url = f"{base}/feed"
+    for _ in range(config.CIRCUIT_FAILURE_THRESHOLD):
+        circuit_breaker.record_failure(url)
+
+    FixtureHandler.requests = 0
+    start = time.perf_counter()
+    skipped = await news_crawler.fetch_url(url)
+    elapsed = time.perf_counter() - start
+    skipped_requests = FixtureHandler.requests
+
+    # Hết cooldown -> 1 request thăm dò thành công -> CLOSED
+    circuit_breaker.get_breaker(url).opened_at -= config.CIRCUIT_COOLDOWN_SECONDS
+    probe = await news_crawler.fetch_url(url)
+    state = circuit_breaker.states()["127.0.0.1"]
+
+    if skipped is None and skipped_requests == 0 and elapsed < 0.1 and probe and state == circuit_breaker.CLOSED:
+        print(f"✅ Open host skipped in {elapsed * 1000:.1f} ms, probe closed the circuit")
+        return True
+    print(f"❌ skipped={skipped}, requests={skipped_requests}, elapsed={elapsed:.2f}s, state={state}")
+    return False
+
+async def test_negative_cache():
+    """Test failed-URL TTL, escalation on repeated failures and size bound"""
+    print("\n" + "=" * 60)
+    print("TEST 3: Negative URL Cache")
+    print("=" * 60)
+
+    url = "https://example.com/broken-article"
+    ttl1 = circuit_breaker.remember_failed_url(url, now=0)
+    cached = circuit_breaker.is_failed_url(url, now=ttl1 - 1)
+    expired = not circuit_breaker.is_failed_url(url, now=ttl1 + 1)
+    ttl2 = circuit_breaker.remember_failed_url(url, now=ttl1 + 1)
+
+    for i in range(config.NEGATIVE_CACHE_MAX_ENTRIES + 10):
+        circuit_breaker.remember_failed_url(f"https://example.com/{i}", now=0)
+    bounded = len(circuit_breaker._negative) == config.NEGATIVE_CACHE_MAX_ENTRIES
+
+    if cached and expired and ttl2 == min(24 * 3600, ttl1 * 2) and bounded:
+        print(f"✅ Skipped for {ttl1 / 60:.0f} min, then {ttl2 / 60:.0f} min after a repeat failure; size bounded")
+        return True
+    print(f"❌ cached={cached}, expired={expired}, ttl1={ttl1}, ttl2={ttl2}, bounded={bounded}")
+    return False
+
+async def main():
+    """Run all tests"""
+    print("\n🧪 CIRCUIT BREAKER - TEST SUITE")
+
+    server = start_server()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    circuit_breaker.clear()
+    results = [
+        await test_transitions(),
+        await test_fetch_skip(base),
+        await test_negative_cache(),
+    ]
+    server.shutdown()
+
+    print("\n" + "=" * 60)
+    print("TEST SUMMARY")
+    print("=" * 60)
+    passed = sum(results)
+    total = len(results)
+    print(f"Passed: {passed}/{total}")
+
+    if passed == total:
+        print("✅ ALL TESTS PASSED")
+    else:
+        print(f"❌ {total - passed} TEST(S) FAILED")
+    print("=" * 60)
+    return passed == total
+
+if __name__ == "__main__":
+    sys.exit(0 if asyncio.run(main()) else 1)
@@ -0,0 +1,180 @@
+"""
+Test Script for Staged Crawler Pipeline
+Verifies multi-stage flow, bounded queues (backpressure), streaming before completion,
+early consumer exit and per-item error isolation
+"""
+
+import asyncio
+import os
+import sys
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core import pipeline
+
+async def test_flow():
+    """Test that every item passes through all stages with fan-out / filtering"""
+    print("=" * 60)
+    print("TEST 1: Multi-Stage Flow")
+    print("=" * 60)
+
+    async def split(item, emit):
+        for i in range(item):
+            await emit(i)
+
+    async def keep_even(item, emit):
+        await asyncio.sleep(0.001 * (item % 3))
+        if item % 2 == 0:
+            await emit(item * 10)
+
+    p = pipeline.Pipeline("test", queue_size=2).add_stage("split", split).add_stage("even", keep_even, concurrency=4)
+    results = sorted([x async for x in p.run([3, 4, 5])])
+    expected = sorted([i * 10 for n in (3, 4, 5) for i in range(n) if i % 2 == 0])
+    stats = p.stats
+
+    if results == expected and stats["split"]["out"] == 12 and stats["even"]["in"] == 12:
+        print(f"✅ {len(results)} results, stats: {stats}")
+        return True
+    print(f"❌ results={results}, stats={stats}")
+    return False
+
+async def test_backpressure():
+    """Test that a slow stage bounds how far a fast stage can run ahead"""
+    print("\n" + "=" * 60)
+    print("TEST 2: Backpressure")
+    print("=" * 60)
+
+    produced = 0
+    consumed = 0
+    max_ahead = 0
+
+    async def produce(item, emit):
+        nonlocal produced
+        produced += 1
+        await emit(item)
+
+    async def slow(item, emit):
+        nonlocal consumed, max_ahead
+        max_ahead = max(max_ahead, produced - consumed)
+        await asyncio.sleep(0.002)
+        consumed += 1
+        await emit(item)
+
+    p = pipeline.Pipeline("bp", queue_size=4).add_stage("produce", produce).add_stage("slow", slow)
+    count = len([x async for x in p.run(range(100))])
+
+    # Giữa 2 stage tối đa: queue (4) + item đang emit (1) + item đang xử lý (1)
+    if count == 100 and max_ahead <= 6 and p.stats["produce"]["blocked_s"] > 0:
+        print(f"✅ Producer stayed at most {max_ahead} items ahead (queue_size=4)")
+        return True
+    print(f"❌ count={count}, max_ahead={max_ahead}, stats={p.stats}")
+    return False
+
+async def test_streaming():
+    """Test that the first result is yielded while later items are still in flight"""
+    print("\n" + "=" * 60)
+    print("TEST 3: Stream Before Completion")
+    print("=" * 60)
+
+    async def work(item, emit):
+        await asyncio.sleep(0.01 if item == 0 else 0.2)
+        await emit(item)
+
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    p = pipeline.Pipeline("stream").add_stage("work", work, concurrency=5)
+    first_at = None
+    results = []
+    async for x in p.run(range(5)):
+        if first_at is None:
+            first_at = loop.time() - start
+        results.append(x)
+
+    if results[0] == 0 and first_at < 0.1 and sorted(results) == list(range(5)):
+        print(f"✅ First result after {first_at * 1000:.0f} ms (slowest item 200 ms)")
+        return True
+    print(f"❌ results={results}, first_at={first_at}")
+    return False
+
+async def test_early_exit():
+    """Test that breaking out of the consumer cancels all stage workers"""
+    print("\n" + "=" * 60)
+    print("TEST 4: Early Consumer Exit")
+    print("=" * 60)
+
+    started = 0
+    cancelled = 0
+
+    async def work(item, emit):
+        nonlocal started, cancelled
+        started += 1
+        try:
+            await asyncio.sleep(0 if item == 0 else 10)
+        except asyncio.CancelledError:
+            cancelled += 1
+            raise
+        await emit(item)
+
+    before = len(asyncio.all_tasks())
+    p = pipeline.Pipeline("early").add_stage("work", work, concurrency=3)
+    gen = p.run(range(10))
+    async for x in gen:
+        break
+    await gen.aclose()
+    leaked = len(asyncio.all_tasks()) - before
+
+    if x == 0 and cancelled == started - 1 and leaked == 0:
+        print(f"✅ {cancelled} in-flight item(s) cancelled, no leaked tasks")
+        return True
+    print(f"❌ started={started}, cancelled={cancelled}, leaked={leaked}")
+    return False
+
+async def test_error_isolation():
+    """Test that an exception on one item does not stop the stage"""
+    print("\n" + "=" * 60)
+    print("TEST 5: Error Isolation")
+    print("=" * 60)
+
+    async def fragile(item, emit):
+        if item == 2:
+            raise ValueError("boom")
+        await emit(item)
+
+    p = pipeline.Pipeline("errors").add_stage("fragile", fragile, concurrency=2)
+    results = sorted([x async for x in p.run(range(5))])
+
+    if results == [0, 1, 3, 4]:
+        print("✅ Failing item dropped, others processed")
+        return True
+    print(f"❌ results={results}")
+    return False
+
+async def main():
+    """Run all tests"""
+    print("\n🧪 CRAWLER PIPELINE - TEST SUITE")
+
+    results = [
+        await test_flow(),
+        await test_backpressure(),
+        await test_streaming(),
+        await test_early_exit(),
+        await test_error_isolation(),
+    ]
+
+    print("\n" + "=" * 60)
+    print("TEST SUMMARY")
+    print("=" * 60)
+    passed = sum(results)
+    total = len(results)
+    print(f"Passed: {passed}/{total}")
+
+    if passed == total:
+        print("✅ ALL TESTS PASSED")
+    else:
+        print(f"❌ {total - passed} TEST(S) FAILED")
+    print("=" * 60)
+    return passed == total
+
+if __name__ == "__main__":
+    sys.exit(0 if asyncio.run(main()) else 1)
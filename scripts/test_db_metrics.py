@@ -0,0 +1,158 @@
+"""
+Test Script for DB Instrumentation
+Verifies per-helper counters/histogram/rows, writer lock-wait under contention, slow-query log with
+EXPLAIN QUERY PLAN, the snapshot dump and that nothing is recorded when disabled
+"""
+
+import asyncio
+import json
+import logging
+import os
+import sys
+import tempfile
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core import config
+from app.core import database
+from app.core import db_metrics
+
+class _Capture(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.messages = []
+
+    def emit(self, record):
+        self.messages.append(record.getMessage())
+
+async def test_helper_counters():
+    """Test call counts, row counts and statements per helper"""
+    print("=" * 60)
+    print("TEST 1: Per-Helper Counters")
+    print("=" * 60)
+
+    db_metrics.reset()
+    for i in range(5):
+        await database.save_trade_signal("XAUUSD", "BUY", "NEWS", float(i))
+    signals = await database.get_all_valid_signals("XAUUSD", ttl_minutes=30)
+
+    snap = db_metrics.snapshot()
+    save = snap["helpers"].get("save_trade_signal", {})
+    read = snap["helpers"].get("get_all_valid_signals", {})
+    print(f"   save_trade_signal={ {k: save.get(k) for k in ('calls', 'rows', 'statements', 'p95_ms')} }")
+    print(f"   get_all_valid_signals={ {k: read.get(k) for k in ('calls', 'rows', 'statements', 'p95_ms')} }")
+
+    if save.get("calls") == 5 and save.get("rows") == 5 and read.get("calls") == 1 \
+            and read.get("rows") == len(signals) == 5 and sum(read["histogram"].values()) == 1:
+        print("✅ Calls, rows and latency histogram recorded per helper")
+        return True
+    print("❌ Unexpected counters")
+    return False
+
+async def test_lock_wait():
+    """Test that concurrent writers show up as writer lock wait"""
+    print("\n" + "=" * 60)
+    print("TEST 2: Writer Lock Wait Under Contention")
+    print("=" * 60)
+
+    db_metrics.reset()
+
+    async def slow_writer():
+        async with database.get_db_connection() as conn:
+            await asyncio.sleep(0.05)  # Giữ writer như 1 transaction dài
+
+    await asyncio.gather(slow_writer(), *[database.save_trade_signal("XAUUSD", "SELL", "NEWS", 1.0) for _ in range(3)])
+
+    snap = db_metrics.snapshot()
+    writer = snap["lock_wait"].get("writer", {})
+    waited = snap["helpers"]["save_trade_signal"]["lock_wait_ms"]
+
+    if writer.get("calls", 0) >= 4 and writer.get("max_ms", 0) >= 40 and waited >= 40:
+        print(f"✅ Writer lock wait max={writer['max_ms']} ms, save_trade_signal waited {waited} ms in total")
+        return True
+    print(f"❌ writer={writer}, waited={waited}")
+    return False
+
+async def test_slow_query_and_dump(tmp: str):
+    """Test slow-query log with query plan and the periodic snapshot dump"""
+    print("\n" + "=" * 60)
+    print("TEST 3: Slow Query Log + Snapshot Dump")
+    print("=" * 60)
+
+    capture = _Capture()
+    config.logger.addHandler(capture)
+    old_threshold = config.DB_SLOW_QUERY_MS
+    config.DB_SLOW_QUERY_MS = 0  # Mọi câu lệnh đều "chậm"
+    try:
+        await database.get_all_valid_signals("XAUUSD", ttl_minutes=30)
+    finally:
+        config.DB_SLOW_QUERY_MS = old_threshold
+        config.logger.removeHandler(capture)
+
+    slow = [m for m in capture.messages if "Slow query" in m and "get_all_valid_signals" in m]
+    path = os.path.join(tmp, "metrics.jsonl")
+    db_metrics.log_snapshot(path=path)
+    with open(path, encoding="utf-8") as f:
+        dumped = json.loads(f.readline())
+
+    if slow and "PLAN: " in slow[0] and "idx_" in slow[0] and dumped["slow_queries"] >= 1 \
+            and "get_all_valid_signals" in dumped["helpers"] and not db_metrics.snapshot()["helpers"]:
+        print(f"✅ {slow[0][:110]}...")
+        print("✅ Snapshot dumped as JSON line and counters reset")
+        return True
+    print(f"❌ slow={slow}, dumped={dumped.get('slow_queries')}")
+    return False
+
+async def test_disabled():
+    """Test that nothing is recorded when instrumentation is off"""
+    print("\n" + "=" * 60)
+    print("TEST 4: Disabled = No Overhead Path")
+    print("=" * 60)
+
+    db_metrics.enable(False)
+    db_metrics.reset()
+    await database.get_all_valid_signals("XAUUSD", ttl_minutes=30)
+    async with database.get_read_connection() as conn:
+        traced = isinstance(conn, db_metrics.TracedConnection)
+    snap = db_metrics.snapshot()
+
+    if not snap["helpers"] and not snap["lock_wait"] and not traced:
+        print("✅ No helper stats, connections not wrapped")
+        return True
+    print(f"❌ snap={snap}, traced={traced}")
+    return False
+
+async def main():
+    """Run all tests"""
+    print("\n🧪 DB METRICS - TEST SUITE")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database.DB_NAME = os.path.join(tmp, "metrics.db")
+        db_metrics.enable()
+        await database.init_db()
+
+        results = [
+            await test_helper_counters(),
+            await test_lock_wait(),
+            await test_slow_query_and_dump(tmp),
+            await test_disabled(),
+        ]
+        await database.close_db()
+
+    print("\n" + "=" * 60)
+    print("TEST SUMMARY")
+    print("=" * 60)
+    passed = sum(results)
+    total = len(results)
+    print(f"Passed: {passed}/{total}")
+
+    if passed == total:
+        print("✅ ALL TESTS PASSED")
+    else:
+        print(f"❌ {total - passed} TEST(S) FAILED")
+    print("=" * 60)
+    return passed == total
+
+if __name__ == "__main__":
+    sys.exit(0 if asyncio.run(main()) else 1)
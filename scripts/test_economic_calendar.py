@@ -0,0 +1,133 @@
+"""
+Test Script for the Economic Calendar Sync
+Verifies the bulk upsert on (title, currency, event_date): alert status kept on re-sync,
+events rescheduled across UTC midnight replaced instead of duplicated (no double alert),
+same-title events on consecutive days kept apart, and single upserts not conflicting with the natural key
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core import database
+
+def event(title: str, timestamp: str, forecast: str = "") -> dict:
+    return {"id": f"{timestamp}_USD_{title.replace(' ', '_')}", "title": title, "currency": "USD", "impact": "High",
+            "timestamp": timestamp, "event_date": timestamp[:10], "forecast": forecast, "previous": ""}
+
+async def rows(title: str) -> list:
+    async with database.get_read_connection() as conn:
+        async with conn.execute("SELECT event_date, timestamp, status FROM economic_events WHERE title = ? ORDER BY timestamp",
+                                (title,)) as cursor:
+            return [tuple(r) for r in await cursor.fetchall()]
+
+async def test_resync_keeps_status():
+    """Test that a re-sync updates fields but keeps the alert status"""
+    print("=" * 60)
+    print("TEST 1: Re-Sync Keeps Alert Status")
+    print("=" * 60)
+
+    await database.bulk_upsert_economic_events([event("CPI m/m", "2026-10-14 12:30:00", "0.2%")])
+    await database.update_event_status("2026-10-14 12:30:00_USD_CPI_m/m", "pre_notified")
+    await database.bulk_upsert_economic_events([event("CPI m/m", "2026-10-14 12:30:00", "0.3%")])
+
+    result = await rows("CPI m/m")
+    if result == [("2026-10-14", "2026-10-14 12:30:00", "pre_notified")]:
+        print("✅ 1 row, status pre_notified kept")
+        return True
+    print(f"❌ rows={result}")
+    return False
+
+async def test_reschedule_across_midnight():
+    """Test that an event moved across UTC midnight replaces its old row and keeps the alert status"""
+    print("\n" + "=" * 60)
+    print("TEST 2: Reschedule Across UTC Midnight")
+    print("=" * 60)
+
+    await database.bulk_upsert_economic_events([event("FOMC Statement", "2026-10-14 23:30:00")])
+    await database.update_event_status("2026-10-14 23:30:00_USD_FOMC_Statement", "pre_notified")
+    # Lịch mới: dời 1 tiếng -> sang ngày UTC kế tiếp
+    await database.bulk_upsert_economic_events([event("FOMC Statement", "2026-10-15 00:30:00")])
+
+    # 1 dòng duy nhất, không còn dòng 'pending' nào để pre-alert lần 2
+    result = await rows("FOMC Statement")
+    if result == [("2026-10-15", "2026-10-15 00:30:00", "pre_notified")]:
+        print("✅ Old row replaced, status pre_notified carried over (no second pre-alert)")
+        return True
+    print(f"❌ rows={result}")
+    return False
+
+async def test_consecutive_days_kept():
+    """Test that same-title events on consecutive days (both in the schedule) stay separate rows"""
+    print("\n" + "=" * 60)
+    print("TEST 3: Same Title On Consecutive Days")
+    print("=" * 60)
+
+    speeches = [event("Fed Chair Powell Speaks", "2026-10-19 14:00:00"), event("Fed Chair Powell Speaks", "2026-10-20 14:00:00")]
+    await database.bulk_upsert_economic_events(speeches)
+    await database.bulk_upsert_economic_events(speeches)
+
+    result = await rows("Fed Chair Powell Speaks")
+    if [r[0] for r in result] == ["2026-10-19", "2026-10-20"]:
+        print("✅ 2 rows kept after 2 syncs")
+        return True
+    print(f"❌ rows={result}")
+    return False
+
+async def test_single_upsert_natural_key():
+    """Test that upsert_economic_event updates the existing row when only the natural key matches"""
+    print("\n" + "=" * 60)
+    print("TEST 4: Single Upsert On Natural Key")
+    print("=" * 60)
+
+    await database.bulk_upsert_economic_events([event("Non-Farm Employment Change", "2026-10-16 12:30:00")])
+    ok = await database.upsert_economic_event({
+        "id": "html_nfp_2026_10_16", "event": "Non-Farm Employment Change", "currency": "USD", "impact": "High",
+        "timestamp": "2026-10-16 12:30:00", "forecast": "150K", "previous": "", "actual": "210K"
+    })
+
+    async with database.get_read_connection() as conn:
+        async with conn.execute("SELECT COUNT(*), MAX(actual) FROM economic_events WHERE title = 'Non-Farm Employment Change'") as cursor:
+            count, actual = await cursor.fetchone()
+    if ok and count == 1 and actual == "210K":
+        print("✅ Existing row updated, no IntegrityError")
+        return True
+    print(f"❌ ok={ok}, count={count}, actual={actual}")
+    return False
+
+async def main():
+    """Run all tests"""
+    print("\n🧪 ECONOMIC CALENDAR SYNC - TEST SUITE")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database.DB_NAME = os.path.join(tmp, "calendar.db")
+        await database.init_db()
+
+        results = [
+            await test_resync_keeps_status(),
+            await test_reschedule_across_midnight(),
+            await test_consecutive_days_kept(),
+            await test_single_upsert_natural_key(),
+        ]
+        await database.close_db()
+
+    print("\n" + "=" * 60)
+    print("TEST SUMMARY")
+    print("=" * 60)
+    passed = sum(results)
+    total = len(results)
+    print(f"Passed: {passed}/{total}")
+
+    if passed == total:
+        print("✅ ALL TESTS PASSED")
+    else:
+        print(f"❌ {total - passed} TEST(S) FAILED")
+    print("=" * 60)
+    return passed == total
+
+if __name__ == "__main__":
+    sys.exit(0 if asyncio.run(main()) else 1)
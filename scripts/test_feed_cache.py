@@ -0,0 +1,176 @@
+"""
+Test Script for the RSS Feed Cache
+Verifies TTL sharing between consumers, conditional GET (304), body-hash short-circuit and re-parse on change
+"""
+
+import asyncio
+import hashlib
+import logging
+import os
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core import config
+from app.core import feed_cache
+from app.core import http_client
+from app.services import news_crawler
+
+def make_rss(title: str) -> bytes:
+    return (
+        '<?xml version="1.0"?><rss version="2.0"><channel><title>Fixture</title>'
+        f'<item><title>{title}</title><link>https://example.com/{title}</link></item>'
+        '</channel></rss>'
+    ).encode()
+
+class FeedHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    body = make_rss("Gold rallies")
+    use_etag = True  # False: server không hỗ trợ validator (chỉ còn so hash)
+    requests = []  # (path, status)
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        cls = type(self)
+        etag = '"' + hashlib.md5(cls.body).hexdigest() + '"'
+        if cls.use_etag and self.headers.get("If-None-Match") == etag:
+            cls.requests.append((self.path, 304))
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+        cls.requests.append((self.path, 200))
+        self.send_response(200)
+        self.send_header("Content-Type", "application/rss+xml")
+        if cls.use_etag:
+            self.send_header("ETag", etag)
+        self.send_header("Content-Length", str(len(cls.body)))
+        self.end_headers()
+        self.wfile.write(cls.body)
+
+def start_server() -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FeedHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def reset(ttl: float, use_etag: bool = True):
+    feed_cache.clear()
+    config.FEED_CACHE_TTL_SECONDS = ttl
+    FeedHandler.use_etag = use_etag
+    FeedHandler.body = make_rss("Gold rallies")
+    FeedHandler.requests = []
+
+async def test_ttl_sharing(base: str):
+    """Test that concurrent and back-to-back consumers share one request and one parse"""
+    print("=" * 60)
+    print("TEST 1: Shared Feed Within TTL")
+    print("=" * 60)
+
+    reset(ttl=60)
+    url = f"{base}/rss/ttl"
+    feeds = await asyncio.gather(*[news_crawler.get_rss_feed_data(url) for _ in range(3)])
+    again = await news_crawler.get_rss_feed_data(url)
+
+    if len(FeedHandler.requests) == 1 and feed_cache.stats["parsed"] == 1 \
+            and all(f is feeds[0] for f in feeds) and again is feeds[0] and feeds[0].entries:
+        print("✅ 4 consumers -> 1 request, 1 parse")
+        return True
+    print(f"❌ requests={FeedHandler.requests}, stats={feed_cache.stats}")
+    return False
+
+async def test_not_modified(base: str):
+    """Test that revalidation sends If-None-Match and reuses the parsed feed on 304"""
+    print("\n" + "=" * 60)
+    print("TEST 2: Conditional GET (304)")
+    print("=" * 60)
+
+    reset(ttl=0)
+    url = f"{base}/rss/etag"
+    first = await news_crawler.get_rss_feed_data(url)
+    second = await news_crawler.get_rss_feed_data(url)
+
+    statuses = [status for _, status in FeedHandler.requests]
+    if statuses == [200, 304] and second is first and feed_cache.stats["parsed"] == 1:
+        print("✅ Second poll -> 304, feedparser skipped")
+        return True
+    print(f"❌ statuses={statuses}, stats={feed_cache.stats}")
+    return False
+
+async def test_body_hash(base: str):
+    """Test that an identical body without validators is not re-parsed"""
+    print("\n" + "=" * 60)
+    print("TEST 3: Unchanged Body Hash (No ETag)")
+    print("=" * 60)
+
+    reset(ttl=0, use_etag=False)
+    url = f"{base}/rss/hash"
+    first = await news_crawler.get_rss_feed_data(url)
+    second = await news_crawler.get_rss_feed_data(url)
+
+    if len(FeedHandler.requests) == 2 and second is first and feed_cache.stats["unchanged"] == 1 \
+            and feed_cache.stats["parsed"] == 1:
+        print("✅ Same body -> feedparser skipped")
+        return True
+    print(f"❌ requests={FeedHandler.requests}, stats={feed_cache.stats}")
+    return False
+
+async def test_changed(base: str):
+    """Test that a changed feed is downloaded and parsed again"""
+    print("\n" + "=" * 60)
+    print("TEST 4: Changed Feed Re-Parsed")
+    print("=" * 60)
+
+    reset(ttl=0)
+    url = f"{base}/rss/changed"
+    first = await news_crawler.get_rss_feed_data(url)
+    FeedHandler.body = make_rss("Fed cuts rates")
+    second = await news_crawler.get_rss_feed_data(url)
+
+    titles = [e.title for e in second.entries] if second else []
+    statuses = [status for _, status in FeedHandler.requests]
+    if statuses == [200, 200] and second is not first and titles == ["Fed cuts rates"] \
+            and feed_cache.stats["parsed"] == 2:
+        print("✅ New body -> parsed again")
+        return True
+    print(f"❌ statuses={statuses}, titles={titles}, stats={feed_cache.stats}")
+    return False
+
+async def main():
+    """Run all tests"""
+    print("\n🧪 FEED CACHE - TEST SUITE")
+
+    config.logger.setLevel(logging.WARNING)
+    config.CRAWLER_HOST_RATE = 0  # Không chờ token bucket giữa các poll
+    server = start_server()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    results = [
+        await test_ttl_sharing(base),
+        await test_not_modified(base),
+        await test_body_hash(base),
+        await test_changed(base),
+    ]
+    await http_client.close_sessions()
+    server.shutdown()
+
+    print("\n" + "=" * 60)
+    print("TEST SUMMARY")
+    print("=" * 60)
+    passed = sum(results)
+    total = len(results)
+    print(f"Passed: {passed}/{total}")
+
+    if passed == total:
+        print("✅ ALL TESTS PASSED")
+    else:
+        print(f"❌ {total - passed} TEST(S) FAILED")
+    print("=" * 60)
+    return passed == total
+
+if __name__ == "__main__":
+    sys.exit(0 if asyncio.run(main()) else 1)
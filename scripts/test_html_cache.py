@@ -0,0 +1,158 @@
+"""
+Test Script for the On-Disk HTML Cache and Offline Re-Extract
+Verifies content-addressed compressed storage, LRU eviction under a size bound
+and rebuilding article content / image / FTS index from the cache with multiple processes
+(including image-only changes)
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core import config
+from app.core import database
+from app.core import html_cache
+from app.jobs import reextract
+
+PARAGRAPH = ("<p>Gold prices climbed on Tuesday as traders weighed fresh comments from Federal Reserve officials "
+             "and a softer US Dollar, with XAUUSD holding above key support levels during the London session.</p>")
+
+def make_article(i: int) -> str:
+    return (
+        f'<html><head><title>Gold article {i}</title>'
+        f'<meta property="og:image" content="https://cdn.example.com/img/{i}.jpg"></head><body>'
+        f'<article><h1>Gold article {i}</h1><p>Story number {i} about bullion.</p>{PARAGRAPH * 8}</article></body></html>'
+    )
+
+async def test_store_load():
+    """Test round-trip, compression and content addressing (same HTML stored once)"""
+    print("=" * 60)
+    print("TEST 1: Store / Load")
+    print("=" * 60)
+
+    html = make_article(1)
+    h1 = html_cache.store("https://a.example/gold-1", html)
+    h2 = html_cache.store("https://b.example/syndicated-gold-1", html)
+    objects = list(html_cache._iter_objects())
+    loaded = html_cache.load("https://a.example/gold-1")
+    missing = html_cache.load("https://a.example/never-fetched")
+
+    if h1 == h2 and len(objects) == 1 and objects[0][1].st_size < len(html) / 3 and loaded == html and missing is None:
+        print(f"✅ 2 URLs -> 1 object, {len(html)} B stored as {objects[0][1].st_size} B")
+        return True
+    print(f"❌ hashes={h1 != h2}, objects={len(objects)}, loaded={loaded == html}, missing={missing}")
+    return False
+
+async def test_lru_eviction():
+    """Test that the least recently used HTML is evicted once the size bound is exceeded"""
+    print("\n" + "=" * 60)
+    print("TEST 2: LRU Eviction")
+    print("=" * 60)
+
+    # Mỗi trang là nội dung ngẫu nhiên (khó nén)
+    pages = {f"https://lru.example/{i}": os.urandom(2048).hex() for i in range(10)}
+    for i, (url, html) in enumerate(pages.items()):
+        html_cache.store(url, html)
+        path = html_cache._object_path(html_cache.lookup(url)["hash"])
+        os.utime(path, (time.time() - 100 + i, time.time() - 100 + i))  # Thứ tự truy cập rõ ràng
+    html_cache.load("https://lru.example/0")  # Trang cũ nhất vừa được đọc lại -> không bị evict
+
+    object_size = os.path.getsize(html_cache._object_path(html_cache.lookup("https://lru.example/5")["hash"]))
+    limit = 6 * object_size
+    removed = html_cache.evict(max_bytes=limit)
+    kept = [url for url in pages if html_cache.load(url) is not None]
+
+    if removed >= 5 and "https://lru.example/0" in kept and "https://lru.example/1" not in kept \
+            and html_cache.size_bytes() <= limit * html_cache.EVICT_TARGET:
+        print(f"✅ Evicted {removed} objects, recently read page kept, {len(kept)} pages left")
+        return True
+    print(f"❌ removed={removed}, kept={kept}, size={html_cache.size_bytes()}")
+    return False
+
+async def test_reextract():
+    """Test rebuilding content + image (and FTS) from the cache with 2 worker processes, no network"""
+    print("\n" + "=" * 60)
+    print("TEST 3: Offline Re-Extract")
+    print("=" * 60)
+
+    urls = [f"https://news.example/gold-{i}" for i in range(6)]
+    for i, url in enumerate(urls):
+        # Lúc crawl: bản trích xuất cũ (lỗi) được lưu, HTML gốc nằm trong cache
+        await database.save_to_db({"id": url, "source": "Example", "title": f"Gold article {i}", "published_at": "",
+                                   "keywords": ["Gold"], "content": f"old extraction {i} " * 20, "image_url": None})
+        if i < 5:
+            html_cache.store(url, make_article(i))
+    await database.flush_writes()
+
+    counts = await reextract.main(workers=2)
+    contents = await database.get_article_contents(urls)
+    hits = await database.search_articles(["Story number 3"])
+    again = await reextract.main(workers=2)
+
+    if counts["updated"] == 5 and counts["not_cached"] == 1 and "Story number 2" in contents[urls[2]] \
+            and contents[urls[5]].startswith("old extraction") and [h["id"] for h in hits] == [urls[3]] \
+            and hits[0]["image_url"] == "https://cdn.example.com/img/3.jpg" and again["unchanged"] == 5:
+        print(f"✅ {counts}; FTS + image updated; second run: {again['unchanged']} unchanged")
+        return True
+    print(f"❌ counts={counts}, again={again}, hits={hits}")
+    return False
+
+async def test_reextract_image_only():
+    """Test that a changed image is written even when the extracted text is identical"""
+    print("\n" + "=" * 60)
+    print("TEST 4: Re-Extract Image-Only Change")
+    print("=" * 60)
+
+    url = "https://news.example/gold-0"
+    # Cùng nội dung bài, chỉ og:image đổi (vd. CDN mới)
+    html_cache.store(url, make_article(0).replace("https://cdn.example.com/img/0.jpg", "https://cdn2.example.com/img/0.webp"))
+
+    counts = await reextract.main(workers=2)
+    media = await database.get_article_media([url])
+
+    if counts["updated"] == 1 and counts["unchanged"] == 4 and media[url]["image_url"] == "https://cdn2.example.com/img/0.webp" \
+            and media[url]["fingerprint"] is not None:
+        print(f"✅ {counts}; image updated without a text change")
+        return True
+    print(f"❌ counts={counts}, media={media}")
+    return False
+
+async def main():
+    """Run all tests"""
+    print("\n🧪 HTML CACHE - TEST SUITE")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        config.HTML_CACHE_DIR = os.path.join(tmp, "html_cache")
+        html_cache.reset_size()
+        database.DB_NAME = os.path.join(tmp, "cache.db")
+        await database.init_db()
+
+        results = [
+            await test_store_load(),
+            await test_lru_eviction(),
+            await test_reextract(),
+            await test_reextract_image_only(),
+        ]
+        await database.close_db()
+
+    print("\n" + "=" * 60)
+    print("TEST SUMMARY")
+    print("=" * 60)
+    passed = sum(results)
+    total = len(results)
+    print(f"Passed: {passed}/{total}")
+
+    if passed == total:
+        print("✅ ALL TESTS PASSED")
+    else:
+        print(f"❌ {total - passed} TEST(S) FAILED")
+    print("=" * 60)
+    return passed == total
+
+if __name__ == "__main__":
+    sys.exit(0 if asyncio.run(main()) else 1)
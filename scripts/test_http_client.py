@@ -0,0 +1,124 @@
+"""
+Test Script for the Shared HTTP Session Pool
+Verifies keep-alive reuse across fetches, last-good impersonation profile per host and clean shutdown
+"""
+
+import asyncio
+import os
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core import http_client
+from app.services import news_crawler
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+    connections = 0
+    user_agents = []
+
+    def setup(self):
+        super().setup()
+        type(self).connections += 1
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        agent = self.headers.get("User-Agent", "")
+        type(self).user_agents.append(agent)
+        # Host "blocked" chặn fingerprint Chrome (giả lập Cloudflare)
+        status = 403 if self.path.startswith("/blocked") and "Chrome/" in agent else 200
+        body = b"ok"
+        self.send_response(status)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+def start_server() -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FixtureHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+async def test_keep_alive(base: str):
+    """Test that repeated fetches reuse one session and one TCP connection"""
+    print("=" * 60)
+    print("TEST 1: Keep-Alive Reuse")
+    print("=" * 60)
+
+    FixtureHandler.connections = 0
+    responses = [await news_crawler.fetch_url(f"{base}/feed/{i}") for i in range(5)]
+    same_session = http_client.get_session("chrome120") is http_client.get_session("chrome120")
+
+    if all(r and r.status_code == 200 for r in responses) and same_session and FixtureHandler.connections == 1:
+        print("✅ 5 fetches -> 1 session, 1 TCP connection")
+        return True
+    print(f"❌ connections={FixtureHandler.connections}, same_session={same_session}")
+    return False
+
+async def test_preferred_profile(base: str):
+    """Test that the last successful profile is tried first for the host"""
+    print("\n" + "=" * 60)
+    print("TEST 2: Last-Good Profile Per Host")
+    print("=" * 60)
+
+    first = await news_crawler.fetch_url(f"{base}/blocked/1")  # chrome120, chrome110 bị chặn -> safari15_5
+    FixtureHandler.user_agents = []
+    second = await news_crawler.fetch_url(f"{base}/blocked/2")
+    order = http_client.profiles_for(f"{base}/other", ["chrome120", "chrome110", "safari15_5"])
+
+    if first and second and len(FixtureHandler.user_agents) == 1 and "Chrome/" not in FixtureHandler.user_agents[0] \
+            and order[0] == "safari15_5":
+        print("✅ Second fetch went straight to safari15_5 (no 403 retries)")
+        return True
+    print(f"❌ agents={FixtureHandler.user_agents}, order={order}")
+    return False
+
+async def test_close():
+    """Test that shutdown closes every session"""
+    print("\n" + "=" * 60)
+    print("TEST 3: Close At Shutdown")
+    print("=" * 60)
+
+    sessions = list(http_client._sessions.values())
+    await http_client.close_sessions()
+
+    if sessions and not http_client._sessions and all(s._closed for s in sessions):
+        print(f"✅ Closed {len(sessions)} sessions")
+        return True
+    print("❌ Sessions still open")
+    return False
+
+async def main():
+    """Run all tests"""
+    print("\n🧪 HTTP SESSION POOL - TEST SUITE")
+
+    server = start_server()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    results = [
+        await test_keep_alive(base),
+        await test_preferred_profile(base),
+        await test_close(),
+    ]
+    server.shutdown()
+
+    print("\n" + "=" * 60)
+    print("TEST SUMMARY")
+    print("=" * 60)
+    passed = sum(results)
+    total = len(results)
+    print(f"Passed: {passed}/{total}")
+
+    if passed == total:
+        print("✅ ALL TESTS PASSED")
+    else:
+        print(f"❌ {total - passed} TEST(S) FAILED")
+    print("=" * 60)
+    return passed == total
+
+if __name__ == "__main__":
+    sys.exit(0 if asyncio.run(main()) else 1)
@@ -0,0 +1,469 @@
+"""
+Test Script for the MT5 Bridge Protocol v2
+Verifies the persistent framed connection (request IDs), heartbeats, reconnect after the EA drops the socket,
+binary OHLCV bars (with CSV fallback), the fallback to the legacy one-command-per-connection EA
+and concurrent callers multiplexed over one connection (out-of-order replies, per-request timeout / cancellation);
+trade commands (and the signal behind them) are never resent after a timeout or a connection loss
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core import config
+from app.core import database
+from app.services import mt5_bridge
+from app.services import trader
+from app.services.mt5_bridge import MT5DataClient
+
+BAR_TIME = 1_700_000_000
+
+def csv_bars(count: int) -> str:
+    return "".join(f"{BAR_TIME - i * 3600},{2000 + i * 0.5:G},{2001 + i * 0.5:G},{1999 + i * 0.5:G},{2000.25 + i * 0.5:G},{100 + i};"
+                   for i in range(count))
+
+def binary_bars(count: int) -> bytes:
+    bars = np.zeros(count, dtype=mt5_bridge.BAR_DTYPE)
+    i = np.arange(count)[::-1]  # Cũ -> mới, cùng dữ liệu với csv_bars
+    bars["time"] = BAR_TIME - i * 3600
+    bars["open"], bars["high"], bars["low"], bars["close"] = 2000 + i * 0.5, 2001 + i * 0.5, 1999 + i * 0.5, 2000.25 + i * 0.5
+    bars["volume"] = 100 + i
+    return bars.tobytes()
+
+def handle(command: str) -> str:
+    """Phản hồi giống EA SimpleDataServer"""
+    parts = command.split("|")
+    if parts[0] == "BARS":
+        return "ERROR|NO_DATA"  # EA chưa có BARS: GetData("BARS", ...) không có dữ liệu
+    if parts[0] == "CHECK":
+        return "1001,0,2000.50000,0.01,1.25,1990.00000,2010.00000;"
+    if parts[0] == "CLOSE":
+        return "SUCCESS|CLOSED"
+    if parts[0] == "HISTORY":
+        return f"SUCCESS|{parts[1]}|{int(parts[1]) + 1}|1.50|0|0|0|0"
+    if parts[0] == "SLOW":
+        return "DONE"
+    if parts[0] in ("ORDER", "ORDER_REL"):
+        return "SUCCESS|5001"
+    if len(parts) >= 3 and parts[0] not in ("ORDER", "ORDER_REL"):
+        return csv_bars(int(parts[2]))
+    return "ERROR|UNKNOWN_COMMAND"
+
+class FakeEA:
+    """
+    EA giả lập: legacy=True -> EA cũ (1 lệnh text / kết nối), ngược lại protocol v2.
+    out_of_order=True -> mỗi lệnh xử lý riêng với độ trễ khác nhau (phản hồi về khác thứ tự gửi)
+    drop_trades=True -> nhận ORDER / CLOSE rồi đóng socket, không phản hồi (EA restart giữa chừng)
+    """
+
+    def __init__(self, legacy: bool = False, binary: bool = True, out_of_order: bool = False, drop_trades: bool = False):
+        self.legacy = legacy
+        self.binary = binary
+        self.out_of_order = out_of_order
+        self.drop_trades = drop_trades
+        self.connections = 0
+        self.commands = []
+        self.writers = []
+        self.server = None
+
+    async def start(self) -> int:
+        self.server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        return self.server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        self.kill_connections()
+        self.server.close()
+        await self.server.wait_closed()
+
+    def kill_connections(self):
+        for writer in self.writers:
+            writer.close()
+        self.writers = []
+
+    async def _handle(self, reader, writer):
+        self.connections += 1
+        self.writers.append(writer)
+        try:
+            first = await reader.read(4096)
+            if self.legacy or not first.startswith(b"HELLO|"):
+                command = first.decode()
+                self.commands.append(command)
+                if self._drops(command):
+                    return
+                writer.write(handle(command).encode())
+                await writer.drain()
+                return
+            writer.write(mt5_bridge.HELLO_OK)
+            while True:
+                header = await reader.readexactly(mt5_bridge.FRAME_HEADER.size)
+                length, request_id, _ = mt5_bridge.FRAME_HEADER.unpack(header)
+                command = (await reader.readexactly(length)).decode()
+                self.commands.append(command)
+                if self._drops(command):
+                    return
+                if self.out_of_order:
+                    asyncio.create_task(self._respond(writer, request_id, command))
+                else:
+                    await self._respond(writer, request_id, command)
+        except (asyncio.IncompleteReadError, ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            writer.close()
+
+    def _drops(self, command: str) -> bool:
+        return self.drop_trades and command.split("|", 1)[0] in ("ORDER", "CLOSE")
+
+    async def _respond(self, writer, request_id: int, command: str):
+        if self.out_of_order:
+            parts = command.split("|")
+            delay = 0.3 if parts[0] in ("SLOW", "ORDER") else (int(parts[1]) % 5) * 0.03 if parts[0] == "HISTORY" else 0
+            await asyncio.sleep(delay)
+        kind = mt5_bridge.KIND_TEXT
+        if command.startswith("BARS|") and self.binary:
+            kind, body = mt5_bridge.KIND_BARS, binary_bars(int(command.split("|")[3]))
+        else:
+            body = (b"PONG" if command == "PING" else handle(command).encode())
+        if not writer.is_closing():
+            writer.write(mt5_bridge.FRAME_HEADER.pack(len(body), request_id, kind) + body)
+            await writer.drain()
+
+def new_client(port: int) -> MT5DataClient:
+    MT5DataClient._instance = None
+    return MT5DataClient(port=port)
+
+async def test_persistent_connection():
+    """Test that many commands (and a > 4096-byte bar response) share one framed connection"""
+    print("=" * 60)
+    print("TEST 1: Persistent Framed Connection")
+    print("=" * 60)
+
+    ea = FakeEA()
+    client = new_client(await ea.start())
+    try:
+        positions = [await client.get_open_positions("XAUUSD") for _ in range(5)]
+        closed = await client.close_order(1001)
+        df = await client.get_historical_data("XAUUSD", "H1", 500)
+    finally:
+        await client.disconnect()
+        await ea.stop()
+
+    ok = (client.protocol == mt5_bridge.PROTOCOL_V2 and ea.connections == 1 and all(p and p[0]["ticket"] == 1001 for p in positions)
+          and closed == "SUCCESS|CLOSED" and df is not None and len(df) == 500 and df.index.is_monotonic_increasing)
+    if ok:
+        print(f"✅ 7 commands over {ea.connections} connection, {len(df)} bars ({len(csv_bars(500))} B) read in full")
+        return True
+    print(f"❌ protocol={client.protocol}, connections={ea.connections}, closed={closed}, bars={None if df is None else len(df)}")
+    return False
+
+async def test_heartbeat_and_reconnect():
+    """Test idle heartbeats, then transparent reconnect after the EA drops the connection"""
+    print("\n" + "=" * 60)
+    print("TEST 2: Heartbeat + Reconnect")
+    print("=" * 60)
+
+    original = config.MT5_HEARTBEAT_SECONDS
+    config.MT5_HEARTBEAT_SECONDS = 0.1
+    ea = FakeEA()
+    client = new_client(await ea.start())
+    try:
+        await client.get_open_positions()
+        await asyncio.sleep(0.45)
+        pings = ea.commands.count("PING")
+
+        ea.kill_connections()  # EA khởi động lại / mất mạng
+        await asyncio.sleep(0.05)
+        positions = await client.get_open_positions()
+    finally:
+        config.MT5_HEARTBEAT_SECONDS = original
+        await client.disconnect()
+        await ea.stop()
+
+    if pings >= 2 and client.stats["heartbeats"] >= 2 and positions and ea.connections == 2:
+        print(f"✅ {pings} heartbeats while idle; reconnected after drop ({ea.connections} connections)")
+        return True
+    print(f"❌ pings={pings}, stats={client.stats}, positions={positions}, connections={ea.connections}")
+    return False
+
+async def test_binary_bars():
+    """Test binary bars decode to the same frame as CSV, as views over one buffer, with CSV fallback for older EAs"""
+    print("\n" + "=" * 60)
+    print("TEST 3: Binary Bars + CSV Fallback")
+    print("=" * 60)
+
+    frames = {}
+    for binary in (True, False):
+        ea = FakeEA(binary=binary)
+        client = new_client(await ea.start())
+        try:
+            frames[binary] = [await client.get_historical_data("XAUUSD", "H1", 300) for _ in range(2)]
+            bars_commands = sum(c.startswith("BARS|") for c in ea.commands)
+            csv_commands = sum(c.startswith("XAUUSD|") for c in ea.commands)
+            frames[binary].append((bars_commands, csv_commands, client._binary_bars))
+        finally:
+            await client.disconnect()
+            await ea.stop()
+
+    binary_df, csv_df = frames[True][0], frames[False][0]
+    try:
+        pd.testing.assert_frame_equal(binary_df, csv_df)
+        equal = True
+    except AssertionError as e:
+        print(f"   {e}")
+        equal = False
+    # Zero-copy: các cột là view xen kẽ (không chồng byte) trên cùng 1 buffer record -> vùng nhớ giao nhau
+    shared = np.may_share_memory(binary_df["Open"].to_numpy(), binary_df["Volume"].to_numpy())
+    binary_df.loc[binary_df.index[0], "Close"] = 1.0  # DataFrame vẫn ghi được
+
+    if equal and shared and frames[True][2] == (2, 0, True) and frames[False][2] == (1, 2, False):
+        print(f"✅ Binary == CSV ({len(binary_df)} bars, zero-copy columns); old EA: 1 BARS probe then CSV only")
+        return True
+    print(f"❌ equal={equal}, shared={shared}, binary={frames[True][2]}, fallback={frames[False][2]}")
+    return False
+
+async def test_legacy_fallback():
+    """Test that an old EA (text commands, closes after each reply) still works, incl. large responses"""
+    print("\n" + "=" * 60)
+    print("TEST 4: Legacy EA Fallback")
+    print("=" * 60)
+
+    ea = FakeEA(legacy=True)
+    client = new_client(await ea.start())
+    try:
+        positions = await client.get_open_positions()
+        df = await client.get_historical_data("XAUUSD", "H1", 500)
+        closed = await client.close_order(1001)
+    finally:
+        await client.disconnect()
+        await ea.stop()
+
+    # 1 kết nối bắt tay + 1 kết nối / lệnh; chỉ bắt tay 1 lần trong MT5_LEGACY_RETRY_SECONDS
+    ok = (client.protocol == mt5_bridge.PROTOCOL_LEGACY and positions and positions[0]["tp"] == 2010.0
+          and df is not None and len(df) == 500 and closed == "SUCCESS|CLOSED" and ea.connections == 4
+          and client.stats["legacy_requests"] == 3)
+    if ok:
+        print(f"✅ Fell back to legacy mode: 3 commands, {len(df)} bars read until EOF")
+        return True
+    print(f"❌ protocol={client.protocol}, connections={ea.connections}, stats={client.stats}")
+    return False
+
+async def test_latency():
+    """Test that a persistent connection beats one TCP connection per command"""
+    print("\n" + "=" * 60)
+    print("TEST 5: Round-Trip Latency")
+    print("=" * 60)
+
+    timings = {}
+    for legacy in (True, False):
+        ea = FakeEA(legacy=legacy)
+        client = new_client(await ea.start())
+        try:
+            await client.get_open_positions()
+            started = time.perf_counter()
+            for _ in range(200):
+                await client.get_open_positions()
+            timings["legacy" if legacy else "v2"] = (time.perf_counter() - started) / 200 * 1000
+        finally:
+            await client.disconnect()
+            await ea.stop()
+
+    if timings["v2"] < timings["legacy"]:
+        print(f"✅ v2 {timings['v2']:.3f} ms/command vs legacy {timings['legacy']:.3f} ms/command")
+        return True
+    print(f"❌ timings={timings}")
+    return False
+
+async def test_concurrent_callers():
+    """Test that concurrent callers from a cold start share one connection and each get their own (out-of-order) reply"""
+    print("\n" + "=" * 60)
+    print("TEST 6: Concurrent Callers")
+    print("=" * 60)
+
+    ea = FakeEA(out_of_order=True)
+    client = new_client(await ea.start())
+    tickets = list(range(1, 21))
+    try:
+        started = time.perf_counter()
+        results = await asyncio.gather(*[client.get_trade_history(t) for t in tickets],
+                                       *[client.get_open_positions() for _ in range(10)])
+        elapsed = time.perf_counter() - started
+    finally:
+        await client.disconnect()
+        await ea.stop()
+
+    histories, positions = results[:20], results[20:]
+    serial = sum((t % 5) * 0.03 for t in tickets)
+    ok = (all(h and h["open_price"] == t and h["close_price"] == t + 1 for h, t in zip(histories, tickets))
+          and all(p and p[0]["ticket"] == 1001 for p in positions) and ea.connections == 1 and elapsed < serial / 2)
+    if ok:
+        print(f"✅ 30 concurrent commands, 1 connection, all matched by ID; {elapsed * 1000:.0f} ms vs {serial * 1000:.0f} ms serial")
+        return True
+    print(f"❌ connections={ea.connections}, elapsed={elapsed:.3f}s, histories={histories[:3]}")
+    return False
+
+async def test_timeout_and_cancel():
+    """Test that a timed-out or cancelled request is abandoned alone, without breaking the shared connection"""
+    print("\n" + "=" * 60)
+    print("TEST 7: Per-Request Timeout + Cancellation")
+    print("=" * 60)
+
+    ea = FakeEA(out_of_order=True)
+    client = new_client(await ea.start())
+    try:
+        await client.connect()
+        slow = asyncio.create_task(client._request("SLOW", timeout=0.1))
+        cancelled = asyncio.create_task(client._request("SLOW"))
+        positions = await client.get_open_positions()
+        cancelled.cancel()
+        try:
+            await slow
+            timed_out = False
+        except asyncio.TimeoutError:
+            timed_out = True
+        await asyncio.gather(cancelled, return_exceptions=True)
+        pending_after = len(client._pending)
+        await asyncio.sleep(0.35)  # Phản hồi muộn của 2 lệnh SLOW về sau đó -> bị bỏ qua
+        after = await client.get_trade_history(7)
+    finally:
+        await client.disconnect()
+        await ea.stop()
+
+    ok = (timed_out and cancelled.cancelled() and positions and pending_after == 0 and client.stats["timeouts"] == 1
+          and client.stats["late_responses"] == 2 and after and after["open_price"] == 7 and ea.connections == 1)
+    if ok:
+        print("✅ Timeout + cancel abandoned only their requests; 2 late replies dropped; connection kept")
+        return True
+    print(f"❌ timed_out={timed_out}, cancelled={cancelled.cancelled()}, pending={pending_after}, stats={client.stats}, "
+          f"connections={ea.connections}")
+    return False
+
+async def test_order_timeout_not_resent():
+    """Test that a timed-out ORDER is sent exactly once (FAIL|TIMEOUT), while a timed-out read is retried"""
+    print("\n" + "=" * 60)
+    print("TEST 8: Timed-Out Orders Are Not Resent")
+    print("=" * 60)
+
+    original = config.MT5_REQUEST_TIMEOUT_SECONDS
+    config.MT5_REQUEST_TIMEOUT_SECONDS = 0.1
+    ea = FakeEA(out_of_order=True)
+    client = new_client(await ea.start())
+    try:
+        result = await client.execute_order("XAUUSD", "BUY", 0.01, 1990.0, 2010.0)
+        slow = await client._send_simple_command("SLOW")
+        await asyncio.sleep(0.35)  # EA vẫn thực hiện lệnh ORDER đã nhận, phản hồi muộn bị bỏ qua
+        orders = sum(c.startswith("ORDER|") for c in ea.commands)
+        slow_sent = ea.commands.count("SLOW")
+    finally:
+        config.MT5_REQUEST_TIMEOUT_SECONDS = original
+        await client.disconnect()
+        await ea.stop()
+
+    if result == "FAIL|TIMEOUT" and orders == 1 and slow.startswith("FAIL|CONNECTION_ERROR") and slow_sent == 3:
+        print(f"✅ ORDER timed out -> {result}, sent {orders} time; read-only command retried {slow_sent} times")
+        return True
+    print(f"❌ result={result}, orders={orders}, slow={slow}, slow_sent={slow_sent}")
+    return False
+
+async def test_connection_lost_not_resent():
+    """Test that ORDER / CLOSE are not resent when the connection drops after they were written (v2 + legacy)"""
+    print("\n" + "=" * 60)
+    print("TEST 10: Trade Commands Not Resent After Connection Loss")
+    print("=" * 60)
+
+    outcomes = {}
+    for legacy in (False, True):
+        ea = FakeEA(legacy=legacy, drop_trades=True)
+        client = new_client(await ea.start())
+        try:
+            order = await client.execute_order("XAUUSD", "BUY", 0.01, 1990.0, 2010.0)
+            closed = await client.close_order(1001)
+            positions = await client.get_open_positions()  # Lệnh đọc vẫn tự kết nối lại
+            sent = sum(c.split("|", 1)[0] in ("ORDER", "CLOSE") for c in ea.commands)
+        finally:
+            await client.disconnect()
+            await ea.stop()
+        outcomes["legacy" if legacy else "v2"] = (order, closed, sent, bool(positions))
+
+    expected = ("FAIL|TIMEOUT|CONNECTION_LOST", "FAIL|TIMEOUT|CONNECTION_LOST", 2, True)
+    if all(outcome == expected for outcome in outcomes.values()):
+        print(f"✅ v2 + legacy: ORDER / CLOSE -> {expected[0]}, each sent once; reads still reconnect")
+        return True
+    print(f"❌ outcomes={outcomes}")
+    return False
+
+async def test_timed_out_signal_not_retried():
+    """Test that a signal whose ORDER timed out is completed, so the next trader run does not send ORDER again"""
+    print("\n" + "=" * 60)
+    print("TEST 9: Timed-Out Signal Not Re-Claimed")
+    print("=" * 60)
+
+    async def fake_market_data(symbol):
+        return pd.DataFrame({"Close": [2000.5]}), "TEST"
+
+    original = (config.MT5_REQUEST_TIMEOUT_SECONDS, trader.get_market_data, database.DB_NAME)
+    config.MT5_REQUEST_TIMEOUT_SECONDS = 0.1
+    trader.get_market_data = fake_market_data
+    ea = FakeEA(out_of_order=True)
+    new_client(await ea.start())
+    with tempfile.TemporaryDirectory() as tmp:
+        database.DB_NAME = os.path.join(tmp, "signals.db")
+        try:
+            await database.init_db()
+            await database.save_trade_signal("XAUUSD", "BUY", "NEWS", 6)
+            bot = trader.AutoTrader("XAUUSD")
+            first = await bot.analyze_and_trade()
+            second = await bot.analyze_and_trade()
+            await asyncio.sleep(0.35)
+            orders = sum(c.startswith("ORDER|") for c in ea.commands)
+        finally:
+            config.MT5_REQUEST_TIMEOUT_SECONDS, trader.get_market_data, database.DB_NAME = original
+            await MT5DataClient().disconnect()
+            await ea.stop()
+            await database.close_db()
+
+    if first == ["FAIL|TIMEOUT"] and second == "WAIT_NO_SIGNAL" and orders == 1:
+        print(f"✅ 2 trader runs: {first} then {second}; ORDER sent {orders} time")
+        return True
+    print(f"❌ first={first}, second={second}, orders={orders}")
+    return False
+
+async def main():
+    """Run all tests"""
+    print("\n🧪 MT5 BRIDGE PROTOCOL - TEST SUITE")
+
+    results = [
+        await test_persistent_connection(),
+        await test_heartbeat_and_reconnect(),
+        await test_binary_bars(),
+        await test_legacy_fallback(),
+        await test_latency(),
+        await test_concurrent_callers(),
+        await test_timeout_and_cancel(),
+        await test_order_timeout_not_resent(),
+        await test_timed_out_signal_not_retried(),
+        await test_connection_lost_not_resent(),
+    ]
+
+    print("\n" + "=" * 60)
+    print("TEST SUMMARY")
+    print("=" * 60)
+    passed = sum(results)
+    total = len(results)
+    print(f"Passed: {passed}/{total}")
+
+    if passed == total:
+        print("✅ ALL TESTS PASSED")
+    else:
+        print(f"❌ {total - passed} TEST(S) FAILED")
+    print("=" * 60)
+    return passed == total
+
+if __name__ == "__main__":
+    sys.exit(0 if asyncio.run(main()) else 1)
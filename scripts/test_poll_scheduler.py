@@ -0,0 +1,227 @@
+"""
+Test Script for Adaptive Per-Source Polling
+Verifies publish-interval learning, High Impact event windows, quiet-hour and failure back-off,
+loading event times from economic_events, empty feeds not counted as failures
+and the alert worker not re-screening the same article on every tick
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+from datetime import datetime, timezone
+
+import feedparser
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# ai_engine khởi tạo AI service lúc import: key giả là đủ (TEST 6 thay check_breaking_news bằng hàm giả)
+os.environ.setdefault("GEMINI_API_KEY", "test-key")
+
+from app.core import config
+from app.core import database
+from app.jobs import realtime_alert
+from app.services import ai_engine
+from app.services import news_crawler
+from app.services import poll_scheduler
+
+# Thứ 3, 14:00 UTC (giờ giao dịch)
+NOW = datetime(2026, 10, 13, 14, 0, tzinfo=timezone.utc).timestamp()
+FAST = {"name": "Fast"}
+SLOW = {"name": "Slow"}
+
+def make_scheduler() -> poll_scheduler.PollScheduler:
+    return poll_scheduler.PollScheduler(min_seconds=30, max_seconds=900, default_seconds=60, quiet_hours="")
+
+def feed(every_seconds: float, count: int = 20) -> list:
+    return [NOW - i * every_seconds for i in range(count)]
+
+async def test_publish_interval():
+    """Test that busy feeds are polled more often than quiet ones, within bounds"""
+    print("=" * 60)
+    print("TEST 1: Publish Interval Learning")
+    print("=" * 60)
+
+    s = make_scheduler()
+    fast = s.record("Fast", True, feed(120), now=NOW)   # 1 bài / 2 phút
+    slow = s.record("Slow", True, feed(7200), now=NOW)  # 1 bài / 2 giờ
+    unknown = s.record("Web", True, [], now=NOW)         # Không có ngày đăng
+
+    due_now = [x["name"] for x in s.due([FAST, SLOW], now=NOW + 61)]
+    print(f"   fast={fast:.0f}s, slow={slow:.0f}s, no dates={unknown:.0f}s, due after 61s: {due_now}")
+    if fast == 60 and slow == 900 and unknown == 60 and due_now == ["Fast"]:
+        print("✅ Poll interval follows each source's publish rate")
+        return True
+    print("❌ Unexpected intervals")
+    return False
+
+async def test_event_window():
+    """Test that sources are polled at the minimum interval around a High Impact release"""
+    print("\n" + "=" * 60)
+    print("TEST 2: High Impact Event Window")
+    print("=" * 60)
+
+    s = make_scheduler()
+    release = NOW + 20 * 60
+    s.set_event_times([release])
+    s.record("Slow", True, feed(7200), now=NOW)
+    wake = s.sources["Slow"].next_poll
+    in_window = s.record("Slow", True, feed(7200), now=release - 60)
+    due_mid = [x["name"] for x in s.due([SLOW], now=release + 35)]
+    after = s.record("Slow", True, feed(7200), now=release + 3600)
+
+    print(f"   wake at release-{(release - wake) / 60:.0f}m, in window={in_window:.0f}s, after={after:.0f}s")
+    if wake == release - config.POLL_EVENT_BEFORE_MINUTES * 60 and in_window == 30 and due_mid == ["Slow"] and after == 900:
+        print("✅ Scheduler wakes before the release and polls fast until the window closes")
+        return True
+    print("❌ Event window not applied")
+    return False
+
+async def test_backoff():
+    """Test quiet-hour and failure back-off, and reset after a success"""
+    print("\n" + "=" * 60)
+    print("TEST 3: Quiet Hours + Failure Back-off")
+    print("=" * 60)
+
+    s = make_scheduler()
+    saturday = datetime(2026, 10, 17, 10, 0, tzinfo=timezone.utc).timestamp()
+    quiet = s.record("Fast", True, feed(120), now=saturday)
+
+    failures = [s.record("Fast", False, now=NOW) for _ in range(5)]
+    recovered = s.record("Fast", True, feed(120), now=NOW)
+
+    print(f"   weekend={quiet:.0f}s, failures={[round(f) for f in failures]}, recovered={recovered:.0f}s")
+    if quiet == 240 and failures == [120, 240, 480, 900, 900] and recovered == 60:
+        print("✅ Backs off on weekends and repeated failures, resets on success")
+        return True
+    print("❌ Unexpected back-off")
+    return False
+
+async def test_events_from_db():
+    """Test that High Impact event times are read from economic_events"""
+    print("\n" + "=" * 60)
+    print("TEST 4: Event Times From DB")
+    print("=" * 60)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database.DB_NAME = os.path.join(tmp, "poll.db")
+        await database.init_db()
+        now = datetime.now(timezone.utc)
+        soon = now.timestamp() + 3 * 60
+        events = [
+            {"id": f"e{i}", "title": title, "currency": "USD", "impact": impact,
+             "timestamp": datetime.fromtimestamp(ts, timezone.utc).strftime('%Y-%m-%d %H:%M:%S'),
+             "event_date": now.strftime('%Y-%m-%d'), "forecast": "", "previous": ""}
+            for i, (title, impact, ts) in enumerate([("CPI", "High", soon), ("Retail Sales", "Medium", soon)])
+        ]
+        await database.bulk_upsert_economic_events(events)
+
+        s = make_scheduler()
+        due = await s.due_sources([FAST])
+        s.record("Fast", True, feed(7200, 5), now=now.timestamp())
+        fast_window = s.in_event_window(now.timestamp())
+        await database.close_db()
+
+    if len(s.event_times) == 1 and due == [FAST] and fast_window and s.sources["Fast"].interval == 30:
+        print("✅ Only the High Impact release is loaded and drives the fast window")
+        return True
+    print(f"❌ events={s.event_times}, due={due}, window={fast_window}")
+    return False
+
+async def test_empty_feed_not_failure():
+    """Test that a feed fetched fine but with no items keeps its interval, while a failing fetch backs off"""
+    print("\n" + "=" * 60)
+    print("TEST 5: Empty Feed Is Not A Failure")
+    print("=" * 60)
+
+    empty = feedparser.parse(b'<rss version="2.0"><channel><title>Quiet</title></channel></rss>')
+    feeds = {"https://quiet.example/rss": empty, "https://down.example/rss": None}
+
+    async def fake_rss(url, timeout=30):
+        return feeds[url]
+
+    original = news_crawler.get_rss_feed_data
+    news_crawler.get_rss_feed_data = fake_rss
+    s = make_scheduler()
+    try:
+        for source in ({"name": "Quiet", "rss": "https://quiet.example/rss"}, {"name": "Down", "rss": "https://down.example/rss"}):
+            for _ in range(4):
+                entries, _, fetched = await news_crawler._fetch_source_entries(source, fast_mode=True)
+                s.record(source["name"], fetched, news_crawler._entry_timestamps(entries), now=NOW)
+    finally:
+        news_crawler.get_rss_feed_data = original
+
+    quiet, down = s.sources["Quiet"], s.sources["Down"]
+    print(f"   quiet: {quiet.interval:.0f}s (lỗi {quiet.failures}), down: {down.interval:.0f}s (lỗi {down.failures})")
+    if quiet.failures == 0 and quiet.interval == 60 and down.failures == 4 and down.interval == 900:
+        print("✅ Empty but successful polls keep the normal interval; only fetch errors back off")
+        return True
+    print("❌ Empty feed treated as a failure")
+    return False
+
+async def test_screened_across_ticks():
+    """Test that an urgent-looking but non-breaking article is sent to the AI once, not on every alert tick"""
+    print("\n" + "=" * 60)
+    print("TEST 6: Screened Articles Remembered Across Ticks")
+    print("=" * 60)
+
+    calls = []
+
+    async def fake_breaking(content):
+        calls.append(content)
+        return {"is_breaking": False, "score": 2}
+
+    original = (ai_engine.check_breaking_news, config.NEWS_SOURCES, database.DB_NAME)
+    ai_engine.check_breaking_news = fake_breaking
+    config.NEWS_SOURCES = []  # Không poll nguồn nào: chỉ chạy bước quét tin chưa Alert
+    realtime_alert._screened.clear()
+    with tempfile.TemporaryDirectory() as tmp:
+        database.DB_NAME = os.path.join(tmp, "alert.db")
+        try:
+            await database.init_db()
+            await database.save_to_db({"id": "https://news.example/fed-speech", "source": "Example",
+                                       "title": "Fed official says rate path unchanged", "published_at": "",
+                                       "keywords": ["Fed"], "content": "Routine remarks on policy. " * 20, "image_url": None})
+            await database.flush_writes()
+            for _ in range(3):
+                await realtime_alert.main()
+        finally:
+            ai_engine.check_breaking_news, config.NEWS_SOURCES, database.DB_NAME = original
+            realtime_alert._screened.clear()
+            await database.close_db()
+
+    if len(calls) == 1:
+        print("✅ 3 ticks -> 1 AI check for the same article")
+        return True
+    print(f"❌ AI called {len(calls)} times")
+    return False
+
+async def main():
+    """Run all tests"""
+    print("\n🧪 ADAPTIVE POLLING - TEST SUITE")
+
+    results = [
+        await test_publish_interval(),
+        await test_event_window(),
+        await test_backoff(),
+        await test_events_from_db(),
+        await test_empty_feed_not_failure(),
+        await test_screened_across_ticks(),
+    ]
+
+    print("\n" + "=" * 60)
+    print("TEST SUMMARY")
+    print("=" * 60)
+    passed = sum(results)
+    total = len(results)
+    print(f"Passed: {passed}/{total}")
+
+    if passed == total:
+        print("✅ ALL TESTS PASSED")
+    else:
+        print(f"❌ {total - passed} TEST(S) FAILED")
+    print("=" * 60)
+    return passed == total
+
+if __name__ == "__main__":
+    sys.exit(0 if asyncio.run(main()) else 1)
@@ -0,0 +1,115 @@
+"""
+Test Script for DB Migrations & Query Plans
+Verifies schema version tracking and that the hot-path helpers use an index (EXPLAIN QUERY PLAN)
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core import database, migrations
+
+# Helper -> bảng mà query của helper phải đi qua index
+HOT_QUERIES = [
+    ("get_unalerted_news", lambda: database.get_unalerted_news(lookback_minutes=5), "articles"),
+    ("get_all_valid_signals", lambda: database.get_all_valid_signals("XAUUSD", ttl_minutes=30), "trade_signals"),
+    ("get_pending_pre_alerts", lambda: database.get_pending_pre_alerts(60), "economic_events"),
+    ("get_events_for_trap", lambda: database.get_events_for_trap(1.5, 2.5), "economic_events"),
+    ("get_incomplete_events_today", lambda: database.get_incomplete_events_today(), "economic_events"),
+    ("check_upcoming_high_impact_news", lambda: database.check_upcoming_high_impact_news(30), "economic_events"),
+    ("check_recent_high_impact_news", lambda: database.check_recent_high_impact_news(15), "economic_events"),
+    ("get_latest_valid_signal", lambda: database.get_latest_valid_signal("XAUUSD", ttl_minutes=30), "trade_signals"),
+    ("get_open_trades", lambda: database.get_open_trades(), "trade_history"),
+]
+
+async def capture_sql(pool, call) -> list:
+    """Chạy helper thật và thu lại các câu SELECT nó gửi xuống SQLite"""
+    statements = []
+    await pool.set_trace_callback(statements.append)
+    try:
+        await call()
+    finally:
+        await pool.set_trace_callback(None)
+    return [s for s in statements if s.lstrip().upper().startswith("SELECT")]
+
+async def test_schema_version():
+    """Test that migrations are recorded and not re-applied"""
+    print("=" * 60)
+    print("TEST 1: Schema Version")
+    print("=" * 60)
+
+    async with database.get_db_connection() as conn:
+        version = await migrations.get_schema_version(conn)
+        again = await migrations.run_migrations(conn)
+
+    if version == migrations.LATEST_VERSION and again == version:
+        print(f"✅ Schema at version {version} (re-run is a no-op)")
+        return True
+    print(f"❌ Schema version {version}, expected {migrations.LATEST_VERSION}")
+    return False
+
+async def test_query_plans():
+    """Test that every hot query uses an index"""
+    print("\n" + "=" * 60)
+    print("TEST 2: EXPLAIN QUERY PLAN")
+    print("=" * 60)
+
+    pool = await database.get_pool()
+    ok = True
+
+    for name, call, table in HOT_QUERIES:
+        statements = await capture_sql(pool, call)
+        if not statements:
+            print(f"❌ {name}: no SELECT captured")
+            ok = False
+            continue
+
+        for sql in statements:
+            async with database.get_read_connection() as conn:
+                async with conn.execute(f"EXPLAIN QUERY PLAN {sql}") as cursor:
+                    details = [row[3] for row in await cursor.fetchall()]
+
+            table_steps = [d for d in details if f" {table}" in d]
+            uses_index = bool(table_steps) and all("INDEX" in d for d in table_steps)
+            if uses_index:
+                print(f"✅ {name}: {' | '.join(table_steps)}")
+            else:
+                print(f"❌ {name}: {' | '.join(details)}")
+                ok = False
+
+    return ok
+
+async def main():
+    """Run all tests"""
+    print("\n🧪 DB MIGRATIONS & QUERY PLANS - TEST SUITE")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database.DB_NAME = os.path.join(tmp, "query_plans.db")
+        await database.init_db()
+
+        results = [
+            await test_schema_version(),
+            await test_query_plans(),
+        ]
+        await database.close_db()
+
+    print("\n" + "=" * 60)
+    print("TEST SUMMARY")
+    print("=" * 60)
+    passed = sum(results)
+    total = len(results)
+    print(f"Passed: {passed}/{total}")
+
+    if passed == total:
+        print("✅ ALL TESTS PASSED")
+    else:
+        print(f"❌ {total - passed} TEST(S) FAILED")
+    print("=" * 60)
+    return passed == total
+
+if __name__ == "__main__":
+    sys.exit(0 if asyncio.run(main()) else 1)
@@ -0,0 +1,201 @@
+"""
+Test Script for the In-Memory Seen-Link Filter
+Verifies warm-up from recent articles, bulk IN (...) lookups, LRU bounds
+and that a steady-state crawl makes no per-entry DB lookups
+"""
+
+import asyncio
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+from email.utils import format_datetime
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core import config
+from app.core import database
+from app.services import news_crawler
+
+PARAGRAPH = ("<p>Gold prices climbed on Tuesday as traders weighed fresh comments from Federal Reserve officials "
+             "and a softer US Dollar, with XAUUSD holding above key support levels during the London session.</p>")
+
+class FeedHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, body: str, content_type: str):
+        data = body.encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        host = self.headers.get("Host", "")
+        if self.path == "/feed.xml":
+            now = format_datetime(datetime.now(timezone.utc))
+            items = [f"<item><title>Gold rallies as Fed signals pause #{i}</title><link>http://{host}/article/{i}.html</link>"
+                     f"<pubDate>{now}</pubDate><description>XAUUSD update</description></item>" for i in range(3)]
+            items += [f"<item><title>Sports roundup {i}</title><link>http://{host}/other/{i}.html</link>"
+                      f"<pubDate>{now}</pubDate></item>" for i in range(20)]
+            self._send(f"<?xml version='1.0'?><rss version='2.0'><channel>{''.join(items)}</channel></rss>", "application/rss+xml")
+        else:
+            self._send(f"<html><body><article><h1>Gold {self.path}</h1><p>Story {self.path}.</p>{PARAGRAPH * 8}</article></body></html>",
+                       "text/html")
+
+def article(link: str) -> dict:
+    return {"id": link, "source": "Test", "title": link, "published_at": "", "keywords": ["Gold"],
+            "content": f"Gold story {link} " * 30, "image_url": None}
+
+def reset_stats():
+    for key in database.seen_link_stats:
+        database.seen_link_stats[key] = 0
+
+async def test_warm_up():
+    """Test that warm-up loads recent links only, and bulk lookups hit the DB once for the unknown ones"""
+    print("=" * 60)
+    print("TEST 1: Warm-Up + Bulk Lookup")
+    print("=" * 60)
+
+    for i in range(3):
+        await database.save_to_db(article(f"https://recent/{i}"))
+    await database.save_to_db(article("https://old/0"))
+    await database.flush_writes()
+    async with database.get_db_connection() as conn:
+        await conn.execute("UPDATE articles SET created_at = datetime('now', '-10 days') WHERE id = 'https://old/0'")
+        await conn.commit()
+
+    database._seen_links = None  # Giả lập process mới khởi động
+    seen = await database.get_seen_links()
+    warmed = sorted(seen)
+
+    reset_stats()
+    links = [f"https://recent/{i}" for i in range(3)] + ["https://old/0", "https://new/0", "https://new/1"]
+    existing = await database.find_existing_links(links)
+    first_queries = database.seen_link_stats["queries"]
+    reset_stats()
+    again = await database.find_existing_links([f"https://recent/{i}" for i in range(3)] + ["https://old/0"])
+
+    if warmed == [f"https://recent/{i}" for i in range(3)] and existing == set(links[:4]) and first_queries == 1 \
+            and again == set(links[:4]) and database.seen_link_stats["queries"] == 0:
+        print(f"✅ Warmed {len(warmed)} recent links; 6 lookups -> 1 query; repeat -> 0 queries")
+        return True
+    print(f"❌ warmed={warmed}, existing={existing}, queries={first_queries}/{database.seen_link_stats['queries']}")
+    return False
+
+async def test_lru_bound():
+    """Test that the filter stays bounded and evicted links still resolve through the DB"""
+    print("\n" + "=" * 60)
+    print("TEST 2: LRU Bound")
+    print("=" * 60)
+
+    original = config.SEEN_LINKS_MAX
+    config.SEEN_LINKS_MAX = 5
+    try:
+        for i in range(8):
+            await database.save_to_db(article(f"https://bound/{i}"))
+        await database.flush_writes()
+        seen = await database.get_seen_links()
+        size = len(seen)
+        evicted = "https://bound/0" not in seen
+        found = await database.check_article_exists("https://bound/0")
+    finally:
+        config.SEEN_LINKS_MAX = original
+
+    if size == 5 and evicted and found:
+        print("✅ Filter capped at 5 links; evicted link found via DB")
+        return True
+    print(f"❌ size={size}, evicted={evicted}, found={found}")
+    return False
+
+async def test_steady_state_crawl(base: str):
+    """Test that a repeat crawl of an unchanged feed makes zero DB existence lookups"""
+    print("\n" + "=" * 60)
+    print("TEST 3: Steady-State Crawl")
+    print("=" * 60)
+
+    config.NEWS_SOURCES = [{"name": "Fixture", "rss": f"{base}/feed.xml", "web": None, "selector": None}]
+    config.FEED_CACHE_TTL_SECONDS = 0
+    first = await news_crawler.get_gold_news(lookback_minutes=60, fast_mode=True)
+    reset_stats()
+    second = await news_crawler.get_gold_news(lookback_minutes=60, fast_mode=True)
+    stats = dict(database.seen_link_stats)
+
+    if len(first) == 3 and not second and stats["queries"] == 0 and stats["lookups"] == 3:
+        print(f"✅ 1st scan saved 3 articles; 2nd scan: {stats['lookups']} lookups, {stats['queries']} DB queries")
+        return True
+    print(f"❌ first={len(first)}, second={len(second)}, stats={stats}")
+    return False
+
+async def test_early_exit_commits(base: str):
+    """Test that a stream consumer stopping after the first article still commits it and records stats"""
+    print("\n" + "=" * 60)
+    print("TEST 4: Stream Early Exit Commits")
+    print("=" * 60)
+
+    # Host khác -> link khác -> 3 bài mới
+    port = base.rsplit(":", 1)[1]
+    config.NEWS_SOURCES = [{"name": "Fixture", "rss": f"http://localhost:{port}/feed.xml", "web": None, "selector": None}]
+    news_crawler.last_crawl_stats.clear()
+    stream = news_crawler.stream_gold_news(lookback_minutes=60, fast_mode=True)
+    first = await stream.__anext__()
+    await stream.aclose()
+
+    # Kết nối sqlite3 riêng: chỉ thấy dữ liệu đã commit
+    with sqlite3.connect(database.DB_NAME) as conn:
+        committed = conn.execute("SELECT COUNT(*) FROM articles WHERE id = ?", (first["id"],)).fetchone()[0]
+    stats = dict(news_crawler.last_crawl_stats)
+
+    if committed == 1 and stats.get("articles") == 1:
+        print("✅ Article yielded before the consumer stopped is committed, crawl stats recorded")
+        return True
+    print(f"❌ committed={committed}, stats={stats}")
+    return False
+
+async def main():
+    """Run all tests"""
+    print("\n🧪 SEEN-LINK FILTER - TEST SUITE")
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FeedHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database.DB_NAME = os.path.join(tmp, "seen.db")
+        config.HTML_CACHE_DIR = os.path.join(tmp, "html_cache")
+        await database.init_db()
+
+        results = [
+            await test_warm_up(),
+            await test_lru_bound(),
+            await test_steady_state_crawl(base),
+            await test_early_exit_commits(base),
+        ]
+        await database.close_db()
+    server.shutdown()
+
+    print("\n" + "=" * 60)
+    print("TEST SUMMARY")
+    print("=" * 60)
+    passed = sum(results)
+    total = len(results)
+    print(f"Passed: {passed}/{total}")
+
+    if passed == total:
+        print("✅ ALL TESTS PASSED")
+    else:
+        print(f"❌ {total - passed} TEST(S) FAILED")
+    print("=" * 60)
+    return passed == total
+
+if __name__ == "__main__":
+    sys.exit(0 if asyncio.run(main()) else 1)
@@ -0,0 +1,109 @@
+"""
+Test Script for Atomic Signal Claiming
+Verifies that concurrent claims never overlap, complete/release semantics and lease expiry
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core import database
+
+async def seed(n: int):
+    for i in range(n):
+        await database.save_trade_signal("XAUUSD", "BUY" if i % 2 else "SELL", "NEWS" if i % 3 else "AI_REPORT", float(i % 10))
+
+async def test_concurrent_claims():
+    """Test that overlapping trader runs get disjoint signal sets"""
+    print("=" * 60)
+    print("TEST 1: Concurrent Claims")
+    print("=" * 60)
+
+    batches = await asyncio.gather(*[database.claim_signals("XAUUSD", ttl_minutes=30, limit=7) for _ in range(4)])
+    ids = [s['id'] for batch in batches for s in batch]
+    scores = [abs(s['score']) for s in batches[0]]
+
+    if len(ids) == 20 and len(set(ids)) == 20 and scores == sorted(scores, reverse=True):
+        print(f"✅ 4 claimers got {[len(b) for b in batches]} signals, no duplicates, sorted by score")
+        return True, batches
+    print(f"❌ claimed={len(ids)}, unique={len(set(ids))}")
+    return False, batches
+
+async def test_complete_and_release(batches):
+    """Test complete (token checked) and release (signal claimable again)"""
+    print("\n" + "=" * 60)
+    print("TEST 2: Complete + Release")
+    print("=" * 60)
+
+    first = batches[0]
+    token = first[0]['claim_token']
+    wrong = await database.complete_signal(first[0]['id'], "not-my-token")
+    done = await database.complete_signal(first[0]['id'], token)
+    released = await database.release_signals(token)
+
+    for batch in batches[1:]:
+        if batch:
+            await database.release_signals(batch[0]['claim_token'])
+    again = await database.claim_signals("XAUUSD", ttl_minutes=30)
+    again_ids = {s['id'] for s in again}
+
+    if not wrong and done and released == len(first) - 1 and len(again) == 19 and first[0]['id'] not in again_ids:
+        print("✅ Wrong token rejected, completed signal stays done, released signals re-claimable")
+        await database.release_signals(again[0]['claim_token'])
+        return True
+    print(f"❌ wrong={wrong}, done={done}, released={released}, again={len(again)}")
+    return False
+
+async def test_lease_expiry():
+    """Test that an expired lease can be claimed by another trader"""
+    print("\n" + "=" * 60)
+    print("TEST 3: Lease Expiry")
+    print("=" * 60)
+
+    crashed = await database.claim_signals("XAUUSD", ttl_minutes=30, limit=1, lease_seconds=-1)
+    takeover = await database.claim_signals("XAUUSD", ttl_minutes=30, limit=1)
+    stale_complete = await database.complete_signal(crashed[0]['id'], crashed[0]['claim_token'])
+
+    if crashed and takeover and takeover[0]['id'] == crashed[0]['id'] and not stale_complete:
+        print("✅ Expired claim taken over; stale token can no longer complete it")
+        return True
+    print(f"❌ crashed={crashed}, takeover={takeover}, stale_complete={stale_complete}")
+    return False
+
+async def main():
+    """Run all tests"""
+    print("\n🧪 SIGNAL CLAIMS - TEST SUITE")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database.DB_NAME = os.path.join(tmp, "claims.db")
+        await database.init_db()
+        await seed(20)
+
+        ok, batches = await test_concurrent_claims()
+        results = [
+            ok,
+            await test_complete_and_release(batches),
+            await test_lease_expiry(),
+        ]
+        await database.close_db()
+
+    print("\n" + "=" * 60)
+    print("TEST SUMMARY")
+    print("=" * 60)
+    passed = sum(results)
+    total = len(results)
+    print(f"Passed: {passed}/{total}")
+
+    if passed == total:
+        print("✅ ALL TESTS PASSED")
+    else:
+        print(f"❌ {total - passed} TEST(S) FAILED")
+    print("=" * 60)
+    return passed == total
+
+if __name__ == "__main__":
+    sys.exit(0 if asyncio.run(main()) else 1)
@@ -0,0 +1,133 @@
+"""
+Test Script for Trade Statistics Tables
+Verifies trigger-maintained strategy/daily aggregates, re-sync corrections, equity/drawdown view and rebuild
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+from datetime import datetime, timezone
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core import database
+
+DAY = 86400
+BASE = int(datetime(2025, 1, 6, 12, tzinfo=timezone.utc).timestamp())
+
+# ticket, strategy, profit, day offset
+TRADES = [
+    (1, "NEWS", 50.0, 0),
+    (2, "NEWS", -20.0, 0),
+    (3, "SNIPER", -80.0, 1),
+    (4, "SNIPER", 30.0, 2),
+    (5, "REPORT", 10.0, 2),
+]
+
+async def snapshot():
+    async with database.get_read_connection() as conn:
+        async with conn.execute("SELECT * FROM trade_strategy_stats ORDER BY strategy") as cursor:
+            strategies = [tuple(r) for r in await cursor.fetchall()]
+        async with conn.execute("SELECT * FROM trade_daily_pnl ORDER BY day") as cursor:
+            daily = [tuple(r) for r in await cursor.fetchall()]
+    return strategies, daily
+
+async def test_incremental_stats():
+    """Test that closing trades updates the summary tables"""
+    print("=" * 60)
+    print("TEST 1: Incremental Aggregates On Close")
+    print("=" * 60)
+
+    for ticket, strategy, profit, offset in TRADES:
+        await database.save_trade_entry(ticket, None, "XAUUSD", "BUY", 0.01, 2000.0, 1990.0, 2020.0, strategy)
+    await database.save_trade_entry(6, None, "XAUUSD", "SELL", 0.01, 2000.0, 2010.0, 1980.0, "NEWS")  # Còn OPEN
+
+    for ticket, strategy, profit, offset in TRADES:
+        await database.update_trade_exit(ticket, 2001.0, profit, close_time=BASE + offset * DAY)
+
+    stats = {s['strategy']: s for s in await database.get_strategy_stats()}
+    summary = await database.get_trade_summary()
+
+    if stats["NEWS"]['trades'] == 2 and stats["NEWS"]['win_rate'] == 50.0 and stats["SNIPER"]['net_profit'] == -50.0 \
+            and summary['trades'] == 5 and summary['net_profit'] == -10.0 and summary['win_rate'] == 60.0:
+        print(f"✅ {len(stats)} strategies, summary={summary}")
+        return True
+    print(f"❌ stats={stats}, summary={summary}")
+    return False
+
+async def test_resync_and_rebuild():
+    """Test that MT5 re-sync corrections are applied and match a full rebuild"""
+    print("\n" + "=" * 60)
+    print("TEST 2: Re-sync Corrections + Rebuild")
+    print("=" * 60)
+
+    # Profit thực tế khác (phí/swap) + lệnh #3 thực ra đóng ngày khác
+    await database.sync_trade_data(1, 2000.0, 2001.0, 45.0, 1990.0, 2020.0, BASE - 3600, BASE)
+    await database.sync_trade_data(3, 2000.0, 2001.0, -85.0, 1990.0, 2020.0, BASE, BASE + 2 * DAY)
+    async with database.get_db_connection() as conn:
+        await conn.execute("DELETE FROM trade_history WHERE ticket = 5")
+        await conn.commit()
+
+    incremental = await snapshot()
+    rebuilt_ok = await database.rebuild_trade_stats()
+    rebuilt = await snapshot()
+    days = [d[0] for d in rebuilt[1]]
+
+    if rebuilt_ok and incremental == rebuilt and "REPORT" not in [s[0] for s in rebuilt[0]] and days == ["2025-01-06", "2025-01-08"]:
+        print("✅ Trigger-maintained tables equal a full rebuild after updates/deletes")
+        return True
+    print(f"❌ incremental={incremental}\n   rebuilt={rebuilt}")
+    return False
+
+async def test_equity_curve():
+    """Test running equity and drawdown series"""
+    print("\n" + "=" * 60)
+    print("TEST 3: Equity Curve + Drawdown")
+    print("=" * 60)
+
+    # Daily: 01-06 = 45 - 20 = 25 ; 01-08 = -85 + 30 = -55
+    curve = await database.get_equity_curve()
+    last = await database.get_equity_curve(days=1)
+    summary = await database.get_trade_summary()
+    points = [(c['day'], c['equity'], c['drawdown']) for c in curve]
+
+    if points == [("2025-01-06", 25.0, 0.0), ("2025-01-08", -30.0, 55.0)] and len(last) == 1 \
+            and last[0]['equity'] == -30.0 and summary['max_drawdown'] == 55.0:
+        print(f"✅ Equity curve {points}")
+        return True
+    print(f"❌ points={points}, last={last}, summary={summary}")
+    return False
+
+async def main():
+    """Run all tests"""
+    print("\n🧪 TRADE STATISTICS - TEST SUITE")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database.DB_NAME = os.path.join(tmp, "trade_stats.db")
+        await database.init_db()
+
+        results = [
+            await test_incremental_stats(),
+            await test_resync_and_rebuild(),
+            await test_equity_curve(),
+        ]
+        await database.close_db()
+
+    print("\n" + "=" * 60)
+    print("TEST SUMMARY")
+    print("=" * 60)
+    passed = sum(results)
+    total = len(results)
+    print(f"Passed: {passed}/{total}")
+
+    if passed == total:
+        print("✅ ALL TESTS PASSED")
+    else:
+        print(f"❌ {total - passed} TEST(S) FAILED")
+    print("=" * 60)
+    return passed == total
+
+if __name__ == "__main__":
+    sys.exit(0 if asyncio.run(main()) else 1)
@@ -0,0 +1,121 @@
+"""
+Test Script for Write-Behind Queue
+Verifies group commit, per-key coalescing, durable writes (save_trade_entry)
+and that the queue follows the current pool after it is reopened on another DB
+"""
+
+import asyncio
+import os
+import sqlite3
+import sys
+import tempfile
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core import database
+
+async def count_commits(call) -> int:
+    """Đếm số COMMIT gửi xuống SQLite trong khi chạy call()"""
+    statements = []
+    pool = await database.get_pool()
+    await pool.set_trace_callback(statements.append)
+    try:
+        await call()
+    finally:
+        await pool.set_trace_callback(None)
+    return sum(1 for s in statements if s.strip().upper() == "COMMIT")
+
+async def test_durable_entry():
+    """Test that save_trade_entry is committed before it returns"""
+    print("=" * 60)
+    print("TEST 1: Durable save_trade_entry")
+    print("=" * 60)
+
+    ok = await database.save_trade_entry(1001, None, "XAUUSD", "BUY", 0.01, 2650.0, 2640.0, 2670.0, strategy='NEWS')
+    queue = await database.get_write_queue()
+
+    if ok and queue.pending_count == 0:
+        print("✅ Trade committed before save_trade_entry returned")
+        return True
+    print(f"❌ save_trade_entry={ok}, pending={queue.pending_count}")
+    return False
+
+async def test_coalescing_and_group_commit():
+    """Test that many profit updates collapse into one row write and one commit"""
+    print("\n" + "=" * 60)
+    print("TEST 2: Coalescing + Group Commit")
+    print("=" * 60)
+
+    async def burst():
+        for i in range(200):
+            await database.update_trade_profit(1001, float(i))
+            await database.update_trade_details(1001, 2651.0, 2641.0, 2671.0)
+        queue = await database.get_write_queue()
+        print(f"   Pending after 400 calls: {queue.pending_count}")
+        await database.flush_writes()
+
+    commits = await count_commits(burst)
+    trades = await database.get_open_trades()
+    profit = trades[0]['profit'] if trades else None
+
+    if commits == 1 and profit == 199.0:
+        print(f"✅ 1 commit, final profit = {profit}")
+        return True
+    print(f"❌ commits={commits}, profit={profit}")
+    return False
+
+async def test_pool_reopened(tmp: str):
+    """Test that queued writes go through the current pool after DB_NAME changes (no writer left on the old file)"""
+    print("\n" + "=" * 60)
+    print("TEST 3: Queue Follows Reopened Pool")
+    print("=" * 60)
+
+    old_path = database.DB_NAME
+    queue = await database.get_write_queue()
+    database.DB_NAME = os.path.join(tmp, "write_queue_2.db")
+    await database.init_db()
+
+    ok = await database.save_trade_entry(2002, None, "XAUUSD", "SELL", 0.01, 2650.0, 2660.0, 2630.0, strategy='NEWS')
+    same_queue = await database.get_write_queue() is queue
+    new_trades = [t['ticket'] for t in await database.get_open_trades()]
+    with sqlite3.connect(old_path) as conn:
+        old_trades = [row[0] for row in conn.execute("SELECT ticket FROM trade_history")]
+
+    if ok and same_queue and new_trades == [2002] and 2002 not in old_trades:
+        print(f"✅ Write landed in {os.path.basename(database.DB_NAME)} only (old DB: {old_trades})")
+        return True
+    print(f"❌ ok={ok}, same_queue={same_queue}, new={new_trades}, old={old_trades}")
+    return False
+
+async def main():
+    """Run all tests"""
+    print("\n🧪 WRITE-BEHIND QUEUE - TEST SUITE")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database.DB_NAME = os.path.join(tmp, "write_queue.db")
+        await database.init_db()
+
+        results = [
+            await test_durable_entry(),
+            await test_coalescing_and_group_commit(),
+            await test_pool_reopened(tmp),
+        ]
+        await database.close_db()
+
+    print("\n" + "=" * 60)
+    print("TEST SUMMARY")
+    print("=" * 60)
+    passed = sum(results)
+    total = len(results)
+    print(f"Passed: {passed}/{total}")
+
+    if passed == total:
+        print("✅ ALL TESTS PASSED")
+    else:
+        print(f"❌ {total - passed} TEST(S) FAILED")
+    print("=" * 60)
+    return passed == total
+
+if __name__ == "__main__":
+    sys.exit(0 if asyncio.run(main()) else 1)